@@ -31,6 +31,8 @@ class DevourPeople(TimedAction):
             gain = random.randint(10, 100)
             current_souls = auxiliary.special_data.get("devoured_souls", 0)
             auxiliary.special_data["devoured_souls"] = min(10000, int(current_souls) + gain)
+            # 万魂幡战力随魂魄数动态变化
+            self.avatar.invalidate_effects()
             
             # 若在城市中，大幅降低繁荣度
             region = self.avatar.tile.region
@@ -34,10 +34,7 @@ class Move(DefineAction, ChunkActionMixin):
 
         # 边界检查：越界则不移动
         if world.map.is_in_bounds(new_x, new_y):
-            self.avatar.pos_x = new_x
-            self.avatar.pos_y = new_y
-            target_tile = world.map.get_tile(new_x, new_y)
-            self.avatar.tile = target_tile
+            self.avatar.set_position(new_x, new_y)
         else:
             # 超出边界：不改变位置与tile
             pass
@@ -36,11 +36,20 @@ def get_action_infos() -> Dict[str, Any]:
         for action in ALL_ACTUAL_ACTION_CLASSES
     }
 
+# 语言 -> 动作描述 JSON 字符串。动作描述只随语言变化，每个语言只序列化一次
+_ACTION_INFOS_STR_CACHE: Dict[str, str] = {}
+
 def get_action_infos_str() -> str:
     """
-    获取JSON格式的动作描述字符串
+    获取JSON格式的动作描述字符串（按语言缓存）
     """
-    return json.dumps(get_action_infos(), ensure_ascii=False, indent=2)
+    from src.classes.language import language_manager
+    lang = str(language_manager)
+    cached = _ACTION_INFOS_STR_CACHE.get(lang)
+    if cached is None:
+        cached = json.dumps(get_action_infos(), ensure_ascii=False, indent=2)
+        _ACTION_INFOS_STR_CACHE[lang] = cached
+    return cached
 
 # 为了兼容性保留 ACTION_INFOS_STR，但请注意这可能是旧的（导入时的快照），不会随语言切换更新
 # 建议使用 get_action_infos_str() 获取最新语言的描述
@@ -4,15 +4,17 @@ NPC AI 的类。
 """
 from __future__ import annotations
 from abc import ABC, abstractmethod
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Optional
 import asyncio
 
 from src.classes.core.world import World
+from src.classes.emotions import EmotionType
 from src.classes.event import Event, NULL_EVENT
 from src.utils.llm import call_llm_with_task_name
 from src.classes.typings import ACTION_NAME_PARAMS_PAIRS
 from src.classes.actions import get_action_infos_str
 from src.utils.config import CONFIG
+from src.run.log import get_logger
 
 if TYPE_CHECKING:
     from src.classes.core.avatar import Avatar
@@ -26,31 +28,52 @@ class AI(ABC):
     async def _decide(self, world: World, avatars_to_decide: list[Avatar]) -> dict[Avatar, tuple]:
         pass
 
-    async def decide(self, world: World, avatars_to_decide: list[Avatar]) -> dict[Avatar, tuple[ACTION_NAME_PARAMS_PAIRS, str, str, Event]]:
+    async def decide(self, world: World, avatars_to_decide: list[Avatar]) -> dict[Avatar, tuple[ACTION_NAME_PARAMS_PAIRS, str, str, Optional[EmotionType], Event]]:
         """
         决定做什么，同时生成对应的事件。
         由于底层 LLM 调用已接入全局任务池，此处直接并发执行所有任务即可。
+
+        决策只产出结果、不改动角色（预取的决策可能被丢弃）；
+        _decide 可返回 (动作链, 思考, 短期目标) 或再附带情绪，情绪为 None 表示不变，由调用方在采用决策时写回。
         """
         # 调用具体的决策逻辑
         results = await self._decide(world, avatars_to_decide)
 
-        # 补全 Event 字段
+        # 补全情绪与 Event 字段
         for avatar in list(results.keys()):
-            action_name_params_pairs, avatar_thinking, short_term_objective = results[avatar]  # type: ignore
+            action_name_params_pairs, avatar_thinking, short_term_objective, *rest = results[avatar]  # type: ignore
+            emotion = rest[0] if rest else None
             # 不在决策阶段生成开始事件，提交阶段统一触发
-            results[avatar] = (action_name_params_pairs, avatar_thinking, short_term_objective, NULL_EVENT)
+            results[avatar] = (action_name_params_pairs, avatar_thinking, short_term_objective, emotion, NULL_EVENT)
 
         return results
 
 class LLMAI(AI):
     """
     LLM AI
+
+    ai.decision_batch_size > 1 时启用合并决策：同一区域（不在区域内则同一宗门）的角色
+    每 K 个合并为一次请求，共享世界信息，返回按角色名为键的 JSON；
+    响应中缺失的角色退回单角色请求。
+
+    ai.decision_policy 为 rule / tiered 时，全部 / 低于 ai.llm_min_realm 的角色改由规则策略（RuleAI）决策；
+    ai.rule_fallback 开启时，超过 ai.decision_timeout 或请求失败的批次改由规则策略决策。
     """
 
-    async def _decide(self, world: World, avatars_to_decide: list[Avatar]) -> dict[Avatar, tuple[ACTION_NAME_PARAMS_PAIRS, str, str]]:
+    async def _decide(self, world: World, avatars_to_decide: list[Avatar]) -> dict[Avatar, tuple]:
         """
         异步决策逻辑：通过LLM决定执行什么动作和参数
         """
+        from src.classes.rule_ai import rule_ai
+
+        policy_results: dict[Avatar, tuple[ACTION_NAME_PARAMS_PAIRS, str, str]] = {}
+        rule_avatars = [avatar for avatar in avatars_to_decide if _uses_rule_policy(avatar)]
+        if rule_avatars:
+            policy_results = await rule_ai._decide(world, rule_avatars)
+            avatars_to_decide = [avatar for avatar in avatars_to_decide if avatar not in policy_results]
+            if not avatars_to_decide:
+                return policy_results
+
         general_action_infos = get_action_infos_str()
         
         async def decide_one(avatar: Avatar):
@@ -69,15 +92,57 @@ class LLMAI(AI):
             }
             template_path = CONFIG.paths.templates / "ai.txt"
             res = await call_llm_with_task_name("action_decision", template_path, info)
-            return avatar, res
+            return [(avatar, res)]
+
+        async def decide_batch(batch: list[Avatar]):
+            if len(batch) == 1:
+                return await decide_one(batch[0])
+
+            avatar_infos = {
+                avatar.name: avatar.get_expanded_info(co_region_avatars=world.get_observable_avatars(avatar))
+                for avatar in batch
+            }
+            info = {
+                "avatar_names": ", ".join(avatar_infos),
+                "avatar_infos": avatar_infos,
+                "world_info": world.get_shared_info(batch, detailed=True),
+                "general_action_infos": general_action_infos,
+            }
+            template_path = CONFIG.paths.templates / "ai_batch.txt"
+            res = await call_llm_with_task_name("action_decision", template_path, info)
+
+            # 响应中缺失的角色退回单角色请求
+            answered = [(avatar, res) for avatar in batch if _has_decision(res, avatar)]
+            missing = [avatar for avatar in batch if not _has_decision(res, avatar)]
+            retried = await asyncio.gather(*[decide_one(avatar) for avatar in missing])
+            return answered + [pair for pairs in retried for pair in pairs]
+
+        batches = _make_decision_batches(avatars_to_decide, _get_decision_batch_size())
+
+        timeout = _get_decision_timeout()
+        fallback = bool(getattr(CONFIG.ai, "rule_fallback", False))
+        failed: list[Avatar] = []
+
+        async def guarded_batch(batch: list[Avatar]):
+            try:
+                return await asyncio.wait_for(decide_batch(batch), timeout)
+            except Exception as e:
+                if not fallback:
+                    raise
+                get_logger().logger.warning(
+                    "LLM 决策失败（%s），%d 个角色改用规则策略: %s",
+                    type(e).__name__, len(batch), e
+                )
+                failed.extend(batch)
+                return []
 
         # 直接并发所有任务
-        tasks = [decide_one(avatar) for avatar in avatars_to_decide]
-        results_list = await asyncio.gather(*tasks)
+        tasks = [guarded_batch(batch) for batch in batches]
+        results_list = [pair for pairs in await asyncio.gather(*tasks) for pair in pairs]
         
-        results: dict[Avatar, tuple[ACTION_NAME_PARAMS_PAIRS, str, str]] = {}
+        results: dict[Avatar, tuple] = {}
         for avatar, res in results_list:
-            if not res or avatar.name not in res:
+            if not _has_decision(res, avatar):
                 continue
                 
             r = res[avatar.name]
@@ -101,17 +166,76 @@ class LLMAI(AI):
             avatar_thinking = r.get("avatar_thinking", r.get("thinking", ""))
             short_term_objective = r.get("short_term_objective", "")
             
-            # 更新情绪
-            from src.classes.emotions import EmotionType
+            # 情绪随决策返回，采用决策时才写回角色
             raw_emotion = r.get("current_emotion", "emotion_calm")
             try:
                 # 尝试通过 value 获取枚举
-                avatar.emotion = EmotionType(raw_emotion)
+                emotion = EmotionType(raw_emotion)
             except ValueError:
-                avatar.emotion = EmotionType.CALM
+                emotion = EmotionType.CALM
                 
-            results[avatar] = (pairs, avatar_thinking, short_term_objective)
-            
+            results[avatar] = (pairs, avatar_thinking, short_term_objective, emotion)
+
+        if failed:
+            results.update(await rule_ai._decide(world, failed))
+        results.update(policy_results)
         return results
 
+
+def _has_decision(res, avatar: Avatar) -> bool:
+    return isinstance(res, dict) and isinstance(res.get(avatar.name), dict)
+
+
+def _get_decision_batch_size() -> int:
+    ai_conf = getattr(CONFIG, "ai", None)
+    return max(1, int(getattr(ai_conf, "decision_batch_size", 1) or 1))
+
+
+def _get_decision_timeout() -> float | None:
+    """单批 LLM 决策的超时（秒）；0 或未配置为不限"""
+    timeout = float(getattr(CONFIG.ai, "decision_timeout", 0) or 0)
+    return timeout if timeout > 0 else None
+
+
+def _uses_rule_policy(avatar: Avatar) -> bool:
+    """按 ai.decision_policy 判断角色是否由规则策略决策"""
+    policy = str(getattr(CONFIG.ai, "decision_policy", "llm") or "llm")
+    if policy == "rule":
+        return True
+    if policy == "tiered":
+        from src.systems.cultivation import Realm
+        min_realm = Realm.from_str(getattr(CONFIG.ai, "llm_min_realm", "FOUNDATION_ESTABLISHMENT"))
+        return avatar.cultivation_progress.realm < min_realm
+    return False
+
+
+def _decision_group_key(avatar: Avatar) -> tuple:
+    """合并决策的分组：优先按所在区域，不在区域内时按宗门，否则单独决策"""
+    region = avatar.tile.region if avatar.tile else None
+    if region is not None:
+        return ("region", region.id)
+    if avatar.sect is not None:
+        return ("sect", avatar.sect.id)
+    return ("avatar", avatar.id)
+
+
+def _make_decision_batches(avatars: list[Avatar], batch_size: int) -> list[list[Avatar]]:
+    """
+    按分组切成最多 batch_size 个角色的批次。
+    同一批次内角色名不能重复（响应以角色名为键），重名角色放入其他批次。
+    """
+    if batch_size <= 1:
+        return [[avatar] for avatar in avatars]
+
+    groups: dict[tuple, list[list[Avatar]]] = {}
+    for avatar in avatars:
+        batches = groups.setdefault(_decision_group_key(avatar), [])
+        for batch in batches:
+            if len(batch) < batch_size and all(a.name != avatar.name for a in batch):
+                batch.append(avatar)
+                break
+        else:
+            batches.append([avatar])
+    return [batch for batches in groups.values() for batch in batches]
+
 llm_ai = LLMAI()
@@ -53,6 +53,9 @@ from src.classes.core.avatar.action_mixin import ActionMixin
 
 persona_num = CONFIG.avatar.persona_num
 
+# 位置相关字段：赋值时同步空间索引
+_POSITION_FIELDS = frozenset({"pos_x", "pos_y", "tile"})
+
 
 @dataclass
 class Avatar(
@@ -436,6 +439,12 @@ class Avatar(
 
     # ========== 区域与位置 ==========
 
+    def set_position(self, x: int, y: int) -> None:
+        """移动到 (x, y)，同步 tile（位置变化会自动同步到 AvatarManager 的空间索引）。"""
+        self.pos_x = x
+        self.pos_y = y
+        self.tile = self.world.map.get_tile(x, y)
+
     def _init_known_regions(self):
         """初始化已知区域：当前位置 + 宗门驻地"""
         if self.tile and self.tile.region:
@@ -589,6 +598,13 @@ class Avatar(
         self.recalc_effects()
         self._init_known_regions()
 
+    def __setattr__(self, name: str, value) -> None:
+        super().__setattr__(name, value)
+        if name in _POSITION_FIELDS:
+            index = self.__dict__.get("_spatial_index")
+            if index is not None:
+                index.update(self)
+
     def __hash__(self) -> int:
         if not hasattr(self, 'id'):
             # 防御性编程：如果id尚未初始化（例如deepcopy过程中），使用对象内存地址
@@ -50,7 +50,8 @@ class World():
         """
         static_info = self.static_info
         map_info = self.map.get_info(detailed=detailed, avatar=avatar)
-        world_info = {**map_info, **static_info}
+        # 静态的世界设定在前、角色相关的区域信息在后，便于提供商复用提示词前缀缓存
+        world_info = {**static_info, **map_info}
 
         if self.current_phenomenon:
             # 使用翻译 Key
@@ -64,6 +65,29 @@ class World():
 
         return world_info
 
+    def get_shared_info(self, avatars: list["Avatar"], detailed: bool = False) -> dict:
+        """
+        返回一组角色共享的世界信息（用于多角色合并决策）。
+        区域取各角色已知区域的并集；仅当所有角色位于同一区域时才附带距离（以第一个角色的位置计算）。
+        """
+        leader = avatars[0]
+        known_region_ids = set().union(*(a.known_regions for a in avatars))
+        leader_region = leader.tile.region if leader.tile else None
+        same_region = leader_region is not None and all(
+            a.tile is not None and a.tile.region is leader_region for a in avatars
+        )
+        map_info = self.map.get_info(
+            detailed=detailed,
+            avatar=leader if same_region else None,
+            known_region_ids=known_region_ids,
+        )
+        world_info = {**self.static_info, **map_info}
+        if self.current_phenomenon:
+            world_info[t("Current World Phenomenon")] = t(
+                "phenomenon_format", name=self.current_phenomenon.name, desc=self.current_phenomenon.desc
+            )
+        return world_info
+
     def get_avatars_in_same_region(self, avatar: "Avatar"):
         return self.avatar_manager.get_avatars_in_same_region(avatar)
 
@@ -33,9 +33,10 @@ from .consts import (
 from .process import (
     load_effect_from_str,
     build_effects_map_from_df,
+    compile_effect_exprs,
     _evaluate_conditional_effect,
     _merge_effects,
 )
-from .mixin import EffectsMixin
+from .mixin import EffectsMixin, EFFECT_SOURCE_FIELDS
 from .desc import format_effects_to_text, translate_condition
 
@@ -10,12 +10,65 @@ from typing import TYPE_CHECKING, Any
 if TYPE_CHECKING:
     from src.classes.core.avatar.core import Avatar
 
-from .process import _merge_effects, _evaluate_conditional_effect
+from .process import _merge_effects, _evaluate_conditional_effect, _evaluate_effect_values
 from src.classes.hp import HP_MAX_BY_REALM
 
 
+# 赋值时会令合并效果缓存失效的字段（效果来源，或 when/动态表达式读取的状态）
+EFFECT_SOURCE_FIELDS = frozenset({
+    "world",
+    "sect",
+    "technique",
+    "root",
+    "personas",
+    "weapon",
+    "weapon_proficiency",
+    "auxiliary",
+    "spirit_animal",
+    "alignment",
+    "cultivation_progress",
+    "elixirs",
+    "temporary_effects",
+})
+
+
 class EffectsMixin:
     """效果计算相关方法"""
+
+    # 效果版本号：效果来源变化时自增，用于使合并效果缓存失效
+    _effects_version: int = 0
+    _effects_cache_key: tuple | None = None
+    _effects_cache: dict[str, object] | None = None
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        object.__setattr__(self, name, value)
+        if name in EFFECT_SOURCE_FIELDS:
+            object.__setattr__(self, "_effects_version", self._effects_version + 1)
+
+    def invalidate_effects(self) -> None:
+        """
+        使合并效果缓存失效。
+        对效果来源做原地修改（如 list.append、修改装备 special_data）后需调用；
+        直接赋值 EFFECT_SOURCE_FIELDS 中的字段会自动失效。
+        """
+        object.__setattr__(self, "_effects_version", self._effects_version + 1)
+
+    def _effects_key(self: "Avatar") -> tuple:
+        """
+        合并效果缓存的键：
+        版本号 + 月份（丹药/临时效果按月过期）+ 天地灵机
+        + 境界与等级、丹药与临时效果数量（这些常被原地修改）
+        """
+        cp = self.cultivation_progress
+        return (
+            self._effects_version,
+            int(self.world.month_stamp),
+            id(self.world.current_phenomenon),
+            cp.level,
+            cp.realm,
+            len(self.elixirs),
+            len(self.temporary_effects),
+        )
     
     def get_active_temporary_effects(self: "Avatar") -> list[dict[str, Any]]:
         """获取当前生效的临时效果列表"""
@@ -30,47 +83,20 @@ class EffectsMixin:
         评估效果字典中的动态值（字符串表达式）。
         支持明确的 'eval(...)' 格式，以及包含 'avatar.' 的隐式表达式。
         """
-        result = {}
-        # 安全的 eval 上下文
-        context = {
-            "__builtins__": {},
-            "avatar": self,
-            "max": max,
-            "min": min,
-            "int": int,
-            "float": float,
-            "round": round,
-        }
-
-        for k, v in effects.items():
-            if isinstance(v, str):
-                s = v.strip()
-                expr = None
-                
-                # 检查是否为表达式
-                if s.startswith("eval(") and s.endswith(")"):
-                    expr = s[5:-1]
-                elif "avatar." in s: # 启发式：包含 avatar. 则视为表达式
-                    expr = s
-                
-                if expr:
-                    try:
-                        result[k] = eval(expr, context)
-                    except Exception:
-                        # 评估失败，保留原值（可能是普通字符串，或者表达式有误）
-                        result[k] = v
-                else:
-                    result[k] = v
-            else:
-                result[k] = v
-        return result
+        return _evaluate_effect_values(effects, self)
 
     @property
     def effects(self: "Avatar") -> dict[str, object]:
         """
         合并所有来源的效果：宗门、功法、灵根、特质、兵器、辅助装备、灵兽、天地灵机、丹药
         直接复用 get_effect_breakdown 的逻辑，确保显示与实际效果一致。
+
+        结果按 _effects_key 缓存，同一月内来源未变化时直接返回缓存（调用方不应修改返回值）。
         """
+        key = self._effects_key()
+        if self._effects_cache is not None and self._effects_cache_key == key:
+            return self._effects_cache
+
         merged: dict[str, object] = {}
         
         # get_effect_breakdown 已经完成了条件评估(when)和动态值计算(expressions)
@@ -78,6 +104,8 @@ class EffectsMixin:
         for _, effect_dict in self.get_effect_breakdown():
             merged = _merge_effects(merged, effect_dict)
 
+        object.__setattr__(self, "_effects_cache", merged)
+        object.__setattr__(self, "_effects_cache_key", key)
         return merged
 
     def get_effect_breakdown(self: "Avatar") -> list[tuple[str, dict[str, Any]]]:
@@ -171,6 +199,9 @@ class EffectsMixin:
         - HP 最大值
         - 寿命最大值
         """
+        # recalc 通常紧随效果来源的原地修改（服用丹药、添加临时效果等）
+        self.invalidate_effects()
+
         # 计算基础最大值（基于境界）
         base_max_hp = HP_MAX_BY_REALM.get(self.cultivation_progress.realm, 100)
         
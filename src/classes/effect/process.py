@@ -1,6 +1,8 @@
 from __future__ import annotations
 
 import json
+from functools import lru_cache
+from types import CodeType
 from typing import Any, Callable, Optional, TYPE_CHECKING
 
 if TYPE_CHECKING:
@@ -10,6 +12,7 @@ if TYPE_CHECKING:
 def load_effect_from_str(value: object) -> dict[str, Any] | list[dict[str, Any]]:
     """
     将 effects 字段解析为 dict 或 list（支持宽松JSON格式）。
+    解析成功后会预编译其中的 when 条件与动态表达式（见 compile_effect_exprs）。
     
     支持的格式：
     1. 标准JSON: {"extra_battle_strength_points": 3}
@@ -22,6 +25,13 @@ def load_effect_from_str(value: object) -> dict[str, Any] | list[dict[str, Any]]
     - 解析失败时返回 {}
     - 支持返回 dict（单个effect）或 list[dict]（多个条件effect）
     """
+    effect = _parse_effect_str(value)
+    compile_effect_exprs(effect)
+    return effect
+
+
+def _parse_effect_str(value: object) -> dict[str, Any] | list[dict[str, Any]]:
+    """load_effect_from_str 的纯解析部分。"""
     if value is None:
         return {}
     if isinstance(value, (dict, list)):
@@ -86,6 +96,112 @@ def load_effect_from_str(value: object) -> dict[str, Any] | list[dict[str, Any]]
         return {}
 
 
+@lru_cache(maxsize=None)
+def _compile_expr(expr: str) -> CodeType | None:
+    """
+    将表达式字符串编译为 code object，按字符串缓存。
+    同一条配表表达式只会编译一次；语法错误返回 None（求值时按失败处理）。
+    """
+    try:
+        return compile(expr, "<effect>", "eval")
+    except (SyntaxError, ValueError):
+        return None
+
+
+@lru_cache(maxsize=None)
+def _value_expr(value: str) -> tuple[bool, CodeType | None]:
+    """
+    判断 effect 的字符串值是否为动态表达式，并返回 (是否表达式, code object)。
+    支持明确的 'eval(...)' 格式，以及包含 'avatar.' 的隐式表达式。
+    """
+    s = value.strip()
+    if s.startswith("eval(") and s.endswith(")"):
+        return True, _compile_expr(s[5:-1])
+    if "avatar." in s:  # 启发式：包含 avatar. 则视为表达式
+        return True, _compile_expr(s)
+    return False, None
+
+
+def compile_effect_exprs(effect: object) -> None:
+    """
+    预编译 effect 配置中的所有 when 条件与动态值表达式。
+    在配表加载时调用，使逐 tick 的效果计算只需执行已编译的 code object。
+    """
+    items = effect if isinstance(effect, list) else [effect]
+    for eff in items:
+        if not isinstance(eff, dict):
+            continue
+        for k, v in eff.items():
+            if not isinstance(v, str):
+                continue
+            if k == "when":
+                _compile_expr(v)
+            else:
+                _value_expr(v)
+
+
+_condition_context: dict[str, Any] | None = None
+
+
+def _get_condition_context() -> dict[str, Any]:
+    """when 条件的安全 eval 上下文（惰性构建，避免循环导入）。"""
+    global _condition_context
+    if _condition_context is None:
+        from src.classes.weapon_type import WeaponType
+        from src.systems.cultivation import Realm
+        from src.classes.alignment import Alignment
+
+        _condition_context = {
+            "__builtins__": {},
+            "WeaponType": WeaponType,
+            "Realm": Realm,
+            "Alignment": Alignment,
+            # 常用内置函数
+            "any": any,
+            "all": all,
+            "len": len,
+            "set": set,
+            "list": list,
+            "max": max,
+            "min": min,
+        }
+    return _condition_context
+
+
+# 动态值表达式的安全 eval 上下文
+_VALUE_CONTEXT: dict[str, Any] = {
+    "__builtins__": {},
+    "max": max,
+    "min": min,
+    "int": int,
+    "float": float,
+    "round": round,
+}
+
+
+def _evaluate_effect_values(effects: dict[str, Any], avatar: "Avatar") -> dict[str, Any]:
+    """
+    评估效果字典中的动态值（字符串表达式），返回新字典。
+    评估失败时保留原值（可能是普通字符串，或者表达式有误）。
+    """
+    context = None
+    result = {}
+    for k, v in effects.items():
+        if isinstance(v, str):
+            is_expr, code = _value_expr(v)
+            if is_expr:
+                if context is None:
+                    context = dict(_VALUE_CONTEXT)
+                    context["avatar"] = avatar
+                try:
+                    result[k] = eval(code, context) if code is not None else v
+                except Exception:
+                    result[k] = v
+                continue
+        result[k] = v
+    return result
+
+
 def _evaluate_conditional_effect(effect: dict[str, Any] | list[dict[str, Any]], avatar: "Avatar") -> dict[str, Any]:
     """
     评估带条件的effect，返回实际生效的effect dict。
@@ -102,33 +218,23 @@ def _evaluate_conditional_effect(effect: dict[str, Any] | list[dict[str, Any]],
     Returns:
         评估后实际生效的effect dict（合并所有满足条件的effects）
     """
-    from src.classes.weapon_type import WeaponType
-    from src.systems.cultivation import Realm
-    from src.classes.alignment import Alignment
-    
-    # 构建安全的eval上下文
-    safe_context = {
-        "__builtins__": {},
-        "avatar": avatar,
-        "WeaponType": WeaponType,
-        "Realm": Realm,
-        "Alignment": Alignment,
-        # 常用内置函数
-        "any": any,
-        "all": all,
-        "len": len,
-        "set": set,
-        "list": list,
-        "max": max,
-        "min": min,
-    }
-    
+    safe_context = None
+
     def _check_condition(when_expr: str) -> bool:
         """检查条件表达式是否为真"""
+        nonlocal safe_context
         if not when_expr:
             return True
+        if not isinstance(when_expr, str):
+            return False
+        code = _compile_expr(when_expr)
+        if code is None:
+            return False
+        if safe_context is None:
+            safe_context = dict(_get_condition_context())
+            safe_context["avatar"] = avatar
         try:
-            return bool(eval(when_expr, safe_context, {}))
+            return bool(eval(code, safe_context, {}))
         except Exception:
             # 条件评估失败时视为False
             return False
@@ -204,7 +310,7 @@ def build_effects_map_from_df(
     """
     将配表数据列表构造成 {key -> effects} 的映射：
     - key_column：用于定位键（字符串），通过 parse_key 解析为目标键（如 Enum）
-    - effects_column：字符串列，使用 load_effect_from_str 解析
+    - effects_column：字符串列，使用 load_effect_from_str 解析（同时预编译表达式）
     解析失败或空值的行将被忽略。
     """
     effects_map: dict[Any, dict[str, object]] = {}
@@ -1,20 +1,94 @@
-from typing import TYPE_CHECKING, Optional
+import itertools
+from array import array
+from typing import TYPE_CHECKING, Iterator, Optional
 
-from src.classes.environment.tile import Tile, TileType
+from src.classes.environment.tile import Tile, TileType, TILE_TYPES, TILE_TYPE_CODES
 from src.classes.environment.sect_region import SectRegion
 
 if TYPE_CHECKING:
     from src.classes.environment.region import Region
 
+# get_regions_within 的缓存条目上限（超过后整体清空）
+_REGIONS_WITHIN_CACHE_MAX = 65536
+
+# 地形编码数组中表示"尚未创建 tile"的值
+NO_TILE_CODE = _NO_TILE = 255
+
+# 每个 Map 实例的唯一编号（与 id() 不同，不会在对象回收后复用）
+_map_uids = itertools.count(1)
+
+
+class TileGrid():
+    """
+    Map.tiles：以 (x, y) 为键、行为类似 dict 的地块视图。
+    取值时按需创建 Tile 视图；赋值时把 Tile 的地形/区域写入地图数组，并把该 Tile 绑定为地图视图。
+    """
+    __slots__ = ("_map",)
+
+    def __init__(self, game_map: "Map"):
+        self._map = game_map
+
+    def __getitem__(self, pos: tuple[int, int]) -> Tile:
+        return self._map.get_tile(*pos)
+
+    def __setitem__(self, pos: tuple[int, int], tile: Tile) -> None:
+        x, y = pos
+        region = tile.region
+        self._map.create_tile(x, y, tile.type)
+        self._map.set_tile_region(x, y, region)
+        tile.x, tile.y, tile._map = x, y, self._map
+
+    def __contains__(self, pos) -> bool:
+        try:
+            self._map._cell(*pos)
+        except (KeyError, TypeError):
+            return False
+        return True
+
+    def get(self, pos: tuple[int, int], default=None) -> Optional[Tile]:
+        return self[pos] if pos in self else default
+
+    def keys(self) -> Iterator[tuple[int, int]]:
+        w = self._map.width
+        for i, code in enumerate(self._map._tile_codes):
+            if code != _NO_TILE:
+                yield (i % w, i // w)
+
+    __iter__ = keys
+
+    def values(self) -> Iterator[Tile]:
+        return (Tile.view(self._map, x, y) for x, y in self.keys())
+
+    def items(self) -> Iterator[tuple[tuple[int, int], Tile]]:
+        return ((pos, Tile.view(self._map, *pos)) for pos in self.keys())
+
+    def __len__(self) -> int:
+        codes = self._map._tile_codes
+        return len(codes) - codes.count(_NO_TILE)
+
 
 class Map():
     """
-    通过dict记录position 到 tile。
+    地图：按行优先的扁平数组存储每个格子的地形编码（uint8）与区域下标（int32）。
+
+    - _tile_codes[y * width + x]：TileType 在 TILE_TYPES 中的下标，_NO_TILE 表示尚未创建
+    - _region_slots[y * width + x]：_region_table 中的下标，0 表示不属于任何区域
+    - tiles / get_tile 返回按需创建的 Tile 视图，修改视图的 type/region 会写回数组
     """
     def __init__(self, width: int, height: int):
-        self.tiles = {}
         self.width = width
         self.height = height
+        size = width * height
+        self._tile_codes = bytearray([_NO_TILE]) * size
+        self._region_slots = array("i", bytes(4 * size))
+        # 区域下标 → Region（按对象身份登记，0 号为 None）
+        self._region_table: list[Optional["Region"]] = [None]
+        self._region_slot_by_obj: dict[int, int] = {}
+        self.tiles = TileGrid(self)
+        # uid + version 标识地图的一个静态版本：地形或区域展示信息变化时递增 version（见 mark_changed），
+        # 供 /api/map 之类的缓存判断是否过期
+        self.uid = next(_map_uids)
+        self.version = 0
         # 维护“最终归属”的每个 region 的坐标集合（由分配流程写入）
         # key: region.id, value: list[(x, y)]
         self.region_cors: dict[int, list[tuple[int, int]]] = {}
@@ -29,6 +103,44 @@ class Map():
         self.cultivate_regions = {}
         self.city_regions = {}
 
+        # (x, y, radius) -> 半径内的区域（tile 的 region 变化时自动清空）
+        self._regions_within_cache: dict[tuple[int, int, int], tuple["Region", ...]] = {}
+
+    def mark_changed(self) -> None:
+        """地图的静态内容（地形、区域名称等）发生变化。"""
+        self.version += 1
+
+    def invalidate_region_cache(self) -> None:
+        """丢弃感知查询的缓存结果（通过 Map 修改 tile 区域时会自动调用）。"""
+        self._regions_within_cache.clear()
+
+    def get_regions_within(self, x: int, y: int, radius: int) -> tuple["Region", ...]:
+        """
+        返回与 (x, y) 曼哈顿距离 <= radius 的所有区域（去重）。
+        逐列对区域下标数组做步长切片，结果按 (x, y, radius) 缓存。
+        """
+        key = (x, y, radius)
+        cached = self._regions_within_cache.get(key)
+        if cached is not None:
+            return cached
+
+        slots = self._region_slots
+        w = self.width
+        found: set[int] = set()
+        for tx in range(max(0, x - radius), min(w - 1, x + radius) + 1):
+            # 曼哈顿菱形：该列允许的纵向跨度
+            span = radius - abs(tx - x)
+            top, bottom = max(0, y - span), min(self.height - 1, y + span)
+            if top <= bottom:
+                found.update(slots[top * w + tx:bottom * w + tx + 1:w])
+
+        table = self._region_table
+        result = tuple(table[slot] for slot in found if slot)
+        if len(self._regions_within_cache) >= _REGIONS_WITHIN_CACHE_MAX:
+            self._regions_within_cache.clear()
+        self._regions_within_cache[key] = result
+        return result
+
     def update_sect_regions(self) -> None:
         """根据当前 self.regions 动态刷新宗门总部区域字典。"""
         self.sect_regions = {rid: r for rid, r in self.regions.items() if isinstance(r, SectRegion)}
@@ -39,11 +151,70 @@ class Map():
         """
         return 0 <= x < self.width and 0 <= y < self.height
 
+    def _cell(self, x: int, y: int) -> int:
+        """(x, y) 的数组下标；越界或尚未创建 tile 时抛 KeyError（与原 dict 存储一致）。"""
+        if 0 <= x < self.width and 0 <= y < self.height:
+            i = y * self.width + x
+            if self._tile_codes[i] != _NO_TILE:
+                return i
+        raise KeyError((x, y))
+
+    def _region_slot(self, region: Optional["Region"]) -> int:
+        if region is None:
+            return 0
+        slot = self._region_slot_by_obj.get(id(region))
+        if slot is None:
+            slot = len(self._region_table)
+            self._region_table.append(region)
+            self._region_slot_by_obj[id(region)] = slot
+        return slot
+
     def create_tile(self, x: int, y: int, tile_type: TileType):
-        self.tiles[(x, y)] = Tile(tile_type, x, y, region=None)
+        if not self.is_in_bounds(x, y):
+            raise KeyError((x, y))
+        i = y * self.width + x
+        self._tile_codes[i] = TILE_TYPE_CODES[tile_type]
+        self.version += 1
+        if self._region_slots[i]:
+            self._region_slots[i] = 0
+            self.invalidate_region_cache()
 
     def get_tile(self, x: int, y: int) -> Tile:
-        return self.tiles[(x, y)]
+        self._cell(x, y)
+        return Tile.view(self, x, y)
+
+    def get_tile_type(self, x: int, y: int) -> TileType:
+        return TILE_TYPES[self._tile_codes[self._cell(x, y)]]
+
+    def set_tile_type(self, x: int, y: int, tile_type: TileType) -> None:
+        self._tile_codes[self._cell(x, y)] = TILE_TYPE_CODES[tile_type]
+        self.version += 1
+
+    def set_tile_region(self, x: int, y: int, region: Optional["Region"]) -> None:
+        self._region_slots[self._cell(x, y)] = self._region_slot(region)
+        if self._regions_within_cache:
+            self._regions_within_cache.clear()
+
+    def assign_region(self, region: "Region", cors: list[tuple[int, int]]) -> None:
+        """把 cors 中（地图范围内）的格子归属到 region。"""
+        slot = self._region_slot(region)
+        slots = self._region_slots
+        w, h = self.width, self.height
+        for x, y in cors:
+            if 0 <= x < w and 0 <= y < h:
+                slots[y * w + x] = slot
+        self.invalidate_region_cache()
+
+    def tile_codes(self) -> bytes:
+        """按行优先返回所有格子的地形编码（TILE_TYPES 的下标，NO_TILE_CODE 表示尚未创建）。"""
+        return bytes(self._tile_codes)
+
+    def tile_type_rows(self) -> list[list[TileType]]:
+        """按行返回所有格子的地形（尚未创建的格子为 None）。"""
+        lookup = TILE_TYPES + [None] * (256 - len(TILE_TYPES))
+        w = self.width
+        codes = self._tile_codes
+        return [[lookup[c] for c in codes[y * w:(y + 1) * w]] for y in range(self.height)]
 
     def get_center_locs(self, locs: list[tuple[int, int]]) -> tuple[int, int]:
         """
@@ -74,21 +245,23 @@ class Map():
         """
         获取一个region。
         """
-        return self.tiles[(x, y)].region
+        return self._region_table[self._region_slots[self._cell(x, y)]]
 
-    def get_info(self, detailed: bool = False, avatar: object = None) -> dict:
+    def get_info(self, detailed: bool = False, avatar: object = None, known_region_ids: set[int] | None = None) -> dict:
         """
         返回地图信息（dict）。
         avatar: 如果提供，将用于：
                1. 过滤仅返回 avatar.known_regions 中的区域
                2. 计算并在描述中追加从 avatar 当前位置到各区域的距离
+        known_region_ids: 如果提供，用它代替 avatar.known_regions 过滤区域（例如多个角色已知区域的并集）
         """
         if TYPE_CHECKING:
              from src.classes.core.avatar import Avatar
 
         from src.classes.environment.region import NormalRegion, CultivateRegion, CityRegion
         
-        known_region_ids = avatar.known_regions if avatar else None
+        if known_region_ids is None and avatar:
+            known_region_ids = avatar.known_regions
         current_loc = (avatar.pos_x, avatar.pos_y) if avatar else None
         
         def filter_regions(cls):
@@ -88,8 +88,29 @@ class Region(ABC):
     def get_info(self, current_loc: tuple[int, int] = None, step_len: int = 1) -> str:
         return f"{self.name}{self._get_distance_desc(current_loc, step_len)}"
 
+    def _get_desc_state(self) -> tuple:
+        """
+        决定 _get_desc 结果的可变状态，状态不变时复用缓存的描述片段。
+        _get_desc 依赖运行时可变的属性时，子类需要覆盖。
+        """
+        return ()
+
+    def get_desc_fragment(self) -> str:
+        """
+        '名字（描述） - 简介' 片段，与角色无关。
+        按 (语言, 名字, 简介, _get_desc_state()) 缓存，任一变化时重新生成。
+        """
+        from src.classes.language import language_manager
+        key = (str(language_manager), self.name, self.desc, self._get_desc_state())
+        cached = self.__dict__.get("_desc_fragment_cache")
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        fragment = f"{self.name}{self._get_desc()} - {self.desc}"
+        self._desc_fragment_cache = (key, fragment)
+        return fragment
+
     def get_detailed_info(self, current_loc: tuple[int, int] = None, step_len: int = 1) -> str:
-        return f"{self.name}{self._get_desc()} - {self.desc}{self._get_distance_desc(current_loc, step_len)}"
+        return f"{self.get_desc_fragment()}{self._get_distance_desc(current_loc, step_len)}"
 
     def get_structured_info(self) -> dict:
         return {
@@ -139,6 +160,9 @@ class NormalRegion(Region):
             info_parts.extend([l.get_info() for l in self.lodes])
         return "; ".join(info_parts) if info_parts else t("No special resources")
 
+    def _get_desc_state(self) -> tuple:
+        return (tuple(self.animals), tuple(self.plants), tuple(self.lodes))
+
     def _get_desc(self) -> str:
         species_info = self.get_species_info()
         return t(" (Resource Distribution: {species_info})", species_info=species_info)
@@ -202,6 +226,9 @@ class CultivateRegion(Region):
     def get_detailed_info(self, current_loc: tuple[int, int] = None, step_len: int = 1) -> str:
         return super().get_detailed_info(current_loc, step_len) + self._get_owner_desc()
 
+    def _get_desc_state(self) -> tuple:
+        return (self.essence_type, self.essence_density)
+
     def _get_desc(self) -> str:
         return t(" ({essence_type} Essence: {essence_density})", essence_type=self.essence_type, essence_density=self.essence_density)
 
@@ -246,6 +273,9 @@ class CityRegion(Region, StoreMixin):
     def get_region_type(self) -> str:
         return "city"
 
+    def _get_desc_state(self) -> tuple:
+        return tuple(getattr(self, "store_items", ()))
+
     def _get_desc(self) -> str:
         store_info = self.get_store_info()
         if store_info:
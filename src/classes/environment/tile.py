@@ -1,8 +1,8 @@
 from enum import Enum
-from dataclasses import dataclass
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Optional
 
 if TYPE_CHECKING:
+    from src.classes.environment.map import Map
     from src.classes.environment.region import Region
     from src.classes.core.avatar import Avatar
 
@@ -85,13 +85,73 @@ def get_large_tile_slices(tile_name: str) -> list[str]:
     return [f"{tile_name}_{i}" for i in range(4)]
 
 
-@dataclass
+# Map 内部以 uint8 编码存储地形：编码为 TileType 在 TILE_TYPES 中的下标
+TILE_TYPES: list[TileType] = list(TileType)
+TILE_TYPE_CODES: dict[TileType, int] = {t: i for i, t in enumerate(TILE_TYPES)}
+
+
 class Tile():
-    # 实际的地块
-    type: TileType
-    x: int
-    y: int
-    region: 'Region' = None # 可以是一个region的一部分，也可以不属于任何region
+    """
+    地块。
+
+    直接构造时自带 type/region；Map.get_tile 返回的是地图数组上的轻量视图（按需创建），
+    读写 type/region 直接作用于地图，与以前修改 dict 中的 Tile 对象效果相同。
+    """
+    __slots__ = ("x", "y", "_map", "_type", "_region")
+
+    def __init__(self, type: TileType, x: int, y: int, region: 'Region' = None):
+        # 实际的地块
+        self.x = x
+        self.y = y
+        self._map: Optional["Map"] = None
+        self._type = type
+        self._region = region  # 可以是一个region的一部分，也可以不属于任何region
+
+    @classmethod
+    def view(cls, game_map: "Map", x: int, y: int) -> "Tile":
+        """地图 (x, y) 处的视图（不检查坐标，由 Map 负责）"""
+        tile = cls.__new__(cls)
+        tile.x = x
+        tile.y = y
+        tile._map = game_map
+        return tile
+
+    @property
+    def type(self) -> TileType:
+        if self._map is not None:
+            return self._map.get_tile_type(self.x, self.y)
+        return self._type
+
+    @type.setter
+    def type(self, value: TileType) -> None:
+        if self._map is not None:
+            self._map.set_tile_type(self.x, self.y, value)
+        else:
+            self._type = value
+
+    @property
+    def region(self) -> Optional['Region']:
+        if self._map is not None:
+            return self._map.get_region(self.x, self.y)
+        return self._region
+
+    @region.setter
+    def region(self, value: Optional['Region']) -> None:
+        if self._map is not None:
+            self._map.set_tile_region(self.x, self.y, value)
+        else:
+            self._region = value
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Tile):
+            return NotImplemented
+        return (self.type, self.x, self.y, self.region) == (other.type, other.x, other.y, other.region)
+
+    # 与原 dataclass 一致：可变对象，不可哈希
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"Tile(type={self.type!r}, x={self.x}, y={self.y}, region={self.region!r})"
 
     @property
     def coordinate(self) -> tuple[int, int]:
@@ -5,9 +5,11 @@ SQLite 事件存储层。
 """
 from __future__ import annotations
 
+import os
+import shutil
 import sqlite3
 from pathlib import Path
-from typing import TYPE_CHECKING, Optional
+from typing import TYPE_CHECKING, Callable, Iterable, Optional, Sequence
 from contextlib import contextmanager
 from datetime import datetime, timezone
 
@@ -36,12 +38,24 @@ def _parse_time(ts_str: str) -> float:
     # 假设数据库存的是 UTC (naive time string from sqlite usually treated as such)
     return dt.replace(tzinfo=timezone.utc).timestamp()
 
+# 关联角色 ID 的拼接分隔符（ASCII 单元分隔符，不会出现在角色 ID 中）。
+_AVATAR_ID_SEP = "\x1f"
+
+_EVENT_COLUMNS = "e.rowid, e.id, e.month_stamp, e.content, e.is_major, e.is_story, e.created_at"
+
+# 在线备份每步复制的页数（默认页大小 4KB，即每步约 4MB）。
+BACKUP_PAGES_PER_STEP = 1024
+
+# 大事（长期记忆）与小事（短期记忆，包括故事）的筛选条件。
+_MAJOR_WHERE = "e.is_major = TRUE AND e.is_story = FALSE"
+_MINOR_WHERE = "(e.is_major = FALSE OR e.is_story = TRUE)"
+
 class EventStorage:
     """
     SQLite 事件存储层。
 
     提供：
-    - 实时写入事件
+    - 实时写入事件（单条 / 按月批量）
     - 分页查询（cursor-based）
     - 按角色/角色对查询
     - 历史清理
@@ -57,6 +71,8 @@ class EventStorage:
         self._db_path = db_path
         self._conn: Optional[sqlite3.Connection] = None
         self._logger = get_logger().logger
+        # 上一次快照：(路径, 快照时的 total_changes, 文件大小, 修改时间)，用于复用未变化的快照
+        self._last_snapshot: Optional[tuple[Path, int, int, int]] = None
         self._init_db()
 
     def _init_db(self) -> None:
@@ -64,12 +80,17 @@ class EventStorage:
         try:
             # 确保目录存在。
             self._db_path.parent.mkdir(parents=True, exist_ok=True)
+            # 快照可能与其他存档共享硬链接，写入前先拆分为独立文件。
+            self._unshare_db_file()
 
             self._conn = sqlite3.connect(str(self._db_path), check_same_thread=False)
             self._conn.row_factory = sqlite3.Row
 
             # 启用外键约束。
             self._conn.execute("PRAGMA foreign_keys = ON")
+            # WAL + NORMAL：提交时不再每次 fsync 主库，读写互不阻塞。
+            self._conn.execute("PRAGMA journal_mode = WAL")
+            self._conn.execute("PRAGMA synchronous = NORMAL")
 
             # 创建表。
             self._conn.executescript("""
@@ -104,6 +125,14 @@ class EventStorage:
             self._logger.error(f"Failed to initialize EventStorage: {e}")
             raise
 
+    def _unshare_db_file(self) -> None:
+        """数据库文件有多个硬链接时，替换为一份独立副本（其他链接保持不变）。"""
+        if not self._db_path.exists() or self._db_path.stat().st_nlink <= 1:
+            return
+        tmp_path = self._db_path.with_name(self._db_path.name + ".unshare")
+        shutil.copy2(self._db_path, tmp_path)
+        os.replace(tmp_path, self._db_path)
+
     @contextmanager
     def _transaction(self):
         """事务上下文管理器。"""
@@ -123,6 +152,20 @@ class EventStorage:
         Args:
             event: 要写入的事件对象。
 
+        Returns:
+            写入是否成功。
+        """
+        return self.add_events([event])
+
+    def add_events(self, events: Iterable["Event"]) -> bool:
+        """
+        在单个事务中批量写入事件（executemany），整批成功或整批回滚。
+
+        失败时记录日志并返回 False，不抛异常。
+
+        Args:
+            events: 要写入的事件列表（通常为一个月步进产生的全部事件）。
+
         Returns:
             写入是否成功。
         """
@@ -130,37 +173,143 @@ class EventStorage:
             self._logger.error("EventStorage not initialized")
             return False
 
+        events = list(events)
+        if not events:
+            return True
+
         try:
+            event_rows = []
+            avatar_rows = []
+            for event in events:
+                event_rows.append((
+                    event.id,
+                    int(event.month_stamp),
+                    event.content,
+                    event.is_major,
+                    event.is_story,
+                    _format_time(event.created_at),
+                ))
+                if event.related_avatars:
+                    for avatar_id in event.related_avatars:
+                        avatar_rows.append((event.id, str(avatar_id)))
+
             with self._transaction():
                 # 插入事件主表。
-                self._conn.execute(
+                self._conn.executemany(
                     """
                     INSERT OR IGNORE INTO events (id, month_stamp, content, is_major, is_story, created_at)
                     VALUES (?, ?, ?, ?, ?, ?)
                     """,
-                    (
-                        event.id,
-                        int(event.month_stamp),
-                        event.content,
-                        event.is_major,
-                        event.is_story,
-                        _format_time(event.created_at),
-                    )
+                    event_rows,
                 )
 
                 # 插入关联表。
-                if event.related_avatars:
-                    for avatar_id in event.related_avatars:
-                        self._conn.execute(
-                            """
-                            INSERT OR IGNORE INTO event_avatars (event_id, avatar_id)
-                            VALUES (?, ?)
-                            """,
-                            (event.id, str(avatar_id))
-                        )
+                if avatar_rows:
+                    self._conn.executemany(
+                        """
+                        INSERT OR IGNORE INTO event_avatars (event_id, avatar_id)
+                        VALUES (?, ?)
+                        """,
+                        avatar_rows,
+                    )
             return True
         except Exception as e:
-            self._logger.error(f"Failed to write event {event.id}: {e}")
+            if len(events) == 1:
+                self._logger.error(f"Failed to write event {events[0].id}: {e}")
+            else:
+                self._logger.error(f"Failed to write {len(events)} events: {e}")
+            return False
+
+    def checkpoint(self) -> None:
+        """将 WAL 中的内容合并回主库文件（直接复制 .db 文件前必须调用）。"""
+        if self._conn is None:
+            return
+        try:
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        except Exception as e:
+            self._logger.error(f"Failed to checkpoint EventStorage: {e}")
+
+    def snapshot_to(
+        self,
+        dest_path: Path,
+        pages: int = BACKUP_PAGES_PER_STEP,
+        progress: Optional[Callable[[int, int], None]] = None,
+        max_rowid: Optional[int] = None,
+    ) -> dict:
+        """
+        把当前数据库一致地复制到 dest_path（用于存档）。
+
+        - 自上次快照以来没有写入、且上次快照文件未被改动时，直接硬链接上次的快照，不复制数据
+        - 否则使用 SQLite 在线备份 API，每步复制 pages 页；期间本连接上的写入会同步进备份，
+          不会得到撕裂的副本。先写入临时文件，完成后原子替换
+
+        Args:
+            dest_path: 目标文件。
+            pages: 每步复制的页数。
+            progress: 每步完成后回调 (已复制页数, 总页数)。
+            max_rowid: 只保留 rowid 不超过此值的事件（取快照时 get_max_rowid() 的值），
+                裁掉备份开始前后游戏循环继续写入的事件，使事件库与存档快照一致。
+
+        Returns:
+            {"method": "hardlink" | "backup", "pages": 总页数, "trimmed": 裁掉的事件数（仅 backup）}
+        """
+        if self._conn is None:
+            raise RuntimeError("EventStorage is closed")
+        dest_path = Path(dest_path)
+        dest_path.parent.mkdir(parents=True, exist_ok=True)
+
+        if self._link_last_snapshot(dest_path):
+            return {"method": "hardlink", "pages": 0}
+
+        # total_changes 在备份前读取：备份期间的写入会同步进目标，但不会被记为"未变化"
+        changes = self._conn.total_changes
+        tmp_path = dest_path.with_name(dest_path.name + ".tmp")
+        tmp_path.unlink(missing_ok=True)
+        total_pages = 0
+
+        def on_progress(status: int, remaining: int, total: int) -> None:
+            nonlocal total_pages
+            total_pages = total
+            if progress is not None:
+                progress(total - remaining, total)
+
+        trimmed = 0
+        dest = sqlite3.connect(str(tmp_path))
+        try:
+            self._conn.backup(dest, pages=pages, progress=on_progress)
+            if max_rowid is not None:
+                # 外键级联同时删除 event_avatars 中的关联行
+                dest.execute("PRAGMA foreign_keys = ON")
+                with dest:
+                    trimmed = dest.execute("DELETE FROM events WHERE rowid > ?", (max_rowid,)).rowcount
+        finally:
+            dest.close()
+        os.replace(tmp_path, dest_path)
+
+        # 裁剪过的快照与当前数据库不一致，不能作为下次硬链接复用的基础
+        if trimmed:
+            self._last_snapshot = None
+        else:
+            stat = dest_path.stat()
+            self._last_snapshot = (dest_path, changes, stat.st_size, stat.st_mtime_ns)
+        return {"method": "backup", "pages": total_pages, "trimmed": trimmed}
+
+    def _link_last_snapshot(self, dest_path: Path) -> bool:
+        """数据库自上次快照后未变化时，把 dest_path 硬链接到上次的快照。"""
+        if self._last_snapshot is None:
+            return False
+        snapshot_path, changes, size, mtime_ns = self._last_snapshot
+        if changes != self._conn.total_changes or snapshot_path == dest_path:
+            return False
+        try:
+            stat = snapshot_path.stat()
+            if (stat.st_size, stat.st_mtime_ns) != (size, mtime_ns):
+                return False
+            dest_path.unlink(missing_ok=True)
+            os.link(snapshot_path, dest_path)
+            return True
+        except OSError:
+            # 快照已删除或文件系统不支持硬链接：退回在线备份
             return False
 
     def _parse_cursor(self, cursor: str) -> tuple[int, int]:
@@ -181,6 +330,76 @@ class EventStorage:
         """生成复合 cursor。"""
         return f"{month_stamp}_{rowid}"
 
+    def _row_to_event(self, row: sqlite3.Row) -> "Event":
+        """
+        将查询行还原为 Event 对象。
+
+        row 为 _query_events 返回的行（含聚合好的 avatar_ids 列）。
+        """
+        from src.classes.event import Event
+        from src.systems.time import MonthStamp
+
+        avatar_ids = row["avatar_ids"]
+        related_avatars = avatar_ids.split(_AVATAR_ID_SEP) if avatar_ids else None
+        return Event(
+            month_stamp=MonthStamp(row["month_stamp"]),
+            content=row["content"],
+            related_avatars=related_avatars,
+            is_major=bool(row["is_major"]),
+            is_story=bool(row["is_story"]),
+            id=row["id"],
+            created_at=_parse_time(row["created_at"]),
+        )
+
+    def _query_events(
+        self,
+        avatar_ids: Sequence[str] = (),
+        where: Optional[str] = None,
+        params: Sequence = (),
+        limit: int = 100,
+    ) -> list[sqlite3.Row]:
+        """
+        执行一次事件分页查询：单条 SQL，关联角色在同一查询中聚合。
+
+        内层查询先取出一页事件，外层再为这一页聚合 event_avatars，
+        避免逐行再查关联表（N+1），也避免为未入页的行做聚合。
+
+        Args:
+            avatar_ids: 筛选与这些角色全部相关的事件（为空表示不筛选）。
+            where: 额外的 WHERE 条件（不含 WHERE 关键字）。
+            params: where 中的参数。
+            limit: 返回行数上限。
+
+        Returns:
+            按 month_stamp、rowid 倒序排列的查询行，avatar_ids 列为拼接后的关联角色。
+        """
+        if avatar_ids:
+            # 从角色索引出发（CROSS JOIN 固定连接顺序），只访问该角色相关的事件，
+            # 否则规划器可能按 is_major 索引扫描全表。
+            # (event_id, avatar_id) 为主键，连接结果不会重复。
+            source = "event_avatars ea0 CROSS JOIN events e ON e.id = ea0.event_id AND ea0.avatar_id = ?"
+            source += "".join(
+                f" JOIN event_avatars ea{i} ON ea{i}.event_id = e.id AND ea{i}.avatar_id = ?"
+                for i in range(1, len(avatar_ids))
+            )
+        else:
+            source = "events e"
+
+        page = f"SELECT {_EVENT_COLUMNS} FROM {source}"
+        if where:
+            page += f" WHERE {where}"
+        # 使用 rowid 保证同一 month_stamp 内的插入顺序（最新的在前）。
+        page += " ORDER BY e.month_stamp DESC, e.rowid DESC LIMIT ?"
+
+        sql = f"""
+            SELECT p.*,
+                   (SELECT group_concat(ea.avatar_id, char(31))
+                    FROM event_avatars ea WHERE ea.event_id = p.id) AS avatar_ids
+            FROM ({page}) p
+            ORDER BY p.month_stamp DESC, p.rowid DESC
+        """
+        return self._conn.execute(sql, (*avatar_ids, *params, limit)).fetchall()
+
     def get_events(
         self,
         avatar_id: Optional[str] = None,
@@ -200,96 +419,41 @@ class EventStorage:
         Returns:
             (events, next_cursor)，next_cursor 为 None 表示没有更多。
         """
-        from src.classes.event import Event
-        from src.systems.time import MonthStamp
-
         if self._conn is None:
             return [], None
 
         try:
-            # 构建查询。
-            params: list = []
-
             if avatar_id_pair:
                 # Pair 查询：两个角色都相关的事件。
-                id1, id2 = avatar_id_pair
-                base_query = """
-                    SELECT DISTINCT e.rowid, e.id, e.month_stamp, e.content, e.is_major, e.is_story, e.created_at
-                    FROM events e
-                    JOIN event_avatars ea1 ON e.id = ea1.event_id AND ea1.avatar_id = ?
-                    JOIN event_avatars ea2 ON e.id = ea2.event_id AND ea2.avatar_id = ?
-                """
-                params.extend([id1, id2])
+                avatar_ids: tuple = tuple(avatar_id_pair)
             elif avatar_id:
-                # 单角色查询。
-                base_query = """
-                    SELECT DISTINCT e.rowid, e.id, e.month_stamp, e.content, e.is_major, e.is_story, e.created_at
-                    FROM events e
-                    JOIN event_avatars ea ON e.id = ea.event_id AND ea.avatar_id = ?
-                """
-                params.append(avatar_id)
+                avatar_ids = (avatar_id,)
             else:
-                # 全部事件。
-                base_query = """
-                    SELECT rowid, id, month_stamp, content, is_major, is_story, e.created_at
-                    FROM events e
-                """
+                avatar_ids = ()
+            params: list = []
 
             # Cursor 条件（获取更旧的事件）。
             # 使用 rowid 保证同一 month_stamp 内的确定性顺序。
-            where_clauses = []
+            where = None
             if cursor:
                 cursor_month, cursor_rowid = self._parse_cursor(cursor)
-                where_clauses.append(
-                    "(e.month_stamp < ? OR (e.month_stamp = ? AND e.rowid < ?))"
-                )
+                where = "(e.month_stamp < ? OR (e.month_stamp = ? AND e.rowid < ?))"
                 params.extend([cursor_month, cursor_month, cursor_rowid])
 
-            # 组装 WHERE。
-            if where_clauses:
-                base_query += " WHERE " + " AND ".join(where_clauses)
-
-            # 排序和分页（最新的在前，向上加载更旧的）。
-            # 使用 rowid 保证同一 month_stamp 内的插入顺序。
-            base_query += " ORDER BY e.month_stamp DESC, e.rowid DESC LIMIT ?"
-            params.append(limit + 1)  # 多取一条判断是否有更多。
-
-            rows = self._conn.execute(base_query, params).fetchall()
+            # 多取一条判断是否有更多。
+            rows = self._query_events(avatar_ids, where, params, limit + 1)
 
-            # 判断是否有更多。
             has_more = len(rows) > limit
             if has_more:
                 rows = rows[:limit]
 
-            # 构建事件对象。
-            events = []
-            last_rowid = None
-            last_month_stamp = None
-            for row in rows:
-                # 获取关联的 avatar IDs。
-                avatar_rows = self._conn.execute(
-                    "SELECT avatar_id FROM event_avatars WHERE event_id = ?",
-                    (row["id"],)
-                ).fetchall()
-                related_avatars = [r["avatar_id"] for r in avatar_rows]
-
-                event = Event(
-                    month_stamp=MonthStamp(row["month_stamp"]),
-                    content=row["content"],
-                    related_avatars=related_avatars if related_avatars else None,
-                    is_major=bool(row["is_major"]),
-                    is_story=bool(row["is_story"]),
-                    id=row["id"],
-                    created_at=_parse_time(row["created_at"]),
-                )
-                events.append(event)
-                last_rowid = row["rowid"]
-                last_month_stamp = row["month_stamp"]
+            events = [self._row_to_event(row) for row in rows]
 
             # 生成 next_cursor。
             next_cursor = None
-            if has_more and last_rowid is not None:
-                next_cursor = self._make_cursor(last_month_stamp, last_rowid)
+            if has_more and rows:
+                last = rows[-1]
+                next_cursor = self._make_cursor(last["month_stamp"], last["rowid"])
 
             return events, next_cursor
 
@@ -315,187 +479,33 @@ class EventStorage:
         events, _ = self.get_events(avatar_id_pair=(id1, id2), limit=limit)
         return list(reversed(events))  # 转为时间正序。
 
-    def get_major_events_by_avatar(self, avatar_id: str, limit: int = 10) -> list["Event"]:
-        """获取角色的大事（长期记忆）。"""
-        from src.classes.event import Event
-        from src.systems.time import MonthStamp
-
+    def _get_memory_events(self, avatar_ids: tuple, major: bool, limit: int, label: str) -> list["Event"]:
+        """按大事/小事筛选与给定角色相关的事件，按时间正序返回。"""
         if self._conn is None:
             return []
 
         try:
-            rows = self._conn.execute(
-                """
-                SELECT DISTINCT e.id, e.month_stamp, e.content, e.is_major, e.is_story, e.created_at
-                FROM events e
-                JOIN event_avatars ea ON e.id = ea.event_id AND ea.avatar_id = ?
-                WHERE e.is_major = TRUE AND e.is_story = FALSE
-                ORDER BY e.month_stamp DESC
-                LIMIT ?
-                """,
-                (avatar_id, limit)
-            ).fetchall()
-
-            events = []
-            for row in rows:
-                avatar_rows = self._conn.execute(
-                    "SELECT avatar_id FROM event_avatars WHERE event_id = ?",
-                    (row["id"],)
-                ).fetchall()
-                related_avatars = [r["avatar_id"] for r in avatar_rows]
-
-                event = Event(
-                    month_stamp=MonthStamp(row["month_stamp"]),
-                    content=row["content"],
-                    related_avatars=related_avatars if related_avatars else None,
-                    is_major=bool(row["is_major"]),
-                    is_story=bool(row["is_story"]),
-                    id=row["id"],
-                    created_at=_parse_time(row["created_at"]),
-                )
-                events.append(event)
-
-            return list(reversed(events))  # 时间正序。
+            rows = self._query_events(avatar_ids, _MAJOR_WHERE if major else _MINOR_WHERE, (), limit)
+            return [self._row_to_event(row) for row in reversed(rows)]  # 时间正序。
         except Exception as e:
-            self._logger.error(f"Failed to query major events: {e}")
+            self._logger.error(f"Failed to query {label}: {e}")
             return []
 
+    def get_major_events_by_avatar(self, avatar_id: str, limit: int = 10) -> list["Event"]:
+        """获取角色的大事（长期记忆）。"""
+        return self._get_memory_events((avatar_id,), True, limit, "major events")
+
     def get_minor_events_by_avatar(self, avatar_id: str, limit: int = 10) -> list["Event"]:
         """获取角色的小事（短期记忆，包括故事）。"""
-        from src.classes.event import Event
-        from src.systems.time import MonthStamp
-
-        if self._conn is None:
-            return []
-
-        try:
-            rows = self._conn.execute(
-                """
-                SELECT DISTINCT e.id, e.month_stamp, e.content, e.is_major, e.is_story, e.created_at
-                FROM events e
-                JOIN event_avatars ea ON e.id = ea.event_id AND ea.avatar_id = ?
-                WHERE e.is_major = FALSE OR e.is_story = TRUE
-                ORDER BY e.month_stamp DESC
-                LIMIT ?
-                """,
-                (avatar_id, limit)
-            ).fetchall()
-
-            events = []
-            for row in rows:
-                avatar_rows = self._conn.execute(
-                    "SELECT avatar_id FROM event_avatars WHERE event_id = ?",
-                    (row["id"],)
-                ).fetchall()
-                related_avatars = [r["avatar_id"] for r in avatar_rows]
-
-                event = Event(
-                    month_stamp=MonthStamp(row["month_stamp"]),
-                    content=row["content"],
-                    related_avatars=related_avatars if related_avatars else None,
-                    is_major=bool(row["is_major"]),
-                    is_story=bool(row["is_story"]),
-                    id=row["id"],
-                    created_at=_parse_time(row["created_at"]),
-                )
-                events.append(event)
-
-            return list(reversed(events))  # 时间正序。
-        except Exception as e:
-            self._logger.error(f"Failed to query minor events: {e}")
-            return []
+        return self._get_memory_events((avatar_id,), False, limit, "minor events")
 
     def get_major_events_between(self, id1: str, id2: str, limit: int = 10) -> list["Event"]:
         """获取两个角色之间的大事（长期记忆）。"""
-        from src.classes.event import Event
-        from src.systems.time import MonthStamp
-
-        if self._conn is None:
-            return []
-
-        try:
-            rows = self._conn.execute(
-                """
-                SELECT DISTINCT e.id, e.month_stamp, e.content, e.is_major, e.is_story, e.created_at
-                FROM events e
-                JOIN event_avatars ea1 ON e.id = ea1.event_id AND ea1.avatar_id = ?
-                JOIN event_avatars ea2 ON e.id = ea2.event_id AND ea2.avatar_id = ?
-                WHERE e.is_major = TRUE AND e.is_story = FALSE
-                ORDER BY e.month_stamp DESC
-                LIMIT ?
-                """,
-                (id1, id2, limit)
-            ).fetchall()
-
-            events = []
-            for row in rows:
-                avatar_rows = self._conn.execute(
-                    "SELECT avatar_id FROM event_avatars WHERE event_id = ?",
-                    (row["id"],)
-                ).fetchall()
-                related_avatars = [r["avatar_id"] for r in avatar_rows]
-
-                event = Event(
-                    month_stamp=MonthStamp(row["month_stamp"]),
-                    content=row["content"],
-                    related_avatars=related_avatars if related_avatars else None,
-                    is_major=bool(row["is_major"]),
-                    is_story=bool(row["is_story"]),
-                    id=row["id"],
-                    created_at=_parse_time(row["created_at"]),
-                )
-                events.append(event)
-
-            return list(reversed(events))  # 时间正序。
-        except Exception as e:
-            self._logger.error(f"Failed to query major events between: {e}")
-            return []
+        return self._get_memory_events((id1, id2), True, limit, "major events between")
 
     def get_minor_events_between(self, id1: str, id2: str, limit: int = 10) -> list["Event"]:
         """获取两个角色之间的小事（短期记忆）。"""
-        from src.classes.event import Event
-        from src.systems.time import MonthStamp
-
-        if self._conn is None:
-            return []
-
-        try:
-            rows = self._conn.execute(
-                """
-                SELECT DISTINCT e.id, e.month_stamp, e.content, e.is_major, e.is_story, e.created_at
-                FROM events e
-                JOIN event_avatars ea1 ON e.id = ea1.event_id AND ea1.avatar_id = ?
-                JOIN event_avatars ea2 ON e.id = ea2.event_id AND ea2.avatar_id = ?
-                WHERE e.is_major = FALSE OR e.is_story = TRUE
-                ORDER BY e.month_stamp DESC
-                LIMIT ?
-                """,
-                (id1, id2, limit)
-            ).fetchall()
-
-            events = []
-            for row in rows:
-                avatar_rows = self._conn.execute(
-                    "SELECT avatar_id FROM event_avatars WHERE event_id = ?",
-                    (row["id"],)
-                ).fetchall()
-                related_avatars = [r["avatar_id"] for r in avatar_rows]
-
-                event = Event(
-                    month_stamp=MonthStamp(row["month_stamp"]),
-                    content=row["content"],
-                    related_avatars=related_avatars if related_avatars else None,
-                    is_major=bool(row["is_major"]),
-                    is_story=bool(row["is_story"]),
-                    id=row["id"],
-                    created_at=_parse_time(row["created_at"]),
-                )
-                events.append(event)
-
-            return list(reversed(events))  # 时间正序。
-        except Exception as e:
-            self._logger.error(f"Failed to query minor events between: {e}")
-            return []
+        return self._get_memory_events((id1, id2), False, limit, "minor events between")
 
     def get_recent_events(self, limit: int = 100) -> list["Event"]:
         """获取最近的事件（供初始状态 API 使用）。"""
@@ -547,6 +557,13 @@ class EventStorage:
             self._logger.error(f"Failed to cleanup events: {e}")
             return 0
 
+    def get_max_rowid(self) -> int:
+        """当前最大的事件 rowid（无事件时为 0），用作存档快照的事件边界。"""
+        if self._conn is None:
+            return 0
+        row = self._conn.execute("SELECT COALESCE(MAX(rowid), 0) FROM events").fetchone()
+        return row[0] if row else 0
+
     def count(self) -> int:
         """获取事件总数。"""
         if self._conn is None:
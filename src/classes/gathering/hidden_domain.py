@@ -34,6 +34,10 @@ class DomainConfig:
     cd_years: int
     open_prob: float
 
+# (配置表对象, 解析出的秘境配置)：tick 广播每月都会读取秘境列表，避免重复解析
+_configs_cache: tuple[Any, List[DomainConfig]] = (None, [])
+
+
 @register_gathering
 class HiddenDomain(Gathering):
     """
@@ -55,12 +59,15 @@ class HiddenDomain(Gathering):
         return t(cls.STORY_PROMPT_ID)
 
     def _load_configs(self) -> List[DomainConfig]:
-        """从配置表加载秘境配置"""
-        configs = []
+        """从配置表加载秘境配置（按配置表对象缓存解析结果，reload_game_configs 后自动重新解析）"""
+        global _configs_cache
         df = game_configs.get("hidden_domain")
         if df is None:
             return []
-        
+        if _configs_cache[0] is df:
+            return list(_configs_cache[1])
+
+        configs = []
         for row in df:
             try:
                 # 必须字段
@@ -79,7 +86,8 @@ class HiddenDomain(Gathering):
             except Exception as e:
                 logger.error(f"Failed to load hidden domain config: {e}")
                 continue
-        return configs
+        _configs_cache = (df, configs)
+        return list(configs)
 
     def is_start(self, world: "World") -> bool:
         """
@@ -190,6 +190,8 @@ class HistoryManager:
                 self.logger.error(f"[History] 区域更新失败 - ID: {rid_str}, Error: {e}")
                 continue
         if count > 0:
+            # 区域名称出现在 /api/map 的静态数据里，通知缓存失效
+            self.world.map.mark_changed()
             self.logger.info(f"[History] 更新了 {count} 个区域")
 
     def _update_techniques(self, changes: Dict[str, Any]):
@@ -0,0 +1,142 @@
+"""
+规则策略 AI：不请求模型，按角色状态从 ActionRegistry 中挑选动作链。
+
+用于大规模世界中的次要角色（ai.decision_policy = tiered/rule），以及 LLM 决策超时或失败时的兜底。
+同一角色在同一月份的决策是确定的（随机数以角色 ID 与月戳为种子）。
+
+优先级：
+1. 血量低于 hp_ratio：疗伤（有宗门时先回总部）
+2. 处于瓶颈且突破不在冷却中：突破
+3. 身处城市且背包中有材料：卖出存量最多的材料
+4. 可以修炼：按道统吐纳 / 炼体 / 禅定 / 教化，偶尔先前往一个已知区域（教化须前往城市）
+5. 无法修炼（瓶颈且突破冷却中）：就地采集（狩猎 / 采药 / 挖矿），否则前往已知的普通区域采集
+6. 以上皆不可行：向随机方向移动
+"""
+from __future__ import annotations
+
+import random
+from typing import TYPE_CHECKING, Optional
+
+from src.classes.ai import AI
+from src.classes.action.registry import ActionRegistry
+from src.classes.environment.region import CityRegion, NormalRegion
+from src.classes.environment.sect_region import SectRegion
+from src.classes.typings import ACTION_NAME_PARAMS_PAIRS
+from src.utils.params import filter_kwargs_for_callable
+
+if TYPE_CHECKING:
+    from src.classes.core.avatar import Avatar
+    from src.classes.core.world import World
+
+CULTIVATE_ACTIONS = ("Respire", "Temper", "Meditate", "Educate")
+# 只能在特定区域进行的修炼动作
+CULTIVATE_REGION_KINDS = {"Educate": CityRegion}
+# 采集动作 -> 普通区域上对应的资源属性
+GATHER_ACTIONS = {"Hunt": "animals", "Harvest": "plants", "Mine": "lodes"}
+DIRECTIONS = ("North", "South", "East", "West")
+
+
+class RuleAI(AI):
+    """
+    Args:
+        hp_ratio: 血量低于上限的该比例时优先疗伤
+        wander_chance: 修炼前先前往某个已知区域的概率
+    """
+
+    def __init__(self, hp_ratio: float = 0.5, wander_chance: float = 0.2):
+        self.hp_ratio = hp_ratio
+        self.wander_chance = wander_chance
+
+    async def _decide(self, world: "World", avatars_to_decide: list["Avatar"]) -> dict["Avatar", tuple[ACTION_NAME_PARAMS_PAIRS, str, str]]:
+        results = {}
+        for avatar in avatars_to_decide:
+            pairs = self.plan(world, avatar)
+            # 规则策略不产生叙事，沿用角色原有的思考与短期目标
+            results[avatar] = (pairs, avatar.thinking, avatar.short_term_objective)
+        return results
+
+    def plan(self, world: "World", avatar: "Avatar") -> ACTION_NAME_PARAMS_PAIRS:
+        rng = random.Random(f"{avatar.id}:{int(world.month_stamp)}")
+        region = avatar.tile.region if avatar.tile is not None else None
+        home = _sect_headquarter(world, avatar)
+
+        hp = avatar.hp
+        if hp.max > 0 and hp.cur < hp.max * self.hp_ratio and _can_start(avatar, "SelfHeal"):
+            if home is not None and region is not home:
+                return [("MoveToRegion", {"region": home.name}), ("SelfHeal", {})]
+            return [("SelfHeal", {})]
+
+        if avatar.cultivation_progress.can_break_through() and _can_start(avatar, "Breakthrough"):
+            return [("Breakthrough", {})]
+
+        pairs: ACTION_NAME_PARAMS_PAIRS = []
+        if isinstance(region, CityRegion) and avatar.materials:
+            material = max(avatar.materials, key=lambda m: avatar.materials[m])
+            pairs.append(("Sell", {"target_name": material.name}))
+
+        if avatar.cultivation_progress.can_cultivate():
+            cultivate = next((name for name in CULTIVATE_ACTIONS if _can_start(avatar, name)), None)
+            if cultivate is not None and rng.random() >= self.wander_chance:
+                return pairs + [(cultivate, {})]
+            legal = next((name for name in CULTIVATE_ACTIONS if _orthodoxy_allows(avatar, name)), "Respire")
+            kind = CULTIVATE_REGION_KINDS.get(legal)
+            destination = _pick_known_region(world, avatar, rng, exclude=region, kind=kind)
+            if destination is not None:
+                return pairs + [("MoveToRegion", {"region": destination.name}), (legal, {})]
+            if cultivate is not None:
+                return pairs + [(cultivate, {})]
+
+        gather = [name for name in GATHER_ACTIONS if _can_start(avatar, name)]
+        if gather:
+            return pairs + [(rng.choice(gather), {})]
+        destination = _pick_known_region(world, avatar, rng, exclude=region, kind=NormalRegion)
+        if destination is not None:
+            available = [name for name, attr in GATHER_ACTIONS.items() if getattr(destination, attr, None)]
+            if available:
+                return pairs + [("MoveToRegion", {"region": destination.name}), (rng.choice(available), {})]
+
+        return pairs + [("MoveToDirection", {"direction": rng.choice(DIRECTIONS)})]
+
+
+def _can_start(avatar: "Avatar", action_name: str, **params) -> bool:
+    """按提交阶段的方式检查动作能否启动（含冷却），不产生副作用"""
+    try:
+        action = ActionRegistry.get(action_name)(avatar, avatar.world)
+        ok, _reason = action.can_start(**filter_kwargs_for_callable(action.can_start, params))
+        return bool(ok)
+    except Exception:
+        return False
+
+
+def _orthodoxy_allows(avatar: "Avatar", action_name: str) -> bool:
+    legal = avatar.effects.get("legal_actions", [])
+    return not legal or action_name in legal
+
+
+def _sect_headquarter(world: "World", avatar: "Avatar") -> Optional[SectRegion]:
+    sect = avatar.sect
+    if sect is None:
+        return None
+    for region in getattr(world.map, "sect_regions", {}).values():
+        if region.sect_id == sect.id:
+            return region
+    return None
+
+
+def _pick_known_region(world: "World", avatar: "Avatar", rng: random.Random, exclude=None, kind: type | None = None):
+    """从角色已知的区域中随机挑一个可进入的（不含其他宗门总部）"""
+    regions = world.map.regions
+    candidates = []
+    for region_id in sorted(avatar.known_regions):
+        region = regions.get(region_id)
+        if region is None or region is exclude:
+            continue
+        if kind is not None and not isinstance(region, kind):
+            continue
+        if isinstance(region, SectRegion) and (avatar.sect is None or avatar.sect.id != region.sect_id):
+            continue
+        candidates.append(region)
+    return rng.choice(candidates) if candidates else None
+
+
+rule_ai = RuleAI()
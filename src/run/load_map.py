@@ -71,6 +71,7 @@ def load_cultivation_world_map() -> Map:
     
     # 5. 更新缓存
     game_map.update_sect_regions()
+    game_map.invalidate_region_cache()
     
     return game_map
 
@@ -139,9 +140,7 @@ def _load_and_assign_regions(game_map: Map, region_coords: dict[int, list[tuple[
                 game_map.region_cors[rid] = cors
                 
                 # 绑定到 Tiles
-                for rx, ry in cors:
-                    if game_map.is_in_bounds(rx, ry):
-                        game_map.tiles[(rx, ry)].region = region_obj
+                game_map.assign_region(region_obj, cors)
                         
             except Exception as e:
                 print(f"Error creating region {rid}: {e}")
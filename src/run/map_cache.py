@@ -0,0 +1,150 @@
+"""
+随机地图布局缓存
+
+随机地图由 (seed, 宽, 高, 宗门列表) 唯一确定。读档时不再重新生成，而是读取缓存的布局
+（地形栅格 + 区域划分，见 MapLayout），直接 build_map。
+
+缓存文件位于 saves/map_cache/，按 seed、尺寸和宗门 id 命名；文件格式：
+- 魔数 + zlib 压缩的负载
+- 负载 = 头部长度(u32) + 头部 JSON（版本、键、地形类型表、区域列表）+ 地形索引(uint8 数组) + 区域坐标(int32 数组, y*w+x)
+
+缓存缺失、损坏、版本或键不一致时回退为重新生成，并写入新缓存。
+生成算法的输出发生变化时需递增 MAP_CACHE_VERSION。
+"""
+import hashlib
+import json
+import os
+import struct
+import zlib
+from array import array
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional
+
+from src.classes.environment.map import Map
+from src.classes.environment.tile import TileType
+from src.run.map_generator import MapLayout, build_map, generate_map_layout
+from src.utils.config import CONFIG
+
+if TYPE_CHECKING:
+    from src.classes.core.sect import Sect
+
+MAP_CACHE_VERSION = 1
+MAP_CACHE_SUFFIX = ".map"
+
+_MAGIC = b"CWSMAP\x00"
+_HEADER_LEN = struct.Struct("<I")
+
+
+def get_map_cache_dir() -> Path:
+    return CONFIG.paths.saves / "map_cache"
+
+
+def _cache_key(seed: int, width: int, height: int, sect_ids: list[int]) -> dict:
+    return {"seed": seed, "width": width, "height": height, "sect_ids": list(sect_ids)}
+
+
+def get_map_cache_path(seed: int, width: int, height: int, sect_ids: list[int], cache_dir: Optional[Path] = None) -> Path:
+    """缓存文件路径（宗门顺序影响放置结果，所以按顺序参与哈希）"""
+    digest = hashlib.blake2b(json.dumps(list(sect_ids)).encode("utf-8"), digest_size=6).hexdigest()
+    return (cache_dir or get_map_cache_dir()) / f"{seed}_{width}x{height}_{digest}{MAP_CACHE_SUFFIX}"
+
+
+def write_map_layout(path: Path, layout: MapLayout, sect_ids: list[int]) -> None:
+    """写入布局缓存（先写临时文件再原子替换）"""
+    tile_types = list(TileType)
+    type_index = {t: i for i, t in enumerate(tile_types)}
+    tiles = bytes(type_index[t] for row in layout.tile_grid for t in row)
+
+    w = layout.width
+    cors = array("i")
+    regions = []
+    for kind, rid, region_cors in layout.regions:
+        regions.append([kind, rid, len(region_cors)])
+        cors.extend(y * w + x for x, y in region_cors)
+
+    header = json.dumps({
+        "version": MAP_CACHE_VERSION,
+        "key": _cache_key(layout.seed, layout.width, layout.height, sect_ids),
+        "tile_types": [t.value for t in tile_types],
+        "regions": regions,
+    }).encode("utf-8")
+    payload = _HEADER_LEN.pack(len(header)) + header + tiles + cors.tobytes()
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(_MAGIC + zlib.compress(payload, 6))
+    os.replace(tmp_path, path)
+
+
+def read_map_layout(path: Path, seed: int, width: int, height: int, sect_ids: list[int]) -> Optional[MapLayout]:
+    """读取布局缓存；文件缺失、损坏、版本或键不一致时返回 None"""
+    try:
+        with open(path, "rb") as f:
+            raw = f.read()
+    except OSError:
+        return None
+    if not raw.startswith(_MAGIC):
+        return None
+
+    try:
+        payload = zlib.decompress(raw[len(_MAGIC):])
+        (header_len,) = _HEADER_LEN.unpack_from(payload)
+        offset = _HEADER_LEN.size
+        header = json.loads(payload[offset:offset + header_len])
+        offset += header_len
+        if header.get("version") != MAP_CACHE_VERSION:
+            return None
+        if header.get("key") != _cache_key(seed, width, height, sect_ids):
+            return None
+
+        tile_types = [TileType(v) for v in header["tile_types"]]
+        tiles = payload[offset:offset + width * height]
+        if len(tiles) != width * height:
+            return None
+        offset += width * height
+        tile_grid = [[tile_types[i] for i in tiles[y * width:(y + 1) * width]] for y in range(height)]
+
+        cors = array("i")
+        cors.frombytes(payload[offset:])
+        regions = []
+        pos = 0
+        for kind, rid, count in header["regions"]:
+            regions.append((kind, rid, [(c % width, c // width) for c in cors[pos:pos + count]]))
+            pos += count
+        if pos != len(cors):
+            return None
+    except (ValueError, KeyError, IndexError, TypeError, zlib.error, struct.error):
+        return None
+
+    return MapLayout(width=width, height=height, seed=seed, tile_grid=tile_grid, regions=regions)
+
+
+def load_or_generate_map(
+    width: int,
+    height: int,
+    seed: int,
+    existed_sects: Optional[list["Sect"]] = None,
+    cache_dir: Optional[Path] = None,
+) -> tuple[Map, bool]:
+    """
+    优先从缓存构造随机地图，缓存不可用时生成并写入缓存。
+
+    Returns:
+        (Map 对象, 是否命中缓存)
+    """
+    existed_sects = existed_sects or []
+    sect_ids = [sect.id for sect in existed_sects]
+    path = get_map_cache_path(seed, width, height, sect_ids, cache_dir)
+
+    layout = read_map_layout(path, seed, width, height, sect_ids)
+    hit = layout is not None
+    if layout is None:
+        layout = generate_map_layout(width, height, seed, existed_sects)
+        try:
+            write_map_layout(path, layout, sect_ids)
+        except OSError as e:
+            print(f"[MapCache] 写入地图缓存失败: {e}")
+
+    return build_map(layout, existed_sects), hit
@@ -4,13 +4,14 @@
 设计思路（方向 A + B 轻量组合）：
   1. 世界类型（World Recipe）：种子高位决定世界类型，影响大陆/海洋分布模板。
   2. POI 优先：先按种子撒城市/洞府/宗门点，再根据 POI 位置影响周围地形。
-  3. 噪声地形：用纯 Python 实现的双重正弦叠加+坐标哈希噪声，无需 numpy/scipy。
-  4. 区域连通块：对每块同类地形做简单 BFS 连通，按地形类型分配 normal_region。
+  3. 噪声地形：用纯 Python 实现的双重正弦叠加+坐标哈希噪声，无需 numpy/scipy；按行计算，逐格只做必要运算。
+  4. 区域连通块：在扁平地形编码数组上对每块同类地形做连通遍历，按地形类型分配 normal_region。
   5. 建筑放置（2×2 大块）：城市、洞府/遗迹、宗门总部，保证不重叠且地形匹配。
 """
 import math
 import random
-from typing import TYPE_CHECKING, Optional
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Iterator, Optional
 
 from src.classes.environment.map import Map
 from src.classes.environment.tile import Tile, TileType
@@ -78,6 +79,10 @@ RUIN_FRIENDLY_TERRAIN = {
 # ---------------------------------------------------------------------------
 # 简易 2D 噪声（纯 Python，无外部依赖）
 # ---------------------------------------------------------------------------
+#
+# _hash_noise / _smooth_noise 是逐点定义；生成整张图时使用按行计算的 _hash_noise_rows /
+# _smooth_noise_rows：只与 x 或 y 有关的项预先算成列表/行常量，每格只剩必要的运算。
+# 两者的浮点运算顺序完全相同，结果逐位一致（同 seed 生成的地图不变）。
 
 def _hash_noise(x: int, y: int, seed: int) -> float:
     """返回 [0, 1] 之间基于坐标和种子的伪随机值。"""
@@ -108,6 +113,47 @@ def _smooth_noise(x: float, y: float, seed: int, scale: float = 0.1) -> float:
     return (low + mid + hi) / 3.75  # 归一化到约 [-1, 1]
 
 
+def _hash_noise_rows(width: int, height: int, seed: int) -> Iterator[list[float]]:
+    """逐行产出 [_hash_noise(x, y, seed) for x in range(width)]。"""
+    col_terms = [x * 1619 for x in range(width)]
+    seed_term = seed * 6971
+    for y in range(height):
+        row_term = y * 31337
+        row = []
+        for xt in col_terms:
+            n = xt + row_term + seed_term
+            n = (n ^ (n >> 8)) * 0x27d4eb2d
+            n = (n ^ (n >> 15)) & 0xFFFFFFFF
+            row.append((n & 0xFFFF) / 65535.0)
+        yield row
+
+
+def _smooth_noise_rows(width: int, height: int, seed: int, scale: float) -> Iterator[list[float]]:
+    """逐行产出 [_smooth_noise(x, y, seed, scale) for x in range(width)]。"""
+    sin, cos = math.sin, math.cos
+    mid_scale = scale * 2.5
+    # 只与 x 有关的项
+    xs = [x * scale for x in range(width)]
+    xs_03 = [v * 0.3 for v in xs]
+    mid_cols = [sin(x * mid_scale + seed * 0.003) for x in range(width)]
+    low_c1 = seed * 0.001
+    low_c2 = seed * 0.002
+
+    for y, hash_row in enumerate(_hash_noise_rows(width, height, seed)):
+        ys = y * scale
+        ys_07 = ys * 0.7
+        ys_09 = ys * 0.9
+        mid_row = cos(y * mid_scale + seed * 0.004)
+        yield [
+            (
+                (sin(xv + ys_07 + low_c1) + cos(ys_09 - xv3 + low_c2))
+                + 0.5 * (mc + mid_row)
+                + 0.25 * (hn * 2 - 1)
+            ) / 3.75
+            for xv, xv3, mc, hn in zip(xs, xs_03, mid_cols, hash_row)
+        ]
+
+
 # ---------------------------------------------------------------------------
 # 世界类型生成函数
 # ---------------------------------------------------------------------------
@@ -116,76 +162,58 @@ def _make_continent_heightmap(width: int, height: int, seed: int) -> list[list[f
     """大陆型：中央大陆，四周海洋，北冰南林。"""
     h = []
     cx, cy = width / 2, height / 2
-    for y in range(height):
-        row = []
-        for x in range(width):
-            # 椭圆距中心的距离衰减（大陆形状）
-            dx = (x - cx) / (cx * 0.85)
-            dy = (y - cy) / (cy * 0.85)
-            dist_fade = 1.0 - min(1.0, math.sqrt(dx * dx + dy * dy))
-            noise = _smooth_noise(x, y, seed, scale=0.07)
-            row.append(dist_fade * 0.6 + noise * 0.4)
-        h.append(row)
+    # 椭圆距中心的距离衰减（大陆形状）
+    dx2 = [d * d for d in ((x - cx) / (cx * 0.85) for x in range(width))]
+    for y, noise_row in enumerate(_smooth_noise_rows(width, height, seed, scale=0.07)):
+        dy = (y - cy) / (cy * 0.85)
+        dy2 = dy * dy
+        h.append([
+            (1.0 - min(1.0, math.sqrt(dxx + dy2))) * 0.6 + noise * 0.4
+            for dxx, noise in zip(dx2, noise_row)
+        ])
     return h
 
 
 def _make_archipelago_heightmap(width: int, height: int, seed: int) -> list[list[float]]:
     """群岛型：整体偏低（海洋），用更高频噪声制造分散岛屿。"""
-    h = []
-    for y in range(height):
-        row = []
-        for x in range(width):
-            noise = _smooth_noise(x, y, seed, scale=0.12)
-            row.append(noise - 0.1)  # 整体下移，海洋为主
-        h.append(row)
-    return h
+    # 整体下移，海洋为主
+    return [[noise - 0.1 for noise in noise_row] for noise_row in _smooth_noise_rows(width, height, seed, scale=0.12)]
 
 
 def _make_two_shores_heightmap(width: int, height: int, seed: int) -> list[list[float]]:
     """一江两岸：中间竖向河道，两侧陆地。"""
-    h = []
     cx = width / 2
-    for y in range(height):
-        row = []
-        for x in range(width):
-            dist_from_center = abs(x - cx) / (width * 0.5)
-            # 中间低（水），两侧高（陆）
-            base = (dist_from_center - 0.25) * 2.0
-            noise = _smooth_noise(x, y, seed, scale=0.08)
-            row.append(base * 0.6 + noise * 0.4)
-        h.append(row)
-    return h
+    # 中间低（水），两侧高（陆）
+    base_cols = [((abs(x - cx) / (width * 0.5)) - 0.25) * 2.0 * 0.6 for x in range(width)]
+    return [
+        [base + noise * 0.4 for base, noise in zip(base_cols, noise_row)]
+        for noise_row in _smooth_noise_rows(width, height, seed, scale=0.08)
+    ]
 
 
 def _make_oasis_heightmap(width: int, height: int, seed: int) -> list[list[float]]:
     """荒漠绿洲：四周沙漠，中心平原/水域。"""
     h = []
     cx, cy = width / 2, height / 2
-    for y in range(height):
-        row = []
-        for x in range(width):
-            dx = (x - cx) / (cx * 0.7)
-            dy = (y - cy) / (cy * 0.7)
-            dist = math.sqrt(dx * dx + dy * dy)
-            # 中心高（绿洲），外围低（沙漠虽然高度不一定，用另一个通道决定沙漠）
-            center_fade = 1.0 - min(1.0, dist)
-            noise = _smooth_noise(x, y, seed, scale=0.09)
-            row.append(center_fade * 0.7 + noise * 0.3)
-        h.append(row)
+    dx2 = [d * d for d in ((x - cx) / (cx * 0.7) for x in range(width))]
+    for y, noise_row in enumerate(_smooth_noise_rows(width, height, seed, scale=0.09)):
+        dy = (y - cy) / (cy * 0.7)
+        dy2 = dy * dy
+        # 中心高（绿洲），外围低（沙漠虽然高度不一定，用另一个通道决定沙漠）
+        h.append([
+            (1.0 - min(1.0, math.sqrt(dxx + dy2))) * 0.7 + noise * 0.3
+            for dxx, noise in zip(dx2, noise_row)
+        ])
     return h
 
 
 def _make_polar_south_heightmap(width: int, height: int, seed: int) -> list[list[float]]:
     """极北南蛮：北边极寒（低），中部平原（高），南边热带（高但不同类型）。"""
     h = []
-    for y in range(height):
-        row = []
+    for y, noise_row in enumerate(_smooth_noise_rows(width, height, seed, scale=0.08)):
         # 北边 (y=0) 和南边 (y=height-1) 都适合，中间适当
-        north_factor = 1.0 - (y / height)  # 越北越大
-        for x in range(width):
-            noise = _smooth_noise(x, y, seed, scale=0.08)
-            row.append(0.4 + noise * 0.4 - north_factor * 0.2)
-        h.append(row)
+        north_term = (1.0 - (y / height)) * 0.2  # 越北越大
+        h.append([0.4 + noise * 0.4 - north_term for noise in noise_row])
     return h
 
 
@@ -316,28 +344,46 @@ def _height_to_tiletype(
 # ---------------------------------------------------------------------------
 # 2×2 建筑放置助手
 # ---------------------------------------------------------------------------
+#
+# 放置与连通块阶段在扁平的地形编码数组上进行：codes[y * width + x] 为 TileType 在 _TILE_TYPES 中的下标，
+# 地形集合用按编码索引的 0/1 查找表表示，避免逐格的枚举哈希与二维列表访问。
+
+_TILE_TYPES: list[TileType] = list(TileType)
+_TILE_CODES: dict[TileType, int] = {t: i for i, t in enumerate(_TILE_TYPES)}
+
+# 不能与 2×2 建筑重叠的地形
+_BLOCKED_TERRAIN = {TileType.SEA, TileType.WATER, TileType.CITY, TileType.SECT, TileType.CAVE, TileType.RUIN}
+
+
+def _terrain_lut(types: set[TileType]) -> bytes:
+    """地形集合 → 按编码索引的查找表（256 字节，可直接用于 bytearray.translate）。"""
+    return bytes(1 if t in types else 0 for t in _TILE_TYPES).ljust(256, b"\x00")
+
+
+_BLOCKED_LUT = _terrain_lut(_BLOCKED_TERRAIN)
 
-def _can_place_2x2(tile_grid: list[list[TileType]], x: int, y: int, width: int, height: int) -> bool:
+
+def _can_place_2x2(codes: bytearray, x: int, y: int, width: int, height: int) -> bool:
     """检查 (x, y), (x+1, y), (x, y+1), (x+1, y+1) 是否都是陆地且不是已占用的特殊地形。"""
     if x + 1 >= width or y + 1 >= height:
         return False
-    blocked = {TileType.SEA, TileType.WATER, TileType.CITY, TileType.SECT, TileType.CAVE, TileType.RUIN}
-    for dy in range(2):
-        for dx in range(2):
-            if tile_grid[y + dy][x + dx] in blocked:
-                return False
-    return True
+    i = y * width + x
+    blocked = _BLOCKED_LUT
+    return not (
+        blocked[codes[i]] or blocked[codes[i + 1]]
+        or blocked[codes[i + width]] or blocked[codes[i + width + 1]]
+    )
 
 
-def _place_2x2(tile_grid: list[list[TileType]], x: int, y: int, t: TileType) -> None:
+def _place_2x2(codes: bytearray, x: int, y: int, width: int, t: TileType) -> None:
     """在 (x,y) 起始放置 2×2 的 tile 类型。"""
-    for dy in range(2):
-        for dx in range(2):
-            tile_grid[y + dy][x + dx] = t
+    code = _TILE_CODES[t]
+    i = y * width + x
+    codes[i] = codes[i + 1] = codes[i + width] = codes[i + width + 1] = code
 
 
 def _find_candidates(
-    tile_grid: list[list[TileType]],
+    codes: bytearray,
     width: int,
     height: int,
     friendly_terrain: set[TileType],
@@ -350,69 +396,106 @@ def _find_candidates(
     """
     if placed is None:
         placed = []
+    # friendly[i] 为 1 表示该格是 friendly_terrain，邻近检查变成对 4 段行切片的 C 级查找
+    friendly = codes.translate(_terrain_lut(friendly_terrain))
+    # too_close[i] 为 1 表示该格与某个已放置点的横纵距离都 < min_dist
+    too_close = bytearray(len(codes))
+    for px, py in placed:
+        lo, hi = max(0, px - min_dist + 1), min(width, px + min_dist)
+        if lo >= hi:
+            continue
+        span = b"\x01" * (hi - lo)
+        for ny in range(max(0, py - min_dist + 1), min(height, py + min_dist)):
+            too_close[ny * width + lo:ny * width + hi] = span
+
     candidates = []
     for y in range(0, height - 1, 2):
+        rows = [ny * width for ny in range(max(0, y - 1), min(height, y + 3))]
         for x in range(0, width - 1, 2):
-            if not _can_place_2x2(tile_grid, x, y, width, height):
+            if too_close[y * width + x] or not _can_place_2x2(codes, x, y, width, height):
                 continue
-            # 检查是否邻近 friendly_terrain
-            has_friendly = False
-            for dy in range(-1, 3):
-                for dx in range(-1, 3):
-                    nx, ny = x + dx, y + dy
-                    if 0 <= nx < width and 0 <= ny < height:
-                        if tile_grid[ny][nx] in friendly_terrain:
-                            has_friendly = True
-                            break
-                if has_friendly:
+            # 检查是否邻近 friendly_terrain（x-1 ~ x+2, y-1 ~ y+2）
+            lo, hi = max(0, x - 1), min(width, x + 3)
+            for row in rows:
+                if friendly.find(1, row + lo, row + hi) != -1:
+                    candidates.append((x, y))
                     break
-            if not has_friendly:
-                continue
-            # 检查最小间距
-            too_close = False
-            for px, py in placed:
-                if abs(x - px) < min_dist and abs(y - py) < min_dist:
-                    too_close = True
-                    break
-            if not too_close:
-                candidates.append((x, y))
     rng.shuffle(candidates)
     return candidates
 
 
 # ---------------------------------------------------------------------------
-# 区域 BFS 连通分块
+# 区域连通分块
 # ---------------------------------------------------------------------------
 
-def _bfs_flood_fill(
-    tile_grid: list[list[TileType]],
-    visited: list[list[bool]],
-    start_x: int,
-    start_y: int,
-    width: int,
-    height: int,
-    target_type: TileType,
-) -> list[tuple[int, int]]:
-    """BFS 找到与 (start_x, start_y) 连通的同类型格子集合。"""
-    queue = [(start_x, start_y)]
-    visited[start_y][start_x] = True
+def _flood_fill(codes: bytearray, visited: bytearray, start: int, width: int) -> list[int]:
+    """找到与 start 连通的同类型格子（扁平下标），遍历顺序固定：右、左、下、上，后进先出。"""
+    target = codes[start]
+    size = len(codes)
+    stack = [start]
+    visited[start] = 1
     result = []
-    while queue:
-        cx, cy = queue.pop()
-        result.append((cx, cy))
-        for dx, dy in [(1, 0), (-1, 0), (0, 1), (0, -1)]:
-            nx, ny = cx + dx, cy + dy
-            if 0 <= nx < width and 0 <= ny < height and not visited[ny][nx]:
-                if tile_grid[ny][nx] == target_type:
-                    visited[ny][nx] = True
-                    queue.append((nx, ny))
+    while stack:
+        i = stack.pop()
+        result.append(i)
+        x = i % width
+        if x + 1 < width:
+            j = i + 1
+            if not visited[j] and codes[j] == target:
+                visited[j] = 1
+                stack.append(j)
+        if x > 0:
+            j = i - 1
+            if not visited[j] and codes[j] == target:
+                visited[j] = 1
+                stack.append(j)
+        j = i + width
+        if j < size and not visited[j] and codes[j] == target:
+            visited[j] = 1
+            stack.append(j)
+        j = i - width
+        if j >= 0 and not visited[j] and codes[j] == target:
+            visited[j] = 1
+            stack.append(j)
     return result
 
 
+def _label_components(codes: bytearray, width: int, skip: set[TileType]) -> list[tuple[TileType, list[int]]]:
+    """
+    按扫描顺序列出所有同类型四连通块：[(地形, 扁平下标列表)]。
+    skip 中的地形不参与分块。
+    """
+    skip_lut = _terrain_lut(skip)
+    # 跳过的格子直接视为已访问
+    visited = codes.translate(skip_lut)
+    components = []
+    start = visited.find(0)
+    while start != -1:
+        components.append((_TILE_TYPES[codes[start]], _flood_fill(codes, visited, start, width)))
+        start = visited.find(0, start + 1)
+    return components
+
+
 # ---------------------------------------------------------------------------
 # 主生成函数
 # ---------------------------------------------------------------------------
 
+@dataclass
+class MapLayout:
+    """
+    生成结果中与语言/配置无关的部分：地形栅格与区域划分。
+    同一组 (seed, 尺寸, 宗门) 的布局固定，可缓存后直接 build_map，无需重新生成（见 map_cache.py）。
+    """
+    width: int
+    height: int
+    seed: int
+    # tile_grid[y][x]
+    tile_grid: list[list[TileType]]
+    # 按注册顺序排列的区域：(kind, id, cors)
+    # kind 为 normal / city / cave / ruin / sect；normal 的 id 为 region_id，sect 的 id 为 sect_id，其余为 0
+    regions: list[tuple[str, int, list[tuple[int, int]]]] = field(default_factory=list)
+
+
 def generate_map(
     width: int,
     height: int,
@@ -435,6 +518,21 @@ def generate_map(
     Returns:
         (Map 对象, 实际使用的 seed)
     """
+    layout = generate_map_layout(width, height, seed, existed_sects, city_count, cave_count)
+    game_map = build_map(layout, existed_sects)
+    print(f"[MapGenerator] complete: {len(game_map.regions)} regions")
+    return game_map, seed
+
+
+def generate_map_layout(
+    width: int,
+    height: int,
+    seed: int,
+    existed_sects: Optional[list["Sect"]] = None,
+    city_count: Optional[int] = None,
+    cave_count: Optional[int] = None,
+) -> MapLayout:
+    """生成地形栅格与区域划分（参数同 generate_map）。"""
     if existed_sects is None:
         existed_sects = []
 
@@ -451,18 +549,14 @@ def generate_map(
 
     # 辅助噪声图（用于地形多样化）
     s2_seed = seed ^ 0xDEADBEEF
-    s2_map = [[_hash_noise(x, y, s2_seed) for x in range(width)] for y in range(height)]
 
-    # 3. 高度值 → TileType 网格
-    tile_grid: list[list[TileType]] = []
-    for y in range(height):
-        row = []
-        for x in range(width):
-            t = _height_to_tiletype(
-                h_map[y][x], x, y, width, height, world_type, s2_map[y][x]
-            )
-            row.append(t)
-        tile_grid.append(row)
+    # 3. 高度值 → 地形编码（扁平数组，codes[y * width + x]）
+    codes = bytearray()
+    for y, (h_row, s2_row) in enumerate(zip(h_map, _hash_noise_rows(width, height, s2_seed))):
+        codes.extend(
+            _TILE_CODES[_height_to_tiletype(h_val, x, y, width, height, world_type, s2)]
+            for x, (h_val, s2) in enumerate(zip(h_row, s2_row))
+        )
 
     # 4. 决定建筑数量
     area = width * height
@@ -483,22 +577,22 @@ def generate_map(
                 TileType.MOUNTAIN, TileType.SNOW_MOUNTAIN, TileType.BAMBOO,
                 TileType.VOLCANO, TileType.RAINFOREST, TileType.SWAMP, TileType.TUNDRA,
                 TileType.GOBI, TileType.DESERT}
-    sect_candidates = _find_candidates(tile_grid, width, height, all_land, rng, min_dist=15, placed=placed_positions)
+    sect_candidates = _find_candidates(codes, width, height, all_land, rng, min_dist=15, placed=placed_positions)
     for i, sect in enumerate(existed_sects):
         if not sect_candidates:
             break
         sx, sy = sect_candidates.pop()
         # 放置 SECT 类型（统一标记，具体 sect_id 后面绑 Region）
-        _place_2x2(tile_grid, sx, sy, TileType.SECT)
+        _place_2x2(codes, sx, sy, width, TileType.SECT)
         sect_placed.append((sx, sy))
         placed_positions.append((sx, sy))
 
     # 5b. 城市
     city_placed: list[tuple[int, int]] = []
-    city_candidates = _find_candidates(tile_grid, width, height, CITY_FRIENDLY_TERRAIN, rng, min_dist=12, placed=placed_positions)
+    city_candidates = _find_candidates(codes, width, height, CITY_FRIENDLY_TERRAIN, rng, min_dist=12, placed=placed_positions)
     for i in range(min(city_count, len(city_candidates))):
         cx, cy = city_candidates.pop()
-        _place_2x2(tile_grid, cx, cy, TileType.CITY)
+        _place_2x2(codes, cx, cy, width, TileType.CITY)
         city_placed.append((cx, cy))
         placed_positions.append((cx, cy))
 
@@ -506,28 +600,19 @@ def generate_map(
     cave_placed: list[tuple[int, int]] = []
     ruin_placed: list[tuple[int, int]] = []
     cave_all_friendly = CAVE_FRIENDLY_TERRAIN | RUIN_FRIENDLY_TERRAIN | {TileType.PLAIN, TileType.GRASSLAND}
-    cave_candidates = _find_candidates(tile_grid, width, height, cave_all_friendly, rng, min_dist=10, placed=placed_positions)
+    cave_candidates = _find_candidates(codes, width, height, cave_all_friendly, rng, min_dist=10, placed=placed_positions)
     ruin_split = max(1, cave_count // 3)  # 约 1/3 为遗迹
     for i in range(min(cave_count, len(cave_candidates))):
         pos = cave_candidates.pop()
         tile_type = TileType.RUIN if i < ruin_split else TileType.CAVE
-        _place_2x2(tile_grid, pos[0], pos[1], tile_type)
+        _place_2x2(codes, pos[0], pos[1], width, tile_type)
         if tile_type == TileType.CAVE:
             cave_placed.append(pos)
         else:
             ruin_placed.append(pos)
         placed_positions.append(pos)
 
-    # 6. 构造 Map 对象（创建 Tile）
-    game_map = Map(width=width, height=height)
-    for y in range(height):
-        for x in range(width):
-            game_map.create_tile(x, y, tile_grid[y][x])
-
-    # 7. 建立 Region —— 普通区域（连通块 BFS）
-    visited = [[False] * width for _ in range(height)]
-    normal_region_id_counter = [101]  # 从 101 开始轮流分配
-
+    # 6. 建立 Region —— 普通区域（连通块）
     # 建立地形 → region_id 的映射分配器（每种地形有自己的候选列表）
     region_type_assigned: dict[TileType, int] = {}
 
@@ -540,6 +625,45 @@ def generate_map(
     # 跳过特殊格（CITY/SECT/CAVE/RUIN）不参与连通块
     special_types = {TileType.CITY, TileType.SECT, TileType.CAVE, TileType.RUIN}
 
+    # 连通块 → NormalRegion，但每种地形只分配同一个 region_id，合并同类区域
+    region_tile_map: dict[int, list[tuple[int, int]]] = {}  # region_id → 格子列表
+    for tt, cells in _label_components(codes, width, special_types):
+        rid = _get_or_assign_region_id(tt, rng)
+        if rid not in region_tile_map:
+            region_tile_map[rid] = []
+        region_tile_map[rid].extend((i % width, i // width) for i in cells)
+
+    tile_grid = [[_TILE_TYPES[c] for c in codes[y * width:(y + 1) * width]] for y in range(height)]
+
+    # 7. 特殊建筑（城市、洞府、遗迹、宗门）各占一个 2×2 区域
+    def _cors_2x2(pos: tuple[int, int]) -> list[tuple[int, int]]:
+        return [(pos[0] + dx, pos[1] + dy) for dy in range(2) for dx in range(2)]
+
+    regions: list[tuple[str, int, list[tuple[int, int]]]] = [
+        ("normal", rid, cors) for rid, cors in region_tile_map.items()
+    ]
+    regions += [("city", 0, _cors_2x2(pos)) for pos in city_placed]
+    regions += [("cave", 0, _cors_2x2(pos)) for pos in cave_placed]
+    regions += [("ruin", 0, _cors_2x2(pos)) for pos in ruin_placed]
+    regions += [("sect", sect.id, _cors_2x2(pos)) for pos, sect in zip(sect_placed, existed_sects)]
+
+    return MapLayout(width=width, height=height, seed=seed, tile_grid=tile_grid, regions=regions)
+
+
+def build_map(layout: MapLayout, existed_sects: Optional[list["Sect"]] = None) -> Map:
+    """
+    由布局构造 Map、Tile 与各 Region。
+    区域名称/描述等元数据取自当前配置表，所以切换语言后同一布局仍可复用。
+    """
+    if existed_sects is None:
+        existed_sects = []
+
+    # 构造 Map 对象（创建 Tile）
+    game_map = Map(width=layout.width, height=layout.height)
+    for y, row in enumerate(layout.tile_grid):
+        for x, tile_type in enumerate(row):
+            game_map.create_tile(x, y, tile_type)
+
     # 加载 normal_region 元数据（复用已有配置）
     from src.utils.df import game_configs, get_str, get_int
     normal_region_meta: dict[int, dict] = {}
@@ -554,126 +678,81 @@ def generate_map(
             "essence_density": get_int(row, "essence_density", 0),
         }
 
-    # BFS 连通块 → NormalRegion，但每种地形只分配同一个 region_id，合并同类区域
-    region_tile_map: dict[int, list[tuple[int, int]]] = {}  # region_id → 格子列表
-
-    for y in range(height):
-        for x in range(width):
-            if visited[y][x]:
-                continue
-            tt = tile_grid[y][x]
-            if tt in special_types:
-                visited[y][x] = True
-                continue
-            # BFS
-            cluster = _bfs_flood_fill(tile_grid, visited, x, y, width, height, tt)
-            rid = _get_or_assign_region_id(tt, rng)
-            if rid not in region_tile_map:
-                region_tile_map[rid] = []
-            region_tile_map[rid].extend(cluster)
-
-    # 创建 NormalRegion 对象并注册
-    for rid, cors in region_tile_map.items():
-        if rid not in normal_region_meta:
-            continue
-        meta = normal_region_meta[rid]
-        region_obj = NormalRegion(
-            id=rid,
-            name=meta["name"],
-            desc=meta["desc"],
-            cors=cors,
-            animal_ids=meta["animal_ids"],
-            plant_ids=meta["plant_ids"],
-            lode_ids=meta["lode_ids"],
-            essence_density=meta.get("essence_density", 0),
-        )
-        game_map.regions[rid] = region_obj
-        game_map.region_cors[rid] = cors
-        for tx, ty in cors:
-            if game_map.is_in_bounds(tx, ty):
-                game_map.tiles[(tx, ty)].region = region_obj
-
-    # 8. 建立 Region —— 特殊建筑
-
-    # 加载配置元数据
+    # 加载建筑配置元数据
     city_meta_list = _load_city_meta(game_configs)
     cultivate_meta_list = _load_cultivate_meta(game_configs)
     sect_meta_list = _load_sect_meta(game_configs, existed_sects)
-
-    # 城市
-    from src.classes.core.sect import sects_by_id as _sects_by_id
-    city_ids = [301, 302, 303, 304, 305]
-    for i, (cx, cy) in enumerate(city_placed):
-        meta_idx = i % len(city_meta_list)
-        meta = city_meta_list[meta_idx]
-        cors = [(cx + dx, cy + dy) for dy in range(2) for dx in range(2)]
-        region_obj = CityRegion(
-            id=meta["id"],
-            name=meta["name"],
-            desc=meta["desc"],
-            cors=cors,
-            sell_item_ids=meta.get("sell_item_ids", []),
-        )
-        _register_region(game_map, region_obj)
-
-    # 洞府
-    cave_essence_cycle = [
-        EssenceType.GOLD, EssenceType.WOOD, EssenceType.WATER,
-        EssenceType.FIRE, EssenceType.EARTH
-    ]
-    for i, (cx, cy) in enumerate(cave_placed):
-        meta_idx = i % max(1, len([m for m in cultivate_meta_list if m.get("sub_type") == "cave"]))
-        cave_metas = [m for m in cultivate_meta_list if m.get("sub_type") == "cave"]
-        if not cave_metas:
-            break
-        meta = cave_metas[i % len(cave_metas)]
-        cors = [(cx + dx, cy + dy) for dy in range(2) for dx in range(2)]
-        region_obj = CultivateRegion(
-            id=meta["id"],
-            name=meta["name"],
-            desc=meta["desc"],
-            cors=cors,
-            essence_type=EssenceType.from_str(meta.get("root_type", "GOLD")),
-            essence_density=meta.get("root_density", 8),
-            sub_type="cave",
-        )
-        _register_region(game_map, region_obj)
-
-    # 遗迹
-    ruin_metas = [m for m in cultivate_meta_list if m.get("sub_type") == "ruin"]
-    for i, (cx, cy) in enumerate(ruin_placed):
-        if not ruin_metas:
-            break
-        meta = ruin_metas[i % len(ruin_metas)]
-        cors = [(cx + dx, cy + dy) for dy in range(2) for dx in range(2)]
-        region_obj = CultivateRegion(
-            id=meta["id"],
-            name=meta["name"],
-            desc=meta["desc"],
-            cors=cors,
-            essence_type=EssenceType.from_str(meta.get("root_type", "WOOD")),
-            essence_density=meta.get("root_density", 8),
-            sub_type="ruin",
-        )
-        _register_region(game_map, region_obj)
-
-    # 宗门
-    for i, ((sx, sy), sect) in enumerate(zip(sect_placed, existed_sects)):
-        meta = sect_meta_list[i] if i < len(sect_meta_list) else None
-        cors = [(sx + dx, sy + dy) for dy in range(2) for dx in range(2)]
-        region_obj = SectRegion(
-            id=400 + sect.id,
-            name=meta["name"] if meta else sect.name,
-            desc=meta["desc"] if meta else f"{sect.name}驻地",
-            cors=cors,
-            sect_id=sect.id,
-            sect_name=sect.name,
-        )
+    sub_type_metas = {
+        sub_type: [m for m in cultivate_meta_list if m.get("sub_type") == sub_type]
+        for sub_type in ("cave", "ruin")
+    }
+    default_essence = {"cave": "GOLD", "ruin": "WOOD"}
+    sect_index = {sect.id: (i, sect) for i, sect in enumerate(existed_sects)}
+    # 同类建筑按出现顺序轮流使用配置表中的条目
+    kind_counts = {"city": 0, "cave": 0, "ruin": 0}
+
+    for kind, rid, cors in layout.regions:
+        if kind == "normal":
+            if rid not in normal_region_meta:
+                continue
+            meta = normal_region_meta[rid]
+            region_obj = NormalRegion(
+                id=rid,
+                name=meta["name"],
+                desc=meta["desc"],
+                cors=cors,
+                animal_ids=meta["animal_ids"],
+                plant_ids=meta["plant_ids"],
+                lode_ids=meta["lode_ids"],
+                essence_density=meta.get("essence_density", 0),
+            )
+        elif kind == "city":
+            i = kind_counts[kind]
+            kind_counts[kind] += 1
+            meta = city_meta_list[i % len(city_meta_list)]
+            region_obj = CityRegion(
+                id=meta["id"],
+                name=meta["name"],
+                desc=meta["desc"],
+                cors=cors,
+                sell_item_ids=meta.get("sell_item_ids", []),
+            )
+        elif kind in ("cave", "ruin"):
+            metas = sub_type_metas[kind]
+            if not metas:
+                continue
+            i = kind_counts[kind]
+            kind_counts[kind] += 1
+            meta = metas[i % len(metas)]
+            region_obj = CultivateRegion(
+                id=meta["id"],
+                name=meta["name"],
+                desc=meta["desc"],
+                cors=cors,
+                essence_type=EssenceType.from_str(meta.get("root_type", default_essence[kind])),
+                essence_density=meta.get("root_density", 8),
+                sub_type=kind,
+            )
+        elif kind == "sect":
+            if rid not in sect_index:
+                continue
+            i, sect = sect_index[rid]
+            meta = sect_meta_list[i] if i < len(sect_meta_list) else None
+            region_obj = SectRegion(
+                id=400 + sect.id,
+                name=meta["name"] if meta else sect.name,
+                desc=meta["desc"] if meta else f"{sect.name}驻地",
+                cors=cors,
+                sect_id=sect.id,
+                sect_name=sect.name,
+            )
+        else:
+            continue
         _register_region(game_map, region_obj)
 
     game_map.update_sect_regions()
-    print(f"[MapGenerator] complete: {len(game_map.regions)} regions")
-    return game_map, seed
+    game_map.invalidate_region_cache()
+    return game_map
 
 
 # ---------------------------------------------------------------------------
@@ -684,9 +763,7 @@ def _register_region(game_map: Map, region_obj) -> None:
     """注册一个 Region 到 Map，并绑定到 Tile。"""
     game_map.regions[region_obj.id] = region_obj
     game_map.region_cors[region_obj.id] = region_obj.cors
-    for tx, ty in region_obj.cors:
-        if game_map.is_in_bounds(tx, ty):
-            game_map.tiles[(tx, ty)].region = region_obj
+    game_map.assign_region(region_obj, region_obj.cors)
 
 
 def _parse_list(s: str) -> list[int]:
@@ -0,0 +1,150 @@
+"""
+后台存档/读档任务
+
+- Job: 一个存档或读档任务的状态（stage 与 done/total 进度），可通过 /api/jobs/{id} 查询
+- JobManager:
+  - 单线程工作池：序列化、写文件、读档解析都在这里执行，不占用事件循环；
+    单线程保证多个存档/读档任务按提交顺序执行，不会同时写同一份二进制存档基底
+  - 步进锁：game_loop 在 sim.step() 期间持有，存档任务只在拿到锁后（两步之间）做快照，
+    快照完成即释放，游戏循环不等待文件写入
+
+世界对象无法 pickle，所以不使用进程池：快照阶段先在事件循环里把状态转成纯数据，再交给工作线程。
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Any, Awaitable, Callable, Optional
+
+from src.utils.id_generator import base62_id
+
+# 保留的已结束任务数
+MAX_FINISHED_JOBS = 20
+
+
+@dataclass
+class Job:
+    """一个后台任务的状态"""
+    id: str
+    kind: str  # save | load
+    status: str = "pending"  # pending | running | done | failed
+    stage: str = "queued"
+    done: int = 0
+    total: int = 0
+    result: Optional[dict] = None
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+    _task: Optional[asyncio.Task] = field(default=None, repr=False)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "failed")
+
+    def set_progress(self, stage: str, done: int = 0, total: int = 0) -> None:
+        """更新进度（可在工作线程中调用）"""
+        self.stage = stage
+        self.done = done
+        self.total = total
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "stage": self.stage,
+            "done": self.done,
+            "total": self.total,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobManager:
+    """后台任务登记、单线程工作池与步进锁"""
+
+    def __init__(self):
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._step_lock: Optional[asyncio.Lock] = None
+        self._step_lock_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def step_lock(self) -> asyncio.Lock:
+        """当前事件循环上的步进锁（事件循环更换后重新创建，例如测试中的多个循环）"""
+        loop = asyncio.get_running_loop()
+        if self._step_lock is None or self._step_lock_loop is not loop:
+            self._step_lock = asyncio.Lock()
+            self._step_lock_loop = loop
+        return self._step_lock
+
+    async def run_in_worker(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """在工作线程中执行 func 并等待结果"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="save-load")
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(func, *args, **kwargs))
+
+    def submit(self, kind: str, run: Callable[[Job], Awaitable[dict]]) -> Job:
+        """
+        登记并启动任务。
+
+        Args:
+            kind: 任务类型（save / load）
+            run: 接收 Job、返回结果字典的协程函数；抛出异常则任务失败
+        """
+        job = Job(id=base62_id(10), kind=kind)
+        self._jobs[job.id] = job
+        self._prune()
+        job._task = asyncio.get_running_loop().create_task(self._run(job, run))
+        return job
+
+    async def wait(self, job: Job) -> Job:
+        """等待任务结束"""
+        if job._task is not None:
+            await asyncio.shield(job._task)
+        return job
+
+    async def _run(self, job: Job, run: Callable[[Job], Awaitable[dict]]) -> None:
+        job.status = "running"
+        try:
+            job.result = await run(job)
+            job.status = "done"
+            job.stage = "done"
+        except Exception as e:
+            from src.run.log import get_logger
+            get_logger().logger.error(f"{job.kind} job {job.id} failed: {e}", exc_info=True)
+            job.error = str(e)
+            job.status = "failed"
+            job.stage = "failed"
+        finally:
+            job.finished_at = time.time()
+
+    async def wait_kind(self, kind: str) -> None:
+        """等待当前所有未结束的 kind 类任务结束"""
+        for job in [job for job in self._jobs.values() if job.kind == kind and not job.finished]:
+            await self.wait(job)
+
+    def has_active(self, kind: str) -> bool:
+        """是否有未结束的 kind 类任务"""
+        return any(job.kind == kind and not job.finished for job in self._jobs.values())
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def list_jobs(self) -> list[Job]:
+        """所有任务，最新的在前"""
+        return list(reversed(self._jobs.values()))
+
+    def _prune(self) -> None:
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self._jobs[job_id]
+
+
+job_manager = JobManager()
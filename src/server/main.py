@@ -11,13 +11,15 @@ import re
 import logging
 from omegaconf import OmegaConf
 from contextlib import asynccontextmanager
+from pathlib import Path
 
 from typing import List, Optional
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, Query
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, Query, Header, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 import uvicorn
 from pydantic import BaseModel
+import anyio.from_thread
 
 # 确保可以导入 src 模块
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
@@ -41,7 +43,24 @@ from src.classes.event import Event
 from src.classes.celestial_phenomenon import celestial_phenomena_by_id
 from src.classes.long_term_objective import set_user_long_term_objective, clear_user_long_term_objective
 from src.sim import save_game, list_saves, load_game, get_events_db_path, check_save_compatibility
+from src.sim.save.save_game import resolve_save_path, take_save_snapshot, write_save_snapshot
+from src.server.jobs import Job, job_manager
+from src.server.map_payload import MAP_ENCODINGS, map_payload_cache
+from src.server.read_model import ReadModelStore
+from src.server.tick_scheduler import TickScheduler
+from src.server.tick_stream import (
+    DEFAULT_MAX_PENDING_TICKS,
+    PROTOCOL_DELTA,
+    PROTOCOL_LEGACY,
+    ClientChannel,
+    Subscription,
+    TickFrame,
+    TickStream,
+    dumps,
+)
 from src.utils.llm.client import test_connectivity
+from src.utils.llm.transport import reset_transports
+from src.utils.llm.cache import get_cache_stats
 from src.utils.llm.config import LLMConfig, LLMMode
 from src.run.data_loader import reload_all_static_data
 from src.classes.language import language_manager, LanguageType
@@ -140,13 +159,36 @@ class EndpointFilter(logging.Filter):
     def filter(self, record: logging.LogRecord) -> bool:
         return record.getMessage().find("GET /api/init-status") == -1
 
+def serialize_avatar_tick_fields(avatar) -> dict:
+    """增量 tick 协议中每个角色跟踪的字段（变化时才下发）"""
+    return {
+        "name": avatar.name,
+        "x": int(getattr(avatar, "pos_x", 0)),
+        "y": int(getattr(avatar, "pos_y", 0)),
+        "gender": avatar.gender.value,
+        "pic_id": resolve_avatar_pic_id(avatar),
+        "action": avatar.current_action_name,
+        "action_emoji": resolve_avatar_action_emoji(avatar),
+    }
+
+
 class ConnectionManager:
     def __init__(self):
         self.active_connections: list[WebSocket] = []
+        # 每个连接独立的发送队列（connect 时创建）
+        self.channels: dict[WebSocket, ClientChannel] = {}
 
-    async def connect(self, websocket: WebSocket):
+    async def connect(self, websocket: WebSocket, protocol: str = PROTOCOL_LEGACY):
         await websocket.accept()
         self.active_connections.append(websocket)
+        channel = ClientChannel(
+            websocket,
+            tick_stream,
+            protocol=protocol,
+            max_pending_ticks=int(getattr(CONFIG.system, "ws_max_pending_ticks", DEFAULT_MAX_PENDING_TICKS)),
+        )
+        channel.start()
+        self.channels[websocket] = channel
         
         # 不再自动恢复游戏，让用户明确选择"新游戏"或"加载存档"。
         # 这样可以避免在用户加载存档前就生成初始化事件。
@@ -156,6 +198,9 @@ class ConnectionManager:
     def disconnect(self, websocket: WebSocket):
         if websocket in self.active_connections:
             self.active_connections.remove(websocket)
+        channel = self.channels.pop(websocket, None)
+        if channel is not None:
+            channel.close()
             
         # 当最后一个客户端断开时，自动暂停游戏
         if len(self.active_connections) == 0:
@@ -168,15 +213,48 @@ class ConnectionManager:
             print(f"[Auto-Control] {log_msg}")
 
     async def broadcast(self, message: dict):
+        """
+        广播控制类消息（toast 等）。有发送队列的连接只入队，不等待慢客户端；
+        其余连接并发发送。
+        """
         import json
         try:
             # 简单序列化，实际生产可能需要更复杂的 Encoder
             txt = json.dumps(message, default=str)
-            for connection in self.active_connections:
-                await connection.send_text(txt)
+            direct = []
+            for connection in list(self.active_connections):
+                channel = self.channels.get(connection)
+                if channel is not None:
+                    channel.send_control(txt)
+                else:
+                    direct.append(connection)
+            results = await asyncio.gather(*(c.send_text(txt) for c in direct), return_exceptions=True)
+            for result in results:
+                if isinstance(result, Exception):
+                    print(f"Broadcast error: {result}")
         except Exception as e:
             print(f"Broadcast error: {e}")
 
+    async def send_control(self, websocket: WebSocket, message: dict):
+        """给单个连接发送控制类消息：经该连接的发送队列，保证每个连接只有发送协程一个写入者"""
+        channel = self.channels.get(websocket)
+        if channel is not None:
+            channel.send_control(dumps(message))
+        else:
+            await websocket.send_json(message)
+
+    def has_protocol(self, protocol: str) -> bool:
+        return any(c.protocol == protocol for c in self.channels.values())
+
+    def publish_tick(self, legacy_message: Optional[dict], frame: TickFrame, world: Optional[World] = None):
+        """把本月的 tick 放入各连接的发送队列（每种协议只序列化一次，订阅视口的客户端按可见角色过滤）"""
+        legacy_text = dumps(legacy_message) if legacy_message is not None else None
+        for channel in list(self.channels.values()):
+            if channel.protocol == PROTOCOL_DELTA:
+                channel.send_frame(frame, world)
+            elif legacy_text is not None:
+                channel.send_tick(legacy_text)
+
 manager = ConnectionManager()
 
 
@@ -194,8 +272,7 @@ def serialize_active_domains(world: World) -> List[dict]:
             break
             
     if hidden_domain_gathering:
-        # 获取所有配置（假设 _load_configs 开销不大，或者已缓存）
-        # 这里为了确保获取最新状态，重新加载配置
+        # 获取所有配置（_load_configs 按配置表对象缓存解析结果，每个 tick 调用没有解析开销）
         # 注意：访问受保护方法 _load_configs
         all_configs = hidden_domain_gathering._load_configs()
         
@@ -288,6 +365,145 @@ def serialize_phenomenon(phenomenon) -> Optional[dict]:
         "effect_desc": effect_desc
     }
 
+# 增量 tick 编码器（记录已下发给增量协议客户端的状态）
+tick_stream = TickStream(serialize_avatar_tick_fields, serialize_active_domains, serialize_phenomenon)
+
+
+def serialize_state_avatars(world: World, limit: int = 50) -> List[dict]:
+    """/api/state 的角色列表（只取前 limit 个）"""
+    av_list = []
+    for a in list(world.avatar_manager.avatars.values())[:limit]:
+        # 极其保守的取值
+        aid = str(getattr(a, "id", "no_id"))
+        aname = str(getattr(a, "name", "no_name"))
+        # 修正：使用 pos_x/pos_y
+        ax = int(getattr(a, "pos_x", 0))
+        ay = int(getattr(a, "pos_y", 0))
+        aaction = "unknown"
+
+        # 动作检查
+        curr = getattr(a, "current_action", None)
+        if curr:
+            act = getattr(curr, "action", None)
+            if act:
+                aaction = getattr(act, "name", "unnamed_action")
+            else:
+                aaction = str(curr)
+
+        av_list.append({
+            "id": aid,
+            "name": aname,
+            "x": ax,
+            "y": ay,
+            "action": str(aaction),
+            "action_emoji": resolve_avatar_action_emoji(a),
+            "gender": str(a.gender.value),
+            "pic_id": resolve_avatar_pic_id(a)
+        })
+    return av_list
+
+
+def serialize_avatar_list(world: World) -> List[dict]:
+    """/api/meta/avatar_list 的简略角色列表（按名字排序）"""
+    result = []
+    for a in world.avatar_manager.avatars.values():
+        sect_name = a.sect.name if a.sect else "散修"
+        realm_str = a.cultivation_progress.realm.value if hasattr(a, 'cultivation_progress') else "未知"
+        
+        result.append({
+            "id": str(a.id),
+            "name": a.name,
+            "sect_name": sect_name,
+            "realm": realm_str,
+            "gender": str(a.gender),
+            "age": a.age.age
+        })
+    
+    # 按名字排序
+    result.sort(key=lambda x: x["name"])
+    return result
+
+
+def _build_rankings(world: World) -> dict:
+    from src.systems.rankings import get_all_rankings
+    return get_all_rankings(world)
+
+
+# 只读快照：每步结束时在事件循环上构造，线程池中的读接口直接读取（见 src/server/read_model.py）
+read_model_store = ReadModelStore({
+    "state_avatars": serialize_state_avatars,
+    "avatar_count": lambda world: len(world.avatar_manager.avatars),
+    "avatar_list": serialize_avatar_list,
+    "rankings": _build_rankings,
+    "phenomenon": lambda world: serialize_phenomenon(world.current_phenomenon),
+})
+
+
+def _make_tick_scheduler() -> TickScheduler:
+    system_conf = getattr(CONFIG, "system", None)
+    return TickScheduler(
+        months_per_second=float(getattr(system_conf, "months_per_second", 1.0)),
+        max_speed=bool(getattr(system_conf, "max_speed", False)),
+        catch_up=str(getattr(system_conf, "tick_catch_up", "skip")),
+        max_burst=int(getattr(system_conf, "tick_max_burst", 3)),
+    )
+
+
+# game_loop 的步进节奏（见 src/server/tick_scheduler.py），可通过 /api/control/speed 调整
+tick_scheduler = _make_tick_scheduler()
+
+
+def publish_read_model(world: Optional[World]):
+    """
+    重新发布只读快照（修改世界的接口在修改后调用）。
+    快照只在事件循环上构造：在线程池中调用（同步接口）时切回事件循环执行并等待完成，
+    避免与 Simulator.step 并发遍历世界，也保证各次发布按调用顺序完成。
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        try:
+            anyio.from_thread.run_sync(_publish_read_model, world)
+            return
+        except RuntimeError:
+            # 不在服务端线程池中（脚本或测试直接调用）：没有需要避让的事件循环
+            pass
+    _publish_read_model(world)
+
+
+def _publish_read_model(world: Optional[World]):
+    if world is None:
+        read_model_store.clear()
+        return
+    try:
+        read_model_store.publish(world)
+    except Exception as e:
+        from src.run.log import get_logger
+        get_logger().logger.error(f"Publish read model failed: {e}", exc_info=True)
+        read_model_store.clear()
+
+
+def discard_sim():
+    """丢弃当前 sim（重置/新游戏/读档前调用）：取消其在途的预取决策，不再为旧世界请求 LLM"""
+    sim = game_instance.get("sim")
+    pipeline = getattr(sim, "decision_pipeline", None) if sim is not None else None
+    if pipeline is not None:
+        pipeline.cancel()
+    game_instance["sim"] = None
+
+
+def attach_read_model(sim: Simulator, world: World):
+    """让 sim 每步结束时发布快照，并立即发布一次"""
+    sim.step_listeners.append(publish_read_model)
+    publish_read_model(world)
+
+
+def snapshot_fields(snapshot) -> dict:
+    """响应中附带的快照信息（实时读取时为 None）"""
+    if snapshot is None:
+        return {"snapshot_version": None, "snapshot_age_ms": None}
+    return {"snapshot_version": snapshot.version, "snapshot_age_ms": snapshot.age_ms()}
+
 def check_llm_connectivity() -> tuple[bool, str]:
     """
     检查 LLM 连通性
@@ -387,7 +603,7 @@ async def init_game_async():
         _urm_raw = getattr(CONFIG.game, "use_random_map", False)
         use_random_map = _urm_raw is True or str(_urm_raw).lower() == "true"
         if use_random_map:
-            from src.run.map_generator import generate_map as _gen_map
+            from src.run.map_cache import load_or_generate_map
             _map_seed_str = str(getattr(CONFIG.game, "map_seed", "") or "").strip()
             _map_seed = int(_map_seed_str) if _map_seed_str.lstrip("-").isdigit() else random.randint(0, 2**31 - 1)
             _map_width = int(getattr(CONFIG.game, "map_width", 160))
@@ -395,7 +611,8 @@ async def init_game_async():
             print(f"随机地图：seed={_map_seed}, size={_map_width}x{_map_height}")
             _existed_sects_ref = existed_sects  # 闭包引用
             def _gen_map_sync():
-                result_map, _ = _gen_map(
+                # 同时写入布局缓存，之后读档时无需重新生成
+                result_map, _ = load_or_generate_map(
                     width=_map_width,
                     height=_map_height,
                     seed=_map_seed,
@@ -477,6 +694,7 @@ async def init_game_async():
         world.avatar_manager.avatars.update(final_avatars)
         game_instance["world"] = world
         game_instance["sim"] = sim
+        attach_read_model(sim, world)
 
         # 阶段 5: LLM 连通性检测
         update_init_progress(5, "checking_llm")
@@ -522,6 +740,91 @@ async def init_game_async():
 
 
 
+def build_legacy_tick(world: World, events_payload: List[dict]) -> dict:
+    """旧协议的 "tick" 消息：新生/死亡角色的完整信息 + 前 50 个角色的位置 + 全部秘境"""
+    # 获取状态变更 (Source of Truth: AvatarManager)
+    newly_born_ids = world.avatar_manager.pop_newly_born()
+    newly_dead_ids = world.avatar_manager.pop_newly_dead()
+
+    avatar_updates = []
+
+    # 为了避免重复发送大量数据，我们区分处理：
+    # - 新角色/刚死角色：发送完整数据（或关键状态更新）
+    # - 旧角色：只发送位置 (x, y)（限制数量）
+
+    # 1. 发送新角色的完整信息
+    for aid in newly_born_ids:
+        a = world.avatar_manager.avatars.get(aid)
+        if a:
+            avatar_updates.append({
+                "id": str(a.id),
+                "name": a.name,
+                "x": int(getattr(a, "pos_x", 0)),
+                "y": int(getattr(a, "pos_y", 0)),
+                "gender": a.gender.value,
+                "pic_id": resolve_avatar_pic_id(a),
+                "action": a.current_action_name,
+                "action_emoji": resolve_avatar_action_emoji(a),
+                "is_dead": False
+            })
+
+    # 2. 发送刚死角色的状态更新
+    for aid in newly_dead_ids:
+        # 使用 get_avatar 以兼容死者查询
+        a = world.avatar_manager.get_avatar(aid)
+        if a:
+            avatar_updates.append({
+                "id": str(a.id),
+                "name": a.name, # 名字也带上，防止前端没数据
+                "is_dead": True,
+                "action": "已故"
+            })
+
+    # 3. 常规位置更新（暂时只发前 50 个旧角色，减少数据量）
+    limit = 50
+    count = 0
+    # 只遍历活人更新位置
+    for a in world.avatar_manager.get_living_avatars():
+        # 如果是新角色，已经在上面处理过了，跳过
+        if a.id in newly_born_ids:
+            continue
+
+        if count < limit:
+            avatar_updates.append({
+                "id": str(a.id), 
+                "x": int(getattr(a, "pos_x", 0)), 
+                "y": int(getattr(a, "pos_y", 0)),
+                "action_emoji": resolve_avatar_action_emoji(a)
+            })
+            count += 1
+
+    # 构造广播数据包
+    state = {
+        "type": "tick",
+        "year": int(world.month_stamp.get_year()),
+        "month": world.month_stamp.get_month().value,
+        "events": events_payload,
+        "avatars": avatar_updates,
+        "phenomenon": serialize_phenomenon(world.current_phenomenon),
+        "active_domains": serialize_active_domains(world)
+    }
+    return state
+
+
+def publish_tick(world: World, events: List[Event]):
+    """把本月结果放入各连接的发送队列（增量帧每月都编码，以保持已下发状态连续）"""
+    events_payload = serialize_events_for_client(events)
+    frame = tick_stream.encode(world, events_payload)
+    if manager.has_protocol(PROTOCOL_LEGACY):
+        legacy = build_legacy_tick(world, events_payload)
+    else:
+        # 没有旧协议客户端时不构造旧消息，但新生/死亡列表仍需清空
+        world.avatar_manager.pop_newly_born()
+        world.avatar_manager.pop_newly_dead()
+        legacy = None
+    manager.publish_tick(legacy, frame, world)
+
+
 async def game_loop():
     """后台自动运行游戏循环。"""
     print("后台游戏循环已启动，等待初始化完成...")
@@ -537,92 +840,35 @@ async def game_loop():
     print("[game_loop] 初始化完成，开始游戏循环。")
     
     while True:
-        # 控制游戏速度，例如每秒 1 次更新
-        await asyncio.sleep(1.0)
+        # 控制游戏速度：按 tick_scheduler 的节奏等到下一步的截止时间
+        await tick_scheduler.wait()
         
         try:
             # 检查暂停状态
             if game_instance.get("is_paused", False):
+                tick_scheduler.pause()
                 continue
             
             # 再次检查初始化状态（可能被重新初始化）
             if game_instance.get("init_status") != "ready":
+                tick_scheduler.pause()
                 continue
 
             sim = game_instance.get("sim")
             world = game_instance.get("world")
             
             if sim and world:
-                # 执行一步
-                events = await sim.step()
-                
-                # 获取状态变更 (Source of Truth: AvatarManager)
-                newly_born_ids = world.avatar_manager.pop_newly_born()
-                newly_dead_ids = world.avatar_manager.pop_newly_dead()
-
-                avatar_updates = []
-                
-                # 为了避免重复发送大量数据，我们区分处理：
-                # - 新角色/刚死角色：发送完整数据（或关键状态更新）
-                # - 旧角色：只发送位置 (x, y)（限制数量）
+                # 执行一步（持有步进锁，后台存档只在两步之间做快照）
+                async with job_manager.step_lock():
+                    tick_scheduler.begin_step()
+                    try:
+                        events = await sim.step()
+                    finally:
+                        tick_scheduler.end_step()
                 
-                # 1. 发送新角色的完整信息
-                for aid in newly_born_ids:
-                    a = world.avatar_manager.avatars.get(aid)
-                    if a:
-                        avatar_updates.append({
-                            "id": str(a.id),
-                            "name": a.name,
-                            "x": int(getattr(a, "pos_x", 0)),
-                            "y": int(getattr(a, "pos_y", 0)),
-                            "gender": a.gender.value,
-                            "pic_id": resolve_avatar_pic_id(a),
-                            "action": a.current_action_name,
-                            "action_emoji": resolve_avatar_action_emoji(a),
-                            "is_dead": False
-                        })
-
-                # 2. 发送刚死角色的状态更新
-                for aid in newly_dead_ids:
-                    # 使用 get_avatar 以兼容死者查询
-                    a = world.avatar_manager.get_avatar(aid)
-                    if a:
-                        avatar_updates.append({
-                            "id": str(a.id),
-                            "name": a.name, # 名字也带上，防止前端没数据
-                            "is_dead": True,
-                            "action": "已故"
-                        })
-
-                # 3. 常规位置更新（暂时只发前 50 个旧角色，减少数据量）
-                limit = 50
-                count = 0
-                # 只遍历活人更新位置
-                for a in world.avatar_manager.get_living_avatars():
-                    # 如果是新角色，已经在上面处理过了，跳过
-                    if a.id in newly_born_ids:
-                        continue
-                        
-                    if count < limit:
-                        avatar_updates.append({
-                            "id": str(a.id), 
-                            "x": int(getattr(a, "pos_x", 0)), 
-                            "y": int(getattr(a, "pos_y", 0)),
-                            "action_emoji": resolve_avatar_action_emoji(a)
-                        })
-                        count += 1
-
-                # 构造广播数据包
-                state = {
-                    "type": "tick",
-                    "year": int(world.month_stamp.get_year()),
-                    "month": world.month_stamp.get_month().value,
-                    "events": serialize_events_for_client(events),
-                    "avatars": avatar_updates,
-                    "phenomenon": serialize_phenomenon(world.current_phenomenon),
-                    "active_domains": serialize_active_domains(world)
-                }
-                await manager.broadcast(state)
+                publish_tick(world, events)
+            else:
+                tick_scheduler.pause()
         except Exception as e:
             from src.run.log import get_logger
             print(f"Game loop error: {e}")
@@ -703,6 +949,8 @@ async def lifespan(app: FastAPI):
     yield
     
     # 关闭时清理
+    await reset_transports()
+
     if npm_process:
         print("正在关闭前端开发服务...")
         try:
@@ -757,14 +1005,42 @@ print(f"Web dist path: {WEB_DIST_PATH}")
 
 # (read_root removed to allow StaticFiles to handle /)
 
+def handle_client_message(websocket: WebSocket, data: str):
+    """
+    处理客户端发来的 JSON 指令（仅增量协议）：
+    - resync：请求全量快照
+    - subscribe：订阅视口/关注角色，见 src/server/tick_stream.py
+    """
+    import json
+    try:
+        message = json.loads(data)
+    except ValueError:
+        return
+    if not isinstance(message, dict):
+        return
+    channel = manager.channels.get(websocket)
+    if channel is None or channel.protocol != PROTOCOL_DELTA:
+        return
+    if message.get("type") == "resync":
+        channel.request_snapshot()
+    elif message.get("type") == "subscribe":
+        try:
+            subscription = Subscription.from_message(message)
+        except (KeyError, TypeError, ValueError) as e:
+            print(f"Invalid subscribe message: {e}")
+            return
+        channel.subscribe(subscription)
+
+
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
-    await manager.connect(websocket)
+    protocol = PROTOCOL_DELTA if websocket.query_params.get("protocol") == PROTOCOL_DELTA else PROTOCOL_LEGACY
+    await manager.connect(websocket, protocol)
     
     # ===== 检查 LLM 状态并通知前端 =====
     if game_instance.get("llm_check_failed", False):
         error_msg = game_instance.get("llm_error_message", "LLM 连接失败")
-        await websocket.send_json({
+        await manager.send_control(websocket, {
             "type": "llm_config_required",
             "error": error_msg
         })
@@ -773,11 +1049,13 @@ async def websocket_endpoint(websocket: WebSocket):
     
     try:
         while True:
-            # 保持连接活跃，接收客户端指令（目前暂不处理复杂指令）
+            # 保持连接活跃，接收客户端指令
             data = await websocket.receive_text()
             # echo test
             if data == "ping":
-                await websocket.send_text('{"type":"pong"}')
+                await manager.send_control(websocket, {"type": "pong"})
+                continue
+            handle_client_message(websocket, data)
     except WebSocketDisconnect:
         manager.disconnect(websocket)
     except Exception as e:
@@ -801,44 +1079,26 @@ def get_state():
         # 2. 时间检查
         y = 0
         m = 0
+        snapshot = read_model_store.current_for(world)
         try:
-            y = int(world.month_stamp.get_year())
-            m = int(world.month_stamp.get_month().value)
+            if snapshot is not None:
+                y, m = snapshot.year, snapshot.month
+            else:
+                y = int(world.month_stamp.get_year())
+                m = int(world.month_stamp.get_month().value)
         except Exception as e:
             return {"step": 2, "error": str(e)}
 
-        # 3. 角色列表检查
-        av_list = []
+        # 3. 角色列表（优先读取只读快照）
         try:
-            raw_avatars = list(world.avatar_manager.avatars.values())[:50] # 缩小范围
-            for a in raw_avatars:
-                # 极其保守的取值
-                aid = str(getattr(a, "id", "no_id"))
-                aname = str(getattr(a, "name", "no_name"))
-                # 修正：使用 pos_x/pos_y
-                ax = int(getattr(a, "pos_x", 0))
-                ay = int(getattr(a, "pos_y", 0))
-                aaction = "unknown"
-                
-                # 动作检查
-                curr = getattr(a, "current_action", None)
-                if curr:
-                     act = getattr(curr, "action", None)
-                     if act:
-                         aaction = getattr(act, "name", "unnamed_action")
-                     else:
-                         aaction = str(curr)
-                
-                av_list.append({
-                    "id": aid,
-                    "name": aname,
-                    "x": ax,
-                    "y": ay,
-                    "action": str(aaction),
-                    "action_emoji": resolve_avatar_action_emoji(a),
-                    "gender": str(a.gender.value),
-                    "pic_id": resolve_avatar_pic_id(a)
-                })
+            if snapshot is not None:
+                av_list = snapshot.sections["state_avatars"]
+                avatar_count = snapshot.sections["avatar_count"]
+                phenomenon = snapshot.sections["phenomenon"]
+            else:
+                av_list = serialize_state_avatars(world)
+                avatar_count = len(world.avatar_manager.avatars)
+                phenomenon = serialize_phenomenon(world.current_phenomenon)
         except Exception as e:
             return {"step": 3, "error": str(e)}
 
@@ -854,11 +1114,12 @@ def get_state():
             "status": "ok",
             "year": y,
             "month": m,
-            "avatar_count": len(world.avatar_manager.avatars),
+            "avatar_count": avatar_count,
             "avatars": av_list,
             "events": recent_events,
-            "phenomenon": serialize_phenomenon(world.current_phenomenon),
-            "is_paused": game_instance.get("is_paused", False)
+            "phenomenon": phenomenon,
+            "is_paused": game_instance.get("is_paused", False),
+            **snapshot_fields(snapshot),
         }
 
     except Exception as e:
@@ -939,63 +1200,38 @@ def cleanup_events(
 
 
 @app.get("/api/map")
-def get_map():
-    """获取静态地图数据（仅需加载一次）"""
+def get_map(
+    encoding: str = Query("grid", description="grid | rle | raster"),
+    if_none_match: Optional[str] = Header(None),
+):
+    """
+    获取静态地图数据（仅需加载一次）。
+    响应体按地图版本缓存，支持 ETag / If-None-Match；encoding 见 src/server/map_payload.py。
+    """
     world = game_instance.get("world")
     if not world or not world.map:
         return {"error": "No map"}
-    
-    # 构造二维数组
-    w, h = world.map.width, world.map.height
-    map_data = []
-    for y in range(h):
-        row = []
-        for x in range(w):
-            tile = world.map.get_tile(x, y)
-            row.append(tile.type.name)
-        map_data.append(row)
-        
-    # 构造区域列表
-    regions_data = []
-    if world.map and hasattr(world.map, 'regions'):
-        for r in world.map.regions.values():
-            # 确保有中心点
-            if hasattr(r, 'center_loc') and r.center_loc:
-                rtype = "unknown"
-                if hasattr(r, 'get_region_type'):
-                    rtype = r.get_region_type()
-                
-            region_dict = {
-                "id": r.id,
-                "name": r.name,
-                "type": rtype,
-                "x": r.center_loc[0],
-                "y": r.center_loc[1]
-            }
-            # 如果是宗门区域，传递 sect_id 用于前端加载图片资源
-            if hasattr(r, 'sect_id'):
-                region_dict["sect_id"] = r.sect_id
-            
-            # 如果是修炼区域（洞府/遗迹），传递 sub_type
-            if hasattr(r, 'sub_type'):
-                region_dict["sub_type"] = r.sub_type
-            
-            regions_data.append(region_dict)
-        
-    return {
-        "width": w,
-        "height": h,
-        "data": map_data,
-        "regions": regions_data,
-        "config": CONFIG.get("frontend", {})
-    }
+    if encoding not in MAP_ENCODINGS:
+        raise HTTPException(status_code=400, detail=f"Unknown encoding: {encoding}")
+
+    body, etag = map_payload_cache.get(
+        world.map,
+        encoding,
+        language=str(language_manager),
+        frontend_config=CONFIG.get("frontend", {}),
+    )
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
 
 
 @app.post("/api/control/reset")
-def reset_game():
+async def reset_game():
     """重置游戏到 Idle 状态（回到主菜单）"""
     game_instance["world"] = None
-    game_instance["sim"] = None
+    discard_sim()
+    publish_read_model(None)
     game_instance["is_paused"] = True
     game_instance["init_status"] = "idle"
     game_instance["init_phase"] = 0
@@ -1015,6 +1251,31 @@ def resume_game():
     game_instance["is_paused"] = False
     return {"status": "ok", "message": "Game resumed"}
 
+class SpeedRequest(BaseModel):
+    months_per_second: Optional[float] = None
+    max_speed: Optional[bool] = None
+    catch_up: Optional[str] = None
+    max_burst: Optional[int] = None
+
+@app.get("/api/control/speed")
+async def get_speed():
+    """游戏循环的节奏设置与调度延迟（lag）统计"""
+    return tick_scheduler.status()
+
+@app.post("/api/control/speed")
+async def set_speed(req: SpeedRequest):
+    """调整游戏循环的目标速度 / 全速模式 / 落后时的补跑策略，立即生效"""
+    try:
+        tick_scheduler.configure(
+            months_per_second=req.months_per_second,
+            max_speed=req.max_speed,
+            catch_up=req.catch_up,
+            max_burst=req.max_burst,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"status": "ok", **tick_scheduler.status()}
+
 @app.post("/api/control/shutdown")
 async def shutdown_server():
     def _shutdown():
@@ -1094,6 +1355,59 @@ def get_llm_status():
         "configured": bool(key and base_url)
     }
 
+@app.get("/api/llm/cache/stats")
+def get_llm_cache_stats():
+    """获取 LLM 响应缓存的命中统计"""
+    return get_cache_stats()
+
+# (指标名, status 中的键, 类型, 说明)
+SCHEDULER_METRICS = (
+    ("tick_lag_seconds", "lag_s", "gauge", "Delay between the scheduled and actual start of the last step."),
+    ("tick_max_lag_seconds", "max_lag_s", "gauge", "Largest step start delay seen by the scheduler."),
+    ("tick_target_months_per_second", "months_per_second", "gauge", "Target simulation speed (ignored in max speed mode)."),
+    ("tick_actual_months_per_second", "actual_months_per_second", "gauge", "Measured simulation speed over recent steps."),
+    ("tick_skipped_total", "skipped_ticks", "counter", "Scheduled ticks dropped because the loop fell behind."),
+)
+DECISION_PIPELINE_METRICS = (
+    ("decision_prefetched_total", "prefetched", "counter", "Decisions requested ahead of time for avatars about to become idle."),
+    ("decision_prefetch_hits_total", "hits", "counter", "Idle avatars served from a prefetched decision."),
+    ("decision_prefetch_misses_total", "misses", "counter", "Idle avatars decided synchronously."),
+    ("decision_prefetch_wasted_total", "wasted", "counter", "Prefetched decisions discarded as stale, invalid or failed."),
+    ("decision_prefetch_waited_total", "waited", "counter", "Idle avatars whose prefetched decision was still in flight."),
+    ("decision_prefetch_hit_ratio", "hit_ratio", "gauge", "Share of idle-avatar decisions served from prefetch."),
+    ("decision_prefetch_waste_ratio", "waste_ratio", "gauge", "Share of prefetched decisions that were discarded."),
+)
+
+
+def status_prometheus(status: dict, metrics: tuple) -> str:
+    """把状态字典按 metrics 定义转为 Prometheus 文本"""
+    lines = []
+    for metric, key, kind, help_text in metrics:
+        value = status.get(key)
+        lines += [f"# HELP cws_{metric} {help_text}", f"# TYPE cws_{metric} {kind}", f"cws_{metric} {value if value is not None else 0}"]
+    return "\n".join(lines) + "\n"
+
+@app.get("/api/metrics")
+async def get_metrics(format: str = Query("prometheus")):
+    """Simulator 分阶段耗时、步进节奏与流水线决策统计：默认 Prometheus 文本格式，format=json 返回 JSON"""
+    sim = game_instance.get("sim")
+    profiler = getattr(sim, "profiler", None) if sim is not None else None
+    pipeline = getattr(sim, "decision_pipeline", None) if sim is not None else None
+    if format == "json":
+        return {
+            "enabled": profiler is not None,
+            **(profiler.to_dict() if profiler is not None else {}),
+            "scheduler": tick_scheduler.status(),
+            "decision_pipeline": pipeline.stats() if pipeline is not None else None,
+        }
+    if format != "prometheus":
+        raise HTTPException(status_code=400, detail=f"Unknown format: {format}")
+    body = profiler.to_prometheus() if profiler is not None else "# step profiling disabled or no simulation running\n"
+    body += status_prometheus(tick_scheduler.status(), SCHEDULER_METRICS)
+    if pipeline is not None:
+        body += status_prometheus(pipeline.stats(), DECISION_PIPELINE_METRICS)
+    return Response(content=body, media_type="text/plain; version=0.0.4; charset=utf-8")
+
 @app.post("/api/game/start")
 async def start_game(req: GameStartRequest):
     """
@@ -1156,7 +1470,8 @@ async def start_game(req: GameStartRequest):
     if current_status == "ready":
         # 清理旧的游戏状态
         game_instance["world"] = None
-        game_instance["sim"] = None
+        discard_sim()
+        publish_read_model(None)
     
     game_instance["init_status"] = "pending"
     game_instance["init_phase"] = 0
@@ -1174,7 +1489,8 @@ async def reinit_game():
     """重新初始化游戏（用于错误恢复）。"""
     # 清理旧的游戏状态
     game_instance["world"] = None
-    game_instance["sim"] = None
+    discard_sim()
+    publish_read_model(None)
     game_instance["init_status"] = "pending"
     game_instance["init_phase"] = 0
     game_instance["init_progress"] = 0
@@ -1187,7 +1503,7 @@ async def reinit_game():
 
 
 @app.get("/api/detail")
-def get_detail_info(
+async def get_detail_info(
     target_type: str = Query(alias="type"),
     target_id: str = Query(alias="id")
 ):
@@ -1359,8 +1675,11 @@ def get_rankings():
     world = game_instance.get("world")
     if not world:
         return {"realm": [], "sect": [], "age": [], "treasure": []}
-    from src.systems.rankings import get_all_rankings
-    return get_all_rankings(world)
+    snapshot = read_model_store.current_for(world)
+    if snapshot is None:
+        from src.systems.rankings import get_all_rankings
+        return get_all_rankings(world)
+    return {**snapshot.sections["rankings"], **snapshot_fields(snapshot)}
 
 
 @app.get("/api/meta/avatar_list")
@@ -1370,23 +1689,10 @@ def get_avatar_list_simple():
     if not world:
         return {"avatars": []}
     
-    result = []
-    for a in world.avatar_manager.avatars.values():
-        sect_name = a.sect.name if a.sect else "散修"
-        realm_str = a.cultivation_progress.realm.value if hasattr(a, 'cultivation_progress') else "未知"
-        
-        result.append({
-            "id": str(a.id),
-            "name": a.name,
-            "sect_name": sect_name,
-            "realm": realm_str,
-            "gender": str(a.gender),
-            "age": a.age.age
-        })
-    
-    # 按名字排序
-    result.sort(key=lambda x: x["name"])
-    return {"avatars": result}
+    snapshot = read_model_store.current_for(world)
+    if snapshot is None:
+        return {"avatars": serialize_avatar_list(world)}
+    return {"avatars": snapshot.sections["avatar_list"], **snapshot_fields(snapshot)}
 
 @app.get("/api/meta/phenomena")
 def get_phenomena_list():
@@ -1418,7 +1724,8 @@ def set_phenomenon(req: SetPhenomenonRequest):
         world.phenomenon_start_year = current_year
     except Exception:
         pass
-    
+
+    publish_read_model(world)
     return {"status": "ok", "message": f"Phenomenon set to {p.name}"}
 
 @app.post("/api/action/create_avatar")
@@ -1501,6 +1808,7 @@ def create_avatar(req: CreateAvatarRequest):
 
         # 注册到管理器
         world.avatar_manager.register_avatar(avatar, is_newly_born=True)
+        publish_read_model(world)
         
         return {
             "status": "ok", 
@@ -1524,6 +1832,7 @@ def delete_avatar(req: DeleteAvatarRequest):
         
     try:
         world.avatar_manager.remove_avatar(req.avatar_id)
+        publish_read_model(world)
         return {"status": "ok", "message": "Avatar deleted"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -1561,6 +1870,7 @@ def set_language_api(req: LanguageRequest):
     if world:
         from src.run.data_loader import fix_runtime_references
         fix_runtime_references(world)
+        publish_read_model(world)
     
     # 5. 持久化到 local_config.yml
     local_config_path = "static/local_config.yml"
@@ -1661,6 +1971,9 @@ async def save_llm_config(req: LLMConfigDTO):
                  CONFIG.ai = OmegaConf.create({})
             CONFIG.ai.max_concurrent_requests = req.max_concurrent_requests
 
+        # 连接池与并发上限按新配置重建
+        await reset_transports()
+
         # 2. Persist to local_config.yml
         # 使用 src/utils/config.py 中类似的路径逻辑
         # 注意：这里我们假设是在项目根目录下运行，或者静态文件路径是相对固定的
@@ -1730,12 +2043,14 @@ def validate_save_name(name: str) -> bool:
 
 class SaveGameRequest(BaseModel):
     custom_name: Optional[str] = None  # 自定义存档名称
+    background: bool = False  # 为 True 时立即返回 job_id，通过 /api/jobs/{job_id} 查询结果
 
 class DeleteSaveRequest(BaseModel):
     filename: str
 
 class LoadGameRequest(BaseModel):
     filename: str
+    background: bool = False  # 同 SaveGameRequest.background
 
 @app.get("/api/saves")
 def get_saves():
@@ -1760,12 +2075,20 @@ def get_saves():
     return {"saves": result}
 
 @app.post("/api/game/save")
-def api_save_game(req: SaveGameRequest):
-    """保存游戏"""
+async def api_save_game(req: SaveGameRequest):
+    """
+    保存游戏（后台任务）。
+
+    在两步之间拍下世界快照后，事件库备份和文件写入都在工作线程中进行，游戏循环照常运行。
+    background 为 True 时立即返回 job_id；否则等待任务完成后返回文件名。
+    """
     world = game_instance.get("world")
     sim = game_instance.get("sim")
     if not world or not sim:
         raise HTTPException(status_code=503, detail="Game not initialized")
+    # 读档会关闭当前世界的事件库，期间不接受存档
+    if job_manager.has_active("load"):
+        raise HTTPException(status_code=409, detail="A game is being loaded")
 
     # 尝试从 world 属性获取（如果以后添加了）。
     existed_sects = getattr(world, "existed_sects", [])
@@ -1781,12 +2104,49 @@ def api_save_game(req: SaveGameRequest):
             detail="Invalid save name"
         )
 
-    # 新存档（不使用 current_save_path，每次创建新文件）。
-    success, filename = save_game(world, sim, existed_sects, custom_name=custom_name)
-    if success:
-        return {"status": "ok", "filename": filename}
-    else:
+    async def run(job: Job) -> dict:
+        job.set_progress("snapshotting")
+        async with job_manager.step_lock():
+            # 排队期间世界已被读档/重置替换（旧世界的事件库可能已关闭）
+            if game_instance.get("world") is not world:
+                raise RuntimeError("World was replaced before the save started")
+            # 新存档（不使用 current_save_path，每次创建新文件）。
+            save_path = resolve_save_path(world, custom_name=custom_name)
+            snapshot = take_save_snapshot(world, sim, existed_sects, save_path, custom_name, detach=True)
+        success, filename = await job_manager.run_in_worker(
+            write_save_snapshot, world, snapshot, job.set_progress
+        )
+        if not success:
+            raise RuntimeError("Save failed")
+        return {"filename": filename, "timings": getattr(world, "_save_stats", {})}
+
+    job = job_manager.submit("save", run)
+    if req.background:
+        return {"status": "accepted", "job_id": job.id}
+
+    await job_manager.wait(job)
+    if job.status != "done":
         raise HTTPException(status_code=500, detail="Save failed")
+    return {"status": "ok", "job_id": job.id, **job.result}
+
+@app.get("/api/game/save/progress")
+def api_save_progress():
+    """查询存档进度（事件库在线备份的已复制页数/总页数）"""
+    from src.sim.save.save_game import get_save_progress
+    return get_save_progress()
+
+@app.get("/api/jobs")
+def api_list_jobs():
+    """列出后台存档/读档任务（最新的在前）"""
+    return {"jobs": [job.to_dict() for job in job_manager.list_jobs()]}
+
+@app.get("/api/jobs/{job_id}")
+def api_get_job(job_id: str):
+    """查询后台任务的状态、进度与结果"""
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
 
 @app.post("/api/game/delete")
 def api_delete_game(req: DeleteSaveRequest):
@@ -1799,7 +2159,7 @@ def api_delete_game(req: DeleteSaveRequest):
         saves_dir = CONFIG.paths.saves
         target_path = saves_dir / req.filename
         
-        # 1. 删除 JSON 存档文件
+        # 1. 删除存档文件（JSON 或 .sav）
         if target_path.exists():
             os.remove(target_path)
             
@@ -1811,7 +2171,14 @@ def api_delete_game(req: DeleteSaveRequest):
             except Exception as e:
                 print(f"[Warning] Failed to delete db file {events_db_path}: {e}")
                 
-        # 3. 删除可能存在的其他关联文件（如果有）
+        # 3. 删除 WAL 模式下可能残留的日志文件
+        for suffix in ("-wal", "-shm"):
+            sidecar = Path(str(events_db_path) + suffix)
+            if sidecar.exists():
+                try:
+                    os.remove(sidecar)
+                except Exception as e:
+                    print(f"[Warning] Failed to delete db file {sidecar}: {e}")
         
         return {"status": "ok", "message": "Save deleted"}
     except Exception as e:
@@ -1821,17 +2188,27 @@ def api_delete_game(req: DeleteSaveRequest):
 
 @app.post("/api/game/load")
 async def api_load_game(req: LoadGameRequest):
-    """加载游戏（异步，支持进度更新）。"""
+    """
+    加载游戏（后台任务，支持进度更新）。
+
+    读档解析与状态恢复在工作线程中执行，期间 WebSocket 广播与其他接口照常响应。
+    background 为 True 时立即返回 job_id；否则等待任务完成。
+    """
     # 安全检查：只允许加载 saves 目录下的文件
     if ".." in req.filename or "/" in req.filename or "\\" in req.filename:
          raise HTTPException(status_code=400, detail="Invalid filename")
-    
-    try:
-        saves_dir = CONFIG.paths.saves
-        target_path = saves_dir / req.filename
-        
-        if not target_path.exists():
-            raise HTTPException(status_code=404, detail="File not found")
+
+    saves_dir = CONFIG.paths.saves
+    target_path = saves_dir / req.filename
+
+    if not target_path.exists():
+        raise HTTPException(status_code=404, detail="File not found")
+
+    async def run(job: Job) -> dict:
+        def set_phase(name: str, progress: int) -> None:
+            game_instance["init_phase_name"] = name
+            game_instance["init_progress"] = progress
+            job.set_progress(name, progress, 100)
 
         # --- 语言环境自动切换 ---
         from src.sim import get_save_info
@@ -1888,35 +2265,39 @@ async def api_load_game(req: LoadGameRequest):
         game_instance["init_start_time"] = time.time()
         game_instance["init_error"] = None
         game_instance["init_phase"] = 0
-        
+
         # 0. 扫描资源 (修复读取存档不加载头像的问题)
-        game_instance["init_phase_name"] = "scanning_assets"
+        set_phase("scanning_assets", 0)
         await asyncio.to_thread(scan_avatar_assets)
 
-        game_instance["init_phase_name"] = "loading_save"
-        game_instance["init_progress"] = 10
+        set_phase("loading_save", 10)
 
-        # 暂停游戏，防止 game_loop 在加载过程中使用旧 world 生成事件。
+        # 暂停游戏，防止 game_loop 在加载过程中使用旧 world 生成事件；
+        # 拿到步进锁说明正在进行的一步已经结束。
         game_instance["is_paused"] = True
-        await asyncio.sleep(0)  # 让出控制权
-
-        # 更新进度
-        game_instance["init_progress"] = 30
-        game_instance["init_phase_name"] = "parsing_data"
-        await asyncio.sleep(0)
-
-        # 关闭旧 World 的 EventManager，释放 SQLite 连接。
-        old_world = game_instance.get("world")
+        async with job_manager.step_lock():
+            # 更新进度
+            set_phase("parsing_data", 30)
+
+            # 先把全局实例切到加载中（无世界）状态，再关闭旧世界的存储：
+            # 之后的存档请求与排队中的存档任务都不会再拿到这个世界
+            old_world = game_instance.get("world")
+            game_instance["world"] = None
+            discard_sim()
+            publish_read_model(None)
+
+        # 已拍下快照的存档仍在工作线程中读取旧世界的事件库（在线备份），
+        # 排队中的存档拿到步进锁后会因世界已被替换而放弃；
+        # 等它们全部结束后再关闭旧 World 的 EventManager，释放 SQLite 连接。
+        await job_manager.wait_kind("save")
         if old_world and hasattr(old_world, "event_manager"):
             old_world.event_manager.close()
 
-        # 加载
-        new_world, new_sim, new_sects = load_game(target_path)
+        # 加载（解析与恢复在工作线程中执行，不阻塞事件循环）
+        new_world, new_sim, new_sects = await job_manager.run_in_worker(load_game, target_path)
         
         # 更新进度
-        game_instance["init_progress"] = 70
-        game_instance["init_phase_name"] = "restoring_state"
-        await asyncio.sleep(0)
+        set_phase("restoring_state", 70)
 
         # 确保挂载 existed_sects 以便下次保存
         new_world.existed_sects = new_sects
@@ -1924,28 +2305,39 @@ async def api_load_game(req: LoadGameRequest):
         # 替换全局实例
         game_instance["world"] = new_world
         game_instance["sim"] = new_sim
+        attach_read_model(new_sim, new_world)
         game_instance["current_save_path"] = target_path
 
         # 更新进度
-        game_instance["init_progress"] = 90
-        game_instance["init_phase_name"] = "finalizing"
-        await asyncio.sleep(0)
+        set_phase("finalizing", 90)
 
         # 加载完成
         game_instance["init_status"] = "ready"
-        game_instance["init_progress"] = 100
-        game_instance["init_phase_name"] = "complete"
+        set_phase("complete", 100)
         
         # 加载完成后保持暂停状态，让用户决定何时恢复。
         # 这也给前端时间来刷新状态。
         
-        return {"status": "ok", "message": "Game loaded"}
-    except Exception as e:
-        import traceback
-        traceback.print_exc()
-        game_instance["init_status"] = "error"
-        game_instance["init_error"] = str(e)
-        raise HTTPException(status_code=500, detail=f"Load failed: {str(e)}")
+        return {"message": "Game loaded", "timings": getattr(new_world, "_load_stats", {})}
+
+    async def run_and_record(job: Job) -> dict:
+        try:
+            return await run(job)
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            game_instance["init_status"] = "error"
+            game_instance["init_error"] = str(e)
+            raise
+
+    job = job_manager.submit("load", run_and_record)
+    if req.background:
+        return {"status": "accepted", "job_id": job.id}
+
+    await job_manager.wait(job)
+    if job.status != "done":
+        raise HTTPException(status_code=500, detail=f"Load failed: {job.error}")
+    return {"status": "ok", "job_id": job.id, **job.result}
 
 # --- 静态文件挂载 (必须放在最后) ---
 
@@ -0,0 +1,122 @@
+"""
+/api/map 的静态地图数据
+
+地图在初始化后基本不变（只有历史修改会改区域名称），所以响应体按 (地图 uid, 地图版本, 语言, 前端配置)
+只构造并序列化一次，之后直接返回缓存的字节串；ETag 为响应体的摘要，客户端带 If-None-Match 时可得到 304。
+
+编码方式（encoding 参数）：
+- grid：data 为二维数组，每格是地形名称（默认，兼容旧前端）
+- rle：palette 为地形名称表，runs 为整张地图按行优先展开后的游程 [编码, 长度, 编码, 长度, ...]
+- raster：palette 同上，data 为按行优先排列的 uint8 编码（base64）
+
+rle/raster 中编码 NO_TILE_CODE(255) 表示该格尚未创建地块。
+"""
+from __future__ import annotations
+
+import base64
+import hashlib
+import json
+from itertools import groupby
+from typing import TYPE_CHECKING, Optional
+
+from omegaconf import DictConfig, OmegaConf
+
+from src.classes.environment.map import NO_TILE_CODE
+from src.classes.environment.tile import TILE_TYPES
+
+if TYPE_CHECKING:
+    from src.classes.environment.map import Map
+
+MAP_ENCODINGS = ("grid", "rle", "raster")
+
+
+def _serialize_regions(game_map: "Map") -> list[dict]:
+    regions_data = []
+    for r in game_map.regions.values():
+        # 只下发有中心点的区域
+        if not getattr(r, "center_loc", None):
+            continue
+        region_dict = {
+            "id": r.id,
+            "name": r.name,
+            "type": r.get_region_type() if hasattr(r, "get_region_type") else "unknown",
+            "x": r.center_loc[0],
+            "y": r.center_loc[1],
+        }
+        # 如果是宗门区域，传递 sect_id 用于前端加载图片资源
+        if hasattr(r, "sect_id"):
+            region_dict["sect_id"] = r.sect_id
+        # 如果是修炼区域（洞府/遗迹），传递 sub_type
+        if hasattr(r, "sub_type"):
+            region_dict["sub_type"] = r.sub_type
+        regions_data.append(region_dict)
+    return regions_data
+
+
+def _run_length(codes: bytes) -> list[int]:
+    runs: list[int] = []
+    for code, group in groupby(codes):
+        runs.append(code)
+        runs.append(sum(1 for _ in group))
+    return runs
+
+
+def build_map_payload(game_map: "Map", encoding: str = "grid", frontend_config: Optional[dict] = None) -> dict:
+    """构造 /api/map 的响应数据"""
+    if encoding not in MAP_ENCODINGS:
+        raise ValueError(f"Unknown map encoding: {encoding}")
+
+    payload = {
+        "width": game_map.width,
+        "height": game_map.height,
+        "encoding": encoding,
+    }
+    if encoding == "grid":
+        payload["data"] = [[t.name if t is not None else None for t in row] for row in game_map.tile_type_rows()]
+    else:
+        payload["palette"] = [t.name for t in TILE_TYPES]
+        payload["empty_code"] = NO_TILE_CODE
+        codes = game_map.tile_codes()
+        if encoding == "rle":
+            payload["runs"] = _run_length(codes)
+        else:
+            payload["data"] = base64.b64encode(codes).decode("ascii")
+    payload["regions"] = _serialize_regions(game_map)
+    payload["config"] = frontend_config or {}
+    return payload
+
+
+class MapPayloadCache:
+    """按地图版本缓存序列化后的 /api/map 响应体"""
+
+    def __init__(self):
+        self._key: Optional[tuple] = None
+        self._entries: dict[str, tuple[bytes, str]] = {}
+
+    def get(self, game_map: "Map", encoding: str = "grid", language: str = "", frontend_config=None) -> tuple[bytes, str]:
+        """
+        Returns:
+            (JSON 响应体, ETag)
+        """
+        if isinstance(frontend_config, DictConfig):
+            frontend_config = OmegaConf.to_container(frontend_config, resolve=True)
+        config_json = json.dumps(frontend_config or {}, sort_keys=True, ensure_ascii=False)
+        key = (game_map.uid, game_map.version, language, config_json)
+        if key != self._key:
+            self._key = key
+            self._entries = {}
+
+        entry = self._entries.get(encoding)
+        if entry is None:
+            payload = build_map_payload(game_map, encoding, frontend_config)
+            body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            etag = '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+            entry = self._entries[encoding] = (body, etag)
+        return entry
+
+    def clear(self) -> None:
+        self._key = None
+        self._entries = {}
+
+
+map_payload_cache = MapPayloadCache()
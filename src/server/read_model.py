@@ -0,0 +1,77 @@
+"""
+只读快照（read model）
+
+/api/state、/api/meta/avatar_list、/api/meta/rankings 等同步接口由 FastAPI 在线程池中执行，
+直接遍历 world.avatar_manager.avatars 会与事件循环上正在执行的 Simulator.step 并发读写
+（"dict changed size during iteration"）。
+
+因此每步结束时（Simulator._finalize_step 末尾的回调，运行在事件循环上）把这些接口需要的数据
+构造成一份不可变的快照并整体替换引用；读接口只读取当前快照，无需加锁，也不会阻塞步进。
+快照带有版本号与发布时间，响应里附带 snapshot_age_ms。
+
+修改世界的接口（创建/删除角色、设置天地灵机等）在修改后重新发布，避免暂停期间读到旧数据。
+"""
+from __future__ import annotations
+
+import time
+import weakref
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Callable, Optional
+
+if TYPE_CHECKING:
+    from src.classes.core.world import World
+
+
+@dataclass(frozen=True)
+class ReadModel:
+    """某个世界在某一时刻的只读数据"""
+    version: int
+    year: int
+    month: int
+    # 各接口所需的数据，键为 section 名称
+    sections: dict[str, Any]
+    published_at: float = field(default_factory=time.monotonic)
+    _world: Optional[weakref.ref] = field(default=None, repr=False, compare=False)
+
+    def belongs_to(self, world: "World") -> bool:
+        return self._world is not None and self._world() is world
+
+    def age_ms(self) -> float:
+        return round((time.monotonic() - self.published_at) * 1000, 1)
+
+
+class ReadModelStore:
+    """
+    当前快照的持有者。publish 在事件循环上构造新快照后整体替换引用，读者直接取引用。
+
+    Args:
+        builders: section 名称 -> 构造函数（接收 world，返回可 JSON 序列化的数据）
+    """
+
+    def __init__(self, builders: dict[str, Callable[["World"], Any]]):
+        self._builders = builders
+        self._current: Optional[ReadModel] = None
+        self._version = 0
+
+    def publish(self, world: "World") -> ReadModel:
+        sections = {name: build(world) for name, build in self._builders.items()}
+        self._version += 1
+        model = ReadModel(
+            version=self._version,
+            year=int(world.month_stamp.get_year()),
+            month=int(world.month_stamp.get_month().value),
+            sections=sections,
+            _world=weakref.ref(world),
+        )
+        self._current = model
+        return model
+
+    def current_for(self, world: "World") -> Optional[ReadModel]:
+        """world 的最新快照；尚未发布过（或已换了世界）时返回 None"""
+        model = self._current
+        if model is not None and model.belongs_to(world):
+            return model
+        return None
+
+    def clear(self) -> None:
+        self._current = None
@@ -0,0 +1,175 @@
+"""
+game_loop 的步进节奏控制
+
+按截止时间（而非每步前固定 sleep）调度：目标速度为 months_per_second 时，相邻两步的开始时间间隔
+为 1 / months_per_second，步进本身的耗时计入间隔内。max_speed 时不等待（只让出一次事件循环）。
+
+某步结束时已错过下一步的截止时间时：
+- skip：丢弃错过的节拍，立即开始下一步，之后仍按原节拍网格推进（不补跑）
+- burst：连续补跑错过的节拍，最多积压 max_burst 个，超出部分丢弃
+
+lag（实际开始时间 - 截止时间）、丢弃的节拍数与实际速度通过 status() 暴露给 API。
+"""
+from __future__ import annotations
+
+import asyncio
+import math
+import time
+from collections import deque
+from typing import Callable, Optional
+
+CATCH_UP_MODES = ("skip", "burst")
+# 暂停 / 未初始化时轮询的间隔（秒）
+IDLE_POLL_SECONDS = 0.25
+# 计算实际速度、平均 lag 时保留的最近步数
+RECENT_STEPS = 30
+
+
+class TickScheduler:
+    """
+    Args:
+        months_per_second: 目标速度（每秒推进的月数）
+        max_speed: 为 True 时忽略目标速度，尽快推进
+        catch_up: 落后时的策略，见 CATCH_UP_MODES
+        max_burst: burst 模式下最多补跑的节拍数
+        clock: 单调时钟（测试可替换）
+    """
+
+    def __init__(
+        self,
+        months_per_second: float = 1.0,
+        max_speed: bool = False,
+        catch_up: str = "skip",
+        max_burst: int = 3,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.months_per_second = 1.0
+        self.max_speed = False
+        self.catch_up = "skip"
+        self.max_burst = 3
+        self._clock = clock
+        self._changed = asyncio.Event()
+        self._next_due: Optional[float] = None
+        self._step_started: Optional[float] = None
+        self.steps = 0
+        self.skipped = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.last_step_s = 0.0
+        self._recent_starts: deque[float] = deque(maxlen=RECENT_STEPS)
+        self._recent_lags: deque[float] = deque(maxlen=RECENT_STEPS)
+        self.configure(months_per_second=months_per_second, max_speed=max_speed, catch_up=catch_up, max_burst=max_burst)
+
+    @property
+    def interval(self) -> float:
+        return 0.0 if self.max_speed else 1.0 / self.months_per_second
+
+    def configure(
+        self,
+        months_per_second: Optional[float] = None,
+        max_speed: Optional[bool] = None,
+        catch_up: Optional[str] = None,
+        max_burst: Optional[int] = None,
+    ) -> None:
+        """修改节奏参数（任一参数非法时抛 ValueError 且不做修改），并唤醒正在等待的循环按新节奏重新计算"""
+        if months_per_second is not None:
+            months_per_second = float(months_per_second)
+            if not math.isfinite(months_per_second) or months_per_second <= 0:
+                raise ValueError("months_per_second must be a positive number")
+        if catch_up is not None and catch_up not in CATCH_UP_MODES:
+            raise ValueError(f"catch_up must be one of {CATCH_UP_MODES}")
+        if max_burst is not None and int(max_burst) < 0:
+            raise ValueError("max_burst must be >= 0")
+
+        if months_per_second is not None:
+            self.months_per_second = months_per_second
+        if max_speed is not None:
+            self.max_speed = bool(max_speed)
+        if catch_up is not None:
+            self.catch_up = catch_up
+        if max_burst is not None:
+            self.max_burst = int(max_burst)
+        if self._next_due is not None and self._step_started is None:
+            # 按新间隔从上一步开始时间重新计算截止时间
+            last_start = self._recent_starts[-1] if self._recent_starts else self._clock()
+            self._next_due = last_start + self.interval
+        self._changed.set()
+
+    def pause(self) -> None:
+        """暂停或无可运行的世界：下次 wait 改为轮询，恢复后立即开始，不补跑暂停期间的节拍"""
+        self._next_due = None
+
+    async def wait(self) -> None:
+        """等到下一步的截止时间；暂停中则等待一个轮询间隔"""
+        if self._next_due is None:
+            await self._sleep(IDLE_POLL_SECONDS)
+            self._next_due = self._clock()
+            return
+        while True:
+            delay = self._next_due - self._clock()
+            if delay <= 0:
+                # 让出一次事件循环，max_speed 下也不饿死 API 与 WebSocket
+                await asyncio.sleep(0)
+                return
+            if not await self._sleep(delay):
+                return
+
+    async def _sleep(self, seconds: float) -> bool:
+        """睡眠 seconds 秒；被 configure 提前唤醒时返回 True"""
+        self._changed.clear()
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout=seconds)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def begin_step(self) -> None:
+        now = self._clock()
+        due = self._next_due if self._next_due is not None else now
+        self._step_started = now
+        self.last_lag = max(0.0, now - due)
+        self.max_lag = max(self.max_lag, self.last_lag)
+        self._recent_lags.append(self.last_lag)
+        self._recent_starts.append(now)
+
+    def end_step(self) -> None:
+        now = self._clock()
+        start = self._step_started if self._step_started is not None else now
+        self._step_started = None
+        self.steps += 1
+        self.last_step_s = now - start
+        if self._next_due is None:
+            return
+
+        interval = self.interval
+        if interval <= 0:
+            self._next_due = now
+            return
+        due = self._next_due + interval
+        if now > due:
+            # due 已过期，另有 missed 个节拍也已错过
+            missed = math.floor((now - due) / interval)
+            backlog = self.max_burst if self.catch_up == "burst" else 0
+            drop = max(0, missed - backlog)
+            due += drop * interval
+            self.skipped += drop
+        self._next_due = due
+
+    def status(self) -> dict:
+        starts = list(self._recent_starts)
+        actual = (len(starts) - 1) / (starts[-1] - starts[0]) if len(starts) > 1 and starts[-1] > starts[0] else None
+        lags = list(self._recent_lags)
+        return {
+            "months_per_second": self.months_per_second,
+            "max_speed": self.max_speed,
+            "catch_up": self.catch_up,
+            "max_burst": self.max_burst,
+            "running": self._next_due is not None,
+            "steps": self.steps,
+            "skipped_ticks": self.skipped,
+            "actual_months_per_second": round(actual, 3) if actual is not None else None,
+            "last_step_s": round(self.last_step_s, 4),
+            "lag_s": round(self.last_lag, 4),
+            "avg_lag_s": round(sum(lags) / len(lags), 4) if lags else 0.0,
+            "max_lag_s": round(self.max_lag, 4),
+        }
@@ -0,0 +1,410 @@
+"""
+WebSocket 增量 tick 协议与逐客户端发送队列
+
+客户端以 /ws?protocol=delta 连接时使用增量协议（不带参数时仍是旧的 "tick" 消息）：
+- snapshot：{"type": "snapshot", "seq", "year", "month", "avatars", "phenomenon", "active_domains"}
+  当前已下发状态的全量（连接时、客户端发送 {"type": "resync"} 时、发送队列溢出时下发）
+- tick_delta：{"type": "tick_delta", "seq", "year", "month", "events", "avatars", ...}
+  - avatars 只包含变化的字段（新角色为全部字段，死亡角色为 is_dead）
+  - phenomenon / domains / domains_removed 仅在变化时出现
+  - reset 为 true 时（新游戏/读档后的第一帧）客户端应先清空本地状态
+  - 客户端发现 seq 不连续时应发送 resync
+- 客户端可发送 {"type": "subscribe", "viewport": {"x", "y", "width", "height"}, "follow": [id, ...]}
+  只接收视口内（服务端空间索引查询，视口边长不超过 MAX_VIEWPORT_SIDE 并裁剪到地图范围）和关注角色的变化，离开可见范围的角色 id 列在 avatars_left；
+  订阅变化后会补发一次只含可见角色的 snapshot。viewport 与 follow 都为空表示取消订阅
+
+TickStream 记录"已下发的状态"并与世界对比得出增量，每个 tick 只序列化一次，所有客户端共享同一段文本。
+snapshot 由已下发状态生成（不读世界），因此与任意 seq 的增量严格衔接。
+
+ClientChannel 是每个连接独立的发送队列和发送协程，慢客户端只会积压自己的队列：
+- 控制消息（toast 等）总是保留
+- tick 积压超过上限时：旧协议丢弃最早的 tick，增量协议丢弃全部积压的增量并改发一次 snapshot
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import weakref
+from collections import deque
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Callable, Optional
+
+if TYPE_CHECKING:
+    from fastapi import WebSocket
+    from src.classes.core.world import World
+
+PROTOCOL_LEGACY = "legacy"
+PROTOCOL_DELTA = "delta"
+
+DEFAULT_MAX_PENDING_TICKS = 8
+# 视口边长上限（格子数）；更大的视口按此截断，查询时再裁剪到地图范围内
+MAX_VIEWPORT_SIDE = 4096
+
+
+def dumps(message: dict) -> str:
+    return json.dumps(message, default=str)
+
+
+@dataclass
+class TickFrame:
+    """
+    一次 tick 的增量。message 为完整消息（含 avatars），text 为其序列化结果，所有未订阅视口的客户端共用；
+    订阅了视口的客户端由 TickStream.filter_frame 按可见角色拼出自己的 avatars 部分。
+    """
+    seq: int
+    message: dict
+    _head: str = ""
+    _text: str = ""
+    _updates: Optional[dict[str, dict]] = None
+    _update_json: dict[str, str] = field(default_factory=dict)
+
+    def __post_init__(self):
+        # 除 avatars 外的部分只序列化一次，去掉末尾的 "}" 以便拼接
+        head = dumps({k: v for k, v in self.message.items() if k != "avatars"})
+        self._head = head[:-1]
+
+    @property
+    def text(self) -> str:
+        if not self._text:
+            self._text = self.compose([dumps(u) for u in self.message["avatars"]])
+        return self._text
+
+    @property
+    def updates(self) -> dict[str, dict]:
+        """角色 id -> 本帧该角色的增量"""
+        if self._updates is None:
+            self._updates = {u["id"]: u for u in self.message["avatars"]}
+        return self._updates
+
+    def update_json(self, aid: str) -> str:
+        text = self._update_json.get(aid)
+        if text is None:
+            text = self._update_json[aid] = dumps(self.updates[aid])
+        return text
+
+    def compose(self, avatar_parts: list[str], left: Optional[list[str]] = None) -> str:
+        """用已序列化的 avatars 条目拼出完整消息"""
+        text = self._head + ',"avatars":[' + ",".join(avatar_parts) + "]"
+        if left is not None:
+            text += ',"avatars_left":' + dumps(left)
+        return text + "}"
+
+
+@dataclass
+class Subscription:
+    """
+    客户端的订阅：视口矩形（含边界）与关注的角色。
+    订阅后只下发视口内和被关注角色的位置/动作变化，离开视口的角色列在 avatars_left 中。
+    """
+    viewport: Optional[tuple[int, int, int, int]] = None  # (x0, y0, x1, y1)
+    follow: frozenset = frozenset()
+
+    @classmethod
+    def from_message(cls, message: dict) -> Optional["Subscription"]:
+        """
+        解析 {"type": "subscribe", "viewport": {"x", "y", "width", "height"} | null, "follow": [id, ...]}；
+        viewport 与 follow 都为空时返回 None（取消订阅，恢复接收全部角色）。
+        """
+        viewport = None
+        rect = message.get("viewport")
+        if rect:
+            x, y = int(rect["x"]), int(rect["y"])
+            width, height = int(rect["width"]), int(rect["height"])
+            if width <= 0 or height <= 0:
+                raise ValueError("viewport width/height must be positive")
+            width, height = min(width, MAX_VIEWPORT_SIDE), min(height, MAX_VIEWPORT_SIDE)
+            viewport = (x, y, x + width - 1, y + height - 1)
+        follow = frozenset(str(aid) for aid in (message.get("follow") or []))
+        if viewport is None and not follow:
+            return None
+        return cls(viewport=viewport, follow=follow)
+
+    def resolve(self, world: Optional["World"]) -> set[str]:
+        """当前可见的存活角色 id（视口内的通过空间索引查询）"""
+        if world is None:
+            return set()
+        manager = world.avatar_manager
+        visible: set[str] = set()
+        if self.viewport:
+            # 裁剪到地图范围内，客户端发来的视口再大也只查询地图覆盖的网格
+            x0, y0, x1, y1 = self.viewport
+            x0, y0 = max(x0, 0), max(y0, 0)
+            x1, y1 = min(x1, world.map.width - 1), min(y1, world.map.height - 1)
+            if x0 <= x1 and y0 <= y1:
+                visible = {str(a.id) for a in manager.get_avatars_in_rect(x0, y0, x1, y1)}
+        visible.update(aid for aid in self.follow if aid in manager.avatars)
+        return visible
+
+
+class TickStream:
+    """
+    增量 tick 编码器。
+
+    Args:
+        avatar_fields: 角色 -> 下发字段字典（不含 id），字段值需可比较
+        domains_of: 世界 -> 秘境列表（每项含 id）
+        phenomenon_of: 天地灵机对象 -> 下发字典
+    """
+
+    def __init__(
+        self,
+        avatar_fields: Callable[[Any], dict],
+        domains_of: Callable[["World"], list[dict]],
+        phenomenon_of: Callable[[Any], Optional[dict]],
+    ):
+        self._avatar_fields = avatar_fields
+        self._domains_of = domains_of
+        self._phenomenon_of = phenomenon_of
+        self.seq = 0
+        self._world_ref: Optional[weakref.ref] = None
+        self._year: Optional[int] = None
+        self._month: Optional[int] = None
+        self._avatars: dict[str, dict] = {}
+        self._domains: dict[Any, dict] = {}
+        self._phenomenon_obj: Any = None
+        self._phenomenon: Optional[dict] = None
+        self._snapshot_cache: Optional[tuple[int, str]] = None
+
+    def encode(self, world: "World", events: list[dict]) -> TickFrame:
+        """对比世界与已下发状态，生成下一帧增量并更新已下发状态"""
+        self.seq += 1
+        message: dict[str, Any] = {"type": "tick_delta", "seq": self.seq}
+
+        if self._world_ref is None or self._world_ref() is not world:
+            # 换了世界（新游戏/读档）：丢弃旧状态，本帧携带全量且要求客户端清空
+            self._world_ref = weakref.ref(world)
+            self._avatars = {}
+            self._domains = {}
+            self._phenomenon_obj = None
+            self._phenomenon = None
+            message["reset"] = True
+
+        self._year = int(world.month_stamp.get_year())
+        self._month = world.month_stamp.get_month().value
+        message["year"] = self._year
+        message["month"] = self._month
+        message["events"] = events
+        message["avatars"] = self._diff_avatars(world)
+
+        phenomenon = world.current_phenomenon
+        if phenomenon is not self._phenomenon_obj or message.get("reset"):
+            self._phenomenon_obj = phenomenon
+            serialized = self._phenomenon_of(phenomenon)
+            if serialized != self._phenomenon or message.get("reset"):
+                self._phenomenon = serialized
+                message["phenomenon"] = serialized
+
+        changed, removed = self._diff_domains(world)
+        if changed:
+            message["domains"] = changed
+        if removed:
+            message["domains_removed"] = removed
+
+        return TickFrame(seq=self.seq, message=message)
+
+    @property
+    def world(self) -> Optional["World"]:
+        return self._world_ref() if self._world_ref is not None else None
+
+    def known_avatars(self, ids: set[str]) -> set[str]:
+        """ids 中已下发过状态的角色"""
+        return {aid for aid in ids if aid in self._avatars}
+
+    def filter_frame(self, frame: TickFrame, visible_before: set[str], visible_now: set[str]) -> str:
+        """
+        订阅客户端的本帧消息：
+        - 新进入可见范围的角色：已下发状态中的全部字段
+        - 一直可见的角色：本帧增量
+        - 离开可见范围的角色：死亡的发送死亡增量，其余列入 avatars_left
+        """
+        updates = frame.updates
+        parts = []
+        for aid in visible_now:
+            if aid not in visible_before:
+                fields = self._avatars.get(aid)
+                if fields is not None:
+                    parts.append(dumps({"id": aid, **fields}))
+            elif aid in updates:
+                parts.append(frame.update_json(aid))
+        left = []
+        for aid in visible_before - visible_now:
+            if updates.get(aid, {}).get("is_dead"):
+                parts.append(frame.update_json(aid))
+            else:
+                left.append(aid)
+        return frame.compose(parts, left)
+
+    def _diff_avatars(self, world: "World") -> list[dict]:
+        updates = []
+        sent = self._avatars
+        alive: set[str] = set()
+        for avatar in world.avatar_manager.get_living_avatars():
+            aid = str(avatar.id)
+            alive.add(aid)
+            fields = self._avatar_fields(avatar)
+            prev = sent.get(aid)
+            if prev is None:
+                updates.append({"id": aid, **fields})
+            else:
+                changed = {k: v for k, v in fields.items() if prev.get(k) != v}
+                if not changed:
+                    continue
+                updates.append({"id": aid, **changed})
+            sent[aid] = fields
+
+        for aid in [aid for aid in sent if aid not in alive]:
+            del sent[aid]
+            updates.append({"id": aid, "is_dead": True, "action": "已故"})
+        return updates
+
+    def _diff_domains(self, world: "World") -> tuple[list[dict], list]:
+        current = {d["id"]: d for d in self._domains_of(world)}
+        changed = [d for did, d in current.items() if self._domains.get(did) != d]
+        removed = [did for did in self._domains if did not in current]
+        self._domains = current
+        return changed, removed
+
+    def snapshot_text(self, visible: Optional[set[str]] = None) -> str:
+        """
+        当前 seq 的全量快照。visible 不为 None 时只包含这些角色（订阅客户端），否则包含全部并按 seq 缓存。
+        """
+        if visible is not None:
+            avatars = self._avatars
+            message = self._snapshot_message([{"id": aid, **avatars[aid]} for aid in visible if aid in avatars])
+            return dumps(message)
+        if self._snapshot_cache is not None and self._snapshot_cache[0] == self.seq:
+            return self._snapshot_cache[1]
+        text = dumps(self._snapshot_message([{"id": aid, **fields} for aid, fields in self._avatars.items()]))
+        self._snapshot_cache = (self.seq, text)
+        return text
+
+    def _snapshot_message(self, avatars: list[dict]) -> dict:
+        return {
+            "type": "snapshot",
+            "seq": self.seq,
+            "year": self._year,
+            "month": self._month,
+            "avatars": avatars,
+            "phenomenon": self._phenomenon,
+            "active_domains": list(self._domains.values()),
+        }
+
+
+@dataclass
+class ClientChannel:
+    """单个 WebSocket 连接的发送队列与发送协程"""
+    websocket: "WebSocket"
+    stream: TickStream
+    protocol: str = PROTOCOL_LEGACY
+    max_pending_ticks: int = DEFAULT_MAX_PENDING_TICKS
+    dropped_ticks: int = 0
+    needs_snapshot: bool = False
+    subscription: Optional[Subscription] = None
+    # 订阅客户端当前已知的可见角色
+    visible: set = field(default_factory=set)
+    # (kind, text)，kind 为 control / tick
+    _queue: deque = field(default_factory=deque)
+    _pending_ticks: int = 0
+    _wakeup: Optional[asyncio.Event] = None
+    _task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._wakeup = asyncio.Event()
+        if self.protocol == PROTOCOL_DELTA:
+            self.needs_snapshot = True
+            self._wakeup.set()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    @property
+    def pending(self) -> int:
+        return len(self._queue)
+
+    def send_control(self, text: str) -> None:
+        """控制类消息：不参与丢弃"""
+        self._queue.append(("control", text))
+        self._notify()
+
+    def send_tick(self, text: str) -> None:
+        if self._pending_ticks >= self.max_pending_ticks:
+            if self.protocol == PROTOCOL_DELTA:
+                # 积压的增量已无意义，改为下一次发送全量快照
+                self.dropped_ticks += 1
+                self.request_snapshot()
+                return
+            self._drop_oldest_tick()
+        self._queue.append(("tick", text))
+        self._pending_ticks += 1
+        self._notify()
+
+    def send_frame(self, frame: TickFrame, world: Optional["World"]) -> None:
+        """增量协议：未订阅时发送共享文本，订阅时按可见角色过滤"""
+        if self.subscription is None:
+            self.send_tick(frame.text)
+            return
+        visible = self.subscription.resolve(world)
+        text = self.stream.filter_frame(frame, self.visible, visible)
+        self.visible = visible
+        self.send_tick(text)
+
+    def subscribe(self, subscription: Optional[Subscription]) -> None:
+        """更新订阅并补发一次快照（包含新可见范围内的全部角色）"""
+        self.subscription = subscription
+        self.visible = set()
+        self.request_snapshot()
+
+    def request_snapshot(self) -> None:
+        """下一次发送全量快照（快照涵盖队列中尚未发送的全部增量）"""
+        self._discard_ticks()
+        self.needs_snapshot = True
+        self._notify()
+
+    def _drop_oldest_tick(self) -> None:
+        for i, (kind, _) in enumerate(self._queue):
+            if kind == "tick":
+                del self._queue[i]
+                self._pending_ticks -= 1
+                self.dropped_ticks += 1
+                return
+
+    def _discard_ticks(self) -> None:
+        self.dropped_ticks += self._pending_ticks
+        self._queue = deque(item for item in self._queue if item[0] != "tick")
+        self._pending_ticks = 0
+
+    def _notify(self) -> None:
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _next_text(self) -> Optional[str]:
+        if self.needs_snapshot:
+            # 快照涵盖此刻之前发布的所有增量
+            self.needs_snapshot = False
+            self._discard_ticks()
+            if self.subscription is None:
+                return self.stream.snapshot_text()
+            self.visible = self.stream.known_avatars(self.subscription.resolve(self.stream.world))
+            return self.stream.snapshot_text(self.visible)
+        if not self._queue:
+            return None
+        kind, text = self._queue.popleft()
+        if kind == "tick":
+            self._pending_ticks -= 1
+        return text
+
+    async def _run(self) -> None:
+        try:
+            while True:
+                await self._wakeup.wait()
+                self._wakeup.clear()
+                while (text := self._next_text()) is not None:
+                    await self.websocket.send_text(text)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            # 连接已断开；由 /ws 的接收循环负责清理
+            print(f"WS send error: {e}")
@@ -0,0 +1,186 @@
+"""
+流水线决策（ai.pipelined_decisions）
+
+默认的决策阶段要等 AI 为本月所有空闲角色决策完毕才能继续，每月至少一次完整的 LLM 往返。
+多数角色处于多月的长态动作（TimedAction）中，何时空闲可以提前算出：
+
+- prefetch：每月决策阶段之后，为 lookahead 个月内会结束当前长态动作、且没有后续计划的角色
+  在后台发起决策请求，与本月及之后的模拟并行
+- collect：角色真正空闲时取用预取结果；结果已过期（超过 max_staleness 个月）、角色境界/所在区域/宗门
+  已变化或请求失败时丢弃并同步决策；请求仍在途时才等待
+
+统计命中（取用预取）、未命中（同步决策）与浪费（预取结果被丢弃）。
+"""
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Optional
+
+from src.classes.action.action import TimedAction
+from src.run.log import get_logger
+
+if TYPE_CHECKING:
+    from src.classes.ai import AI
+    from src.classes.core.avatar import Avatar
+    from src.classes.core.world import World
+
+
+def months_until_idle(avatar: "Avatar", now: int) -> Optional[int]:
+    """
+    当前长态动作在第几个月后的步进中结束（0 表示本月执行阶段结束，下月需要决策）；
+    无法预测（无动作、瞬时/移动类动作、已有后续计划）时返回 None。
+    """
+    if avatar.has_plans() or avatar.current_action is None:
+        return None
+    action = avatar.current_action.action
+    if not isinstance(action, TimedAction):
+        return None
+    start = getattr(action, "start_monthstamp", None)
+    start = now if start is None else int(start)
+    return max(0, start + int(action.duration_months) - 1 - now)
+
+
+def _fingerprint(avatar: "Avatar") -> tuple:
+    """决策所依赖的关键状态；变化后预取结果作废"""
+    region = avatar.tile.region if avatar.tile is not None else None
+    sect = getattr(avatar, "sect", None)
+    return (
+        avatar.cultivation_progress.realm,
+        getattr(region, "id", None),
+        getattr(sect, "id", None),
+    )
+
+
+def _consume_exception(task: asyncio.Task) -> None:
+    # 避免未取用的失败任务在回收时报 "exception was never retrieved"
+    if not task.cancelled():
+        task.exception()
+
+
+@dataclass
+class _Prefetch:
+    task: asyncio.Task
+    requested_at: int
+    fingerprint: tuple
+
+
+class DecisionPipeline:
+    """
+    Args:
+        lookahead_months: 提前多少个月为即将空闲的角色请求决策
+        max_staleness_months: 预取结果最多可用的月数
+    """
+
+    def __init__(self, lookahead_months: int = 1, max_staleness_months: int = 2):
+        self.lookahead_months = max(1, int(lookahead_months))
+        self.max_staleness_months = max(0, int(max_staleness_months))
+        self._pending: dict[str, _Prefetch] = {}
+        self.prefetched = 0
+        self.hits = 0
+        self.misses = 0
+        self.wasted = 0
+        self.waited = 0
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def _usable(self, prefetch: _Prefetch, avatar: "Avatar", now: int) -> bool:
+        return (
+            not avatar.is_dead
+            and now - prefetch.requested_at <= self.max_staleness_months
+            and prefetch.fingerprint == _fingerprint(avatar)
+        )
+
+    async def collect(self, ai: "AI", world: "World", avatars: list["Avatar"]) -> dict:
+        """为 avatars 取得决策：优先使用预取结果，其余同步决策。返回格式同 AI.decide"""
+        now = int(world.month_stamp)
+        results: dict = {}
+        need: list["Avatar"] = []
+        prefetched: list[tuple["Avatar", _Prefetch]] = []
+        for avatar in avatars:
+            prefetch = self._pending.pop(avatar.id, None)
+            if prefetch is None:
+                need.append(avatar)
+            elif self._usable(prefetch, avatar, now):
+                prefetched.append((avatar, prefetch))
+            else:
+                self.wasted += 1
+                need.append(avatar)
+
+        # 预取仍在途时，与无预取角色的同步决策并发等待
+        in_flight = {p.task for _, p in prefetched if not p.task.done()}
+        direct = asyncio.ensure_future(ai.decide(world, need)) if need else None
+        if in_flight:
+            self.waited += sum(1 for _, p in prefetched if p.task in in_flight)
+            await asyncio.wait(in_flight)
+
+        retry: list["Avatar"] = []
+        for avatar, prefetch in prefetched:
+            task = prefetch.task
+            result = None
+            if not task.cancelled() and task.exception() is None:
+                result = task.result().get(avatar)
+            if result is None:
+                self.wasted += 1
+                retry.append(avatar)
+            else:
+                self.hits += 1
+                results[avatar] = result
+
+        self.misses += len(need) + len(retry)
+        if direct is not None:
+            results.update(await direct)
+        if retry:
+            results.update(await ai.decide(world, retry))
+        return results
+
+    def prefetch(self, ai: "AI", world: "World", living_avatars: list["Avatar"]) -> None:
+        """在后台为 lookahead 个月内会空闲的角色发起决策（本月决策完成后调用）"""
+        now = int(world.month_stamp)
+        self._drop_expired(now)
+        candidates = []
+        for avatar in living_avatars:
+            if avatar.id in self._pending:
+                continue
+            remaining = months_until_idle(avatar, now)
+            if remaining is not None and remaining < self.lookahead_months:
+                candidates.append(avatar)
+        if not candidates:
+            return
+        task = asyncio.create_task(ai.decide(world, candidates))
+        task.add_done_callback(_consume_exception)
+        for avatar in candidates:
+            self._pending[avatar.id] = _Prefetch(task, now, _fingerprint(avatar))
+        self.prefetched += len(candidates)
+
+    def _drop_expired(self, now: int) -> None:
+        """丢弃已不可能再被取用的预取（过期，或角色改由其他途径获得了计划）"""
+        for avatar_id, prefetch in list(self._pending.items()):
+            if now - prefetch.requested_at > self.max_staleness_months:
+                del self._pending[avatar_id]
+                self.wasted += 1
+
+    def cancel(self) -> None:
+        """取消全部在途预取（如世界被替换）"""
+        tasks = {p.task for p in self._pending.values()}
+        self.wasted += len(self._pending)
+        self._pending.clear()
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            get_logger().logger.info(f"Cancelled {len(tasks)} pending decision prefetches")
+
+    def stats(self) -> dict:
+        decided = self.hits + self.misses
+        return {
+            "prefetched": self.prefetched,
+            "pending": self.pending,
+            "hits": self.hits,
+            "misses": self.misses,
+            "wasted": self.wasted,
+            "waited": self.waited,
+            "hit_ratio": round(self.hits / decided, 4) if decided else 0.0,
+            "waste_ratio": round(self.wasted / self.prefetched, 4) if self.prefetched else 0.0,
+        }
@@ -0,0 +1,273 @@
+"""
+Headless 批量模拟
+
+不启动服务端、不经过 game_loop 的 1 秒间隔：按与 init_game_async 相同的步骤构造世界后尽快推进 N 个月，
+统计吞吐（月/秒）、各阶段耗时（Simulator.profiler）、角色数与事件速率，结果可序列化为 JSON 报告用于回归对比。
+命令行入口见 tools/benchmark/bench_batch.py。
+
+决策 AI 与其余 LLM 调用可替换（AI_MODES）：
+- stub：离线，决策由 StubAI 给出，其余模板调用返回空结果（各功能自行降级），不联网
+- rule：离线，决策由规则策略 RuleAI 给出，其余同 stub
+- recorded：回放录制文件中的响应，未录到的请求退回 stub
+- llm：真实模型；可同时录制响应供之后 recorded 回放
+"""
+from __future__ import annotations
+
+import asyncio
+import copy
+import json
+import random
+import time
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional
+
+from src.classes.ai import AI
+from src.classes.core.world import World
+from src.utils.config import CONFIG
+from src.utils.llm.cache import make_cache_key
+from src.utils.llm.client import llm_wait_clock, request_llm_with_template, set_template_responder
+from src.utils.llm.prompt import build_prompt, load_template
+
+if TYPE_CHECKING:
+    from src.classes.core.avatar import Avatar
+
+AI_MODES = ("stub", "rule", "recorded", "llm")
+
+_DIRECTIONS = ("North", "South", "East", "West")
+
+
+def build_headless_world(avatar_count: int, seed: int = 42, events_db_path: Optional[Path] = None) -> World:
+    """
+    按 init_game_async 的步骤构造世界：预选宗门、加载默认地图、生成随机角色、设置初始灵气。
+    不应用世界历史（需要 LLM）。events_db_path 为空时事件存于内存。
+    """
+    from src.classes.core.sect import sects_by_id
+    from src.run.load_map import load_cultivation_world_map
+    from src.sim.avatar_init import make_avatars
+    from src.systems.time import Month, Year, create_month_stamp
+
+    random.seed(seed)
+    existed_sects = []
+    needed_sects = int(getattr(CONFIG.game, "sect_num", 0) or 0)
+    if needed_sects > 0 and sects_by_id:
+        pool = list(sects_by_id.values())
+        random.shuffle(pool)
+        existed_sects = pool[:needed_sects]
+
+    game_map = load_cultivation_world_map()
+    start_year = getattr(CONFIG.game, "start_year", 100)
+    month_stamp = create_month_stamp(Year(start_year), Month.JANUARY)
+    if events_db_path is not None:
+        world = World.create_with_db(map=game_map, month_stamp=month_stamp, events_db_path=events_db_path, start_year=start_year)
+    else:
+        world = World(map=game_map, month_stamp=month_stamp, start_year=start_year)
+    world.world_spirit_qi = float(getattr(CONFIG.game, "world_spirit_qi_initial", 0.6))
+    world.existed_sects = existed_sects
+
+    if avatar_count > 0:
+        avatars = make_avatars(world, count=avatar_count, current_month_stamp=world.month_stamp, existed_sects=existed_sects)
+        world.avatar_manager.avatars.update(avatars)
+    return world
+
+
+class StubAI(AI):
+    """
+    离线桩 AI：不请求模型，给出确定性的简单动作链。
+    处于瓶颈则突破，否则随机走一步后吐纳（无法启动的动作在提交阶段被跳过）。
+    latency > 0 时每次决策模拟一次 LLM 往返的等待（计入 LLM 等待时间），用于离线评估流水线决策。
+    """
+
+    def __init__(self, seed: int = 0, latency: float = 0.0):
+        self._rng = random.Random(seed)
+        self.latency = latency
+
+    async def _decide(self, world: World, avatars_to_decide: list[Avatar]) -> dict[Avatar, tuple]:
+        if self.latency > 0:
+            with llm_wait_clock.waiting():
+                await asyncio.sleep(self.latency)
+        results = {}
+        for avatar in avatars_to_decide:
+            if avatar.cultivation_progress.can_break_through():
+                pairs = [("Breakthrough", {})]
+            else:
+                pairs = [
+                    ("MoveToDirection", {"direction": self._rng.choice(_DIRECTIONS)}),
+                    ("Respire", {}),
+                ]
+            results[avatar] = (pairs, "", "")
+        return results
+
+
+class StubResponder:
+    """离线响应器：所有模板调用返回空结果，按模板文件名计数"""
+
+    def __init__(self):
+        self.calls: Counter[str] = Counter()
+
+    async def __call__(self, template_path, infos: dict, *args) -> dict:
+        self.calls[Path(template_path).name] += 1
+        return {}
+
+
+def _recording_key(template_path, infos: dict) -> str:
+    prompt = build_prompt(load_template(template_path), infos)
+    return make_cache_key("recorded", Path(template_path).name, prompt)
+
+
+class RecordedResponder(StubResponder):
+    """回放 RecordingResponder 录制的 JSONL 响应（按模板名 + 渲染后的提示词匹配），未命中时返回空结果"""
+
+    def __init__(self, path: Path):
+        super().__init__()
+        self.responses: dict[str, dict] = {}
+        self.hits = 0
+        self.misses = 0
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    self.responses[record["key"]] = record["response"]
+
+    async def __call__(self, template_path, infos: dict, *args) -> dict:
+        response = self.responses.get(_recording_key(template_path, infos))
+        if response is None:
+            self.misses += 1
+            return await super().__call__(template_path, infos)
+        self.hits += 1
+        self.calls[Path(template_path).name] += 1
+        return copy.deepcopy(response)
+
+
+class RecordingResponder(StubResponder):
+    """转发到真实模型，并把每次响应追加写入 JSONL 文件"""
+
+    def __init__(self, path: Path):
+        super().__init__()
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    async def __call__(self, template_path, infos: dict, *args) -> dict:
+        response = await request_llm_with_template(template_path, infos, *args)
+        self.calls[Path(template_path).name] += 1
+        record = {"key": _recording_key(template_path, infos), "template": Path(template_path).name, "response": response}
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        return response
+
+
+def make_ai_backend(
+    mode: str,
+    recording: Optional[Path] = None,
+    seed: int = 0,
+    stub_latency: float = 0.0,
+) -> tuple[Optional[AI], Optional[StubResponder]]:
+    """
+    按模式返回 (决策 AI, 模板响应器)；None 表示沿用默认（llm_ai / 真实请求）。
+
+    Args:
+        mode: AI_MODES 之一
+        recording: recorded 模式下为回放文件；llm 模式下为录制输出文件（可选）
+        stub_latency: stub 模式下每次决策模拟的 LLM 往返秒数
+    """
+    if mode == "stub":
+        return StubAI(seed, latency=stub_latency), StubResponder()
+    if mode == "rule":
+        from src.classes.rule_ai import RuleAI
+        return RuleAI(), StubResponder()
+    if mode == "recorded":
+        if recording is None:
+            raise ValueError("recorded mode requires a recording file")
+        return None, RecordedResponder(recording)
+    if mode == "llm":
+        return None, (RecordingResponder(recording) if recording is not None else None)
+    raise ValueError(f"Unknown AI mode: {mode}")
+
+
+@contextmanager
+def use_template_responder(responder: Optional[StubResponder]):
+    """在 with 块内替换 LLM 模板调用；responder 为 None 时不做替换"""
+    if responder is None:
+        yield
+        return
+    previous = set_template_responder(responder)
+    try:
+        yield
+    finally:
+        set_template_responder(previous)
+
+
+@dataclass
+class BatchReport:
+    """一次批量模拟的统计结果（秒为单位）"""
+    ai: str
+    avatars: int
+    months: int
+    elapsed_s: float = 0.0
+    months_per_sec: float = 0.0
+    slowest_month_s: float = 0.0
+    living_start: int = 0
+    living_end: int = 0
+    events: int = 0
+    events_per_month: float = 0.0
+    cpu_s: float = 0.0
+    llm_wait_s: float = 0.0
+    phase_seconds: dict[str, float] = field(default_factory=dict)
+    llm_calls: dict[str, int] = field(default_factory=dict)
+    decision_pipeline: Optional[dict] = None
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+async def run_batch(
+    world: World,
+    months: int,
+    ai: Optional[AI] = None,
+    responder: Optional[StubResponder] = None,
+    label: str = "stub",
+    pipelined: Optional[bool] = None,
+) -> BatchReport:
+    """
+    在 world 上连续推进 months 个月并返回统计；ai / responder 见 make_ai_backend。
+    pipelined 为 None 时沿用 ai.pipelined_decisions 配置。
+    """
+    from src.sim.decision_pipeline import DecisionPipeline
+    from src.sim.simulator import Simulator
+
+    sim = Simulator(world, ai=ai)
+    if pipelined is not None:
+        sim.decision_pipeline = DecisionPipeline() if pipelined else None
+    profiler = sim.enable_profiling()
+    report = BatchReport(
+        ai=label,
+        avatars=len(world.avatar_manager.avatars),
+        months=months,
+        living_start=len(world.avatar_manager.get_living_avatars()),
+    )
+
+    with use_template_responder(responder):
+        start = time.perf_counter()
+        for _ in range(months):
+            month_start = time.perf_counter()
+            events = await sim.step()
+            report.slowest_month_s = max(report.slowest_month_s, time.perf_counter() - month_start)
+            report.events += len(events)
+            # 与 game_loop 一样在两步之间让出事件循环，后台任务（如预取的决策）得以推进
+            await asyncio.sleep(0)
+        report.elapsed_s = time.perf_counter() - start
+
+    report.months_per_sec = months / report.elapsed_s if report.elapsed_s > 0 else 0.0
+    report.events_per_month = report.events / months if months else 0.0
+    report.living_end = len(world.avatar_manager.get_living_avatars())
+    report.cpu_s = profiler.step_stats.cpu
+    report.llm_wait_s = profiler.step_stats.llm_wait
+    report.phase_seconds = profiler.phase_seconds()
+    if responder is not None:
+        report.llm_calls = dict(responder.calls)
+    if sim.decision_pipeline is not None:
+        sim.decision_pipeline.cancel()
+        report.decision_pipeline = sim.decision_pipeline.stats()
+    return report
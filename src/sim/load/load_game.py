@@ -2,7 +2,7 @@
 读档功能模块
 
 主要功能：
-- load_game: 从JSON文件加载游戏完整状态
+- load_game: 从JSON文件或二进制分块存档（.sav）加载游戏完整状态
 - get_events_db_path: 根据存档路径计算事件数据库路径
 - check_save_compatibility: 检查存档版本兼容性（当前未实现严格检查）
 
@@ -26,7 +26,7 @@
 - 读档后会重置前端UI状态（头像图像、插值等）
 - 地图从头重建（因为地图是固定的），但会恢复宗门总部位置
 """
-import json
+import time
 from pathlib import Path
 from typing import Tuple, List, Optional, TYPE_CHECKING
 
@@ -160,6 +160,8 @@ def load_game(save_path: Optional[Path] = None) -> Tuple["World", "Simulator", L
     Raises:
         FileNotFoundError: 如果存档文件不存在
         Exception: 如果加载失败
+
+    读档耗时记录在 world._load_stats。
     """
     # 确定加载路径
     if save_path is None:
@@ -172,6 +174,8 @@ def load_game(save_path: Optional[Path] = None) -> Tuple["World", "Simulator", L
         raise FileNotFoundError(f"存档文件不存在: {save_path}")
     
     try:
+        start = time.perf_counter()
+
         # 运行时导入，避免循环依赖
         from src.classes.core.world import World
         from src.classes.core.avatar import Avatar
@@ -179,9 +183,12 @@ def load_game(save_path: Optional[Path] = None) -> Tuple["World", "Simulator", L
         from src.sim.simulator import Simulator
         from src.run.load_map import load_cultivation_world_map
         
-        # 读取存档文件
-        with open(save_path, "r", encoding="utf-8") as f:
-            save_data = json.load(f)
+        from src.sim.save.binary_save import is_binary_save, read_save_data
+
+        # 读取存档文件（二进制或 JSON）
+        is_binary = is_binary_save(save_path)
+        save_data = read_save_data(save_path)
+        parsed = time.perf_counter()
         
         # 读取元信息
         meta = save_data.get("meta", {})
@@ -193,10 +200,11 @@ def load_game(save_path: Optional[Path] = None) -> Tuple["World", "Simulator", L
         month_stamp = MonthStamp(world_data["month_stamp"])
         start_year = world_data.get("start_year", 100)
 
-        # 重建地图：如果存档含随机地图参数，用相同 seed 重新生成；否则加载静态CSV
+        # 重建地图：如果存档含随机地图参数，读取相同 seed 的布局缓存（缺失时重新生成）；否则加载静态CSV
         map_params = world_data.get("map_params", {})
+        map_cache_hit = None
         if map_params.get("use_random_map"):
-            from src.run.map_generator import generate_map as _gen_map
+            from src.run.map_cache import load_or_generate_map
             from src.classes.core.sect import sects_by_id as _sbi
             _seed = map_params["map_seed"]
             _w = map_params["map_width"]
@@ -205,9 +213,10 @@ def load_game(save_path: Optional[Path] = None) -> Tuple["World", "Simulator", L
             _existed_sect_ids = world_data.get("existed_sect_ids", [])
             _existed_sects = [_sbi[sid] for sid in _existed_sect_ids if sid in _sbi]
             print(f"读档：随机地图 seed={_seed}, size={_w}x{_h}")
-            game_map, _ = _gen_map(width=_w, height=_h, seed=_seed, existed_sects=_existed_sects)
+            game_map, map_cache_hit = load_or_generate_map(width=_w, height=_h, seed=_seed, existed_sects=_existed_sects)
         else:
             game_map = load_cultivation_world_map()
+        map_built = time.perf_counter()
         
         # 计算事件数据库路径。
         events_db_path = get_events_db_path(save_path)
@@ -352,6 +361,21 @@ def load_game(save_path: Optional[Path] = None) -> Tuple["World", "Simulator", L
         # 兼容旧存档 "birth_rate"
         simulator.awakening_rate = simulator_data.get("awakening_rate", simulator_data.get("birth_rate", CONFIG.game.npc_awakening_rate_per_month))
         
+        # 二进制存档可作为下一次增量保存的基底
+        if is_binary:
+            world._last_binary_save = save_path
+
+        finished = time.perf_counter()
+        world._load_stats = {
+            "format": "binary" if is_binary else "json",
+            "parse_ms": round((parsed - start) * 1000, 2),
+            "map_ms": round((map_built - parsed) * 1000, 2),
+            "map_cache_hit": map_cache_hit,
+            "restore_ms": round((finished - parsed) * 1000, 2),
+            "total_ms": round((finished - start) * 1000, 2),
+            "avatars_total": len(all_avatars),
+        }
+
         print(f"存档加载成功！共加载 {len(all_avatars)} 个角色")
         return world, simulator, existed_sects
         
@@ -373,10 +397,10 @@ def check_save_compatibility(save_path: Path) -> Tuple[bool, str]:
         (是否兼容, 错误信息)
     """
     try:
-        with open(save_path, "r", encoding="utf-8") as f:
-            save_data = json.load(f)
-        
-        meta = save_data.get("meta", {})
+        from src.sim.save.save_game import get_save_info
+        meta = get_save_info(save_path)
+        if meta is None:
+            raise ValueError("存档元信息缺失")
         save_version = meta.get("version", "unknown")
         current_version = CONFIG.meta.version
         
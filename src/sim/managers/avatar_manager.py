@@ -6,11 +6,12 @@ import itertools
 if TYPE_CHECKING:
     from src.classes.core.avatar import Avatar
 
-from src.classes.observe import get_observable_avatars
+from src.classes.observe import get_avatar_observation_radius
+from src.sim.managers.spatial_index import SpatialIndex, IndexedAvatarDict
 
 @dataclass
 class AvatarManager:
-    # 仅存储存活的角色，用于主循环遍历
+    # 仅存储存活的角色，用于主循环遍历（增删时自动维护空间索引）
     avatars: Dict[str, "Avatar"] = field(default_factory=dict)
     # 存储已死亡的角色（归档）
     dead_avatars: Dict[str, "Avatar"] = field(default_factory=dict)
@@ -18,6 +19,20 @@ class AvatarManager:
     # --- 变更缓冲区 (不参与序列化) ---
     _newly_dead_buffer: List[str] = field(default_factory=list, init=False)
     _newly_born_buffer: List[str] = field(default_factory=list, init=False)
+    # 存活角色的空间索引（网格 + 区域桶）
+    _spatial: SpatialIndex = field(default_factory=SpatialIndex, init=False, repr=False)
+
+    def __setattr__(self, name: str, value) -> None:
+        # avatars 整体替换（如读档）时，同样换成带索引的 dict
+        if name == "avatars" and "_spatial" in self.__dict__ and not (
+            isinstance(value, IndexedAvatarDict) and value._index is self._spatial
+        ):
+            self._spatial.clear()
+            value = IndexedAvatarDict(self._spatial, value)
+        super().__setattr__(name, value)
+
+    def __post_init__(self) -> None:
+        self.avatars = self.avatars
 
     def register_avatar(self, avatar: "Avatar", is_newly_born: bool = False) -> None:
         """
@@ -70,15 +85,7 @@ class AvatarManager:
         """
         if avatar is None or getattr(avatar, "tile", None) is None or avatar.tile.region is None:
             return []
-        region = avatar.tile.region
-        same_region: list["Avatar"] = []
-        # 只遍历活人
-        for other in self.avatars.values():
-            if other is avatar or getattr(other, "tile", None) is None:
-                continue
-            if other.tile.region == region:
-                same_region.append(other)
-        return same_region
+        return self._spatial.query_region(avatar.tile.region.id, exclude=avatar)
 
     def get_living_avatars(self) -> List["Avatar"]:
         """
@@ -90,9 +97,17 @@ class AvatarManager:
     def get_observable_avatars(self, avatar: "Avatar") -> List["Avatar"]:
         """
         返回处于 avatar 交互范围内的其他【存活】角色列表（不含自己）。
+        通过空间索引只扫描半径覆盖的网格，复杂度 O(k)。
         """
-        return get_observable_avatars(avatar, self.avatars.values())
+        radius = get_avatar_observation_radius(avatar)
+        return self._spatial.query_radius(int(avatar.pos_x), int(avatar.pos_y), radius, exclude=avatar)
     
+    def get_avatars_in_rect(self, x0: int, y0: int, x1: int, y1: int) -> List["Avatar"]:
+        """
+        返回位于矩形 [x0, x1] x [y0, y1]（含边界）内的【存活】角色，用于前端视口订阅。
+        """
+        return self._spatial.query_rect(x0, y0, x1, y1)
+
     def _iter_all_avatars(self) -> Iterable["Avatar"]:
         """辅助方法：遍历所有角色（活人+死者）"""
         return itertools.chain(self.avatars.values(), self.dead_avatars.values())
@@ -5,13 +5,35 @@
 """
 from __future__ import annotations
 
+from collections import OrderedDict, deque
 from pathlib import Path
-from typing import List, Optional, TYPE_CHECKING
+from typing import Deque, Iterable, List, Optional, TYPE_CHECKING
 
 if TYPE_CHECKING:
     from src.classes.event import Event
     from src.classes.event_storage import EventStorage
 
+# 每个角色在内存中保留的最近大事/小事条数（需覆盖 prompt 与绰号判定所需的最大 limit）。
+DEFAULT_MEMORY_CAPACITY = 32
+# 最多缓存多少个角色的记忆，超出时淘汰最久未访问的角色。
+DEFAULT_MEMORY_MAX_AVATARS = 4096
+
+
+class _AvatarMemory:
+    """单个角色最近的大事/小事环形缓冲（时间正序）。"""
+    __slots__ = ("major", "minor")
+
+    def __init__(self, capacity: int, major: Iterable["Event"] = (), minor: Iterable["Event"] = ()):
+        self.major: Deque["Event"] = deque(major, maxlen=capacity)
+        self.minor: Deque["Event"] = deque(minor, maxlen=capacity)
+
+    def append(self, event: "Event") -> None:
+        buf = self.major if event.is_major and not event.is_story else self.minor
+        # 重复写入同一事件时数据库会忽略（INSERT OR IGNORE），缓存也保持一致。
+        if any(e.id == event.id for e in buf):
+            return
+        buf.append(event)
+
 
 class EventManager:
     """
@@ -19,6 +41,7 @@ class EventManager:
 
     保持与旧版兼容的接口：
     - add_event: 添加事件
+    - add_events: 批量添加事件（单事务）
     - get_recent_events: 获取最近事件
     - get_events_by_avatar: 按角色查询
     - get_events_between: 按角色对查询
@@ -26,18 +49,32 @@ class EventManager:
     - get_minor_events_by_avatar: 获取角色小事
     - get_major_events_between: 获取角色对大事
     - get_minor_events_between: 获取角色对小事
+
+    使用 SQLite 时，单个角色的最近大事/小事额外缓存在内存中（按角色的环形缓冲，LRU 淘汰），
+    首次访问时从数据库加载，之后随写入追加，prompt 构建与绰号判定不再每月查库。
     """
 
-    def __init__(self, storage: Optional["EventStorage"] = None):
+    def __init__(
+        self,
+        storage: Optional["EventStorage"] = None,
+        memory_capacity: int = DEFAULT_MEMORY_CAPACITY,
+        memory_max_avatars: int = DEFAULT_MEMORY_MAX_AVATARS,
+    ):
         """
         初始化事件管理器。
 
         Args:
             storage: SQLite 存储层。如果为 None，则使用内存模式（仅用于测试）。
+            memory_capacity: 每个角色缓存的大事/小事条数上限。
+            memory_max_avatars: 缓存的角色数上限。
         """
         self._storage = storage
         # 内存后备（仅当 storage 为 None 时使用，用于测试或迁移期间）。
         self._memory_events: List["Event"] = []
+        # 角色记忆缓存：avatar_id -> _AvatarMemory，按最近访问排序。
+        self._avatar_memory: "OrderedDict[str, _AvatarMemory]" = OrderedDict()
+        self._memory_capacity = memory_capacity
+        self._memory_max_avatars = memory_max_avatars
 
     @classmethod
     def create_with_db(cls, db_path: Path) -> "EventManager":
@@ -77,11 +114,80 @@ class EventManager:
             return
 
         if self._storage:
-            self._storage.add_event(event)
+            if self._storage.add_event(event):
+                self._remember([event])
+            else:
+                self._forget([event])
         else:
             # 内存后备模式。
             self._memory_events.append(event)
 
+    def add_events(self, events: Iterable["Event"]) -> None:
+        """
+        批量添加事件。
+
+        如果有 SQLite 存储，整批在一个事务内写入（每月步进只提交一次）。
+        否则逐条走 add_event 存入内存后备列表。
+        """
+        from src.classes.event import is_null_event
+        batch = [e for e in events if not is_null_event(e)]
+        if not batch:
+            return
+
+        if self._storage:
+            if self._storage.add_events(batch):
+                self._remember(batch)
+            else:
+                self._forget(batch)
+        else:
+            for event in batch:
+                self.add_event(event)
+
+    # --- 角色记忆缓存 ---
+
+    def _remember(self, events: Iterable["Event"]) -> None:
+        """把已写入数据库的事件追加到相关角色的缓存（未缓存的角色首次访问时再从库加载）。"""
+        memory = self._avatar_memory
+        for event in events:
+            if not event.related_avatars:
+                continue
+            for avatar_id in event.related_avatars:
+                entry = memory.get(str(avatar_id))
+                if entry is not None:
+                    entry.append(event)
+
+    def _forget(self, events: Iterable["Event"]) -> None:
+        """写入失败时丢弃相关角色的缓存，下次访问重新从数据库加载。"""
+        for event in events:
+            for avatar_id in event.related_avatars or ():
+                self._avatar_memory.pop(str(avatar_id), None)
+
+    def _get_avatar_memory(self, avatar_id: str) -> "_AvatarMemory":
+        """获取角色记忆缓存，不存在时从数据库加载，并维护 LRU 顺序。"""
+        avatar_id = str(avatar_id)
+        memory = self._avatar_memory
+        entry = memory.get(avatar_id)
+        if entry is not None:
+            memory.move_to_end(avatar_id)
+            return entry
+
+        capacity = self._memory_capacity
+        entry = _AvatarMemory(
+            capacity,
+            major=self._storage.get_major_events_by_avatar(avatar_id, limit=capacity),
+            minor=self._storage.get_minor_events_by_avatar(avatar_id, limit=capacity),
+        )
+        memory[avatar_id] = entry
+        while len(memory) > self._memory_max_avatars:
+            memory.popitem(last=False)
+        return entry
+
+    @staticmethod
+    def _tail(events: Deque["Event"], limit: int) -> List["Event"]:
+        if limit <= 0:
+            return []
+        return list(events)[-limit:]
+
     def get_recent_events(self, limit: int = 100) -> List["Event"]:
         """获取最近的事件（时间正序）。"""
         if self._storage:
@@ -121,7 +227,9 @@ class EventManager:
     def get_major_events_by_avatar(self, avatar_id: str, *, limit: int = 10) -> List["Event"]:
         """获取角色的大事（长期记忆，时间正序）。"""
         if self._storage:
-            return self._storage.get_major_events_by_avatar(avatar_id, limit=limit)
+            if limit > self._memory_capacity:
+                return self._storage.get_major_events_by_avatar(avatar_id, limit=limit)
+            return self._tail(self._get_avatar_memory(avatar_id).major, limit)
         else:
             result = []
             for e in reversed(self._memory_events):
@@ -135,7 +243,9 @@ class EventManager:
     def get_minor_events_by_avatar(self, avatar_id: str, *, limit: int = 10) -> List["Event"]:
         """获取角色的小事（短期记忆，时间正序）。"""
         if self._storage:
-            return self._storage.get_minor_events_by_avatar(avatar_id, limit=limit)
+            if limit > self._memory_capacity:
+                return self._storage.get_minor_events_by_avatar(avatar_id, limit=limit)
+            return self._tail(self._get_avatar_memory(avatar_id).minor, limit)
         else:
             result = []
             for e in reversed(self._memory_events):
@@ -227,6 +337,7 @@ class EventManager:
             删除的事件数量。
         """
         if self._storage:
+            self._avatar_memory.clear()
             return self._storage.cleanup(keep_major=keep_major, before_month_stamp=before_month_stamp)
         else:
             # 内存模式：简单清空。
@@ -243,5 +354,6 @@ class EventManager:
 
     def close(self) -> None:
         """关闭资源。"""
+        self._avatar_memory.clear()
         if self._storage:
             self._storage.close()
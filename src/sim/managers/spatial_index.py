@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from src.classes.core.avatar import Avatar
+
+# 网格边长（格子数）。感知半径通常为 2~5，取 8 时一次半径查询只需扫描 1~4 个网格。
+DEFAULT_CELL_SIZE = 8
+
+Cell = Tuple[int, int]
+
+
+class _Entry:
+    """索引中单个角色的记录。"""
+    __slots__ = ("avatar", "cell", "region_id", "seq")
+
+    def __init__(self, avatar: "Avatar", cell: Cell, region_id: Optional[int], seq: int):
+        self.avatar = avatar
+        self.cell = cell
+        self.region_id = region_id
+        self.seq = seq
+
+
+class SpatialIndex:
+    """
+    角色的空间索引：均匀网格 + 按区域分桶。
+
+    - 网格：按 (pos_x // cell_size, pos_y // cell_size) 分桶，用于半径（曼哈顿距离）查询
+    - 区域桶：按 tile.region.id 分桶，用于同区域查询
+    查询结果按注册顺序返回（与遍历 AvatarManager.avatars 的顺序一致）。
+    """
+
+    def __init__(self, cell_size: int = DEFAULT_CELL_SIZE):
+        self.cell_size = cell_size
+        self._entries: Dict[str, _Entry] = {}
+        self._cells: Dict[Cell, Dict[str, "Avatar"]] = {}
+        self._regions: Dict[int, Dict[str, "Avatar"]] = {}
+        self._next_seq = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, avatar_id: str) -> bool:
+        return avatar_id in self._entries
+
+    # ---------- 写入 ----------
+
+    def _cell_of(self, avatar: "Avatar") -> Cell:
+        return (int(avatar.pos_x) // self.cell_size, int(avatar.pos_y) // self.cell_size)
+
+    @staticmethod
+    def _region_id_of(avatar: "Avatar") -> Optional[int]:
+        tile = getattr(avatar, "tile", None)
+        region = tile.region if tile is not None else None
+        return region.id if region is not None else None
+
+    def add(self, avatar_id: str, avatar: "Avatar") -> None:
+        """加入（或替换）一个角色；替换同 ID 角色时沿用原有顺序。"""
+        old = self._entries.get(avatar_id)
+        if old is not None:
+            seq = old.seq
+            self.remove(avatar_id)
+        else:
+            seq = self._next_seq
+            self._next_seq += 1
+
+        entry = _Entry(avatar, self._cell_of(avatar), self._region_id_of(avatar), seq)
+        self._entries[avatar_id] = entry
+        self._cells.setdefault(entry.cell, {})[avatar_id] = avatar
+        if entry.region_id is not None:
+            self._regions.setdefault(entry.region_id, {})[avatar_id] = avatar
+        # 位置变化时由 Avatar 回调 update
+        object.__setattr__(avatar, "_spatial_index", self)
+
+    def remove(self, avatar_id: str) -> None:
+        entry = self._entries.pop(avatar_id, None)
+        if entry is None:
+            return
+        self._discard(self._cells, entry.cell, avatar_id)
+        if entry.region_id is not None:
+            self._discard(self._regions, entry.region_id, avatar_id)
+        if entry.avatar.__dict__.get("_spatial_index") is self:
+            object.__setattr__(entry.avatar, "_spatial_index", None)
+
+    def update(self, avatar: "Avatar") -> None:
+        """角色位置（pos_x / pos_y / tile）变化后重新分桶。"""
+        avatar_id = str(avatar.id)
+        entry = self._entries.get(avatar_id)
+        if entry is None or entry.avatar is not avatar:
+            return
+
+        cell = self._cell_of(avatar)
+        if cell != entry.cell:
+            self._discard(self._cells, entry.cell, avatar_id)
+            self._cells.setdefault(cell, {})[avatar_id] = avatar
+            entry.cell = cell
+
+        region_id = self._region_id_of(avatar)
+        if region_id != entry.region_id:
+            if entry.region_id is not None:
+                self._discard(self._regions, entry.region_id, avatar_id)
+            if region_id is not None:
+                self._regions.setdefault(region_id, {})[avatar_id] = avatar
+            entry.region_id = region_id
+
+    def clear(self) -> None:
+        for avatar_id in list(self._entries):
+            self.remove(avatar_id)
+        self._next_seq = 0
+
+    @staticmethod
+    def _discard(buckets: dict, key, avatar_id: str) -> None:
+        bucket = buckets.get(key)
+        if bucket is None:
+            return
+        bucket.pop(avatar_id, None)
+        if not bucket:
+            del buckets[key]
+
+    # ---------- 查询 ----------
+
+    def _ordered(self, found: Dict[str, "Avatar"]) -> List["Avatar"]:
+        entries = self._entries
+        return [found[aid] for aid in sorted(found, key=lambda aid: entries[aid].seq)]
+
+    def query_radius(self, x: int, y: int, radius: int, exclude: "Avatar | None" = None) -> List["Avatar"]:
+        """返回与 (x, y) 曼哈顿距离 <= radius 的角色（不含 exclude）。"""
+        cs = self.cell_size
+        found: Dict[str, "Avatar"] = {}
+        for cx in range((x - radius) // cs, (x + radius) // cs + 1):
+            for cy in range((y - radius) // cs, (y + radius) // cs + 1):
+                bucket = self._cells.get((cx, cy))
+                if not bucket:
+                    continue
+                for aid, other in bucket.items():
+                    if other is exclude:
+                        continue
+                    if abs(other.pos_x - x) + abs(other.pos_y - y) <= radius:
+                        found[aid] = other
+        return self._ordered(found)
+
+    def query_rect(self, x0: int, y0: int, x1: int, y1: int) -> List["Avatar"]:
+        """返回位于矩形 [x0, x1] x [y0, y1]（含边界）内的角色。"""
+        if x1 < x0 or y1 < y0:
+            return []
+        cs = self.cell_size
+        cx0, cx1, cy0, cy1 = x0 // cs, x1 // cs, y0 // cs, y1 // cs
+        if (cx1 - cx0 + 1) * (cy1 - cy0 + 1) > len(self._cells):
+            # 矩形覆盖的网格比已占用的还多：改为扫描已占用的网格，耗时与矩形大小无关
+            buckets = [b for (cx, cy), b in self._cells.items() if cx0 <= cx <= cx1 and cy0 <= cy <= cy1]
+        else:
+            buckets = [self._cells.get((cx, cy)) for cx in range(cx0, cx1 + 1) for cy in range(cy0, cy1 + 1)]
+        found: Dict[str, "Avatar"] = {}
+        for bucket in buckets:
+            if not bucket:
+                continue
+            for aid, other in bucket.items():
+                if x0 <= other.pos_x <= x1 and y0 <= other.pos_y <= y1:
+                    found[aid] = other
+        return self._ordered(found)
+
+    def query_region(self, region_id: int, exclude: "Avatar | None" = None) -> List["Avatar"]:
+        """返回当前位于 region_id 区域内的角色（不含 exclude）。"""
+        bucket = self._regions.get(region_id)
+        if not bucket:
+            return []
+        found = {aid: other for aid, other in bucket.items() if other is not exclude}
+        return self._ordered(found)
+
+
+class IndexedAvatarDict(dict):
+    """
+    AvatarManager.avatars 使用的 dict：增删条目时同步维护 SpatialIndex。
+    直接对 avatars 做 dict 操作（update / pop / 赋值）也不会让索引过期。
+    """
+
+    def __init__(self, index: SpatialIndex, data: Optional[dict] = None):
+        super().__init__()
+        self._index = index
+        if data:
+            self.update(data)
+
+    def __setitem__(self, key, avatar) -> None:
+        super().__setitem__(key, avatar)
+        self._index.add(str(key), avatar)
+
+    def __delitem__(self, key) -> None:
+        super().__delitem__(key)
+        self._index.remove(str(key))
+
+    def pop(self, key, *default):
+        if key in self:
+            self._index.remove(str(key))
+        return super().pop(key, *default)
+
+    def popitem(self):
+        key, avatar = super().popitem()
+        self._index.remove(str(key))
+        return key, avatar
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def update(self, *args, **kwargs) -> None:
+        for key, avatar in dict(*args, **kwargs).items():
+            self[key] = avatar
+
+    def clear(self) -> None:
+        super().clear()
+        self._index.clear()
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def __reduce__(self):
+        # 序列化/拷贝时退化为普通 dict
+        return (dict, (dict(self),))
@@ -0,0 +1,250 @@
+"""
+Simulator.step 的分阶段性能统计
+
+StepProfiler.attach(sim) 把 sim 实例上的 step / _phase_* / _finalize_step 替换为计时包装，
+记录每个阶段的墙钟耗时、CPU 时间（事件循环线程的 thread_time，含同线程并发任务，为近似值）、等待 LLM 的时间、
+返回的事件数与处理的角色数。最近 window 步的耗时保存在内存中用于计算分位数，
+累计值与分位数可导出为 Prometheus 文本格式（/api/metrics），每步结束写一行日志。
+
+detach 后实例方法恢复为类方法，关闭时没有任何额外开销。
+"""
+from __future__ import annotations
+
+import asyncio
+import functools
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Optional
+
+from src.run.log import get_logger
+from src.utils.llm.client import llm_wait_clock
+
+if TYPE_CHECKING:
+    from src.sim.simulator import Simulator
+
+DEFAULT_WINDOW = 120
+QUANTILES = (0.5, 0.9, 0.99)
+METRIC_PREFIX = "cws"
+
+
+def _quantile(sorted_values: list[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(q * len(sorted_values)))
+    return sorted_values[index]
+
+
+@dataclass
+class PhaseStats:
+    """单个阶段（或整步）的累计值与最近 window 次的耗时"""
+    window: int
+    count: int = 0
+    wall: float = 0.0
+    cpu: float = 0.0
+    llm_wait: float = 0.0
+    events: int = 0
+    avatars: int = 0
+    recent: deque = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self.recent = deque(maxlen=self.window)
+
+    def add(self, wall: float, cpu: float, llm_wait: float, events: int, avatars: int) -> None:
+        self.count += 1
+        self.wall += wall
+        self.cpu += cpu
+        self.llm_wait += llm_wait
+        self.events += events
+        self.avatars += avatars
+        self.recent.append(wall)
+
+    def quantiles(self) -> dict[float, float]:
+        values = sorted(self.recent)
+        return {q: _quantile(values, q) for q in QUANTILES}
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "wall_s": self.wall,
+            "cpu_s": self.cpu,
+            "llm_wait_s": self.llm_wait,
+            "events": self.events,
+            "avatars": self.avatars,
+            "quantiles": {str(q): v for q, v in self.quantiles().items()},
+        }
+
+
+class StepProfiler:
+    """
+    Args:
+        window: 计算分位数时保留的最近步数
+        log_steps: 每步结束是否写一行耗时日志
+    """
+
+    def __init__(self, window: int = DEFAULT_WINDOW, log_steps: bool = True):
+        self.window = window
+        self.log_steps = log_steps
+        self.phases: dict[str, PhaseStats] = {}
+        self.step_stats = PhaseStats(window)
+        self._sim: Optional["Simulator"] = None
+        self._wrapped: list[str] = []
+        self._step_phases: dict[str, float] = {}
+        self.last_avatars = 0
+
+    # --- 挂载 ---
+
+    def attach(self, sim: "Simulator") -> "StepProfiler":
+        self.detach()
+        self._sim = sim
+        for attr in dir(type(sim)):
+            if attr.startswith("_phase_") or attr == "_finalize_step":
+                name = attr.removeprefix("_phase_").removeprefix("_")
+                setattr(sim, attr, self._wrap(attr, name))
+                self._wrapped.append(attr)
+        setattr(sim, "step", self._wrap_step())
+        self._wrapped.append("step")
+        return self
+
+    def detach(self) -> None:
+        if self._sim is not None:
+            for attr in self._wrapped:
+                self._sim.__dict__.pop(attr, None)
+        self._sim = None
+        self._wrapped = []
+
+    # --- 计时包装 ---
+
+    def _resolve(self, attr: str):
+        """每次调用时从类上取方法（而非挂载时绑定），以便类级别的 patch 仍然生效"""
+        member = getattr(type(self._sim), attr)
+        get = getattr(member, "__get__", None)
+        return get(self._sim, type(self._sim)) if get is not None else member
+
+    def _record(self, name: str, start: tuple[float, float, float], result, args) -> None:
+        wall = time.perf_counter() - start[0]
+        cpu = time.thread_time() - start[1]
+        llm_wait = llm_wait_clock.now() - start[2]
+        events = len(result) if isinstance(result, list) else 0
+        avatars = len(args[0]) if args and isinstance(args[0], list) else 0
+        stats = self.phases.get(name)
+        if stats is None:
+            stats = self.phases[name] = PhaseStats(self.window)
+        stats.add(wall, cpu, llm_wait, events, avatars)
+        self._step_phases[name] = self._step_phases.get(name, 0.0) + wall
+
+    @staticmethod
+    def _start() -> tuple[float, float, float]:
+        return time.perf_counter(), time.thread_time(), llm_wait_clock.now()
+
+    def _wrap(self, attr: str, name: str):
+        method = getattr(type(self._sim), attr)
+        if asyncio.iscoroutinefunction(method):
+            @functools.wraps(method)
+            async def timed_async(*args, **kwargs):
+                start = self._start()
+                result = None
+                try:
+                    result = await self._resolve(attr)(*args, **kwargs)
+                    return result
+                finally:
+                    self._record(name, start, result, args)
+            return timed_async
+
+        @functools.wraps(method)
+        def timed(*args, **kwargs):
+            start = self._start()
+            result = None
+            try:
+                result = self._resolve(attr)(*args, **kwargs)
+                return result
+            finally:
+                self._record(name, start, result, args)
+        return timed
+
+    def _wrap_step(self):
+        @functools.wraps(type(self._sim).step)
+        async def timed_step(*args, **kwargs):
+            self._step_phases = {}
+            avatars = len(self._sim.world.avatar_manager.get_living_avatars()) if self._sim else 0
+            self.last_avatars = avatars
+            start = self._start()
+            events = None
+            try:
+                events = await self._resolve("step")(*args, **kwargs)
+                return events
+            finally:
+                wall = time.perf_counter() - start[0]
+                cpu = time.thread_time() - start[1]
+                llm_wait = llm_wait_clock.now() - start[2]
+                event_count = len(events) if isinstance(events, list) else 0
+                self.step_stats.add(wall, cpu, llm_wait, event_count, avatars)
+                if self.log_steps:
+                    self._log_step(wall, cpu, llm_wait, event_count, avatars)
+        return timed_step
+
+    def _log_step(self, wall: float, cpu: float, llm_wait: float, events: int, avatars: int) -> None:
+        top = sorted(self._step_phases.items(), key=lambda kv: kv[1], reverse=True)[:3]
+        top_text = ", ".join(f"{name} {sec:.3f}s" for name, sec in top)
+        get_logger().logger.info(
+            f"Step profile: {wall:.3f}s (cpu {cpu:.3f}s, llm wait {llm_wait:.3f}s), "
+            f"events {events}, avatars {avatars}; top: {top_text}"
+        )
+
+    # --- 导出 ---
+
+    def phase_seconds(self) -> dict[str, float]:
+        """阶段名 -> 累计墙钟秒数（降序）"""
+        return dict(sorted(((k, v.wall) for k, v in self.phases.items()), key=lambda kv: kv[1], reverse=True))
+
+    def to_dict(self) -> dict:
+        return {
+            "step": self.step_stats.to_dict(),
+            "phases": {name: stats.to_dict() for name, stats in self.phases.items()},
+        }
+
+    def to_prometheus(self) -> str:
+        """Prometheus 文本格式（0.0.4）"""
+        p = METRIC_PREFIX
+        lines = [
+            f"# HELP {p}_step_seconds Wall time of Simulator.step (quantiles over the recent window).",
+            f"# TYPE {p}_step_seconds summary",
+        ]
+        lines += _summary_lines(f"{p}_step_seconds", "", self.step_stats)
+        for metric, attr, help_text in (
+            ("step_cpu_seconds_total", "cpu", "Event loop thread CPU time spent in Simulator.step."),
+            ("step_llm_wait_seconds_total", "llm_wait", "Time Simulator.step spent with at least one LLM request in flight."),
+            ("step_events_total", "events", "Events produced by Simulator.step."),
+        ):
+            lines += [f"# HELP {p}_{metric} {help_text}", f"# TYPE {p}_{metric} counter",
+                      f"{p}_{metric} {_fmt(getattr(self.step_stats, attr))}"]
+        lines += [f"# HELP {p}_living_avatars Living avatars at the start of the last step.",
+                  f"# TYPE {p}_living_avatars gauge",
+                  f"{p}_living_avatars {self.last_avatars}"]
+
+        lines += [f"# HELP {p}_phase_seconds Wall time per simulator phase (quantiles over the recent window).",
+                  f"# TYPE {p}_phase_seconds summary"]
+        for name, stats in self.phases.items():
+            lines += _summary_lines(f"{p}_phase_seconds", f'phase="{name}"', stats)
+        for metric, attr, help_text in (
+            ("phase_cpu_seconds_total", "cpu", "Event loop thread CPU time per phase."),
+            ("phase_llm_wait_seconds_total", "llm_wait", "Time per phase with at least one LLM request in flight."),
+            ("phase_events_total", "events", "Events returned per phase."),
+            ("phase_avatars_total", "avatars", "Avatars passed to each phase."),
+        ):
+            lines += [f"# HELP {p}_{metric} {help_text}", f"# TYPE {p}_{metric} counter"]
+            lines += [f'{p}_{metric}{{phase="{name}"}} {_fmt(getattr(stats, attr))}' for name, stats in self.phases.items()]
+        return "\n".join(lines) + "\n"
+
+
+def _fmt(value: float) -> str:
+    return repr(round(value, 6)) if isinstance(value, float) else str(value)
+
+
+def _summary_lines(metric: str, labels: str, stats: PhaseStats) -> list[str]:
+    sep = "," if labels else ""
+    lines = [f'{metric}{{{labels}{sep}quantile="{q}"}} {_fmt(v)}' for q, v in stats.quantiles().items()]
+    suffix = f"{{{labels}}}" if labels else ""
+    lines.append(f"{metric}_sum{suffix} {_fmt(stats.wall)}")
+    lines.append(f"{metric}_count{suffix} {stats.count}")
+    return lines
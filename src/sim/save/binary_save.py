@@ -0,0 +1,150 @@
+"""
+二进制分块存档格式（.sav）
+
+与 JSON 存档内容相同，但按分块存储在单个 SQLite 文件中：
+- sections 表：meta / world / circulation / events / simulator / avatar_ids，每块为 zlib 压缩的紧凑 JSON
+- avatars 表：每个角色一行（id, digest, data），digest 为未压缩数据的哈希
+
+增量存档：写入前比较每个角色的 digest，只重写状态发生变化的角色，删除已不存在的角色。
+保存到新文件时，若提供了上一次的二进制存档作为基底，会先复制基底再增量写入。
+"""
+import hashlib
+import json
+import shutil
+import sqlite3
+import zlib
+from pathlib import Path
+from typing import Optional
+
+BINARY_SAVE_SUFFIX = ".sav"
+SAVE_SUFFIXES = (".json", BINARY_SAVE_SUFFIX)
+
+_SQLITE_MAGIC = b"SQLite format 3\x00"
+_COMPRESS_LEVEL = 1
+
+_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS sections (
+        name TEXT PRIMARY KEY,
+        data BLOB NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS avatars (
+        id TEXT PRIMARY KEY,
+        digest BLOB NOT NULL,
+        data BLOB NOT NULL
+    );
+"""
+
+
+def _dumps(obj) -> bytes:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _decode(blob: bytes):
+    return json.loads(zlib.decompress(blob))
+
+
+def is_binary_save(path: Path) -> bool:
+    """按文件头判断是否为二进制存档"""
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(_SQLITE_MAGIC)) == _SQLITE_MAGIC
+    except OSError:
+        return False
+
+
+def write_binary_save(path: Path, save_data: dict, base_path: Optional[Path] = None) -> dict:
+    """
+    写入二进制存档。
+
+    Args:
+        path: 目标文件
+        save_data: 与 JSON 存档相同结构的数据（meta/world/avatars/events/simulator）
+        base_path: 上一次的二进制存档。目标文件不存在时以它为基底做增量写入
+
+    Returns:
+        写入统计：avatars_total / avatars_written / avatars_deleted / incremental
+    """
+    path = Path(path)
+    if not path.exists() and base_path is not None and Path(base_path) != path and is_binary_save(base_path):
+        shutil.copy2(base_path, path)
+    incremental = path.exists()
+
+    world = dict(save_data.get("world", {}))
+    circulation = world.pop("circulation", {})
+    avatars = save_data.get("avatars", [])
+    sections = {
+        "meta": save_data.get("meta", {}),
+        "world": world,
+        "circulation": circulation,
+        "events": save_data.get("events", []),
+        "simulator": save_data.get("simulator", {}),
+        "avatar_ids": [a["id"] for a in avatars],
+    }
+
+    conn = sqlite3.connect(str(path))
+    try:
+        conn.executescript(_SCHEMA)
+        old_digests = dict(conn.execute("SELECT id, digest FROM avatars"))
+
+        changed = []
+        for avatar_data in avatars:
+            raw = _dumps(avatar_data)
+            digest = hashlib.blake2b(raw, digest_size=16).digest()
+            if old_digests.pop(avatar_data["id"], None) != digest:
+                changed.append((avatar_data["id"], digest, zlib.compress(raw, _COMPRESS_LEVEL)))
+
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO sections (name, data) VALUES (?, ?)",
+                [(name, zlib.compress(_dumps(data), _COMPRESS_LEVEL)) for name, data in sections.items()],
+            )
+            conn.executemany("INSERT OR REPLACE INTO avatars (id, digest, data) VALUES (?, ?, ?)", changed)
+            conn.executemany("DELETE FROM avatars WHERE id = ?", [(aid,) for aid in old_digests])
+    finally:
+        conn.close()
+
+    return {
+        "avatars_total": len(avatars),
+        "avatars_written": len(changed),
+        "avatars_deleted": len(old_digests),
+        "incremental": incremental,
+    }
+
+
+def read_binary_save(path: Path) -> dict:
+    """读取二进制存档，返回与 JSON 存档相同结构的数据"""
+    conn = sqlite3.connect(f"file:{Path(path).as_posix()}?mode=ro", uri=True)
+    try:
+        sections = {name: _decode(data) for name, data in conn.execute("SELECT name, data FROM sections")}
+        avatars_by_id = {aid: _decode(data) for aid, data in conn.execute("SELECT id, data FROM avatars")}
+    finally:
+        conn.close()
+
+    world = sections.get("world", {})
+    world["circulation"] = sections.get("circulation", {})
+    order = sections.get("avatar_ids") or list(avatars_by_id)
+    return {
+        "meta": sections.get("meta", {}),
+        "world": world,
+        "avatars": [avatars_by_id[aid] for aid in order if aid in avatars_by_id],
+        "events": sections.get("events", []),
+        "simulator": sections.get("simulator", {}),
+    }
+
+
+def read_binary_meta(path: Path) -> dict:
+    """只读取 meta 分块"""
+    conn = sqlite3.connect(f"file:{Path(path).as_posix()}?mode=ro", uri=True)
+    try:
+        row = conn.execute("SELECT data FROM sections WHERE name = 'meta'").fetchone()
+    finally:
+        conn.close()
+    return _decode(row[0]) if row else {}
+
+
+def read_save_data(path: Path) -> dict:
+    """读取任意格式的存档（二进制或 JSON）"""
+    if is_binary_save(path):
+        return read_binary_save(path)
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
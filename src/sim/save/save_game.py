@@ -2,7 +2,8 @@
 存档功能模块
 
 主要功能：
-- save_game: 保存游戏完整状态到JSON文件
+- save_game: 保存游戏完整状态到JSON文件或二进制分块文件
+- take_save_snapshot / write_save_snapshot: 分两阶段保存（快照 + 写入），写入阶段可放到线程池执行
 - get_save_info: 读取存档的元信息（不加载完整数据）
 - list_saves: 列出所有存档文件
 
@@ -14,7 +15,8 @@
 - simulator: 模拟器配置（如出生率）
 
 存档格式：
-- JSON（明文，易于调试）+ SQLite事件数据库
+- JSON（明文，易于调试）或二进制分块格式 .sav（save.format: binary，支持增量保存，见 binary_save.py）
+- 另附 SQLite事件数据库
 - 存档位置：assets/saves/ (配置在config.yml中)
 - 事件数据库：{save_name}_events.db（与JSON文件同目录）
 
@@ -25,10 +27,13 @@
 - 事件实时写入SQLite，JSON中的events字段仅用于旧存档迁移
 """
 import json
+import pickle
 import re
+import time
+from dataclasses import dataclass
 from pathlib import Path
 from datetime import datetime
-from typing import List, Optional, TYPE_CHECKING
+from typing import Callable, List, Optional, TYPE_CHECKING
 
 if TYPE_CHECKING:
     from src.classes.core.world import World
@@ -38,6 +43,13 @@ if TYPE_CHECKING:
 from src.utils.config import CONFIG
 from src.classes.language import language_manager
 from src.sim.load.load_game import get_events_db_path
+from src.sim.save.binary_save import (
+    BINARY_SAVE_SUFFIX,
+    SAVE_SUFFIXES,
+    is_binary_save,
+    read_binary_meta,
+    write_binary_save,
+)
 
 
 
@@ -50,172 +62,296 @@ def sanitize_save_name(name: str) -> str:
     return safe_name[:50] if safe_name else "save"
 
 
-def save_game(
+# 当前（或最近一次）存档的进度，供 /api/game/save/progress 查询
+_SAVE_PROGRESS: dict = {"stage": "idle", "done": 0, "total": 0}
+
+
+def _set_save_progress(stage: str, done: int, total: int) -> None:
+    _SAVE_PROGRESS.update(stage=stage, done=done, total=total)
+
+
+def get_save_progress() -> dict:
+    """存档进度：stage 为 idle / backing_up_events / writing_save / done / failed，done/total 为事件库已备份页数/总页数"""
+    return dict(_SAVE_PROGRESS)
+
+
+def get_save_format() -> str:
+    """新存档的格式：json（默认）或 binary"""
+    save_conf = getattr(CONFIG, "save", None)
+    return str(getattr(save_conf, "format", "json")).lower()
+
+
+def resolve_save_path(
+    world: "World",
+    save_path: Optional[Path] = None,
+    custom_name: Optional[str] = None,
+) -> Path:
+    """确定存档路径：未指定时生成 saves/时间戳_游戏时间.json（save.format 为 binary 时为 .sav）"""
+    if save_path is not None:
+        save_path = Path(save_path)
+        save_path.parent.mkdir(parents=True, exist_ok=True)
+        return save_path
+
+    saves_dir = CONFIG.paths.saves
+    saves_dir.mkdir(parents=True, exist_ok=True)
+
+    # 生成友好的文件名。
+    now = datetime.now()
+    time_str = now.strftime("%Y%m%d_%H%M%S")
+    year = world.month_stamp.get_year()
+    month = world.month_stamp.get_month().value
+    game_time_str = f"Y{year}M{month}"
+
+    suffix = BINARY_SAVE_SUFFIX if get_save_format() == "binary" else ".json"
+
+    # 处理自定义名称。
+    if custom_name:
+        safe_name = sanitize_save_name(custom_name)
+        filename = f"{safe_name}_{time_str}{suffix}"
+    else:
+        filename = f"{time_str}_{game_time_str}{suffix}"
+
+    return saves_dir / filename
+
+
+@dataclass
+class SaveSnapshot:
+    """某一时刻的存档快照：纯数据，写入阶段不再访问世界对象（除记录统计外）"""
+    save_path: Path
+    data: dict
+    # 快照时事件库的最大 rowid，备份时裁掉之后写入的事件，保证事件库与快照一致
+    events_max_rowid: Optional[int] = None
+    snapshot_ms: float = 0.0
+
+
+def take_save_snapshot(
     world: "World",
     simulator: "Simulator",
     existed_sects: List["Sect"],
-    save_path: Optional[Path] = None,
-    custom_name: Optional[str] = None
+    save_path: Path,
+    custom_name: Optional[str] = None,
+    detach: bool = False,
+) -> SaveSnapshot:
+    """
+    收集存档数据（在步进间隙调用）。
+
+    Args:
+        detach: 为 True 时深拷贝一份数据，使其与世界对象不再共享可变容器，
+            之后可在其他线程写入，游戏循环可以继续运行。
+    """
+    start = time.perf_counter()
+    events_db_path = get_events_db_path(save_path)
+
+    # 计算角色统计。
+    alive_count = len(world.avatar_manager.avatars)
+    dead_count = len(world.avatar_manager.dead_avatars)
+    total_count = alive_count + dead_count
+
+    # 构建元信息
+    meta = {
+        "version": CONFIG.meta.version,
+        "save_time": datetime.now().isoformat(),
+        "game_time": f"{world.month_stamp.get_year()}年{world.month_stamp.get_month().value}月",
+        "language": str(language_manager),
+        # SQLite 事件数据库信息。
+        "events_db": str(events_db_path.name),
+        "event_count": world.event_manager.count(),
+        # 新增元数据。
+        "avatar_count": total_count,
+        "alive_count": alive_count,
+        "dead_count": dead_count,
+        "custom_name": custom_name,
+    }
+    
+    # 构建世界数据
+    # 收集有主洞府信息
+    from src.classes.environment.region import CultivateRegion, CityRegion
+    cultivate_regions_hosts = {}
+    regions_status = {}
+    
+    if hasattr(world.map, 'regions'):
+         for rid, region in world.map.regions.items():
+             # 保存洞府主人
+             if isinstance(region, CultivateRegion) and region.host_avatar:
+                 cultivate_regions_hosts[str(rid)] = region.host_avatar.id
+             
+             # 保存城市繁荣度
+             if isinstance(region, CityRegion):
+                 regions_status[str(rid)] = {
+                     "prosperity": region.prosperity
+                 }
+
+    # 地图参数（用于读档时复现地图）
+    map_params = getattr(world, "_map_params", None) or {}
+    
+    world_data = {
+        "month_stamp": int(world.month_stamp),
+        "start_year": world.start_year,
+        "existed_sect_ids": [sect.id for sect in existed_sects],
+        # 天地灵机
+        "current_phenomenon_id": world.current_phenomenon.id if world.current_phenomenon else None,
+        "phenomenon_start_year": world.phenomenon_start_year if hasattr(world, 'phenomenon_start_year') else 0,
+        "world_spirit_qi": getattr(world, "world_spirit_qi", 0.6),
+        "cultivate_regions_hosts": cultivate_regions_hosts,
+        "regions_status": regions_status,
+        # 出世物品流转
+        "circulation": world.circulation.to_save_dict(),
+        # 世界历史
+        "history": {
+            "text": world.history.text,
+            "modifications": world.history.modifications
+        },
+        # 地图参数（随机地图时用于复现）
+        "map_params": map_params,
+    }
+    
+    # 保存所有Avatar（第一阶段：不含relations）
+    # 需要保存活人和死者
+    avatars_data = []
+    for avatar in world.avatar_manager._iter_all_avatars():
+        avatars_data.append(avatar.to_save_dict())
+    
+    # 保存事件历史（限制数量）
+    max_events = CONFIG.save.max_events_to_save
+    events_data = []
+    recent_events = world.event_manager.get_recent_events(limit=max_events)
+    for event in recent_events:
+        events_data.append(event.to_dict())
+    
+    # 保存模拟器数据
+    simulator_data = {
+        "awakening_rate": simulator.awakening_rate
+    }
+    
+    # 组装完整的存档数据
+    save_data = {
+        "meta": meta,
+        "world": world_data,
+        "avatars": avatars_data,
+        "events": events_data,
+        "simulator": simulator_data
+    }
+    if detach:
+        # to_save_dict 会直接引用角色身上的 dict/list，pickle 往返比 deepcopy 快得多
+        save_data = pickle.loads(pickle.dumps(save_data, protocol=pickle.HIGHEST_PROTOCOL))
+
+    storage = getattr(world.event_manager, "_storage", None)
+    return SaveSnapshot(
+        save_path=save_path,
+        data=save_data,
+        events_max_rowid=storage.get_max_rowid() if storage else None,
+        snapshot_ms=round((time.perf_counter() - start) * 1000, 2),
+    )
+
+
+def write_save_snapshot(
+    world: "World",
+    snapshot: SaveSnapshot,
+    progress: Optional[Callable[[str, int, int], None]] = None,
 ) -> tuple[bool, Optional[str]]:
     """
-    保存游戏状态到文件
+    写入快照：备份事件数据库，再写存档文件。可在工作线程中执行。
 
     Args:
-        world: 世界对象
-        simulator: 模拟器对象
-        existed_sects: 本局启用的宗门列表
-        save_path: 保存路径，默认为saves/时间戳_游戏时间.json
-        custom_name: 用户自定义的存档名称
+        world: 世界对象（只用于读取事件库连接与记录统计）
+        snapshot: take_save_snapshot 的结果
+        progress: 进度回调 (stage, done, total)，stage 同 get_save_progress
 
     Returns:
         (保存是否成功, 保存的文件名)
     """
+    def report(stage: str, done: int = 0, total: int = 0) -> None:
+        _set_save_progress(stage, done, total)
+        if progress is not None:
+            progress(stage, done, total)
+
     try:
-        # 确定保存路径
-        if save_path is None:
-            saves_dir = CONFIG.paths.saves
-            saves_dir.mkdir(parents=True, exist_ok=True)
-
-            # 生成友好的文件名。
-            now = datetime.now()
-            time_str = now.strftime("%Y%m%d_%H%M%S")
-            year = world.month_stamp.get_year()
-            month = world.month_stamp.get_month().value
-            game_time_str = f"Y{year}M{month}"
-
-            # 处理自定义名称。
-            if custom_name:
-                safe_name = sanitize_save_name(custom_name)
-                filename = f"{safe_name}_{time_str}.json"
-            else:
-                filename = f"{time_str}_{game_time_str}.json"
-
-            save_path = saves_dir / filename
-        else:
-            save_path = Path(save_path)
-            save_path.parent.mkdir(parents=True, exist_ok=True)
-        
-        # 计算事件数据库路径。
+        start = time.perf_counter()
+        save_path = snapshot.save_path
+        save_data = snapshot.data
         events_db_path = get_events_db_path(save_path)
 
         # 确保当前的 SQLite 数据库被复制到新存档的位置。
-        # 如果当前使用的是其他数据库文件，需要将其复制过来。
-        if hasattr(world.event_manager, "_storage") and world.event_manager._storage:
-             current_db_path = world.event_manager._storage._db_path
-             if current_db_path != events_db_path:
-                 import shutil
-                 # 确保源文件存在
-                 if current_db_path.exists():
-                    # 确保目标目录存在
-                    events_db_path.parent.mkdir(parents=True, exist_ok=True)
-                    # 复制数据库文件
-                    shutil.copy2(current_db_path, events_db_path)
-                    print(f"已复制事件数据库: {current_db_path} -> {events_db_path}")
-                 else:
-                     print(f"警告: 当前事件数据库不存在: {current_db_path}")
-
-        # 计算角色统计。
-        alive_count = len(world.avatar_manager.avatars)
-        dead_count = len(world.avatar_manager.dead_avatars)
-        total_count = alive_count + dead_count
-
-        # 构建元信息
-        meta = {
-            "version": CONFIG.meta.version,
-            "save_time": datetime.now().isoformat(),
-            "game_time": f"{world.month_stamp.get_year()}年{world.month_stamp.get_month().value}月",
-            "language": str(language_manager),
-            # SQLite 事件数据库信息。
-            "events_db": str(events_db_path.name),
-            "event_count": world.event_manager.count(),
-            # 新增元数据。
-            "avatar_count": total_count,
-            "alive_count": alive_count,
-            "dead_count": dead_count,
-            "custom_name": custom_name,
-        }
-        
-        # 构建世界数据
-        # 收集有主洞府信息
-        from src.classes.environment.region import CultivateRegion, CityRegion
-        cultivate_regions_hosts = {}
-        regions_status = {}
-        
-        if hasattr(world.map, 'regions'):
-             for rid, region in world.map.regions.items():
-                 # 保存洞府主人
-                 if isinstance(region, CultivateRegion) and region.host_avatar:
-                     cultivate_regions_hosts[str(rid)] = region.host_avatar.id
-                 
-                 # 保存城市繁荣度
-                 if isinstance(region, CityRegion):
-                     regions_status[str(rid)] = {
-                         "prosperity": region.prosperity
-                     }
-
-        # 地图参数（用于读档时复现地图）
-        map_params = getattr(world, "_map_params", None) or {}
-        
-        world_data = {
-            "month_stamp": int(world.month_stamp),
-            "start_year": world.start_year,
-            "existed_sect_ids": [sect.id for sect in existed_sects],
-            # 天地灵机
-            "current_phenomenon_id": world.current_phenomenon.id if world.current_phenomenon else None,
-            "phenomenon_start_year": world.phenomenon_start_year if hasattr(world, 'phenomenon_start_year') else 0,
-            "world_spirit_qi": getattr(world, "world_spirit_qi", 0.6),
-            "cultivate_regions_hosts": cultivate_regions_hosts,
-            "regions_status": regions_status,
-            # 出世物品流转
-            "circulation": world.circulation.to_save_dict(),
-            # 世界历史
-            "history": {
-                "text": world.history.text,
-                "modifications": world.history.modifications
-            },
-            # 地图参数（随机地图时用于复现）
-            "map_params": map_params,
-        }
-        
-        # 保存所有Avatar（第一阶段：不含relations）
-        # 需要保存活人和死者
-        avatars_data = []
-        for avatar in world.avatar_manager._iter_all_avatars():
-            avatars_data.append(avatar.to_save_dict())
-        
-        # 保存事件历史（限制数量）
-        max_events = CONFIG.save.max_events_to_save
-        events_data = []
-        recent_events = world.event_manager.get_recent_events(limit=max_events)
-        for event in recent_events:
-            events_data.append(event.to_dict())
-        
-        # 保存模拟器数据
-        simulator_data = {
-            "awakening_rate": simulator.awakening_rate
-        }
-        
-        # 组装完整的存档数据
-        save_data = {
-            "meta": meta,
-            "world": world_data,
-            "avatars": avatars_data,
-            "events": events_data,
-            "simulator": simulator_data
-        }
-        
+        # 使用在线备份 API 分步复制（游戏循环可继续写入），未变化时复用上次的快照。
+        events_backup = {}
+        storage = getattr(world.event_manager, "_storage", None)
+        if storage and storage._db_path != events_db_path:
+            report("backing_up_events")
+            events_backup = storage.snapshot_to(
+                events_db_path,
+                progress=lambda done, total: report("backing_up_events", done, total),
+                max_rowid=snapshot.events_max_rowid,
+            )
+            print(f"已备份事件数据库 ({events_backup['method']}): {storage._db_path} -> {events_db_path}")
+        events_saved = time.perf_counter()
+        report("writing_save")
+
         # 写入文件
-        with open(save_path, "w", encoding="utf-8") as f:
-            json.dump(save_data, f, ensure_ascii=False, indent=2)
+        if save_path.suffix == BINARY_SAVE_SUFFIX:
+            # 以上一次的二进制存档为基底，只重写状态变化的角色
+            stats = write_binary_save(save_path, save_data, base_path=getattr(world, "_last_binary_save", None))
+            world._last_binary_save = save_path
+        else:
+            with open(save_path, "w", encoding="utf-8") as f:
+                json.dump(save_data, f, ensure_ascii=False, indent=2)
+            stats = {}
+
+        finished = time.perf_counter()
+        world._save_stats = {
+            "format": "binary" if save_path.suffix == BINARY_SAVE_SUFFIX else "json",
+            "serialize_ms": snapshot.snapshot_ms,
+            "events_backup_ms": round((events_saved - start) * 1000, 2),
+            "events_backup": events_backup,
+            "write_ms": round((finished - events_saved) * 1000, 2),
+            "total_ms": round(snapshot.snapshot_ms + (finished - start) * 1000, 2),
+            **stats,
+        }
         
         print(f"游戏已保存到: {save_path}")
+        report("done")
         return True, save_path.name
         
     except Exception as e:
+        report("failed")
+        print(f"保存游戏失败: {e}")
+        import traceback
+        traceback.print_exc()
+        return False, None
+
+
+def save_game(
+    world: "World",
+    simulator: "Simulator",
+    existed_sects: List["Sect"],
+    save_path: Optional[Path] = None,
+    custom_name: Optional[str] = None
+) -> tuple[bool, Optional[str]]:
+    """
+    保存游戏状态到文件
+
+    Args:
+        world: 世界对象
+        simulator: 模拟器对象
+        existed_sects: 本局启用的宗门列表
+        save_path: 保存路径，默认为saves/时间戳_游戏时间.json（save.format 为 binary 时为 .sav）
+        custom_name: 用户自定义的存档名称
+
+    Returns:
+        (保存是否成功, 保存的文件名)
+
+    保存耗时与写入统计记录在 world._save_stats。
+    不阻塞游戏循环的后台存档见 src/server/jobs.py：先 take_save_snapshot，再在线程池中 write_save_snapshot。
+    """
+    try:
+        save_path = resolve_save_path(world, save_path, custom_name)
+        snapshot = take_save_snapshot(world, simulator, existed_sects, save_path, custom_name)
+    except Exception as e:
+        _set_save_progress("failed", 0, 0)
         print(f"保存游戏失败: {e}")
         import traceback
         traceback.print_exc()
         return False, None
+    return write_save_snapshot(world, snapshot)
 
 
 def get_save_info(save_path: Path) -> Optional[dict]:
@@ -229,6 +365,8 @@ def get_save_info(save_path: Path) -> Optional[dict]:
         存档元信息字典，如果读取失败返回None
     """
     try:
+        if is_binary_save(save_path):
+            return read_binary_meta(save_path)
         with open(save_path, "r", encoding="utf-8") as f:
             data = json.load(f)
             return data.get("meta", {})
@@ -253,7 +391,8 @@ def list_saves(saves_dir: Optional[Path] = None) -> List[tuple[Path, dict]]:
         return []
     
     saves = []
-    for save_file in saves_dir.glob("*.json"):
+    save_files = [p for p in saves_dir.iterdir() if p.suffix in SAVE_SUFFIXES and p.is_file()]
+    for save_file in save_files:
         info = get_save_info(save_file)
         if info is not None:
             saves.append((save_file, info))
@@ -1,6 +1,6 @@
 import random
 import asyncio
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Callable
 
 from src.systems.time import Month, Year, MonthStamp
 from src.classes.core.avatar import Avatar, Gender
@@ -9,10 +9,12 @@ from src.classes.age import Age
 from src.systems.cultivation import Realm
 from src.classes.core.world import World
 from src.classes.event import Event, is_null_event
-from src.classes.ai import llm_ai
+from src.classes.ai import AI, llm_ai
 from src.utils.name_generator import get_random_name
 from src.utils.config import CONFIG
 from src.run.log import get_logger
+from src.sim.profiler import StepProfiler
+from src.sim.decision_pipeline import DecisionPipeline
 from src.systems.fortune import try_trigger_fortune
 from src.systems.fortune import try_trigger_misfortune
 from src.classes.celestial_phenomenon import get_random_celestial_phenomenon
@@ -28,9 +30,39 @@ from src.classes.relation.relation_resolver import RelationResolver
 from src.classes.relation.relations import update_second_degree_relations
 
 class Simulator:
-    def __init__(self, world: World):
+    def __init__(self, world: World, ai: AI | None = None):
         self.world = world
+        # 决策 AI；None 表示使用全局的 llm_ai
+        self.ai = ai
         self.awakening_rate = CONFIG.game.npc_awakening_rate_per_month  # 从配置文件读取NPC每月觉醒率（凡人晋升修士）
+        # 感知阶段缓存：avatar_id -> 上次感知时的 (x, y, radius)
+        self._last_perception: dict[str, tuple[int, int, int]] = {}
+        # 每步结束（_finalize_step 末尾，时间已推进）时调用的回调，参数为 world；
+        # 服务端用它发布只读快照
+        self.step_listeners: list[Callable[[World], None]] = []
+        # 流水线决策：提前为即将空闲的角色在后台请求决策（ai.pipelined_decisions）
+        self.decision_pipeline: DecisionPipeline | None = None
+        if getattr(CONFIG.ai, "pipelined_decisions", False):
+            self.decision_pipeline = DecisionPipeline(
+                lookahead_months=int(getattr(CONFIG.ai, "decision_lookahead_months", 1)),
+                max_staleness_months=int(getattr(CONFIG.ai, "decision_max_staleness_months", 2)),
+            )
+        # 分阶段性能统计（system.step_profiling 关闭时为 None，无任何开销）
+        self.profiler: StepProfiler | None = None
+        if getattr(CONFIG.system, "step_profiling", False):
+            self.enable_profiling()
+
+    def enable_profiling(self) -> StepProfiler:
+        """开启分阶段性能统计（已开启时返回现有的统计器）"""
+        if self.profiler is None:
+            window = int(getattr(CONFIG.system, "step_profiling_window", 120))
+            self.profiler = StepProfiler(window=window).attach(self)
+        return self.profiler
+
+    def disable_profiling(self) -> None:
+        if self.profiler is not None:
+            self.profiler.detach()
+            self.profiler = None
 
     def _phase_update_perception_and_knowledge(self, living_avatars: list[Avatar]):
         """
@@ -52,33 +84,26 @@ class Simulator:
                 avatars_with_home.add(r.host_avatar.id)
 
         # 2. 遍历所有存活角色
+        game_map = self.world.map
+        last_perception = self._last_perception
+        current_perception: dict[str, tuple[int, int, int]] = {}
         for avatar in living_avatars:
-            # ...
             # 计算感知半径（曼哈顿距离）
             radius = get_avatar_observation_radius(avatar)
-            
-            # ...
-            # 获取范围内的有效坐标
-            start_x = max(0, avatar.pos_x - radius)
-            end_x = min(self.world.map.width - 1, avatar.pos_x + radius)
-            start_y = max(0, avatar.pos_y - radius)
-            end_y = min(self.world.map.height - 1, avatar.pos_y + radius)
-
-            # 收集感知到的区域
-            observed_regions = set()
-            for x in range(start_x, end_x + 1):
-                for y in range(start_y, end_y + 1):
-                    # 距离判定：曼哈顿距离
-                    if abs(x - avatar.pos_x) + abs(y - avatar.pos_y) <= radius:
-                        tile = self.world.map.get_tile(x, y)
-                        if tile.region:
-                            observed_regions.add(tile.region)
-
-            # 更新认知与自动占据
+            key = (avatar.pos_x, avatar.pos_y, radius)
+            current_perception[avatar.id] = key
+
+            # 收集感知到的区域（Map 按 (x, y, radius) 缓存）
+            observed_regions = game_map.get_regions_within(*key)
+
+            # 位置与半径都没变：known_regions 上月已更新过，跳过
+            if last_perception.get(avatar.id) != key:
+                avatar.known_regions.update(region.id for region in observed_regions)
+
+            # 自动占据（洞府主人可能已变化，每月都需检查）
+            if avatar.id in avatars_with_home:
+                continue
             for region in observed_regions:
-                # 更新 known_regions
-                avatar.known_regions.add(region.id)
-                
                 # 自动占据逻辑
                 # 只有当：是修炼区域 + 无主 + 自己无洞府 时触发
                 if isinstance(region, CultivateRegion):
@@ -95,25 +120,35 @@ class Simulator:
                                 related_avatars=[avatar.id]
                             )
                             events.append(event)
+        self._last_perception = current_perception
         return events
 
     async def _phase_decide_actions(self, living_avatars: list[Avatar]):
         """
         决策阶段：仅对需要新计划的角色调用 AI（当前无动作且无计划），
         将 AI 的决策结果加载为角色的计划链。
+        开启流水线决策时优先取用预取结果，并在结束后为即将空闲的角色发起下一批预取。
         """
         avatars_to_decide = []
         for avatar in living_avatars:
             if avatar.current_action is None and not avatar.has_plans():
                 avatars_to_decide.append(avatar)
-        if not avatars_to_decide:
-            return
-        ai = llm_ai
-        decide_results = await ai.decide(self.world, avatars_to_decide)
-        for avatar, result in decide_results.items():
-            action_name_params_pairs, avatar_thinking, short_term_objective, _event = result
-            # 仅入队计划，不在此处添加开始事件，避免与提交阶段重复
-            avatar.load_decide_result_chain(action_name_params_pairs, avatar_thinking, short_term_objective)
+        ai = self.ai if self.ai is not None else llm_ai
+        pipeline = self.decision_pipeline
+        if avatars_to_decide:
+            if pipeline is not None:
+                decide_results = await pipeline.collect(ai, self.world, avatars_to_decide)
+            else:
+                decide_results = await ai.decide(self.world, avatars_to_decide)
+            for avatar, result in decide_results.items():
+                action_name_params_pairs, avatar_thinking, short_term_objective, emotion, _event = result
+                # 仅入队计划，不在此处添加开始事件，避免与提交阶段重复
+                avatar.load_decide_result_chain(action_name_params_pairs, avatar_thinking, short_term_objective)
+                # 情绪随计划一同采用；被丢弃的预取不会改动角色
+                if emotion is not None:
+                    avatar.emotion = emotion
+        if pipeline is not None:
+            pipeline.prefetch(ai, self.world, living_avatars)
 
     def _phase_commit_next_plans(self, living_avatars: list[Avatar]):
         """
@@ -593,15 +628,21 @@ class Simulator:
                 unique_events[e.id] = e
         final_events = list(unique_events.values())
 
-        # 2. 统一写入事件管理器
+        # 2. 统一写入事件管理器（单事务批量入库）
         if self.world.event_manager:
-            for e in final_events:
-                self.world.event_manager.add_event(e)
+            self.world.event_manager.add_events(final_events)
         
         # 3. 记录日志
         self._phase_log_events(final_events)
 
         # 4. 时间推进
         self.world.month_stamp = self.world.month_stamp + 1
+
+        # 5. 通知监听者（如发布只读快照）
+        for listener in self.step_listeners:
+            try:
+                listener(self.world)
+            except Exception as e:
+                get_logger().logger.error(f"Step listener failed: {e}", exc_info=True)
         
         return final_events
@@ -0,0 +1,187 @@
+"""
+LLM 响应缓存
+
+按 (模型, 模板, 渲染后提示词) 的内容哈希缓存解析后的 JSON 结果，存于 SQLite。
+仅对在 CONFIG.llm.default_modes 中开启 cache 的任务生效；支持 TTL 过期与按条数淘汰（最久未访问优先）。
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+from src.run.log import get_logger
+from src.utils.config import CONFIG
+
+DEFAULT_TTL_HOURS = 168
+DEFAULT_MAX_ENTRIES = 5000
+CACHE_DB_NAME = "llm_responses.db"
+
+
+def make_cache_key(model_name: str, template: str, prompt: str) -> str:
+    """内容寻址的缓存键"""
+    digest = hashlib.sha256()
+    for part in (model_name, template, prompt):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class LLMResponseCache:
+    """SQLite 持久化的 LLM 响应缓存（线程安全）"""
+
+    def __init__(self, db_path: Path, ttl_seconds: float, max_entries: int):
+        self.db_path = Path(db_path)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._stats: dict[str, dict[str, int]] = {}
+        self._logger = get_logger().logger
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                template TEXT NOT NULL,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_llm_cache_last_access
+                ON llm_cache(last_access);
+        """)
+        self._conn.commit()
+
+    def _count(self, task: str, field: str) -> None:
+        counters = self._stats.setdefault(task, {"hits": 0, "misses": 0})
+        counters[field] += 1
+
+    def get(self, key: str, task: str = "") -> Optional[dict]:
+        """命中返回缓存的结果，未命中或已过期返回 None"""
+        now = time.time()
+        with self._lock:
+            try:
+                row = self._conn.execute(
+                    "SELECT response, created_at FROM llm_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and now - row[1] > self.ttl_seconds:
+                    self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                    self._conn.commit()
+                    row = None
+                if row is None:
+                    self._count(task, "misses")
+                    return None
+                self._conn.execute("UPDATE llm_cache SET last_access = ? WHERE key = ?", (now, key))
+                self._conn.commit()
+                self._count(task, "hits")
+                return json.loads(row[0])
+            except Exception as e:
+                self._logger.error(f"LLM cache read failed: {e}")
+                self._count(task, "misses")
+                return None
+
+    def put(self, key: str, model_name: str, template: str, response: dict) -> None:
+        """写入结果，超出条数上限时淘汰最久未访问的条目"""
+        now = time.time()
+        with self._lock:
+            try:
+                self._conn.execute(
+                    """
+                    INSERT OR REPLACE INTO llm_cache (key, model, template, response, created_at, last_access)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    """,
+                    (key, model_name, template, json.dumps(response, ensure_ascii=False), now, now),
+                )
+                self._conn.execute(
+                    """
+                    DELETE FROM llm_cache WHERE key IN (
+                        SELECT key FROM llm_cache ORDER BY last_access DESC LIMIT -1 OFFSET ?
+                    )
+                    """,
+                    (self.max_entries,),
+                )
+                self._conn.commit()
+            except Exception as e:
+                self._conn.rollback()
+                self._logger.error(f"LLM cache write failed: {e}")
+
+    def purge_expired(self) -> int:
+        """删除所有过期条目，返回删除数量"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM llm_cache WHERE created_at < ?", (time.time() - self.ttl_seconds,)
+            )
+            self._conn.commit()
+            return cursor.rowcount
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        """命中统计：总计与按任务分组"""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+            by_task = {task: dict(c) for task, c in self._stats.items()}
+        hits = sum(c["hits"] for c in by_task.values())
+        misses = sum(c["misses"] for c in by_task.values())
+        total = hits + misses
+        return {
+            "enabled": True,
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / total if total else 0.0,
+            "tasks": by_task,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_CACHE: Optional[LLMResponseCache] = None
+_CACHE_LOCK = threading.Lock()
+
+
+def _cache_settings() -> tuple[bool, Path, float, int]:
+    cache_conf = getattr(CONFIG.llm, "cache", None)
+    enabled = bool(getattr(cache_conf, "enabled", True))
+    cache_dir = Path(CONFIG.paths.get("cache", "assets/cache"))
+    ttl_hours = float(getattr(cache_conf, "ttl_hours", DEFAULT_TTL_HOURS))
+    max_entries = int(getattr(cache_conf, "max_entries", DEFAULT_MAX_ENTRIES))
+    return enabled, cache_dir / CACHE_DB_NAME, ttl_hours * 3600, max_entries
+
+
+def get_response_cache() -> Optional[LLMResponseCache]:
+    """获取全局响应缓存（懒加载）；缓存被关闭时返回 None。配置路径变化时重新打开。"""
+    global _CACHE
+    enabled, db_path, ttl_seconds, max_entries = _cache_settings()
+    if not enabled:
+        return None
+    with _CACHE_LOCK:
+        if _CACHE is None or _CACHE.db_path != db_path:
+            if _CACHE is not None:
+                _CACHE.close()
+            _CACHE = LLMResponseCache(db_path, ttl_seconds, max_entries)
+        else:
+            _CACHE.ttl_seconds = ttl_seconds
+            _CACHE.max_entries = max_entries
+        return _CACHE
+
+
+def get_cache_stats() -> dict:
+    """供 API 使用的缓存统计"""
+    cache = get_response_cache()
+    if cache is None:
+        return {"enabled": False}
+    return cache.stats()
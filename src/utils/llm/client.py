@@ -1,33 +1,70 @@
 """LLM 客户端核心调用逻辑"""
 
-import json
-import urllib.request
-import urllib.error
-import asyncio
+import time
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Optional
+from typing import Awaitable, Callable, Optional
 
 from src.run.log import log_llm_call
 from src.utils.config import CONFIG
-from .config import LLMMode, LLMConfig, get_task_mode
+from .cache import get_response_cache, make_cache_key
+from .config import LLMMode, LLMConfig, get_task_mode, is_task_cached
 from .parser import parse_json
 from .prompt import build_prompt, load_template
 from .exceptions import LLMError, ParseError
+from .transport import get_transport, post_json_sync
 
-# 模块级信号量，懒加载
-_SEMAPHORE: Optional[asyncio.Semaphore] = None
 
+# 离线响应器：设置后 call_llm_with_template 不再直接请求，而是以相同参数
+# (template_path, infos, mode, max_retries, cache_task) 调用它取得结果。
+# 供 headless 批量模拟等场景替换/录制/回放 LLM 响应（见 src/sim/headless.py）。
+TemplateResponder = Callable[..., Awaitable[dict]]
+_template_responder: Optional[TemplateResponder] = None
 
-def _get_semaphore() -> asyncio.Semaphore:
-    global _SEMAPHORE
-    if _SEMAPHORE is None:
-        limit = getattr(CONFIG.ai, "max_concurrent_requests", 10)
-        _SEMAPHORE = asyncio.Semaphore(limit)
-    return _SEMAPHORE
 
+def set_template_responder(responder: Optional[TemplateResponder]) -> Optional[TemplateResponder]:
+    """设置（None 为取消）离线响应器，返回之前的响应器以便恢复"""
+    global _template_responder
+    previous = _template_responder
+    _template_responder = responder
+    return previous
 
-def _call_with_requests(config: LLMConfig, prompt: str) -> str:
-    """使用原生 urllib 调用 (OpenAI 兼容接口)"""
+
+class LLMWaitClock:
+    """
+    统计“至少有一个 LLM 请求在途”的累计时间。
+    并发请求的等待区间取并集，因此阶段内的等待时间不会超过其墙钟耗时。
+    """
+
+    def __init__(self):
+        self._inflight = 0
+        self._since = 0.0
+        self._busy = 0.0
+
+    def now(self) -> float:
+        """截至此刻的累计等待秒数"""
+        if self._inflight:
+            return self._busy + time.perf_counter() - self._since
+        return self._busy
+
+    @contextmanager
+    def waiting(self):
+        if self._inflight == 0:
+            self._since = time.perf_counter()
+        self._inflight += 1
+        try:
+            yield
+        finally:
+            self._inflight -= 1
+            if self._inflight == 0:
+                self._busy += time.perf_counter() - self._since
+
+
+llm_wait_clock = LLMWaitClock()
+
+
+def _build_request(config: LLMConfig, prompt: str) -> tuple[str, dict, dict]:
+    """构造 OpenAI 兼容接口的请求 (url, headers, payload)"""
     headers = {
         "Content-Type": "application/json",
         "Authorization": f"Bearer {config.api_key}",
@@ -48,35 +85,34 @@ def _call_with_requests(config: LLMConfig, prompt: str) -> str:
         url = url.rstrip("/")
         url = f"{url}/chat/completions"
 
-    req = urllib.request.Request(
-        url, 
-        data=json.dumps(data).encode('utf-8'), 
-        headers=headers,
-        method="POST"
-    )
-    
+    return url, headers, data
+
+
+def _extract_content(result: dict) -> str:
+    """从 chat/completions 响应中取出回复文本"""
     try:
-        # 设置超时时间为 120 秒，避免无限等待
-        with urllib.request.urlopen(req, timeout=120) as response:
-            result = json.loads(response.read().decode('utf-8'))
-            return result['choices'][0]['message']['content']
-    except urllib.error.HTTPError as e:
-        error_body = e.read().decode('utf-8')
-        raise Exception(f"LLM Request failed {e.code}: {error_body}")
+        return result['choices'][0]['message']['content']
     except Exception as e:
         raise Exception(f"LLM Request failed: {str(e)}")
 
 
+def _call_with_requests(config: LLMConfig, prompt: str) -> str:
+    """使用原生 urllib 同步调用 (OpenAI 兼容接口)，用于连通性测试"""
+    url, headers, data = _build_request(config, prompt)
+    # 设置超时时间为 120 秒，避免无限等待
+    return _extract_content(post_json_sync(url, headers, data, timeout=120))
+
+
 async def call_llm(prompt: str, mode: LLMMode = LLMMode.NORMAL) -> str:
     """
-    基础 LLM 调用，自动控制并发
-    使用 urllib 直接调用 OpenAI 兼容接口
+    基础 LLM 调用
+    通过复用连接的异步传输层调用 OpenAI 兼容接口，按主机控制并发
     """
     config = LLMConfig.from_mode(mode)
-    semaphore = _get_semaphore()
+    url, headers, data = _build_request(config, prompt)
     
-    async with semaphore:
-        result = await asyncio.to_thread(_call_with_requests, config, prompt)
+    with llm_wait_clock.waiting():
+        result = _extract_content(await get_transport().post_json(url, headers, data))
     
     log_llm_call(config.model_name, prompt, result)
     return result
@@ -110,12 +146,47 @@ async def call_llm_with_template(
     template_path: Path | str,
     infos: dict,
     mode: LLMMode = LLMMode.NORMAL,
-    max_retries: int | None = None
+    max_retries: int | None = None,
+    cache_task: str | None = None,
+) -> dict:
+    """
+    使用模板调用 LLM
+
+    cache_task 不为空时启用响应缓存：相同模型、模板与提示词直接返回上次解析好的结果，
+    命中统计按 cache_task 分组。设置了离线响应器时改由它返回结果。
+    """
+    if _template_responder is not None:
+        return await _template_responder(template_path, infos, mode, max_retries, cache_task)
+    return await request_llm_with_template(template_path, infos, mode, max_retries, cache_task)
+
+
+async def request_llm_with_template(
+    template_path: Path | str,
+    infos: dict,
+    mode: LLMMode = LLMMode.NORMAL,
+    max_retries: int | None = None,
+    cache_task: str | None = None,
 ) -> dict:
-    """使用模板调用 LLM"""
+    """call_llm_with_template 的实际请求部分（忽略离线响应器），录制响应时用它转发到真实模型"""
     template = load_template(template_path)
     prompt = build_prompt(template, infos)
-    return await call_llm_json(prompt, mode, max_retries)
+    if cache_task is None:
+        return await call_llm_json(prompt, mode, max_retries)
+
+    cache = get_response_cache()
+    if cache is None:
+        return await call_llm_json(prompt, mode, max_retries)
+
+    model_name = LLMConfig.from_mode(mode).model_name
+    template_id = Path(template_path).as_posix()
+    key = make_cache_key(model_name, template_id, prompt)
+    cached = cache.get(key, task=cache_task)
+    if cached is not None:
+        return cached
+
+    result = await call_llm_json(prompt, mode, max_retries)
+    cache.put(key, model_name, template_id, result)
+    return result
 
 
 async def call_llm_with_task_name(
@@ -144,7 +215,8 @@ async def call_llm_with_task_name(
     if global_mode in ["normal", "fast"]:
         mode = LLMMode(global_mode)
             
-    return await call_llm_with_template(template_path, infos, mode, max_retries)
+    cache_task = task_name if is_task_cached(task_name) else None
+    return await call_llm_with_template(template_path, infos, mode, max_retries, cache_task=cache_task)
 
 
 def test_connectivity(mode: LLMMode = LLMMode.NORMAL, config: Optional[LLMConfig] = None) -> tuple[bool, str]:
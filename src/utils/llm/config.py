@@ -48,6 +48,20 @@ class LLMConfig:
         )
 
 
+def _get_task_setting(task_name: str):
+    """
+    读取 default_modes 中任务的配置
+
+    支持两种写法：
+        nickname: "normal"
+        nickname: {mode: "normal", cache: true}
+    """
+    default_modes = getattr(CONFIG.llm, "default_modes", {})
+    if default_modes and task_name in default_modes:
+        return default_modes[task_name]
+    return None
+
+
 def get_task_mode(task_name: str) -> LLMMode:
     """
     根据任务名称获取 LLM 模式
@@ -62,13 +76,21 @@ def get_task_mode(task_name: str) -> LLMMode:
     
     # Default 模式：根据 task_name 从细粒度配置中获取
     # 如果配置了 default_modes，则根据任务名称返回对应模式
-    default_modes = getattr(CONFIG.llm, "default_modes", {})
-    if default_modes and task_name in default_modes:
-        task_mode = default_modes[task_name].lower()
-        if task_mode == "fast":
+    setting = _get_task_setting(task_name)
+    if setting is not None:
+        task_mode = setting if isinstance(setting, str) else setting.get("mode", "normal")
+        if str(task_mode).lower() == "fast":
             return LLMMode.FAST
         else:
             return LLMMode.NORMAL
     
     # 如果没有配置，默认返回 NORMAL
     return LLMMode.NORMAL
+
+
+def is_task_cached(task_name: str) -> bool:
+    """任务是否开启了响应缓存（default_modes 中配置 cache: true）"""
+    setting = _get_task_setting(task_name)
+    if setting is None or isinstance(setting, str):
+        return False
+    return bool(setting.get("cache", False))
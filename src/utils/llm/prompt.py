@@ -1,5 +1,6 @@
 """提示词处理"""
 
+from functools import lru_cache
 from pathlib import Path
 from src.utils.strings import intentify_prompt_infos
 
@@ -21,7 +22,7 @@ def build_prompt(template: str, infos: dict) -> str:
 
 def load_template(path: Path | str) -> str:
     """
-    加载模板文件
+    加载模板文件（按路径与修改时间缓存，文件被修改后自动重新读取）
     
     Args:
         path: 模板文件路径
@@ -30,5 +31,10 @@ def load_template(path: Path | str) -> str:
         str: 模板内容
     """
     path = Path(path)
+    return _read_template(path, path.stat().st_mtime_ns)
+
+
+@lru_cache(maxsize=128)
+def _read_template(path: Path, mtime_ns: int) -> str:
     return path.read_text(encoding="utf-8")
 
@@ -0,0 +1,191 @@
+"""
+LLM HTTP 传输层
+
+- HttpxTransport：httpx.AsyncClient，keep-alive 连接池复用（免去每次请求的 TCP/TLS 握手），
+  安装了 h2 时启用 HTTP/2
+- UrllibTransport：未安装 httpx 时的后备，每次请求新建连接，在线程池中执行
+
+两者都按主机限制并发连接数（ai.max_connections_per_host，默认沿用 ai.max_concurrent_requests）。
+传输对象按事件循环缓存，连接池不会跨循环复用。
+"""
+
+import asyncio
+import json
+import urllib.error
+import urllib.request
+import weakref
+from abc import ABC, abstractmethod
+from typing import Optional
+from urllib.parse import urlsplit
+
+from src.utils.config import CONFIG
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover - httpx 为可选依赖
+    httpx = None
+
+try:
+    import h2  # noqa: F401
+    _HAS_H2 = True
+except ImportError:
+    _HAS_H2 = False
+
+
+DEFAULT_TIMEOUT = 120.0
+DEFAULT_KEEPALIVE_EXPIRY = 30.0
+
+
+def post_json_sync(url: str, headers: dict, payload: dict, timeout: float = DEFAULT_TIMEOUT) -> dict:
+    """使用原生 urllib 同步发送 JSON POST 请求并解析响应"""
+    req = urllib.request.Request(
+        url,
+        data=json.dumps(payload).encode('utf-8'),
+        headers=headers,
+        method="POST"
+    )
+
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as response:
+            return json.loads(response.read().decode('utf-8'))
+    except urllib.error.HTTPError as e:
+        error_body = e.read().decode('utf-8')
+        raise Exception(f"LLM Request failed {e.code}: {error_body}")
+    except Exception as e:
+        raise Exception(f"LLM Request failed: {str(e)}")
+
+
+class LLMTransport(ABC):
+    """异步 HTTP 传输基类：负责按主机限流，具体发送由子类实现"""
+
+    def __init__(self, max_connections_per_host: int, timeout: float = DEFAULT_TIMEOUT):
+        self.max_connections_per_host = max(1, int(max_connections_per_host))
+        self.timeout = timeout
+        self._host_limits: dict[str, asyncio.Semaphore] = {}
+        self._in_flight = 0
+        self._retired = False
+
+    def _limit_for(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc
+        limit = self._host_limits.get(host)
+        if limit is None:
+            limit = asyncio.Semaphore(self.max_connections_per_host)
+            self._host_limits[host] = limit
+        return limit
+
+    async def post_json(self, url: str, headers: dict, payload: dict) -> dict:
+        """发送 JSON POST 请求，返回解析后的 JSON 响应"""
+        self._in_flight += 1
+        try:
+            async with self._limit_for(url):
+                return await self._post_json(url, headers, payload)
+        finally:
+            self._in_flight -= 1
+            if self._retired and self._in_flight == 0:
+                await self.aclose()
+
+    async def retire(self) -> None:
+        """停止复用：没有进行中的请求时立即关闭，否则等最后一个请求结束后关闭"""
+        self._retired = True
+        if self._in_flight == 0:
+            await self.aclose()
+
+    @abstractmethod
+    async def _post_json(self, url: str, headers: dict, payload: dict) -> dict:
+        ...
+
+    async def aclose(self) -> None:
+        """释放连接池"""
+
+
+class UrllibTransport(LLMTransport):
+    """urllib 后备实现：无连接复用，在线程池中执行阻塞请求"""
+
+    async def _post_json(self, url: str, headers: dict, payload: dict) -> dict:
+        return await asyncio.to_thread(post_json_sync, url, headers, payload, self.timeout)
+
+
+class HttpxTransport(LLMTransport):
+    """httpx 实现：keep-alive 连接池 + 可选 HTTP/2"""
+
+    def __init__(
+        self,
+        max_connections_per_host: int,
+        timeout: float = DEFAULT_TIMEOUT,
+        http2: bool = True,
+        keepalive_expiry: float = DEFAULT_KEEPALIVE_EXPIRY,
+    ):
+        super().__init__(max_connections_per_host, timeout)
+        self.http2 = bool(http2 and _HAS_H2)
+        # 总连接数不设上限，由每个主机的信号量控制；空闲连接保留以便复用。
+        self._client = httpx.AsyncClient(
+            http2=self.http2,
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=None,
+                max_keepalive_connections=self.max_connections_per_host,
+                keepalive_expiry=keepalive_expiry,
+            ),
+        )
+
+    async def _post_json(self, url: str, headers: dict, payload: dict) -> dict:
+        try:
+            response = await self._client.post(url, json=payload, headers=headers)
+        except Exception as e:
+            # 带上异常类型名（如 ReadTimeout / ConnectError），便于上层识别超时与连接错误
+            raise Exception(f"LLM Request failed: {type(e).__name__}: {e}")
+
+        if response.status_code >= 400:
+            raise Exception(f"LLM Request failed {response.status_code}: {response.text}")
+        try:
+            return response.json()
+        except Exception as e:
+            raise Exception(f"LLM Request failed: {str(e)}")
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+
+def create_transport() -> LLMTransport:
+    """根据 CONFIG.ai 创建传输对象"""
+    ai_conf = getattr(CONFIG, "ai", None)
+    default_limit = getattr(ai_conf, "max_concurrent_requests", 10)
+    per_host = getattr(ai_conf, "max_connections_per_host", None) or default_limit
+    timeout = float(getattr(ai_conf, "request_timeout", DEFAULT_TIMEOUT))
+    kind = str(getattr(ai_conf, "transport", "auto")).lower()
+
+    if kind == "urllib" or httpx is None:
+        return UrllibTransport(per_host, timeout)
+    return HttpxTransport(
+        per_host,
+        timeout,
+        http2=bool(getattr(ai_conf, "http2", True)),
+        keepalive_expiry=float(getattr(ai_conf, "keepalive_expiry", DEFAULT_KEEPALIVE_EXPIRY)),
+    )
+
+
+# 事件循环 -> 传输对象，循环结束后自动释放
+_TRANSPORTS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, LLMTransport]" = weakref.WeakKeyDictionary()
+
+
+def get_transport() -> LLMTransport:
+    """获取当前事件循环的传输对象（懒加载）"""
+    loop = asyncio.get_running_loop()
+    transport = _TRANSPORTS.get(loop)
+    if transport is None:
+        transport = create_transport()
+        _TRANSPORTS[loop] = transport
+    return transport
+
+
+async def reset_transports() -> None:
+    """配置变更后调用：后续请求使用新建的传输对象，旧对象在请求结束后关闭"""
+    old = list(_TRANSPORTS.items())
+    _TRANSPORTS.clear()
+    current: Optional[asyncio.AbstractEventLoop] = asyncio.get_running_loop()
+    for loop, transport in old:
+        if loop is current:
+            await transport.retire()
+        else:
+            # 其他循环上的连接只能在其所属循环里关闭，这里仅标记停止复用
+            transport._retired = True
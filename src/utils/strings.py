@@ -1,3 +1,6 @@
+from functools import lru_cache
+
+
 def to_json_str_with_intent(data, unescape_newlines: bool = True) -> str:
     """
     将 Python 对象转为格式化的 JSON 字符串，用于 LLM prompt 模板填充。
@@ -19,15 +22,22 @@ def to_json_str_with_intent(data, unescape_newlines: bool = True) -> str:
     return s
 
 
+@lru_cache(maxsize=32)
+def _str_to_json_str_with_intent(data: str) -> str:
+    return to_json_str_with_intent(data)
+
+
+def _intentify(data) -> str:
+    # 字符串（如按语言缓存的动作目录）每次结果相同，复用转换结果
+    if isinstance(data, str):
+        return _str_to_json_str_with_intent(data)
+    return to_json_str_with_intent(data)
+
+
 def intentify_prompt_infos(infos: dict) -> dict:
     processed: dict = dict(infos or {})
-    if "avatar_infos" in processed:
-        processed["avatar_infos"] = to_json_str_with_intent(processed["avatar_infos"])
-    if "world_info" in processed:
-        processed["world_info"] = to_json_str_with_intent(processed["world_info"])
-    if "general_action_infos" in processed:
-        processed["general_action_infos"] = to_json_str_with_intent(processed["general_action_infos"])
-    if "expanded_info" in processed:
-        processed["expanded_info"] = to_json_str_with_intent(processed["expanded_info"])
+    for key in ("avatar_infos", "world_info", "general_action_infos", "expanded_info"):
+        if key in processed:
+            processed[key] = _intentify(processed[key])
     return processed
 
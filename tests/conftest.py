@@ -83,6 +83,19 @@ def isolate_save_path(monkeypatch, tmp_path):
     yield temp_saves
 
 
+@pytest.fixture(autouse=True)
+def isolate_llm_cache(monkeypatch, tmp_path):
+    """
+    Redirect the LLM response cache to a temp dir so cached responses
+    never leak between tests or into the project tree.
+    """
+    from src.utils.config import CONFIG
+
+    temp_cache = tmp_path / "test_isolation_cache"
+    monkeypatch.setattr(CONFIG.paths, "cache", temp_cache)
+    yield temp_cache
+
+
 @pytest.fixture(autouse=True)
 def fixed_random_seed():
     """
@@ -3,7 +3,7 @@ Tests for src/classes/ai.py
 
 This module tests the NPC AI decision-making system, including:
 - LLM response parsing
-- Emotion updates
+- Emotion parsing
 - Batch avatar processing
 - Edge cases
 
@@ -77,7 +77,7 @@ class TestLLMAIDecide:
             results = await ai._decide(mock_world, [test_avatar])
 
         assert test_avatar in results
-        pairs, thinking, objective = results[test_avatar]
+        pairs, thinking, objective, _emotion = results[test_avatar]
         
         assert len(pairs) == 2
         assert pairs[0] == ("cultivate", {"duration": 10})
@@ -106,12 +106,12 @@ class TestLLMAIDecide:
             results = await ai._decide(mock_world, [test_avatar])
 
         assert test_avatar in results
-        pairs, thinking, objective = results[test_avatar]
+        pairs, thinking, objective, emotion = results[test_avatar]
         
         assert len(pairs) == 2
         assert pairs[0] == ("cultivate", {"duration": 10})
         assert pairs[1] == ("rest", {})
-        assert test_avatar.emotion == EmotionType.TIRED
+        assert emotion == EmotionType.TIRED
 
     @pytest.mark.asyncio
     async def test_decide_with_null_params_converts_to_empty_dict(self, mock_world, test_avatar):
@@ -134,7 +134,7 @@ class TestLLMAIDecide:
             results = await ai._decide(mock_world, [test_avatar])
 
         assert test_avatar in results
-        pairs, _, _ = results[test_avatar]
+        pairs, _, _, _ = results[test_avatar]
         
         # Both should have empty dict as params.
         assert pairs[0] == ("cultivate", {})
@@ -165,7 +165,7 @@ class TestLLMAIDecide:
             results = await ai._decide(mock_world, [test_avatar])
 
         assert test_avatar in results
-        pairs, _, _ = results[test_avatar]
+        pairs, _, _, _ = results[test_avatar]
         
         # Only 2 valid pairs should be kept.
         assert len(pairs) == 2
@@ -238,7 +238,7 @@ class TestLLMAIDecide:
 
 
 class TestLLMAIEmotionUpdate:
-    """Tests for emotion update logic in LLMAI._decide."""
+    """Tests for emotion parsing in LLMAI._decide (returned with the decision, not applied to the avatar)."""
 
     @pytest.fixture
     def mock_world(self, base_world):
@@ -255,8 +255,8 @@ class TestLLMAIEmotionUpdate:
         return dummy_avatar
 
     @pytest.mark.asyncio
-    async def test_decide_updates_emotion_with_valid_value(self, mock_world, test_avatar):
-        """Test that valid emotion string updates avatar.emotion correctly."""
+    async def test_decide_returns_emotion_with_valid_value(self, mock_world, test_avatar):
+        """Test that valid emotion string is returned as the matching EmotionType."""
         emotions_to_test = [
             ("emotion_happy", EmotionType.HAPPY),
             ("emotion_angry", EmotionType.ANGRY),
@@ -284,10 +284,13 @@ class TestLLMAIEmotionUpdate:
 
             with patch("src.classes.ai.call_llm_with_task_name", new_callable=AsyncMock) as mock_llm:
                 mock_llm.return_value = mock_response
-                await ai._decide(mock_world, [test_avatar])
+                results = await ai._decide(mock_world, [test_avatar])
 
-            assert test_avatar.emotion == expected_emotion, \
-                f"Expected {expected_emotion} for '{emotion_str}', got {test_avatar.emotion}"
+            emotion = results[test_avatar][3]
+            assert emotion == expected_emotion, \
+                f"Expected {expected_emotion} for '{emotion_str}', got {emotion}"
+            # _decide itself leaves the avatar untouched
+            assert test_avatar.emotion == EmotionType.CALM
 
     @pytest.mark.asyncio
     async def test_decide_fallback_to_calm_on_invalid_emotion(self, mock_world, test_avatar):
@@ -306,9 +309,10 @@ class TestLLMAIEmotionUpdate:
         ai = LLMAI()
         with patch("src.classes.ai.call_llm_with_task_name", new_callable=AsyncMock) as mock_llm:
             mock_llm.return_value = mock_response
-            await ai._decide(mock_world, [test_avatar])
+            results = await ai._decide(mock_world, [test_avatar])
 
-        assert test_avatar.emotion == EmotionType.CALM
+        assert results[test_avatar][3] == EmotionType.CALM
+        assert test_avatar.emotion == EmotionType.HAPPY
 
     @pytest.mark.asyncio
     async def test_decide_fallback_to_calm_on_missing_emotion(self, mock_world, test_avatar):
@@ -327,10 +331,11 @@ class TestLLMAIEmotionUpdate:
         ai = LLMAI()
         with patch("src.classes.ai.call_llm_with_task_name", new_callable=AsyncMock) as mock_llm:
             mock_llm.return_value = mock_response
-            await ai._decide(mock_world, [test_avatar])
+            results = await ai._decide(mock_world, [test_avatar])
 
         # Default is "emotion_calm" which maps to CALM.
-        assert test_avatar.emotion == EmotionType.CALM
+        assert results[test_avatar][3] == EmotionType.CALM
+        assert test_avatar.emotion == EmotionType.HAPPY
 
 
 class TestLLMAIBatchProcessing:
@@ -445,16 +450,16 @@ class TestLLMAIBatchProcessing:
         assert call_count == 2
         
         # Check avatar A's results.
-        pairs_a, thinking_a, objective_a = results[avatar_a]
+        pairs_a, thinking_a, objective_a, emotion_a = results[avatar_a]
         assert pairs_a == [("cultivate", {"duration": 10})]
         assert thinking_a == "A is cultivating."
-        assert avatar_a.emotion == EmotionType.HAPPY
+        assert emotion_a == EmotionType.HAPPY
         
         # Check avatar B's results.
-        pairs_b, thinking_b, objective_b = results[avatar_b]
+        pairs_b, thinking_b, objective_b, emotion_b = results[avatar_b]
         assert pairs_b == [("move", {"target_x": 2, "target_y": 2})]
         assert thinking_b == "B is moving."
-        assert avatar_b.emotion == EmotionType.ANGRY
+        assert emotion_b == EmotionType.ANGRY
 
     @pytest.mark.asyncio
     async def test_decide_with_empty_avatar_list(self, mock_world):
@@ -466,6 +471,96 @@ class TestLLMAIBatchProcessing:
         assert results == {}
         mock_llm.assert_not_called()
 
+    @staticmethod
+    def _decision(thinking: str) -> dict:
+        return {
+            "action_name_params_pairs": [["cultivate", {}]],
+            "avatar_thinking": thinking,
+            "current_emotion": "emotion_calm"
+        }
+
+    @pytest.fixture
+    def batch_mode(self, mock_world, monkeypatch):
+        """Enable merged decisions with K=4 and put both avatars in the same sect."""
+        from src.utils.config import CONFIG
+        monkeypatch.setattr(CONFIG.ai, "decision_batch_size", 4, raising=False)
+        mock_world.get_shared_info = MagicMock(return_value="shared world info")
+
+    @pytest.mark.asyncio
+    async def test_batch_mode_packs_group_into_one_request(self, mock_world, avatar_a, avatar_b, batch_mode):
+        """Avatars sharing a sect are decided with a single keyed request."""
+        sect = MagicMock(id=7)
+        avatar_a.sect = sect
+        avatar_b.sect = sect
+
+        ai = LLMAI()
+        with patch("src.classes.ai.call_llm_with_task_name", new_callable=AsyncMock) as mock_llm:
+            mock_llm.return_value = {
+                "AvatarA": self._decision("A thinks."),
+                "AvatarB": self._decision("B thinks."),
+            }
+            results = await ai._decide(mock_world, [avatar_a, avatar_b])
+
+        assert mock_llm.call_count == 1
+        _, template_path, info = mock_llm.call_args.args
+        assert template_path.name == "ai_batch.txt"
+        assert info["avatar_infos"] == {"AvatarA": "avatar a info", "AvatarB": "avatar b info"}
+        assert info["world_info"] == "shared world info"
+        assert results[avatar_a][1] == "A thinks."
+        assert results[avatar_b][1] == "B thinks."
+
+    @pytest.mark.asyncio
+    async def test_batch_mode_falls_back_for_missing_names(self, mock_world, avatar_a, avatar_b, batch_mode):
+        """Names missing from the merged response are retried with a single-avatar request."""
+        sect = MagicMock(id=7)
+        avatar_a.sect = sect
+        avatar_b.sect = sect
+
+        async def mock_llm_side_effect(task_name, template_path, info):
+            if template_path.name == "ai_batch.txt":
+                return {"AvatarA": self._decision("A thinks.")}
+            return {info["avatar_name"]: self._decision("single")}
+
+        ai = LLMAI()
+        with patch("src.classes.ai.call_llm_with_task_name", new_callable=AsyncMock) as mock_llm:
+            mock_llm.side_effect = mock_llm_side_effect
+            results = await ai._decide(mock_world, [avatar_a, avatar_b])
+
+        assert mock_llm.call_count == 2
+        assert mock_llm.call_args.args[2]["avatar_name"] == "AvatarB"
+        assert results[avatar_a][1] == "A thinks."
+        assert results[avatar_b][1] == "single"
+
+    @pytest.mark.asyncio
+    async def test_batch_mode_keeps_ungrouped_avatars_single(self, mock_world, avatar_a, avatar_b, batch_mode):
+        """Avatars with no shared region or sect keep using the single-avatar prompt."""
+        ai = LLMAI()
+        with patch("src.classes.ai.call_llm_with_task_name", new_callable=AsyncMock) as mock_llm:
+            mock_llm.side_effect = lambda task, path, info: {info["avatar_name"]: self._decision("x")}
+            results = await ai._decide(mock_world, [avatar_a, avatar_b])
+
+        assert mock_llm.call_count == 2
+        assert {call.args[1].name for call in mock_llm.call_args_list} == {"ai.txt"}
+        assert set(results) == {avatar_a, avatar_b}
+
+    def test_batches_respect_size_and_unique_names(self, avatar_a, avatar_b):
+        """Batches never exceed K and never contain two avatars with the same name."""
+        from src.classes.ai import _make_decision_batches
+
+        sect = MagicMock(id=7)
+        avatars = []
+        for i in range(5):
+            av = MagicMock(id=f"id{i}", name=f"N{i}", tile=None, sect=sect)
+            av.name = f"N{i}"
+            avatars.append(av)
+        avatars[1].name = "N0"
+
+        batches = _make_decision_batches(avatars, 2)
+        assert sorted(len(b) for b in batches) == [1, 2, 2]
+        for batch in batches:
+            assert len({a.name for a in batch}) == len(batch)
+        assert _make_decision_batches(avatars, 1) == [[a] for a in avatars]
+
 
 class TestAIDecideWrapper:
     """Tests for AI.decide wrapper method."""
@@ -503,7 +598,7 @@ class TestAIDecideWrapper:
             results = await ai.decide(mock_world, [test_avatar])
 
         assert test_avatar in results
-        pairs, thinking, objective, event = results[test_avatar]
+        pairs, thinking, objective, emotion, event = results[test_avatar]
         
         # Event should be NULL_EVENT.
         assert event is NULL_EVENT
@@ -512,6 +607,7 @@ class TestAIDecideWrapper:
         assert pairs == [("cultivate", {})]
         assert thinking == "Testing."
         assert objective == "Test"
+        assert emotion == EmotionType.CALM
 
 
 class TestLLMAIThinkingFieldVariants:
@@ -549,7 +645,7 @@ class TestLLMAIThinkingFieldVariants:
             results = await ai._decide(mock_world, [test_avatar])
 
         assert test_avatar in results
-        _, thinking, _ = results[test_avatar]
+        _, thinking, _, _ = results[test_avatar]
         assert thinking == "Using thinking field."
 
     @pytest.mark.asyncio
@@ -571,7 +667,7 @@ class TestLLMAIThinkingFieldVariants:
             results = await ai._decide(mock_world, [test_avatar])
 
         assert test_avatar in results
-        _, thinking, _ = results[test_avatar]
+        _, thinking, _, _ = results[test_avatar]
         assert thinking == "Preferred field."
 
     @pytest.mark.asyncio
@@ -591,7 +687,7 @@ class TestLLMAIThinkingFieldVariants:
             results = await ai._decide(mock_world, [test_avatar])
 
         assert test_avatar in results
-        _, thinking, objective = results[test_avatar]
+        _, thinking, objective, _ = results[test_avatar]
         assert thinking == ""
         assert objective == ""
 
@@ -606,3 +702,43 @@ class TestLLMAIModuleLevelInstance:
     def test_llm_ai_is_ai_subclass(self):
         """Test that LLMAI is a subclass of AI."""
         assert issubclass(LLMAI, AI)
+
+
+class TestSharedWorldInfo:
+    """Tests for World.get_shared_info used by merged decisions."""
+
+    @pytest.fixture
+    def regions(self, base_world):
+        from src.classes.environment.region import NormalRegion
+        game_map = base_world.map
+        regions = []
+        for rid, loc in ((101, (0, 0)), (102, (9, 9))):
+            region = NormalRegion(id=rid, name=f"R{rid}", desc="desc", cors=[loc])
+            game_map.regions[rid] = region
+            game_map.get_tile(*loc).region = region
+            regions.append(region)
+        return regions
+
+    @staticmethod
+    def _avatar(world, pos, known):
+        av = MagicMock(pos_x=pos[0], pos_y=pos[1], move_step_length=1, known_regions=set(known))
+        av.tile = world.map.get_tile(*pos)
+        return av
+
+    @staticmethod
+    def _region_lines(info: dict) -> list[str]:
+        return [line for lines in info.values() if isinstance(lines, list) for line in lines]
+
+    def test_union_of_known_regions_with_distance_in_same_region(self, base_world, regions):
+        a = self._avatar(base_world, (0, 0), {101})
+        b = self._avatar(base_world, (0, 0), {102})
+        lines = self._region_lines(base_world.get_shared_info([a, b], detailed=True))
+        assert len(lines) == 2
+        assert all("R10" in line for line in lines)
+        assert lines == self._region_lines(base_world.get_info(detailed=True, avatar=self._avatar(base_world, (0, 0), {101, 102})))
+
+    def test_no_distance_when_spread_out(self, base_world, regions):
+        a = self._avatar(base_world, (0, 0), {101})
+        b = self._avatar(base_world, (9, 9), {101})
+        lines = self._region_lines(base_world.get_shared_info([a, b], detailed=True))
+        assert lines == [regions[0].get_desc_fragment()]
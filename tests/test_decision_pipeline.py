@@ -0,0 +1,251 @@
+"""
+Tests for pipelined decisions.
+
+Covers:
+- months_until_idle predicts when a timed action ends
+- A prefetch issued ahead of time is used when the avatar becomes idle
+- Stale, invalidated and failed prefetches are discarded and decided synchronously
+- Prefetches do not touch the avatar; the emotion is applied only with the adopted plan
+- In-flight prefetches are awaited instead of re-requested
+- The simulator runs the pipeline when enabled and /api/metrics exposes its stats
+- Resetting or reinitialising the game cancels the old sim's prefetches
+"""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.classes.action.respire import Respire
+from src.classes.action_runtime import ActionInstance
+from src.classes.ai import AI
+from src.classes.emotions import EmotionType
+from src.server import main
+from src.sim.decision_pipeline import DecisionPipeline, months_until_idle
+from src.sim.simulator import Simulator
+
+
+class CountingAI(AI):
+    """记录每次决策的角色；gate 未放行前挂起；fail 为 True 时抛错；结果附带 emotion"""
+
+    def __init__(self):
+        self.calls: list[list[str]] = []
+        self.gate: asyncio.Event | None = None
+        self.fail = False
+        self.emotion: EmotionType | None = None
+
+    async def _decide(self, world, avatars_to_decide):
+        self.calls.append([avatar.id for avatar in avatars_to_decide])
+        if self.gate is not None:
+            await self.gate.wait()
+        if self.fail:
+            raise RuntimeError("llm down")
+        return {avatar: ([("Respire", {})], "think", "goal", self.emotion) for avatar in avatars_to_decide}
+
+
+def start_respire(avatar, world, duration):
+    action = Respire(avatar, world)
+    action.duration_months = duration
+    action.start_monthstamp = world.month_stamp
+    avatar.current_action = ActionInstance(action=action, params={})
+
+
+@pytest.fixture
+def ai():
+    return CountingAI()
+
+
+def test_months_until_idle(dummy_avatar, base_world):
+    now = int(base_world.month_stamp)
+    assert months_until_idle(dummy_avatar, now) is None
+
+    start_respire(dummy_avatar, base_world, 3)
+    assert months_until_idle(dummy_avatar, now) == 2
+    assert months_until_idle(dummy_avatar, now + 2) == 0
+
+    dummy_avatar.load_decide_result_chain([("Respire", {})], "", "")
+    assert months_until_idle(dummy_avatar, now) is None
+
+
+async def test_prefetch_hit(dummy_avatar, base_world, ai):
+    pipeline = DecisionPipeline(lookahead_months=1)
+    start_respire(dummy_avatar, base_world, 1)
+    pipeline.prefetch(ai, base_world, [dummy_avatar])
+    assert pipeline.pending == 1
+    await asyncio.sleep(0)
+
+    dummy_avatar.current_action = None
+    base_world.month_stamp += 1
+    results = await pipeline.collect(ai, base_world, [dummy_avatar])
+
+    assert results[dummy_avatar][0] == [("Respire", {})]
+    assert len(ai.calls) == 1
+    stats = pipeline.stats()
+    assert (stats["hits"], stats["misses"], stats["wasted"], stats["waited"]) == (1, 0, 0, 0)
+    assert stats["hit_ratio"] == 1.0
+
+
+async def test_not_ending_soon_is_not_prefetched(dummy_avatar, base_world, ai):
+    pipeline = DecisionPipeline(lookahead_months=1)
+    start_respire(dummy_avatar, base_world, 5)
+    pipeline.prefetch(ai, base_world, [dummy_avatar])
+    assert pipeline.pending == 0
+    assert ai.calls == []
+
+
+async def test_stale_prefetch_is_wasted(dummy_avatar, base_world, ai):
+    pipeline = DecisionPipeline(lookahead_months=1, max_staleness_months=1)
+    start_respire(dummy_avatar, base_world, 1)
+    pipeline.prefetch(ai, base_world, [dummy_avatar])
+
+    dummy_avatar.current_action = None
+    base_world.month_stamp += 3
+    await pipeline.collect(ai, base_world, [dummy_avatar])
+
+    assert len(ai.calls) == 2
+    stats = pipeline.stats()
+    assert (stats["hits"], stats["misses"], stats["wasted"]) == (0, 1, 1)
+
+
+async def test_changed_state_invalidates_prefetch(dummy_avatar, base_world, ai):
+    pipeline = DecisionPipeline()
+    start_respire(dummy_avatar, base_world, 1)
+    pipeline.prefetch(ai, base_world, [dummy_avatar])
+
+    dummy_avatar.current_action = None
+    dummy_avatar.sect = type("FakeSect", (), {"id": 99})()
+    base_world.month_stamp += 1
+    await pipeline.collect(ai, base_world, [dummy_avatar])
+
+    assert len(ai.calls) == 2
+    assert pipeline.stats()["wasted"] == 1
+
+
+async def test_invalidated_prefetch_leaves_emotion(dummy_avatar, base_world, ai):
+    base_world.avatar_manager.avatars[dummy_avatar.id] = dummy_avatar
+    sim = Simulator(base_world, ai=ai)
+    sim.decision_pipeline = DecisionPipeline()
+    dummy_avatar.emotion = EmotionType.CALM
+
+    ai.emotion = EmotionType.ANGRY
+    start_respire(dummy_avatar, base_world, 1)
+    sim.decision_pipeline.prefetch(ai, base_world, [dummy_avatar])
+    await asyncio.sleep(0)
+    # 预取已完成，但尚未被采用
+    assert len(ai.calls) == 1
+    assert dummy_avatar.emotion == EmotionType.CALM
+
+    ai.emotion = EmotionType.HAPPY
+    dummy_avatar.current_action = None
+    dummy_avatar.sect = type("FakeSect", (), {"id": 99})()
+    base_world.month_stamp += 1
+    await sim._phase_decide_actions([dummy_avatar])
+
+    assert sim.decision_pipeline.stats()["wasted"] == 1
+    assert dummy_avatar.emotion == EmotionType.HAPPY
+
+
+async def test_in_flight_prefetch_is_awaited(dummy_avatar, base_world, ai):
+    pipeline = DecisionPipeline()
+    ai.gate = asyncio.Event()
+    start_respire(dummy_avatar, base_world, 1)
+    pipeline.prefetch(ai, base_world, [dummy_avatar])
+
+    dummy_avatar.current_action = None
+    base_world.month_stamp += 1
+    collecting = asyncio.create_task(pipeline.collect(ai, base_world, [dummy_avatar]))
+    await asyncio.sleep(0.01)
+    assert not collecting.done()
+    ai.gate.set()
+    results = await asyncio.wait_for(collecting, timeout=1)
+
+    assert dummy_avatar in results
+    assert len(ai.calls) == 1
+    assert pipeline.stats()["waited"] == 1
+    assert pipeline.stats()["hits"] == 1
+
+
+async def test_failed_prefetch_falls_back(dummy_avatar, base_world, ai):
+    pipeline = DecisionPipeline()
+    ai.fail = True
+    start_respire(dummy_avatar, base_world, 1)
+    pipeline.prefetch(ai, base_world, [dummy_avatar])
+    await asyncio.sleep(0)
+
+    ai.fail = False
+    dummy_avatar.current_action = None
+    base_world.month_stamp += 1
+    results = await pipeline.collect(ai, base_world, [dummy_avatar])
+
+    assert dummy_avatar in results
+    assert len(ai.calls) == 2
+    stats = pipeline.stats()
+    assert (stats["hits"], stats["misses"], stats["wasted"]) == (0, 1, 1)
+
+
+async def test_cancel_counts_pending_as_wasted(dummy_avatar, base_world, ai):
+    pipeline = DecisionPipeline()
+    ai.gate = asyncio.Event()
+    start_respire(dummy_avatar, base_world, 1)
+    pipeline.prefetch(ai, base_world, [dummy_avatar])
+    pipeline.cancel()
+    await asyncio.sleep(0)
+    assert pipeline.pending == 0
+    assert pipeline.stats()["wasted"] == 1
+
+
+async def test_simulator_decide_phase_uses_pipeline(dummy_avatar, base_world, ai):
+    base_world.avatar_manager.avatars[dummy_avatar.id] = dummy_avatar
+    sim = Simulator(base_world, ai=ai)
+    sim.decision_pipeline = DecisionPipeline()
+
+    # 无动作的角色同步决策；随后其动作即将结束时发起预取
+    await sim._phase_decide_actions([dummy_avatar])
+    assert dummy_avatar.has_plans()
+    assert sim.decision_pipeline.stats()["misses"] == 1
+
+    dummy_avatar.clear_plans()
+    start_respire(dummy_avatar, base_world, 1)
+    await sim._phase_decide_actions([dummy_avatar])
+    assert sim.decision_pipeline.pending == 1
+
+
+def test_metrics_include_pipeline(monkeypatch, base_world):
+    sim = Simulator(base_world)
+    sim.decision_pipeline = DecisionPipeline()
+    sim.decision_pipeline.hits = 3
+    sim.decision_pipeline.misses = 1
+    monkeypatch.setitem(main.game_instance, "sim", sim)
+    client = TestClient(main.app)
+
+    assert "cws_decision_prefetch_hit_ratio 0.75" in client.get("/api/metrics").text
+    assert client.get("/api/metrics", params={"format": "json"}).json()["decision_pipeline"]["hits"] == 3
+
+
+@pytest.mark.parametrize("path", ["/api/control/reset", "/api/control/reinit"])
+def test_dropping_sim_cancels_prefetches(monkeypatch, base_world, path):
+    sim = Simulator(base_world)
+    sim.decision_pipeline = MagicMock()
+    monkeypatch.setitem(main.game_instance, "sim", sim)
+    monkeypatch.setitem(main.game_instance, "world", base_world)
+    monkeypatch.setattr(main, "init_game_async", AsyncMock())
+
+    assert TestClient(main.app).post(path).status_code == 200
+    sim.decision_pipeline.cancel.assert_called_once()
+    assert main.game_instance["sim"] is None
+
+
+async def test_discard_sim_cancels_in_flight_tasks(monkeypatch, dummy_avatar, base_world, ai):
+    ai.gate = asyncio.Event()
+    sim = Simulator(base_world, ai=ai)
+    sim.decision_pipeline = DecisionPipeline()
+    start_respire(dummy_avatar, base_world, 1)
+    sim.decision_pipeline.prefetch(ai, base_world, [dummy_avatar])
+    task = next(iter(sim.decision_pipeline._pending.values())).task
+    monkeypatch.setitem(main.game_instance, "sim", sim)
+
+    main.discard_sim()
+    await asyncio.sleep(0)
+    assert task.cancelled()
+    assert main.game_instance["sim"] is None
@@ -0,0 +1,73 @@
+from unittest.mock import MagicMock
+
+from src.classes.effect import load_effect_from_str, _evaluate_conditional_effect
+from src.classes.effect.process import _compile_expr, _value_expr
+from src.classes.weapon_type import WeaponType
+
+
+class TestCompiledExpressions:
+    """测试效果表达式的预编译"""
+
+    def test_load_precompiles_when_and_values(self):
+        _compile_expr.cache_clear()
+        _value_expr.cache_clear()
+        load_effect_from_str(
+            "[{when: 'avatar.weapon_proficiency > 10', extra_battle_strength_points: 'avatar.weapon_proficiency * 0.1'}]"
+        )
+        # when 条件与动态值各编译一次
+        assert _compile_expr.cache_info().currsize == 2
+
+    def test_conditional_effect_uses_compiled_code(self, dummy_avatar):
+        dummy_avatar.weapon = MagicMock()
+        dummy_avatar.weapon.type = WeaponType.SWORD
+        effect = load_effect_from_str(
+            "[{when: 'avatar.weapon.type == WeaponType.SWORD', extra_battle_strength_points: 2}]"
+        )
+        assert _evaluate_conditional_effect(effect, dummy_avatar) == {"extra_battle_strength_points": 2}
+
+        dummy_avatar.weapon.type = WeaponType.SABER
+        assert _evaluate_conditional_effect(effect, dummy_avatar) == {}
+
+    def test_invalid_expressions_fail_safely(self, dummy_avatar):
+        assert _evaluate_conditional_effect({"when": "avatar.(", "x": 1}, dummy_avatar) == {}
+        assert dummy_avatar._evaluate_values({"x": "avatar.("}) == {"x": "avatar.("}
+
+
+class TestEffectsCache:
+    """测试角色合并效果的缓存与失效"""
+
+    def test_repeated_access_hits_cache(self, dummy_avatar):
+        first = dummy_avatar.effects
+        assert dummy_avatar.effects is first
+
+    def test_equip_change_invalidates(self, dummy_avatar, mock_item_data):
+        before = dummy_avatar.effects
+        version = dummy_avatar._effects_version
+
+        weapon = mock_item_data["obj_weapon"]
+        weapon.effects = {"extra_battle_strength_points": 5}
+        dummy_avatar.weapon = weapon
+
+        assert dummy_avatar._effects_version > version
+        after = dummy_avatar.effects
+        assert after is not before
+        assert after.get("extra_battle_strength_points", 0) >= 5
+
+    def test_temporary_effect_append_is_visible(self, dummy_avatar):
+        _ = dummy_avatar.effects
+        dummy_avatar.temporary_effects.append({
+            "source": "test_buff",
+            "effects": {"extra_move_step": 1},
+            "start_month": int(dummy_avatar.world.month_stamp),
+            "duration": 1,
+        })
+        assert dummy_avatar.effects.get("extra_move_step") == 1
+
+        # 临时效果按月过期
+        dummy_avatar.world.month_stamp = dummy_avatar.world.month_stamp + 1
+        assert "extra_move_step" not in dummy_avatar.effects
+
+    def test_explicit_invalidate(self, dummy_avatar):
+        effects = dummy_avatar.effects
+        dummy_avatar.invalidate_effects()
+        assert dummy_avatar.effects is not effects
@@ -344,6 +344,64 @@ class TestEventStorageHelperMethods:
         assert events[2].content == "Third"
 
 
+class TestEventStorageQueryCount:
+    """Each read path hydrates a page with a single SQL statement (no N+1)."""
+
+    @staticmethod
+    def _count_statements(storage, fn):
+        statements = []
+        storage._conn.set_trace_callback(statements.append)
+        try:
+            result = fn()
+        finally:
+            storage._conn.set_trace_callback(None)
+        return result, len(statements)
+
+    @pytest.mark.parametrize("call", [
+        lambda s: s.get_events(limit=50),
+        lambda s: s.get_events(avatar_id="a1", limit=50),
+        lambda s: s.get_events(avatar_id_pair=("a1", "a2"), limit=50),
+        lambda s: s.get_major_events_by_avatar("a1", limit=50),
+        lambda s: s.get_minor_events_by_avatar("a1", limit=50),
+        lambda s: s.get_major_events_between("a1", "a2", limit=50),
+        lambda s: s.get_minor_events_between("a1", "a2", limit=50),
+    ])
+    def test_single_query_per_page(self, event_storage, call):
+        event_storage.add_events(
+            make_event(100, (i % 12) + 1, f"Event {i}", ["a1", "a2", f"x{i}"], is_major=i % 2 == 0)
+            for i in range(40)
+        )
+
+        events, count = self._count_statements(event_storage, lambda: call(event_storage))
+        if isinstance(events, tuple):
+            events = events[0]
+
+        assert events
+        assert count == 1
+        for e in events:
+            assert len(e.related_avatars) == 3
+
+    def test_hydrated_fields_round_trip(self, event_storage):
+        original = make_event(100, 3, "Round trip", ["a1", "a2"], is_major=True, event_id="evt-1")
+        event_storage.add_event(original)
+
+        [loaded] = event_storage.get_major_events_between("a1", "a2")
+
+        assert loaded.id == "evt-1"
+        assert loaded.content == "Round trip"
+        assert int(loaded.month_stamp) == int(original.month_stamp)
+        assert loaded.is_major is True and loaded.is_story is False
+        assert sorted(loaded.related_avatars) == ["a1", "a2"]
+        assert loaded.created_at == pytest.approx(original.created_at, abs=1e-3)
+
+    def test_event_without_avatars_has_none(self, event_storage):
+        event_storage.add_event(make_event(100, 1, "Lonely"))
+
+        events, _ = event_storage.get_events()
+
+        assert events[0].related_avatars is None
+
+
 class TestEventStorageCleanup:
     """Tests for event cleanup functionality."""
 
@@ -384,6 +442,89 @@ class TestEventStorageCleanup:
         assert events[0].content == "New"
 
 
+class TestEventStorageSnapshot:
+    """Tests for snapshot_to (online backup used by saves)."""
+
+    def test_backup_includes_writes_made_during_backup(self, event_storage, temp_db_path):
+        """Writes landing between backup steps end up in the snapshot."""
+        event_storage.add_events([make_event(100, 1 + i % 12, "x" * 2000) for i in range(200)])
+        dest = temp_db_path.with_name("snapshot.db")
+        steps = []
+
+        def on_progress(done, total):
+            steps.append((done, total))
+            if len(steps) == 2:
+                event_storage.add_event(make_event(101, 1, "During backup"))
+
+        result = event_storage.snapshot_to(dest, pages=8, progress=on_progress)
+
+        assert result["method"] == "backup"
+        assert len(steps) > 2
+        assert steps[-1][0] == steps[-1][1] == result["pages"]
+        snapshot = EventStorage(dest)
+        try:
+            assert snapshot.count() == 201
+            assert snapshot._conn.execute("PRAGMA integrity_check").fetchone()[0] == "ok"
+        finally:
+            snapshot.close()
+        assert not dest.with_name("snapshot.db.tmp").exists()
+
+    def test_unchanged_database_reuses_snapshot_via_hardlink(self, event_storage, temp_db_path):
+        """A second snapshot with no writes in between is a hard link to the first."""
+        event_storage.add_event(make_event(100, 1, "Event"))
+        first = temp_db_path.with_name("first.db")
+        second = temp_db_path.with_name("second.db")
+        third = temp_db_path.with_name("third.db")
+
+        event_storage.snapshot_to(first)
+        assert event_storage.snapshot_to(second)["method"] == "hardlink"
+        assert first.stat().st_ino == second.stat().st_ino
+
+        event_storage.add_event(make_event(100, 2, "Another"))
+        assert event_storage.snapshot_to(third)["method"] == "backup"
+
+    def test_opening_linked_snapshot_unshares_it(self, event_storage, temp_db_path):
+        """Writing to a loaded snapshot must not leak into saves sharing its inode."""
+        event_storage.add_event(make_event(100, 1, "Event"))
+        first = temp_db_path.with_name("first.db")
+        second = temp_db_path.with_name("second.db")
+        event_storage.snapshot_to(first)
+        event_storage.snapshot_to(second)
+
+        loaded = EventStorage(second)
+        try:
+            loaded.add_event(make_event(100, 2, "After load"))
+        finally:
+            loaded.close()
+
+        assert first.stat().st_nlink == 1
+        other = EventStorage(first)
+        try:
+            assert other.count() == 1
+        finally:
+            other.close()
+
+    def test_max_rowid_trims_later_events(self, event_storage, temp_db_path):
+        """Events written after the save snapshot are cut from the backup, with their avatar links."""
+        event_storage.add_event(make_event(100, 1, "Before", avatar_ids=["a1"]))
+        boundary = event_storage.get_max_rowid()
+        event_storage.add_event(make_event(100, 2, "After", avatar_ids=["a1"]))
+        dest = temp_db_path.with_name("trimmed.db")
+
+        result = event_storage.snapshot_to(dest, max_rowid=boundary)
+
+        assert result["trimmed"] == 1
+        assert event_storage.count() == 2
+        snapshot = EventStorage(dest)
+        try:
+            assert [e.content for e in snapshot.get_recent_events()] == ["Before"]
+            assert snapshot._conn.execute("SELECT COUNT(*) FROM event_avatars").fetchone()[0] == 1
+        finally:
+            snapshot.close()
+        # 裁剪过的快照与源库不同，不能被硬链接复用
+        assert event_storage.snapshot_to(temp_db_path.with_name("next.db"))["method"] == "backup"
+
+
 class TestEventStorageCursorParsing:
     """Tests for cursor parsing edge cases."""
 
@@ -498,6 +639,63 @@ class TestEventManagerWithStorage:
         assert events[0].content == "Minor pair"
 
 
+class TestEventManagerAvatarMemory:
+    """Per-avatar major/minor event cache in EventManager."""
+
+    def test_seeded_from_storage_then_served_from_memory(self, temp_db_path):
+        storage = EventStorage(temp_db_path)
+        storage.add_event(make_event(100, 1, "Old major", ["a1"], is_major=True))
+        manager = EventManager(storage)
+
+        assert [e.content for e in manager.get_major_events_by_avatar("a1")] == ["Old major"]
+
+        storage.get_major_events_by_avatar = MagicMock(side_effect=AssertionError("should hit cache"))
+        storage.get_minor_events_by_avatar = MagicMock(side_effect=AssertionError("should hit cache"))
+        manager.add_events([
+            make_event(100, 2, "New major", ["a1", "a2"], is_major=True),
+            make_event(100, 3, "Story", ["a1"], is_major=True, is_story=True),
+        ])
+
+        assert [e.content for e in manager.get_major_events_by_avatar("a1")] == ["Old major", "New major"]
+        assert [e.content for e in manager.get_minor_events_by_avatar("a1")] == ["Story"]
+        manager.close()
+
+    def test_matches_storage_after_many_writes(self, event_manager):
+        for i in range(60):
+            event_manager.get_minor_events_by_avatar("a1")  # 缓存先建立，之后全靠追加
+            event_manager.add_event(make_event(100 + i // 12, i % 12 + 1, f"E{i}", ["a1"], is_major=i % 3 == 0))
+
+        storage = event_manager._storage
+        for limit in (1, 10, 25):
+            assert [e.id for e in event_manager.get_major_events_by_avatar("a1", limit=limit)] == \
+                [e.id for e in storage.get_major_events_by_avatar("a1", limit=limit)]
+            assert [e.id for e in event_manager.get_minor_events_by_avatar("a1", limit=limit)] == \
+                [e.id for e in storage.get_minor_events_by_avatar("a1", limit=limit)]
+
+    def test_large_limit_falls_back_to_storage(self, event_manager):
+        for i in range(40):
+            event_manager.add_event(make_event(100, 1, f"E{i}", ["a1"]))
+
+        assert len(event_manager.get_minor_events_by_avatar("a1", limit=10)) == 10
+        assert len(event_manager.get_minor_events_by_avatar("a1", limit=100)) == 40
+
+    def test_duplicate_event_not_cached_twice(self, event_manager):
+        event = make_event(100, 1, "Once", ["a1"])
+        event_manager.add_event(event)
+        event_manager.get_minor_events_by_avatar("a1")
+        event_manager.add_event(event)
+
+        assert len(event_manager.get_minor_events_by_avatar("a1")) == 1
+
+    def test_lru_eviction(self, temp_db_path):
+        manager = EventManager(EventStorage(temp_db_path), memory_max_avatars=2)
+        for avatar_id in ("a1", "a2", "a1", "a3"):
+            manager.get_minor_events_by_avatar(avatar_id)
+
+        assert list(manager._avatar_memory) == ["a1", "a3"]
+        manager.close()
+
+
 class TestEventManagerPagination:
     """EventManager pagination tests."""
 
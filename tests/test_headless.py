@@ -0,0 +1,87 @@
+"""
+Tests for the headless batch runner.
+
+Covers:
+- The template responder hook replaces LLM template calls and is restored afterwards
+- StubAI returns plan chains the simulator can load
+- run_batch advances the world and reports throughput / phase timings
+- Responses recorded from the real client replay by prompt, misses fall back to empty results
+"""
+
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from src.sim import headless
+from src.sim.headless import (
+    RecordedResponder,
+    RecordingResponder,
+    StubAI,
+    StubResponder,
+    make_ai_backend,
+    run_batch,
+    use_template_responder,
+)
+from src.utils.llm import client
+
+
+@pytest.fixture
+def template(tmp_path):
+    path = tmp_path / "greet.txt"
+    path.write_text("hello {name}", encoding="utf-8")
+    return path
+
+
+async def test_responder_replaces_template_calls(template):
+    responder = StubResponder()
+    with use_template_responder(responder):
+        assert await client.call_llm_with_task_name("action_decision", template, {"name": "a"}) == {}
+    assert responder.calls == {"greet.txt": 1}
+    assert client._template_responder is None
+
+
+async def test_stub_ai_decisions(base_world, dummy_avatar):
+    results = await StubAI().decide(base_world, [dummy_avatar])
+    pairs, _thinking, _objective, _emotion, _event = results[dummy_avatar]
+    assert pairs[0][0] in ("Breakthrough", "MoveToDirection")
+
+    dummy_avatar.load_decide_result_chain(pairs, "", "")
+    assert dummy_avatar.has_plans()
+
+
+async def test_run_batch_report(base_world, dummy_avatar):
+    base_world.avatar_manager.register_avatar(dummy_avatar)
+    start = base_world.month_stamp
+    ai, responder = make_ai_backend("stub")
+
+    report = await run_batch(base_world, 2, ai, responder)
+
+    assert base_world.month_stamp == start + 2
+    assert report.months == 2
+    assert report.avatars == report.living_start == 1
+    assert report.months_per_sec > 0
+    assert "decide_actions" in report.phase_seconds
+    assert "finalize_step" in report.phase_seconds
+    assert report.to_dict()["ai"] == "stub"
+
+
+async def test_record_then_replay(tmp_path, template):
+    recording = tmp_path / "rec.jsonl"
+    real = AsyncMock(return_value={"answer": 1})
+    with patch.object(headless, "request_llm_with_template", real):
+        with use_template_responder(RecordingResponder(recording)):
+            assert await client.call_llm_with_template(template, {"name": "a"}) == {"answer": 1}
+    real.assert_awaited_once()
+
+    replay = RecordedResponder(recording)
+    with use_template_responder(replay):
+        assert await client.call_llm_with_template(template, {"name": "a"}) == {"answer": 1}
+        assert await client.call_llm_with_template(template, {"name": "b"}) == {}
+    assert (replay.hits, replay.misses) == (1, 1)
+
+
+def test_unknown_mode():
+    with pytest.raises(ValueError):
+        make_ai_backend("oracle")
+    with pytest.raises(ValueError):
+        make_ai_backend("recorded")
@@ -252,12 +252,8 @@ class TestMapAndStateAPIDuringInit:
         """Test /api/map is available when world exists (checking_llm phase)."""
         # Simulate world being created but LLM check in progress.
         mock_world = MagicMock()
-        mock_map = MagicMock()
-        mock_map.width = 100
-        mock_map.height = 100
-        mock_map.tiles = {}
-        mock_map.regions = {}
-        mock_world.map = mock_map
+        from src.classes.environment.map import Map
+        mock_world.map = Map(100, 100)
         
         game_instance["world"] = mock_world
         game_instance["init_status"] = "in_progress"
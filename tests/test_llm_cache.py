@@ -0,0 +1,129 @@
+"""
+Tests for the LLM response cache.
+
+Covers:
+- Cache hits skip the model call; different prompts/models miss
+- TTL expiry and size-based (LRU) eviction
+- Per-task opt-in via CONFIG.llm.default_modes
+- Stats endpoint
+"""
+
+import time
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from omegaconf import OmegaConf
+
+from src.utils.config import CONFIG
+from src.utils.llm.cache import LLMResponseCache, get_cache_stats, get_response_cache, make_cache_key
+from src.utils.llm.client import call_llm_with_task_name, call_llm_with_template
+from src.utils.llm.config import LLMConfig, get_task_mode, is_task_cached, LLMMode
+
+
+@pytest.fixture
+def cache(tmp_path):
+    c = LLMResponseCache(tmp_path / "cache.db", ttl_seconds=3600, max_entries=3)
+    yield c
+    c.close()
+
+
+class TestResponseCacheStore:
+
+    def test_round_trip_and_counters(self, cache):
+        key = make_cache_key("m", "t.txt", "prompt")
+        assert cache.get(key, task="nickname") is None
+        cache.put(key, "m", "t.txt", {"nickname": "剑痴"})
+
+        assert cache.get(key, task="nickname") == {"nickname": "剑痴"}
+        stats = cache.stats()
+        assert stats["hits"] == 1 and stats["misses"] == 1
+        assert stats["tasks"]["nickname"] == {"hits": 1, "misses": 1}
+
+    def test_key_depends_on_model_template_and_prompt(self):
+        base = make_cache_key("m", "t", "p")
+        assert base == make_cache_key("m", "t", "p")
+        assert len({base, make_cache_key("m2", "t", "p"), make_cache_key("m", "t2", "p"), make_cache_key("m", "t", "p2")}) == 4
+
+    def test_ttl_expiry(self, cache):
+        key = make_cache_key("m", "t", "p")
+        cache.put(key, "m", "t", {"a": 1})
+        with patch("src.utils.llm.cache.time.time", return_value=time.time() + 7200):
+            assert cache.get(key) is None
+        assert cache.stats()["entries"] == 0
+
+    def test_size_eviction_drops_least_recently_used(self, cache):
+        now = time.time()
+        keys = [make_cache_key("m", "t", f"p{i}") for i in range(3)]
+        for i, key in enumerate(keys):
+            with patch("src.utils.llm.cache.time.time", return_value=now + i):
+                cache.put(key, "m", "t", {"i": i})
+        # 访问最旧的一条，使其变为最近使用
+        with patch("src.utils.llm.cache.time.time", return_value=now + 10):
+            assert cache.get(keys[0]) == {"i": 0}
+            cache.put(make_cache_key("m", "t", "p3"), "m", "t", {"i": 3})
+
+        assert cache.stats()["entries"] == 3
+        assert cache.get(keys[1]) is None
+        assert cache.get(keys[0]) == {"i": 0}
+
+
+class TestTaskOptIn:
+
+    def test_default_modes_accepts_string_and_mapping(self, monkeypatch):
+        modes = OmegaConf.create({
+            "plain": "fast",
+            "cached": {"mode": "fast", "cache": True},
+            "uncached": {"mode": "normal"},
+        })
+        monkeypatch.setattr(CONFIG.llm, "default_modes", modes)
+        monkeypatch.setattr(CONFIG.llm, "mode", "default", raising=False)
+
+        assert get_task_mode("plain") == LLMMode.FAST
+        assert get_task_mode("cached") == LLMMode.FAST
+        assert get_task_mode("uncached") == LLMMode.NORMAL
+        assert not is_task_cached("plain")
+        assert is_task_cached("cached")
+        assert not is_task_cached("uncached")
+        assert not is_task_cached("missing")
+
+    async def test_cached_task_calls_model_once(self, monkeypatch):
+        monkeypatch.setattr(CONFIG.llm, "default_modes", OmegaConf.create({"nickname": {"mode": "normal", "cache": True}}))
+        monkeypatch.setattr(CONFIG.llm, "mode", "default", raising=False)
+        config = LLMConfig(model_name="m", api_key="k", base_url="http://x")
+
+        with patch("src.utils.llm.client.load_template", return_value="Hello {name}"), \
+             patch("src.utils.llm.client.LLMConfig.from_mode", return_value=config), \
+             patch("src.utils.llm.client.call_llm_json", new_callable=AsyncMock) as mock_call:
+            mock_call.return_value = {"nickname": "剑痴"}
+            for _ in range(3):
+                assert await call_llm_with_task_name("nickname", "nickname.txt", {"name": "A"}) == {"nickname": "剑痴"}
+            await call_llm_with_task_name("nickname", "nickname.txt", {"name": "B"})
+
+        assert mock_call.call_count == 2
+        stats = get_cache_stats()
+        assert stats["tasks"]["nickname"] == {"hits": 2, "misses": 2}
+
+    async def test_uncached_template_call_always_hits_model(self):
+        with patch("src.utils.llm.client.load_template", return_value="Hi"), \
+             patch("src.utils.llm.client.call_llm_json", new_callable=AsyncMock) as mock_call:
+            mock_call.return_value = {}
+            await call_llm_with_template("t.txt", {})
+            await call_llm_with_template("t.txt", {})
+        assert mock_call.call_count == 2
+
+    def test_disabled_cache(self, monkeypatch):
+        monkeypatch.setattr(CONFIG.llm, "cache", OmegaConf.create({"enabled": False}))
+        assert get_response_cache() is None
+        assert get_cache_stats() == {"enabled": False}
+
+
+def test_stats_endpoint():
+    from fastapi.testclient import TestClient
+    from src.server.main import app
+
+    client = TestClient(app)
+    response = client.get("/api/llm/cache/stats")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["enabled"] is True
+    assert {"hits", "misses", "entries", "tasks"} <= body.keys()
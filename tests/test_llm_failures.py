@@ -33,6 +33,7 @@ from src.utils.llm.client import (
     LLMMode,
 )
 from src.utils.llm.config import LLMConfig
+from src.utils.llm.transport import UrllibTransport
 from src.utils.llm.parser import parse_json
 from src.utils.llm.exceptions import LLMError, ParseError
 
@@ -504,6 +505,12 @@ class TestConfigurationValidation:
 class TestAsyncCallLLM:
     """Tests for async call_llm function."""
 
+    @pytest.fixture(autouse=True)
+    def urllib_transport(self):
+        """These tests mock urllib, so route call_llm through the urllib fallback transport."""
+        with patch("src.utils.llm.client.get_transport", return_value=UrllibTransport(max_connections_per_host=1)):
+            yield
+
     @pytest.mark.asyncio
     async def test_call_llm_success(self):
         """Test successful async LLM call."""
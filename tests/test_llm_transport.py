@@ -0,0 +1,157 @@
+"""
+Tests for the pooled async LLM transport against a local stub OpenAI-compatible server.
+"""
+
+import asyncio
+import json
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import pytest
+
+from src.utils.llm.client import call_llm
+from src.utils.llm.config import LLMConfig
+from src.utils.llm.transport import (
+    HttpxTransport,
+    UrllibTransport,
+    get_transport,
+    reset_transports,
+)
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        server = self.server
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        with server.lock:
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+        time.sleep(server.delay)
+        with server.lock:
+            server.active -= 1
+
+        if self.headers.get("Authorization") == "Bearer bad-key":
+            status, payload = 401, {"error": "invalid_api_key"}
+        else:
+            reply = body["messages"][0]["content"].upper()
+            status, payload = 200, {"choices": [{"message": {"content": reply}}]}
+
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class _StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _StubHandler)
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.active = 0
+        self.max_active = 0
+        self.delay = 0.0
+
+    def get_request(self):
+        request = super().get_request()
+        self.connections += 1
+        return request
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/v1"
+
+
+@pytest.fixture
+def stub_server():
+    server = _StubServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _config(server, api_key: str = "test-key") -> LLMConfig:
+    return LLMConfig(model_name="stub-model", api_key=api_key, base_url=server.base_url)
+
+
+@contextmanager
+def _routed_to(server, transport, api_key: str = "test-key"):
+    """Route call_llm to the stub server through the given transport."""
+    with patch("src.utils.llm.client.LLMConfig.from_mode", return_value=_config(server, api_key)), \
+         patch("src.utils.llm.client.get_transport", return_value=transport):
+        yield
+
+
+class TestHttpxTransport:
+
+    async def test_sequential_calls_reuse_connection(self, stub_server):
+        transport = HttpxTransport(max_connections_per_host=4)
+        try:
+            with _routed_to(stub_server, transport):
+                for i in range(5):
+                    assert await call_llm(f"hello {i}") == f"HELLO {i}"
+        finally:
+            await transport.aclose()
+        assert stub_server.connections == 1
+
+    async def test_per_host_limit_caps_concurrency(self, stub_server):
+        stub_server.delay = 0.05
+        transport = HttpxTransport(max_connections_per_host=2)
+        try:
+            with _routed_to(stub_server, transport):
+                results = await asyncio.gather(*[call_llm(f"p{i}") for i in range(8)])
+        finally:
+            await transport.aclose()
+        assert results == [f"P{i}" for i in range(8)]
+        assert stub_server.max_active <= 2
+        assert stub_server.connections <= 2
+
+    async def test_http_error_keeps_status_in_message(self, stub_server):
+        transport = HttpxTransport(max_connections_per_host=1)
+        try:
+            with _routed_to(stub_server, transport, api_key="bad-key"), pytest.raises(Exception) as exc_info:
+                await call_llm("x")
+        finally:
+            await transport.aclose()
+        assert "401" in str(exc_info.value)
+        assert "invalid_api_key" in str(exc_info.value)
+
+
+class TestUrllibTransport:
+
+    async def test_fallback_transport_round_trip(self, stub_server):
+        transport = UrllibTransport(max_connections_per_host=2)
+        with _routed_to(stub_server, transport):
+            assert await call_llm("ping") == "PING"
+
+
+class TestTransportRegistry:
+
+    async def test_transport_cached_per_loop_and_reset(self):
+        first = get_transport()
+        assert get_transport() is first
+
+        await reset_transports()
+        assert first._retired
+        assert get_transport() is not first
+        await reset_transports()
+
+    async def test_urllib_selected_by_config(self):
+        from src.utils.config import CONFIG
+        await reset_transports()
+        with patch.object(CONFIG.ai, "transport", "urllib"):
+            assert isinstance(get_transport(), UrllibTransport)
+        await reset_transports()
@@ -0,0 +1,98 @@
+"""
+Tests for the random map layout cache.
+
+Covers:
+- Cached layouts rebuild exactly the generated map
+- Miss -> generate and write, hit -> no regeneration
+- Version/key mismatch and corrupt files fall back to generation
+- load_game reuses the cache for random-seed saves
+"""
+
+import pytest
+
+from src.run import map_cache
+from src.run.map_cache import (
+    get_map_cache_path,
+    load_or_generate_map,
+    read_map_layout,
+    write_map_layout,
+)
+from src.run.map_generator import generate_map, generate_map_layout
+from src.classes.core.sect import sects_by_id
+from src.sim.load.load_game import load_game
+from src.sim.save.save_game import save_game
+from src.sim.simulator import Simulator
+from src.classes.core.world import World
+from src.systems.time import Month, Year, create_month_stamp
+
+WIDTH, HEIGHT, SEED = 48, 32, 20240501
+
+
+def map_signature(game_map):
+    tiles = [(pos, tile.type, tile.region.id if tile.region else None) for pos, tile in sorted(game_map.tiles.items())]
+    regions = [(rid, type(r).__name__, r.name, r.cors) for rid, r in game_map.regions.items()]
+    return tiles, regions, game_map.region_cors
+
+
+@pytest.fixture
+def sects():
+    return list(sects_by_id.values())[:3]
+
+
+def test_layout_round_trip(tmp_path, sects):
+    sect_ids = [s.id for s in sects]
+    layout = generate_map_layout(WIDTH, HEIGHT, SEED, sects)
+    path = tmp_path / "layout.map"
+    write_map_layout(path, layout, sect_ids)
+
+    cached = read_map_layout(path, SEED, WIDTH, HEIGHT, sect_ids)
+    assert cached == layout
+
+
+def test_miss_then_hit_builds_same_map(tmp_path, sects, monkeypatch):
+    expected, _ = generate_map(WIDTH, HEIGHT, SEED, sects)
+
+    first, hit = load_or_generate_map(WIDTH, HEIGHT, SEED, sects, cache_dir=tmp_path)
+    assert not hit
+    assert get_map_cache_path(SEED, WIDTH, HEIGHT, [s.id for s in sects], tmp_path).exists()
+
+    def fail(*args, **kwargs):
+        raise AssertionError("map regenerated on cache hit")
+
+    monkeypatch.setattr(map_cache, "generate_map_layout", fail)
+    second, hit = load_or_generate_map(WIDTH, HEIGHT, SEED, sects, cache_dir=tmp_path)
+    assert hit
+    assert map_signature(first) == map_signature(expected)
+    assert map_signature(second) == map_signature(expected)
+
+
+def test_mismatch_and_corruption_fall_back_to_generation(tmp_path, sects, monkeypatch):
+    sect_ids = [s.id for s in sects]
+    load_or_generate_map(WIDTH, HEIGHT, SEED, sects, cache_dir=tmp_path)
+    path = get_map_cache_path(SEED, WIDTH, HEIGHT, sect_ids, tmp_path)
+
+    # 不同的宗门列表对应不同的缓存
+    assert read_map_layout(path, SEED, WIDTH, HEIGHT, sect_ids[:1]) is None
+
+    monkeypatch.setattr(map_cache, "MAP_CACHE_VERSION", map_cache.MAP_CACHE_VERSION + 1)
+    assert read_map_layout(path, SEED, WIDTH, HEIGHT, sect_ids) is None
+
+    path.write_bytes(path.read_bytes()[:40])
+    _, hit = load_or_generate_map(WIDTH, HEIGHT, SEED, sects, cache_dir=tmp_path)
+    assert not hit
+    assert read_map_layout(path, SEED, WIDTH, HEIGHT, sect_ids) is not None
+
+
+def test_load_game_uses_cached_map(tmp_path, sects):
+    game_map, _ = load_or_generate_map(WIDTH, HEIGHT, SEED, sects)
+    world = World(map=game_map, month_stamp=create_month_stamp(Year(100), Month.JANUARY))
+    world._map_params = {"use_random_map": True, "map_seed": SEED, "map_width": WIDTH, "map_height": HEIGHT}
+    save_path = tmp_path / "random.json"
+    assert save_game(world, Simulator(world), sects, save_path=save_path)[0]
+
+    loaded, _, _ = load_game(save_path)
+    try:
+        assert loaded._load_stats["map_cache_hit"] is True
+        assert map_signature(loaded.map) == map_signature(game_map)
+    finally:
+        loaded.event_manager.close()
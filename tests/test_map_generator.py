@@ -0,0 +1,79 @@
+"""
+Tests for the random map generator.
+
+The row-based noise and flat-array placement/labelling must reproduce the original
+per-tile implementation exactly: same seed -> same map.
+"""
+
+import hashlib
+from types import SimpleNamespace
+
+import pytest
+
+from src.run.map_generator import (
+    _hash_noise,
+    _hash_noise_rows,
+    _smooth_noise,
+    _smooth_noise_rows,
+    generate_map_layout,
+)
+from src.classes.environment.tile import TileType
+
+SECTS = [SimpleNamespace(id=i) for i in (1, 2, 3)]
+
+# 由逐格实现（按行计算之前的版本）生成的布局指纹；seed % 5 覆盖全部五种世界类型
+GOLDEN_LAYOUTS = [
+    (1000, 64, 40, "c3aea7bab4b9ce63fe29c428"),
+    (1001, 64, 40, "91d520faf1ced763383fdb2b"),
+    (1002, 64, 40, "87ea7e9e42d02a676d337b3a"),
+    (1003, 64, 40, "8e5ccde64b45952a767ab717"),
+    (1004, 64, 40, "2f46c01be04ed2e5caf27d7f"),
+    (20250101, 160, 100, "98b52558ed94503dc2332acb"),
+    (20250102, 160, 100, "185fb4492ba79c6ed108f973"),
+    (20250103, 160, 100, "a582c32b3cad212bf843cb83"),
+    (20250104, 160, 100, "0915255dae52a551d353d847"),
+    (20250105, 160, 100, "086fb6e9c9fdcd95ca263304"),
+]
+
+
+def layout_fingerprint(layout) -> str:
+    h = hashlib.blake2b(digest_size=12)
+    for row in layout.tile_grid:
+        h.update(",".join(t.value for t in row).encode())
+    for kind, rid, cors in layout.regions:
+        h.update(f"{kind}:{rid}:{cors}".encode())
+    return h.hexdigest()
+
+
+@pytest.mark.parametrize("seed,width,height,expected", GOLDEN_LAYOUTS)
+def test_layout_matches_reference(seed, width, height, expected):
+    assert layout_fingerprint(generate_map_layout(width, height, seed, SECTS)) == expected
+
+
+@pytest.mark.parametrize("seed", [0, 7, -12345, 2**31 - 1])
+@pytest.mark.parametrize("scale", [0.07, 0.12])
+def test_row_noise_matches_point_noise(seed, scale):
+    width, height = 23, 11
+    smooth = list(_smooth_noise_rows(width, height, seed, scale))
+    hashed = list(_hash_noise_rows(width, height, seed))
+    for y in range(height):
+        assert smooth[y] == [_smooth_noise(x, y, seed, scale=scale) for x in range(width)]
+        assert hashed[y] == [_hash_noise(x, y, seed) for x in range(width)]
+
+
+def test_layout_invariants():
+    width, height = 80, 50
+    layout = generate_map_layout(width, height, 42, SECTS)
+
+    assert len(layout.tile_grid) == height and all(len(row) == width for row in layout.tile_grid)
+
+    # 每个格子至多属于一个区域；建筑区域为 2×2 且地形匹配
+    seen = set()
+    building_types = {"city": TileType.CITY, "cave": TileType.CAVE, "ruin": TileType.RUIN, "sect": TileType.SECT}
+    for kind, _, cors in layout.regions:
+        assert not seen & set(cors)
+        seen.update(cors)
+        if kind in building_types:
+            assert len(cors) == 4
+            assert all(layout.tile_grid[y][x] == building_types[kind] for x, y in cors)
+    assert sum(kind == "sect" for kind, _, _ in layout.regions) == len(SECTS)
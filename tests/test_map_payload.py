@@ -0,0 +1,110 @@
+"""
+Tests for the cached /api/map payload.
+
+Covers:
+- grid / rle / raster encodings decode to the same terrain
+- Payload is serialized once per map version and reused
+- ETag / If-None-Match returns 304, map changes produce a new ETag
+- History region changes invalidate the cached payload
+"""
+
+import base64
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.classes.environment.region import CityRegion
+from src.classes.environment.tile import TileType
+from src.server import main, map_payload
+from src.server.map_payload import MapPayloadCache, build_map_payload
+
+
+@pytest.fixture
+def map_client(base_world, monkeypatch):
+    base_world.map.get_tile(2, 3).type = TileType.MOUNTAIN
+    base_world.map.regions[1] = CityRegion(id=1, name="青云城", desc="test", cors=[(1, 1)])
+    monkeypatch.setitem(main.game_instance, "world", base_world)
+    monkeypatch.setattr(map_payload, "map_payload_cache", MapPayloadCache())
+    monkeypatch.setattr(main, "map_payload_cache", map_payload.map_payload_cache)
+    return TestClient(main.app), base_world.map
+
+
+def decode_terrain(data):
+    """把任意编码的响应还原为二维地形名称"""
+    w, h = data["width"], data["height"]
+    if data["encoding"] == "grid":
+        return data["data"]
+    if data["encoding"] == "rle":
+        codes = []
+        runs = data["runs"]
+        for i in range(0, len(runs), 2):
+            codes.extend([runs[i]] * runs[i + 1])
+    else:
+        codes = list(base64.b64decode(data["data"]))
+    names = [data["palette"][c] for c in codes]
+    return [names[y * w:(y + 1) * w] for y in range(h)]
+
+
+def test_encodings_decode_to_same_terrain(base_map):
+    base_map.get_tile(0, 1).type = TileType.WATER
+    grid = build_map_payload(base_map, "grid")
+    assert grid["data"][1][0] == "WATER"
+    for encoding in ("rle", "raster"):
+        payload = build_map_payload(base_map, encoding)
+        assert decode_terrain(payload) == grid["data"]
+
+
+def test_payload_serialized_once_per_version(base_map, monkeypatch):
+    cache = MapPayloadCache()
+    calls = []
+    real_build = map_payload.build_map_payload
+    monkeypatch.setattr(map_payload, "build_map_payload", lambda *a, **k: calls.append(a) or real_build(*a, **k))
+
+    body, etag = cache.get(base_map, "raster")
+    assert cache.get(base_map, "raster") == (body, etag)
+    assert len(calls) == 1
+
+    base_map.get_tile(0, 0).type = TileType.DESERT
+    assert cache.get(base_map, "raster")[1] != etag
+    assert len(calls) == 2
+
+
+def test_etag_and_not_modified(map_client):
+    client, game_map = map_client
+    response = client.get("/api/map")
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    data = response.json()
+    assert data["data"][3][2] == "MOUNTAIN"
+    assert data["regions"][0]["name"] == "青云城"
+
+    cached = client.get("/api/map", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+
+    raster = client.get("/api/map", params={"encoding": "raster"}, headers={"If-None-Match": etag})
+    assert raster.status_code == 200
+    assert decode_terrain(raster.json()) == data["data"]
+
+    game_map.get_tile(0, 0).type = TileType.WATER
+    changed = client.get("/api/map", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+
+
+def test_unknown_encoding_is_rejected(map_client):
+    client, _ = map_client
+    assert client.get("/api/map", params={"encoding": "png"}).status_code == 400
+
+
+def test_history_region_change_invalidates_payload(map_client, base_world):
+    from src.classes.history import HistoryManager
+
+    client, _ = map_client
+    etag = client.get("/api/map").headers["etag"]
+
+    HistoryManager(base_world)._update_regions({"1": {"name": "紫霄城"}})
+
+    response = client.get("/api/map", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["regions"][0]["name"] == "紫霄城"
@@ -0,0 +1,97 @@
+"""
+Tests for the array-backed Map storage.
+
+Covers:
+- Tile views read from and write through to the map arrays
+- Missing / out-of-bounds tiles raise KeyError like the old dict storage
+- Assigning a standalone Tile into map.tiles binds it to the map
+- Bulk region assignment and get_regions_within
+- tiles mapping behaves like a dict (iteration order, len, contains, get)
+"""
+
+import pytest
+
+from src.classes.environment.map import Map
+from src.classes.environment.region import NormalRegion
+from src.classes.environment.tile import Tile, TileType
+
+
+@pytest.fixture
+def small_map():
+    game_map = Map(4, 3)
+    for y in range(3):
+        for x in range(4):
+            game_map.create_tile(x, y, TileType.PLAIN)
+    return game_map
+
+
+def make_region(rid, name="R"):
+    return NormalRegion(id=rid, name=name, desc="test")
+
+
+def test_tile_views_write_through(small_map):
+    region = make_region(1)
+    tile = small_map.get_tile(2, 1)
+    tile.type = TileType.WATER
+    tile.region = region
+
+    again = small_map.tiles[(2, 1)]
+    assert again is not tile
+    assert again == tile
+    assert again.type == TileType.WATER
+    assert small_map.get_region(2, 1) is region
+    assert small_map.get_tile_type(2, 1) == TileType.WATER
+
+
+def test_missing_tiles_raise_key_error(small_map):
+    with pytest.raises(KeyError):
+        small_map.get_tile(4, 0)
+    with pytest.raises(KeyError):
+        small_map.get_region(-1, 0)
+
+    sparse = Map(3, 3)
+    sparse.create_tile(0, 0, TileType.CITY)
+    assert (0, 0) in sparse.tiles
+    assert (1, 1) not in sparse.tiles
+    assert sparse.tiles.get((1, 1)) is None
+    with pytest.raises(KeyError):
+        sparse.get_tile(1, 1)
+    assert len(sparse.tiles) == 1
+
+
+def test_assign_standalone_tile_binds_it(small_map):
+    region = make_region(7)
+    tile = Tile(TileType.CITY, 0, 0)
+    tile.region = region
+    small_map.tiles[(1, 2)] = tile
+
+    assert (tile.x, tile.y) == (1, 2)
+    assert small_map.get_tile(1, 2).type == TileType.CITY
+    assert small_map.get_region(1, 2) is region
+
+    # 赋值后对象成为视图，继续修改会写回地图
+    tile.type = TileType.MOUNTAIN
+    assert small_map.get_tile_type(1, 2) == TileType.MOUNTAIN
+
+
+def test_assign_region_and_regions_within(small_map):
+    west, east = make_region(1, "west"), make_region(2, "east")
+    small_map.assign_region(west, [(0, 0), (0, 1), (9, 9)])
+    small_map.assign_region(east, [(3, 2)])
+
+    assert small_map.get_region(0, 1) is west
+    assert small_map.get_region(1, 1) is None
+    assert set(small_map.get_regions_within(0, 0, 1)) == {west}
+    assert set(small_map.get_regions_within(1, 1, 3)) == {west, east}
+
+    # 修改 tile 的区域后缓存失效
+    small_map.get_tile(1, 0).region = east
+    assert set(small_map.get_regions_within(0, 0, 1)) == {west, east}
+
+
+def test_tiles_mapping_iterates_row_major(small_map):
+    keys = list(small_map.tiles)
+    assert keys[:5] == [(0, 0), (1, 0), (2, 0), (3, 0), (0, 1)]
+    assert len(small_map.tiles) == 12
+    assert all(pos == (t.x, t.y) for pos, t in small_map.tiles.items())
+    assert small_map.tile_type_rows()[2] == [TileType.PLAIN] * 4
@@ -0,0 +1,79 @@
+"""
+测试感知阶段：Map.get_regions_within 与 Simulator 的感知缓存。
+"""
+import pytest
+from unittest.mock import MagicMock
+
+from src.classes.environment.region import NormalRegion, CultivateRegion
+from src.classes.environment.tile import TileType
+from src.sim.simulator import Simulator
+
+
+def _brute_force_regions(game_map, x, y, radius):
+    found = set()
+    for tx in range(max(0, x - radius), min(game_map.width - 1, x + radius) + 1):
+        for ty in range(max(0, y - radius), min(game_map.height - 1, y + radius) + 1):
+            if abs(tx - x) + abs(ty - y) <= radius:
+                region = game_map.get_tile(tx, ty).region
+                if region:
+                    found.add(region)
+    return found
+
+
+@pytest.fixture
+def striped_map(base_map):
+    """每两列一个普通区域，共 5 个区域。"""
+    for i in range(5):
+        region = NormalRegion(id=i + 1, name=f"区域{i}", desc="")
+        base_map.regions[region.id] = region
+        for x in (2 * i, 2 * i + 1):
+            for y in range(base_map.height):
+                base_map.tiles[(x, y)].region = region
+    base_map.invalidate_region_cache()
+    return base_map
+
+
+def test_regions_within_matches_brute_force(striped_map):
+    for x in range(striped_map.width):
+        for y in range(striped_map.height):
+            for r in (1, 2, 5):
+                assert set(striped_map.get_regions_within(x, y, r)) == _brute_force_regions(striped_map, x, y, r)
+
+
+def test_regions_within_is_cached_and_invalidated(striped_map):
+    first = striped_map.get_regions_within(0, 0, 2)
+    assert striped_map.get_regions_within(0, 0, 2) is first
+
+    new_region = NormalRegion(id=99, name="新区域", desc="")
+    striped_map.tiles[(0, 1)].region = new_region
+    striped_map.invalidate_region_cache()
+    assert new_region in striped_map.get_regions_within(0, 0, 2)
+
+
+def test_create_tile_invalidates_cache(striped_map):
+    assert striped_map.get_regions_within(0, 0, 1)
+    striped_map.create_tile(0, 0, TileType.PLAIN)
+    striped_map.create_tile(1, 0, TileType.PLAIN)
+    striped_map.create_tile(0, 1, TileType.PLAIN)
+    assert striped_map.get_regions_within(0, 0, 1) == ()
+
+
+def test_stationary_avatar_still_occupies_freed_region(base_world, dummy_avatar):
+    """未移动的角色跳过区域扫描，但洞府变为无主时仍会占据。"""
+    cave = CultivateRegion(id=7, name="洞府", desc="")
+    base_world.map.regions[cave.id] = cave
+    base_world.map.tiles[(1, 0)].region = cave
+    base_world.map.invalidate_region_cache()
+
+    sim = Simulator(base_world)
+
+    # 第一个月：已有主人，不能占据
+    cave.host_avatar = MagicMock(id="someone_else")
+    assert sim._phase_update_perception_and_knowledge([dummy_avatar]) == []
+    assert cave.id in dummy_avatar.known_regions
+
+    # 第二个月：位置不变，主人消失
+    cave.host_avatar = None
+    events = sim._phase_update_perception_and_knowledge([dummy_avatar])
+    assert len(events) == 1
+    assert cave.host_avatar is dummy_avatar
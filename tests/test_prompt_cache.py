@@ -0,0 +1,99 @@
+"""
+Tests for the cached/frozen parts of prompt assembly.
+
+Covers:
+- Templates are read from disk once and re-read after modification
+- The action catalog is serialized once per language
+- Region description fragments are cached until the region changes
+- Static sections come before per-avatar sections in the decision prompt
+"""
+
+import os
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+import src.classes.actions as actions
+from src.classes.environment.region import CultivateRegion
+from src.classes.essence import EssenceType
+from src.utils.llm.prompt import load_template
+
+
+class TestTemplateCache:
+
+    def test_template_read_once_until_modified(self, tmp_path):
+        path = tmp_path / "t.txt"
+        path.write_text("v1 {x}", encoding="utf-8")
+
+        with patch.object(Path, "read_text", autospec=True, side_effect=Path.read_text) as mock_read:
+            assert load_template(path) == "v1 {x}"
+            assert load_template(str(path)) == "v1 {x}"
+            assert mock_read.call_count == 1
+
+            path.write_text("v2 {x}", encoding="utf-8")
+            stat = path.stat()
+            os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+            assert load_template(path) == "v2 {x}"
+            assert mock_read.call_count == 2
+
+    def test_missing_template_raises(self, tmp_path):
+        with pytest.raises(FileNotFoundError):
+            load_template(tmp_path / "missing.txt")
+
+
+class TestActionCatalogCache:
+
+    def test_serialized_once_per_language(self, monkeypatch):
+        monkeypatch.setattr(actions, "_ACTION_INFOS_STR_CACHE", {})
+        with patch.object(actions, "get_action_infos", wraps=actions.get_action_infos) as mock_infos:
+            first = actions.get_action_infos_str()
+            assert actions.get_action_infos_str() is first
+            assert mock_infos.call_count == 1
+
+            from src.classes.language import LanguageType, language_manager
+            monkeypatch.setattr(language_manager, "_current", LanguageType.EN_US)
+            actions.get_action_infos_str()
+            assert mock_infos.call_count == 2
+        assert set(actions._ACTION_INFOS_STR_CACHE) == {"zh-CN", "en-US"}
+
+
+class TestRegionFragmentCache:
+
+    def test_fragment_cached_until_region_changes(self):
+        region = CultivateRegion(id=1, name="Fire Cave", desc="Hot", essence_type=EssenceType.FIRE, essence_density=5)
+        with patch.object(CultivateRegion, "_get_desc", autospec=True, side_effect=CultivateRegion._get_desc) as mock_desc:
+            first = region.get_detailed_info((0, 0), 1)
+            assert region.get_detailed_info((0, 0), 1) == first
+            assert mock_desc.call_count == 1
+
+            region.essence_density = 8
+            assert region.get_detailed_info((0, 0), 1) != first
+            region.desc = "Hotter"
+            assert "Hotter" in region.get_detailed_info((0, 0), 1)
+            assert mock_desc.call_count == 3
+
+    def test_distance_and_owner_stay_dynamic(self, dummy_avatar):
+        region = CultivateRegion(id=2, name="Cave", desc="Quiet", essence_type=EssenceType.WATER, essence_density=3,
+                                 cors=[(5, 5)])
+        near = region.get_detailed_info((5, 5), 1)
+        far = region.get_detailed_info((0, 0), 1)
+        assert near != far
+
+        region.host_avatar = dummy_avatar
+        assert dummy_avatar.name in region.get_detailed_info((5, 5), 1)
+
+
+class TestPromptLayout:
+
+    @pytest.mark.parametrize("lang", ["zh-CN", "zh-TW", "en-US"])
+    def test_decision_template_puts_static_sections_first(self, lang):
+        text = (Path("static/locales") / lang / "templates" / "ai.txt").read_text(encoding="utf-8")
+        assert text.index("{general_action_infos}") < text.index("{world_info}") < text.index("{avatar_info}")
+
+    def test_world_info_lists_static_lore_before_regions(self, base_world):
+        base_world.set_history("Once upon a time")
+        keys = list(base_world.get_info(detailed=True))
+        static_keys = list(base_world.static_info)
+        assert static_keys
+        assert keys[:len(static_keys)] == static_keys
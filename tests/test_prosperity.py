@@ -90,7 +90,7 @@ class TestProsperity:
         
         # 注入到地图
         from src.classes.environment.tile import Tile, TileType
-        tile = Tile(0, 0, TileType.CITY)
+        tile = Tile(TileType.CITY, 0, 0)
         tile.region = city
         base_world.map.tiles[(0, 0)] = tile
         base_world.map.regions[1] = city
@@ -119,7 +119,7 @@ class TestProsperity:
         city.prosperity = 88  # 非默认值
         
         # 注入到地图
-        tile = Tile(0, 0, TileType.CITY)
+        tile = Tile(TileType.CITY, 0, 0)
         tile.region = city
         base_world.map.tiles[(0, 0)] = tile
         base_world.map.regions[999] = city
@@ -147,7 +147,7 @@ class TestProsperity:
             empty_map = Map(10, 10)
             # 在新地图中预置该城市（初始繁荣度默认为50）
             new_city = CityRegion(id=999, name="SaveLoadCity", desc="Test")
-            new_tile = Tile(0, 0, TileType.CITY)
+            new_tile = Tile(TileType.CITY, 0, 0)
             new_tile.region = new_city
             empty_map.tiles[(0, 0)] = new_tile
             empty_map.regions[999] = new_city
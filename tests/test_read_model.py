@@ -0,0 +1,125 @@
+"""
+Tests for the read-model snapshot served by the read endpoints.
+
+Covers:
+- Simulator._finalize_step notifies step listeners after the month advances
+- /api/state, /api/meta/avatar_list, /api/meta/rankings serve the published snapshot
+  (with snapshot_version / snapshot_age_ms) and fall back to live data without one
+- Snapshot data stays stable until republished; mutating endpoints republish
+  on the event loop even when the endpoint itself runs in the threadpool
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.server import main
+from src.server.read_model import ReadModelStore
+from src.sim.simulator import Simulator
+
+
+@pytest.fixture
+def store(monkeypatch):
+    s = ReadModelStore(main.read_model_store._builders)
+    monkeypatch.setattr(main, "read_model_store", s)
+    return s
+
+
+@pytest.fixture
+def client(base_world, dummy_avatar, store, monkeypatch):
+    base_world.avatar_manager.register_avatar(dummy_avatar)
+    monkeypatch.setitem(main.game_instance, "world", base_world)
+    return TestClient(main.app)
+
+
+def test_step_listener_called_after_time_advance(base_world):
+    sim = Simulator(base_world)
+    seen = []
+    sim.step_listeners.append(lambda world: seen.append(world.month_stamp))
+    sim.step_listeners.insert(0, lambda world: 1 / 0)  # 出错的监听者不影响后续
+    before = base_world.month_stamp
+
+    sim._finalize_step([])
+
+    assert seen == [before + 1]
+
+
+def test_attach_publishes_on_each_step(base_world, dummy_avatar, store):
+    base_world.avatar_manager.register_avatar(dummy_avatar)
+    sim = Simulator(base_world)
+    main.attach_read_model(sim, base_world)
+    first = store.current_for(base_world)
+    assert first.sections["avatar_count"] == 1
+
+    sim._finalize_step([])
+    second = store.current_for(base_world)
+    assert second.version == first.version + 1
+    assert (second.year, second.month) != (first.year, first.month)
+
+
+def test_state_served_from_snapshot(client, base_world, dummy_avatar, store):
+    live = client.get("/api/state").json()
+    assert live["snapshot_version"] is None
+    assert live["avatars"][0]["name"] == "TestDummy"
+
+    model = store.publish(base_world)
+    dummy_avatar.pos_x = 7
+    data = client.get("/api/state").json()
+    assert data["snapshot_version"] == model.version
+    assert data["snapshot_age_ms"] >= 0
+    # 快照发布后的修改要等下次发布才可见
+    assert data["avatars"][0]["x"] == 0
+
+    store.publish(base_world)
+    assert client.get("/api/state").json()["avatars"][0]["x"] == 7
+
+
+def test_meta_endpoints_served_from_snapshot(client, base_world, store):
+    assert "snapshot_version" not in client.get("/api/meta/avatar_list").json()
+
+    model = store.publish(base_world)
+    avatars = client.get("/api/meta/avatar_list").json()
+    assert avatars["snapshot_version"] == model.version
+    assert [a["name"] for a in avatars["avatars"]] == ["TestDummy"]
+
+    rankings = client.get("/api/meta/rankings").json()
+    assert rankings["snapshot_version"] == model.version
+    assert {"realm", "sect", "age", "treasure"} <= rankings.keys()
+
+
+def test_snapshot_of_other_world_is_ignored(client, base_world, base_map, store):
+    from src.classes.core.world import World
+
+    store.publish(World(map=base_map, month_stamp=base_world.month_stamp))
+    assert client.get("/api/state").json()["snapshot_version"] is None
+
+
+def test_delete_avatar_republishes(client, base_world, dummy_avatar, store):
+    store.publish(base_world)
+    response = client.post("/api/action/delete_avatar", json={"avatar_id": str(dummy_avatar.id)})
+    assert response.status_code == 200
+
+    data = client.get("/api/state").json()
+    assert data["avatar_count"] == 0
+    assert data["snapshot_version"] == store.current_for(base_world).version
+
+
+def test_threadpool_handlers_publish_on_event_loop(client, base_world, dummy_avatar, store, monkeypatch):
+    """Sync endpoints run in the threadpool; the republish itself must run on the event loop."""
+    import asyncio
+
+    seen = []
+    publish = store.publish
+
+    def recording_publish(world):
+        try:
+            asyncio.get_running_loop()
+            seen.append("loop")
+        except RuntimeError:
+            seen.append("thread")
+        return publish(world)
+
+    monkeypatch.setattr(store, "publish", recording_publish)
+    response = client.post("/api/action/delete_avatar", json={"avatar_id": str(dummy_avatar.id)})
+    assert response.status_code == 200
+    assert seen == ["loop"]
+    assert client.get("/api/state").json()["avatar_count"] == 0
@@ -0,0 +1,131 @@
+"""
+Tests for the rule-based policy AI.
+
+Covers:
+- RuleAI picks chains from avatar state: low HP, bottleneck, inventory in a city, orthodoxy
+- Decisions are deterministic per avatar and month and keep the avatar's narrative fields
+- LLMAI routes avatars to the rule policy by ai.decision_policy (rule / tiered)
+- LLM timeouts and errors fall back to the rule policy when ai.rule_fallback is on
+"""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from src.classes.ai import LLMAI
+from src.classes.environment.region import CityRegion
+from src.classes.rule_ai import RuleAI, _can_start
+from src.systems.cultivation import Realm
+from src.utils.config import CONFIG
+from tests.conftest import create_test_material
+
+
+def names(pairs):
+    return [name for name, _ in pairs]
+
+
+@pytest.fixture
+def rule(dummy_avatar):
+    # 关闭游走，使修炼分支确定
+    return RuleAI(wander_chance=0.0)
+
+
+def test_low_hp_heals(rule, dummy_avatar, base_world):
+    dummy_avatar.hp.cur = 1
+    assert names(rule.plan(base_world, dummy_avatar)) == ["SelfHeal"]
+
+
+def test_bottleneck_breaks_through_unless_on_cooldown(rule, dummy_avatar, base_world):
+    dummy_avatar.cultivation_progress.level = 30
+    assert names(rule.plan(base_world, dummy_avatar)) == ["Breakthrough"]
+
+    # 冷却中不能突破也不能修炼：改为采集或移动
+    dummy_avatar._action_cd_last_months["Breakthrough"] = base_world.month_stamp
+    assert names(rule.plan(base_world, dummy_avatar))[-1] not in ("Breakthrough", "Respire")
+
+
+def test_sells_materials_in_city_then_cultivates(rule, dummy_avatar, base_world):
+    city = CityRegion(id=1, name="青云城", desc="test", cors=[(0, 0)])
+    base_world.map.regions[1] = city
+    dummy_avatar.tile.region = city
+    dummy_avatar.add_material(create_test_material("灵草", Realm.Qi_Refinement), 3)
+
+    pairs = rule.plan(base_world, dummy_avatar)
+    assert pairs[0] == ("Sell", {"target_name": "灵草"})
+    assert names(pairs)[1] == "Respire"
+
+
+def test_respects_orthodoxy(rule, dummy_avatar, base_world):
+    dummy_avatar.effects["legal_actions"] = ["Meditate"]
+    assert names(rule.plan(base_world, dummy_avatar)) == ["Meditate"]
+
+
+def test_chains_start_and_are_deterministic(dummy_avatar, base_world):
+    rule = RuleAI()
+    first = rule.plan(base_world, dummy_avatar)
+    assert rule.plan(base_world, dummy_avatar) == first
+    assert _can_start(dummy_avatar, first[0][0], **first[0][1])
+
+
+async def test_decide_keeps_narrative(rule, dummy_avatar, base_world):
+    dummy_avatar.thinking = "静心"
+    dummy_avatar.short_term_objective = "筑基"
+    results = await rule.decide(base_world, [dummy_avatar])
+    pairs, thinking, objective, emotion, _event = results[dummy_avatar]
+    assert pairs
+    assert (thinking, objective) == ("静心", "筑基")
+    assert emotion is None
+
+
+@pytest.fixture
+def llm():
+    with patch("src.classes.ai.call_llm_with_task_name", new_callable=AsyncMock) as mock_llm, \
+         patch("src.classes.core.world.World.get_info", return_value={}), \
+         patch("src.classes.core.avatar.Avatar.get_expanded_info", return_value={}):
+        mock_llm.side_effect = lambda task, path, info: {
+            info["avatar_name"]: {"action_name_params_pairs": [["Temper", {}]], "avatar_thinking": "llm"}
+        }
+        yield mock_llm
+
+
+async def test_rule_policy_skips_llm(monkeypatch, llm, dummy_avatar, base_world):
+    monkeypatch.setattr(CONFIG.ai, "decision_policy", "rule", raising=False)
+    results = await LLMAI()._decide(base_world, [dummy_avatar])
+    assert llm.call_count == 0
+    assert dummy_avatar in results
+
+
+async def test_tiered_policy_routes_by_realm(monkeypatch, llm, dummy_avatar, base_world):
+    monkeypatch.setattr(CONFIG.ai, "decision_policy", "tiered", raising=False)
+    monkeypatch.setattr(CONFIG.ai, "llm_min_realm", "FOUNDATION_ESTABLISHMENT", raising=False)
+    results = await LLMAI()._decide(base_world, [dummy_avatar])
+    assert llm.call_count == 0
+    assert results[dummy_avatar][1] != "llm"
+
+    monkeypatch.setattr(CONFIG.ai, "llm_min_realm", "QI_REFINEMENT", raising=False)
+    results = await LLMAI()._decide(base_world, [dummy_avatar])
+    assert llm.call_count == 1
+    assert results[dummy_avatar][0] == [("Temper", {})]
+
+
+async def test_timeout_falls_back_to_rules(monkeypatch, llm, dummy_avatar, base_world):
+    monkeypatch.setattr(CONFIG.ai, "decision_policy", "llm", raising=False)
+    monkeypatch.setattr(CONFIG.ai, "decision_timeout", 0.01, raising=False)
+    monkeypatch.setattr(CONFIG.ai, "rule_fallback", True, raising=False)
+
+    async def slow(*args):
+        await asyncio.sleep(1)
+
+    llm.side_effect = slow
+    results = await LLMAI()._decide(base_world, [dummy_avatar])
+    assert results[dummy_avatar][0]
+    assert results[dummy_avatar][1] != "llm"
+
+
+async def test_errors_propagate_without_fallback(monkeypatch, llm, dummy_avatar, base_world):
+    monkeypatch.setattr(CONFIG.ai, "decision_policy", "llm", raising=False)
+    monkeypatch.setattr(CONFIG.ai, "rule_fallback", False, raising=False)
+    llm.side_effect = RuntimeError("rate limited")
+    with pytest.raises(RuntimeError):
+        await LLMAI()._decide(base_world, [dummy_avatar])
@@ -0,0 +1,118 @@
+"""
+Tests for the binary (.sav) chunked save format.
+
+Covers:
+- Round trip through save_game/load_game
+- Incremental saves rewrite only changed avatars (same file and from a base file)
+- Meta reading, save listing and format selection via CONFIG.save.format
+- Save/load timings
+"""
+
+import json
+
+import pytest
+
+from src.sim.load.load_game import check_save_compatibility, load_game
+from src.sim.save.binary_save import is_binary_save, read_binary_save
+from src.sim.save.save_game import get_save_info, list_saves, save_game
+from src.sim.simulator import Simulator
+from src.utils.config import CONFIG
+
+
+@pytest.fixture
+def world_with_avatar(base_world, dummy_avatar):
+    dummy_avatar.weapon = None
+    base_world.avatar_manager.register_avatar(dummy_avatar)
+    return base_world, dummy_avatar
+
+
+def test_round_trip(world_with_avatar, tmp_path):
+    world, avatar = world_with_avatar
+    world.set_history("Long ago")
+    save_path = tmp_path / "game.sav"
+
+    success, filename = save_game(world, Simulator(world), [], save_path=save_path)
+    assert success and filename == "game.sav"
+    assert is_binary_save(save_path)
+
+    loaded_world, _, _ = load_game(save_path)
+    loaded = loaded_world.avatar_manager.get_avatar(avatar.id)
+    assert loaded is not None
+    assert loaded.name == avatar.name
+    assert loaded_world.history.text == "Long ago"
+    assert loaded_world._load_stats["format"] == "binary"
+    assert loaded_world._last_binary_save == save_path
+    loaded_world.event_manager.close()
+
+
+def test_matches_json_payload(world_with_avatar, tmp_path):
+    world, _ = world_with_avatar
+    sim = Simulator(world)
+    save_game(world, sim, [], save_path=tmp_path / "game.json")
+    save_game(world, sim, [], save_path=tmp_path / "game.sav")
+
+    with open(tmp_path / "game.json", encoding="utf-8") as f:
+        json_data = json.load(f)
+    binary_data = read_binary_save(tmp_path / "game.sav")
+    for key in ("world", "avatars", "simulator"):
+        assert binary_data[key] == json_data[key]
+
+
+class TestIncrementalSave:
+
+    def test_only_changed_avatars_rewritten(self, world_with_avatar, tmp_path):
+        world, avatar = world_with_avatar
+        sim = Simulator(world)
+        save_path = tmp_path / "game.sav"
+
+        save_game(world, sim, [], save_path=save_path)
+        assert world._save_stats["avatars_written"] == 1
+        assert not world._save_stats["incremental"]
+
+        save_game(world, sim, [], save_path=save_path)
+        assert world._save_stats["avatars_written"] == 0
+        assert world._save_stats["incremental"]
+
+        avatar.pos_x = 3
+        save_game(world, sim, [], save_path=save_path)
+        assert world._save_stats["avatars_written"] == 1
+        assert read_binary_save(save_path)["avatars"][0]["pos_x"] == 3
+
+        world.avatar_manager.avatars.pop(avatar.id)
+        save_game(world, sim, [], save_path=save_path)
+        assert world._save_stats["avatars_deleted"] == 1
+        assert read_binary_save(save_path)["avatars"] == []
+
+    def test_new_file_builds_on_last_binary_save(self, world_with_avatar, tmp_path):
+        world, avatar = world_with_avatar
+        sim = Simulator(world)
+        save_game(world, sim, [], save_path=tmp_path / "first.sav")
+
+        world.month_stamp = world.month_stamp + 1
+        save_game(world, sim, [], save_path=tmp_path / "second.sav")
+        assert world._save_stats["incremental"]
+        assert world._save_stats["avatars_written"] == 0
+
+        second = read_binary_save(tmp_path / "second.sav")
+        assert second["world"]["month_stamp"] == int(world.month_stamp)
+        assert [a["id"] for a in second["avatars"]] == [avatar.id]
+        # 基底文件保持不变
+        assert read_binary_save(tmp_path / "first.sav")["world"]["month_stamp"] == int(world.month_stamp) - 1
+
+
+def test_listing_meta_and_format_selection(world_with_avatar, monkeypatch):
+    world, _ = world_with_avatar
+    sim = Simulator(world)
+    save_game(world, sim, [], custom_name="json_save")
+    monkeypatch.setattr(CONFIG.save, "format", "binary", raising=False)
+    success, filename = save_game(world, sim, [], custom_name="binary_save")
+
+    assert success and filename.endswith(".sav")
+    assert world._save_stats["format"] == "binary"
+    assert {"serialize_ms", "write_ms", "total_ms"} <= world._save_stats.keys()
+
+    saves = list_saves()
+    assert sorted(p.suffix for p, _ in saves) == [".json", ".sav"]
+    binary_path = CONFIG.paths.saves / filename
+    assert get_save_info(binary_path)["custom_name"] == "binary_save"
+    assert check_save_compatibility(binary_path) == (True, "")
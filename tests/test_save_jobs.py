@@ -0,0 +1,225 @@
+"""
+Tests for background save/load jobs.
+
+Covers:
+- JobManager lifecycle (progress, results, failures, listing)
+- Save snapshots are detached from live world state
+- Save jobs snapshot only between steps (step lock) and write in the worker
+- /api/game/save, /api/game/load and /api/jobs endpoints
+- Saves are rejected while a load is running and never touch a world that a load replaced
+- A load waits for saves still backing up the old events DB before closing it
+"""
+
+import asyncio
+import threading
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from src.classes.event_storage import EventStorage
+from src.server import main
+from src.server.jobs import JobManager, job_manager
+from src.sim.managers.event_manager import EventManager
+from src.sim.save.binary_save import read_save_data
+from src.sim.save.save_game import resolve_save_path, take_save_snapshot, write_save_snapshot
+from src.sim.simulator import Simulator
+from src.utils.config import CONFIG
+
+
+@pytest.fixture
+def running_game(base_world, dummy_avatar, monkeypatch):
+    dummy_avatar.weapon = None
+    base_world.avatar_manager.register_avatar(dummy_avatar)
+    monkeypatch.setitem(main.game_instance, "world", base_world)
+    monkeypatch.setitem(main.game_instance, "sim", Simulator(base_world))
+    # 读档会改写这些字段，测试结束后恢复
+    for key in ("is_paused", "init_status", "init_phase_name", "init_progress", "current_save_path"):
+        monkeypatch.setitem(main.game_instance, key, main.game_instance.get(key))
+    return base_world, dummy_avatar
+
+
+class TestJobManager:
+
+    async def test_job_runs_in_worker_and_reports_progress(self):
+        manager = JobManager()
+        seen = []
+
+        def work(job):
+            job.set_progress("writing", 1, 2)
+            seen.append(job.to_dict()["stage"])
+            return {"value": 42}
+
+        async def run(job):
+            return await manager.run_in_worker(work, job)
+
+        job = manager.submit("save", run)
+        await manager.wait(job)
+
+        assert job.status == "done"
+        assert job.result == {"value": 42}
+        assert seen == ["writing"]
+        assert job.finished_at is not None
+        assert manager.list_jobs() == [job]
+
+    async def test_failed_job_records_error(self):
+        manager = JobManager()
+
+        async def run(job):
+            raise RuntimeError("disk full")
+
+        job = manager.submit("load", run)
+        await manager.wait(job)
+
+        assert job.status == "failed"
+        assert job.error == "disk full"
+        assert manager.get(job.id) is job
+
+
+def test_detached_snapshot_does_not_follow_world_changes(running_game):
+    world, avatar = running_game
+    avatar.temporary_effects = [{"source": "pill", "effects": {}, "start_month": 0, "duration": 3}]
+    save_path = resolve_save_path(world, custom_name="detached")
+    snapshot = take_save_snapshot(world, main.game_instance["sim"], [], save_path, detach=True)
+
+    avatar.temporary_effects.append({"source": "later"})
+    avatar.pos_x = 7
+
+    assert write_save_snapshot(world, snapshot) == (True, save_path.name)
+    saved = snapshot.data["avatars"][0]
+    assert len(saved["temporary_effects"]) == 1
+    assert saved["pos_x"] != 7
+
+
+async def test_save_job_waits_for_step_boundary(running_game):
+    world, avatar = running_game
+    step_lock = job_manager.step_lock()
+    await step_lock.acquire()
+    try:
+        response = await main.api_save_game(main.SaveGameRequest(background=True))
+        job = job_manager.get(response["job_id"])
+        await asyncio.sleep(0.05)
+        # 一步尚未结束，不能做快照
+        assert job.stage == "snapshotting"
+        assert not job.finished
+        avatar.pos_x = 5
+    finally:
+        step_lock.release()
+
+    await job_manager.wait(job)
+    assert job.status == "done"
+    # 快照在锁释放后才拍下，包含这一步的结果
+    saved = read_save_data(CONFIG.paths.saves / job.result["filename"])
+    assert saved["avatars"][0]["pos_x"] == 5
+
+
+async def test_save_rejected_while_load_is_running(running_game):
+    saved = await main.api_save_game(main.SaveGameRequest(custom_name="before_load"))
+    step_lock = job_manager.step_lock()
+    await step_lock.acquire()
+    try:
+        response = await main.api_load_game(main.LoadGameRequest(filename=saved["filename"], background=True))
+        load_job = job_manager.get(response["job_id"])
+        await asyncio.sleep(0.05)
+        assert not load_job.finished
+        with pytest.raises(HTTPException) as exc:
+            await main.api_save_game(main.SaveGameRequest(background=True))
+        assert exc.value.status_code == 409
+    finally:
+        step_lock.release()
+
+    await job_manager.wait(load_job)
+    assert load_job.status == "done"
+    main.game_instance["world"].event_manager.close()
+
+
+async def test_queued_save_skips_replaced_world(running_game, monkeypatch):
+    world, _ = running_game
+    step_lock = job_manager.step_lock()
+    await step_lock.acquire()
+    try:
+        response = await main.api_save_game(main.SaveGameRequest(background=True))
+        job = job_manager.get(response["job_id"])
+        await asyncio.sleep(0.01)
+        # 读档在拿到步进锁后先把全局世界切走，再关闭旧世界的事件库
+        monkeypatch.setitem(main.game_instance, "world", None)
+        world.event_manager.close()
+    finally:
+        step_lock.release()
+
+    await job_manager.wait(job)
+    assert job.status == "failed"
+    assert "replaced" in job.error
+
+
+async def test_load_waits_for_save_backup(running_game, monkeypatch, tmp_path):
+    world, _ = running_game
+    world.event_manager = EventManager.create_with_db(tmp_path / "events.db")
+    saved = await main.api_save_game(main.SaveGameRequest(custom_name="before_backup"))
+
+    started = threading.Event()
+    release = threading.Event()
+    original_snapshot_to = EventStorage.snapshot_to
+
+    def blocking_snapshot_to(self, *args, **kwargs):
+        started.set()
+        release.wait(timeout=5)
+        return original_snapshot_to(self, *args, **kwargs)
+
+    monkeypatch.setattr(EventStorage, "snapshot_to", blocking_snapshot_to)
+    closed = []
+    original_close = world.event_manager.close
+    monkeypatch.setattr(world.event_manager, "close", lambda: (closed.append(True), original_close()))
+
+    response = await main.api_save_game(main.SaveGameRequest(background=True))
+    save_job = job_manager.get(response["job_id"])
+    assert await asyncio.to_thread(started.wait, 5)
+
+    # 存档已释放步进锁、正在工作线程中备份旧世界的事件库
+    response = await main.api_load_game(main.LoadGameRequest(filename=saved["filename"], background=True))
+    load_job = job_manager.get(response["job_id"])
+    await asyncio.sleep(0.3)
+    assert main.game_instance["world"] is None
+    assert closed == []
+
+    release.set()
+    await job_manager.wait(save_job)
+    await job_manager.wait(load_job)
+    assert save_job.status == "done"
+    assert load_job.status == "done"
+    assert closed == [True]
+    main.game_instance["world"].event_manager.close()
+
+
+class TestJobEndpoints:
+
+    def test_save_returns_job_that_can_be_queried(self, running_game):
+        client = TestClient(main.app)
+        response = client.post("/api/game/save", json={"custom_name": "job_save"})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["status"] == "ok"
+        assert "job_save" in data["filename"]
+
+        job = client.get(f"/api/jobs/{data['job_id']}").json()
+        assert job["kind"] == "save"
+        assert job["status"] == "done"
+        assert job["result"]["filename"] == data["filename"]
+        assert any(j["id"] == data["job_id"] for j in client.get("/api/jobs").json()["jobs"])
+
+    def test_load_runs_as_job(self, running_game):
+        client = TestClient(main.app)
+        filename = client.post("/api/game/save", json={}).json()["filename"]
+
+        response = client.post("/api/game/load", json={"filename": filename})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["status"] == "ok"
+        assert "total_ms" in data["timings"]
+        assert main.game_instance["init_status"] == "ready"
+        assert client.get(f"/api/jobs/{data['job_id']}").json()["stage"] == "done"
+        main.game_instance["world"].event_manager.close()
+
+    def test_unknown_job_is_404(self):
+        client = TestClient(main.app)
+        assert client.get("/api/jobs/missing").status_code == 404
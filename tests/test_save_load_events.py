@@ -24,7 +24,7 @@ from src.classes.event_storage import EventStorage
 from src.sim.managers.event_manager import EventManager
 from src.sim.simulator import Simulator
 from src.sim.save.save_game import save_game
-from src.sim.load.load_game import load_game
+from src.sim.load.load_game import get_events_db_path, load_game
 from src.utils.id_generator import get_avatar_id
 
 
@@ -241,6 +241,51 @@ class TestSaveLoadWithEvents:
         # Clean up
         world.event_manager.close()
 
+    def test_save_backs_up_events_while_game_keeps_writing(self, temp_save_dir, tmp_path):
+        """Events DB is copied with the online backup API while another thread writes."""
+        import threading
+        from src.sim.save.save_game import get_save_progress
+
+        world = World.create_with_db(
+            map=create_test_map(),
+            month_stamp=create_month_stamp(Year(100), Month.JANUARY),
+            events_db_path=tmp_path / "live.db",
+        )
+        world.event_manager.add_events([make_event_by_index(i, "x" * 2000) for i in range(500)])
+
+        stop = threading.Event()
+        written = []
+
+        def game_loop():
+            i = 0
+            while not stop.is_set():
+                world.event_manager.add_event(make_event_by_index(1000 + i, f"live {i}"))
+                written.append(i)
+                i += 1
+
+        writer = threading.Thread(target=game_loop)
+        writer.start()
+        try:
+            save_path = temp_save_dir / "during_writes.json"
+            success, _ = save_game(world, Simulator(world), [], save_path)
+        finally:
+            stop.set()
+            writer.join()
+
+        assert success
+        stats = world._save_stats
+        assert stats["events_backup"]["method"] == "backup"
+        assert stats["events_backup"]["pages"] > 0
+        assert get_save_progress()["stage"] == "done"
+
+        snapshot = EventStorage(get_events_db_path(save_path))
+        try:
+            assert snapshot._conn.execute("PRAGMA integrity_check").fetchone()[0] == "ok"
+            assert 500 <= snapshot.count() <= 500 + len(written)
+        finally:
+            snapshot.close()
+        world.event_manager.close()
+
 
 class TestEventPagination:
     """Tests for event pagination functionality."""
@@ -416,6 +461,45 @@ class TestEventStorageEdgeCases:
         storage.close()
 
 
+class TestEventStorageBatchWrites:
+    """Tests for batched (single-transaction) event writes."""
+
+    def test_add_events_writes_batch_with_relations(self, tmp_path):
+        storage = EventStorage(tmp_path / "events.db")
+
+        events = [make_event_by_index(i, f"Event {i}", ["a1", f"b{i}"]) for i in range(50)]
+        assert storage.add_events(events) is True
+
+        assert storage.count() == 50
+        assert len(storage.get_events_by_avatar("a1", limit=100)) == 50
+        assert [e.content for e in storage.get_events_by_avatar("b7")] == ["Event 7"]
+        storage.close()
+
+    def test_add_events_rolls_back_whole_batch_on_error(self, tmp_path):
+        storage = EventStorage(tmp_path / "events.db")
+
+        # 关联表写入失败时，已写入的事件主表也应回滚
+        storage._conn.execute("DROP TABLE event_avatars")
+        events = [make_event(100, 1, "Event 1"), make_event(100, 2, "Event 2", ["a1"])]
+        assert storage.add_events(events) is False
+        assert storage.count() == 0
+        storage.close()
+
+    def test_connection_uses_wal(self, tmp_path):
+        storage = EventStorage(tmp_path / "events.db")
+        mode = storage._conn.execute("PRAGMA journal_mode").fetchone()[0]
+        assert mode.lower() == "wal"
+        storage.close()
+
+    def test_manager_add_events_skips_null_events(self, tmp_path):
+        from src.classes.event import NULL_EVENT
+
+        manager = EventManager.create_with_db(tmp_path / "events.db")
+        manager.add_events([make_event(100, 1, "Event 1"), NULL_EVENT])
+        assert manager.count() == 1
+        manager.close()
+
+
 class TestEventManagerMemoryFallback:
     """Tests for EventManager memory fallback mode."""
 
@@ -0,0 +1,120 @@
+import pytest
+
+from src.classes.core.avatar import Avatar, Gender
+from src.classes.age import Age
+from src.classes.observe import get_observable_avatars
+from src.classes.environment.region import NormalRegion
+from src.sim.managers.avatar_manager import AvatarManager
+from src.sim.managers.spatial_index import SpatialIndex
+from src.systems.cultivation import Realm
+from src.systems.time import create_month_stamp, Year, Month
+from src.utils.id_generator import get_avatar_id
+
+
+def _make_avatar(world, name, x, y):
+    return Avatar(
+        world=world,
+        name=name,
+        id=get_avatar_id(),
+        birth_month_stamp=create_month_stamp(Year(2000), Month.JANUARY),
+        age=Age(20, Realm.Qi_Refinement),
+        gender=Gender.MALE,
+        pos_x=x,
+        pos_y=y,
+        personas=[],
+    )
+
+
+@pytest.fixture
+def crowd(base_world):
+    """在 10x10 地图上散布 12 个角色，左半边属于同一区域。"""
+    region = NormalRegion(id=1, name="测试平原", desc="")
+    for x in range(5):
+        for y in range(10):
+            base_world.map.tiles[(x, y)].region = region
+
+    avatars = [_make_avatar(base_world, f"A{i}", (i * 3) % 10, (i * 7) % 10) for i in range(12)]
+    for av in avatars:
+        base_world.avatar_manager.register_avatar(av)
+    return base_world, avatars
+
+
+class TestSpatialIndexQueries:
+
+    def test_observable_matches_linear_scan(self, crowd):
+        world, avatars = crowd
+        manager = world.avatar_manager
+        for av in avatars:
+            assert manager.get_observable_avatars(av) == get_observable_avatars(av, avatars)
+
+    def test_same_region_matches_linear_scan(self, crowd):
+        world, avatars = crowd
+        manager = world.avatar_manager
+        for av in avatars:
+            expected = [
+                o for o in avatars
+                if o is not av and av.tile.region is not None and o.tile.region == av.tile.region
+            ]
+            assert manager.get_avatars_in_same_region(av) == expected
+
+    def test_move_updates_index(self, crowd):
+        world, avatars = crowd
+        manager = world.avatar_manager
+        mover, other = avatars[0], avatars[1]
+
+        mover.set_position(9, 9)
+        other.pos_x, other.pos_y = 9, 8
+        assert other in manager.get_observable_avatars(mover)
+        assert manager.get_avatars_in_same_region(mover) == []
+
+        mover.set_position(0, 0)
+        assert mover in manager.get_avatars_in_same_region(avatars[4])
+
+    def test_death_removes_from_index(self, crowd):
+        world, avatars = crowd
+        manager = world.avatar_manager
+        victim = avatars[3]
+        manager.handle_death(victim.id)
+        for av in avatars:
+            if av is victim:
+                continue
+            assert victim not in manager.get_observable_avatars(av)
+            assert victim not in manager.get_avatars_in_same_region(av)
+
+    def test_direct_dict_writes_are_indexed(self, base_world):
+        manager = AvatarManager()
+        a = _make_avatar(base_world, "A", 1, 1)
+        b = _make_avatar(base_world, "B", 2, 1)
+        manager.avatars[a.id] = a
+        manager.avatars.update({b.id: b})
+        assert manager.get_observable_avatars(a) == [b]
+
+        # 整体替换 avatars（读档路径）
+        manager.avatars = {a.id: a}
+        assert manager.get_observable_avatars(a) == []
+        assert len(manager._spatial) == 1
+
+
+def test_query_radius_crosses_cells(base_world):
+    index = SpatialIndex(cell_size=2)
+    a = _make_avatar(base_world, "A", 3, 3)
+    b = _make_avatar(base_world, "B", 6, 4)
+    index.add(a.id, a)
+    index.add(b.id, b)
+    assert index.query_radius(3, 3, 4, exclude=a) == [b]
+    assert index.query_radius(3, 3, 3, exclude=a) == []
+
+
+def test_query_rect_matches_linear_scan(crowd):
+    world, avatars = crowd
+    for rect in [(0, 0, 4, 4), (3, 2, 9, 6), (7, 7, 7, 7), (0, 0, 9, 9)]:
+        x0, y0, x1, y1 = rect
+        expected = [a for a in avatars if x0 <= a.pos_x <= x1 and y0 <= a.pos_y <= y1]
+        assert world.avatar_manager.get_avatars_in_rect(*rect) == expected
+
+
+def test_query_rect_huge_rect_scans_occupied_cells(crowd):
+    world, avatars = crowd
+    huge = (-10_000_000, -10_000_000, 10_000_000, 10_000_000)
+    assert world.avatar_manager.get_avatars_in_rect(*huge) == avatars
+    assert world.avatar_manager.get_avatars_in_rect(5, 5, 4, 4) == []
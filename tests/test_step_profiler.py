@@ -0,0 +1,105 @@
+"""
+Tests for the per-phase step profiler.
+
+Covers:
+- Phase wall / CPU / LLM-wait time, event and avatar counts are recorded per step
+- Class-level patches of phases still apply to a profiled simulator
+- Disabling restores the plain methods
+- /api/metrics exposes Prometheus text and JSON
+"""
+
+import asyncio
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.server import main
+from src.sim.simulator import Simulator
+from src.utils.llm.client import LLMWaitClock, llm_wait_clock
+
+
+@pytest.fixture
+def sim(base_world, dummy_avatar):
+    base_world.avatar_manager.register_avatar(dummy_avatar)
+    s = Simulator(base_world)
+    s.enable_profiling().log_steps = False
+    return s
+
+
+async def test_records_phases_per_step(sim):
+    await sim.step()
+    await sim.step()
+
+    profiler = sim.profiler
+    assert profiler.step_stats.count == 2
+    assert profiler.last_avatars == 1
+    execute = profiler.phases["execute_actions"]
+    assert execute.count == 2
+    assert execute.avatars == 2
+    assert execute.wall >= execute.llm_wait >= 0
+    assert "finalize_step" in profiler.phases
+    assert list(profiler.phase_seconds().values()) == sorted(profiler.phase_seconds().values(), reverse=True)
+
+
+async def test_llm_wait_is_attributed_to_phase(sim):
+    async def slow_llm_phase(self, living_avatars):
+        with llm_wait_clock.waiting():
+            await asyncio.sleep(0.02)
+        return []
+
+    with patch.object(Simulator, "_phase_nickname_generation", slow_llm_phase):
+        await sim.step()
+
+    nickname = sim.profiler.phases["nickname_generation"]
+    assert nickname.llm_wait >= 0.015
+    assert sim.profiler.step_stats.llm_wait >= nickname.llm_wait
+
+
+def test_wait_clock_merges_concurrent_requests():
+    clock = LLMWaitClock()
+    with clock.waiting():
+        with clock.waiting():
+            pass
+        inner = clock.now()
+    assert clock.now() >= inner > 0
+
+
+async def test_class_patches_and_disable(sim, base_world):
+    from src.classes.event import Event
+
+    event = Event(base_world.month_stamp, "天象变化")
+    with patch.object(Simulator, "_phase_update_celestial_phenomenon", return_value=[event]):
+        await sim.step()
+    assert sim.profiler.phases["update_celestial_phenomenon"].events == 1
+
+    sim.disable_profiling()
+    assert sim.profiler is None
+    assert "step" not in vars(sim)
+    assert not any(name.startswith("_phase_") for name in vars(sim))
+
+
+def test_disabled_by_config(base_world, monkeypatch):
+    from src.utils.config import CONFIG
+
+    monkeypatch.setattr(CONFIG.system, "step_profiling", False)
+    assert Simulator(base_world).profiler is None
+
+
+async def test_metrics_endpoint(sim, monkeypatch):
+    await sim.step()
+    monkeypatch.setitem(main.game_instance, "sim", sim)
+    client = TestClient(main.app)
+
+    text = client.get("/api/metrics")
+    assert text.headers["content-type"].startswith("text/plain")
+    assert 'cws_phase_seconds{phase="execute_actions",quantile="0.5"}' in text.text
+    assert "cws_step_seconds_count 1" in text.text
+    assert "cws_living_avatars 1" in text.text
+
+    data = client.get("/api/metrics", params={"format": "json"}).json()
+    assert data["enabled"] is True
+    assert data["step"]["count"] == 1
+
+    monkeypatch.setitem(main.game_instance, "sim", None)
+    assert client.get("/api/metrics", params={"format": "json"}).json()["enabled"] is False
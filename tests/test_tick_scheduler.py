@@ -0,0 +1,151 @@
+"""
+Tests for the game loop tick scheduler.
+
+Covers:
+- Deadline pacing: step time counts against the interval
+- skip / burst catch-up when a step overruns, and lag accounting
+- max speed, pause and live reconfiguration
+- /api/control/speed and the scheduler metrics
+- game_loop runs back to back in max speed mode
+"""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.server import main
+from src.server.tick_scheduler import TickScheduler
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def run_step(scheduler, clock, duration):
+    scheduler.begin_step()
+    clock.now += duration
+    scheduler.end_step()
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def test_step_time_counts_against_interval(clock):
+    scheduler = TickScheduler(months_per_second=2.0, clock=clock)
+    scheduler._next_due = clock.now
+
+    run_step(scheduler, clock, 0.2)
+    assert scheduler._next_due == pytest.approx(100.5)
+    assert scheduler.last_step_s == pytest.approx(0.2)
+    assert scheduler.skipped == 0
+
+
+def test_skip_drops_missed_ticks_and_starts_immediately(clock):
+    scheduler = TickScheduler(months_per_second=2.0, catch_up="skip", clock=clock)
+    scheduler._next_due = clock.now
+
+    run_step(scheduler, clock, 1.6)  # 错过 100.5 / 101.0 / 101.5 三个节拍
+    assert scheduler.skipped == 2
+    assert scheduler._next_due == pytest.approx(101.5)
+
+    scheduler.begin_step()
+    assert scheduler.last_lag == pytest.approx(0.1)
+    assert scheduler.max_lag == pytest.approx(0.1)
+
+
+def test_burst_keeps_limited_backlog(clock):
+    scheduler = TickScheduler(months_per_second=2.0, catch_up="burst", max_burst=2, clock=clock)
+    scheduler._next_due = clock.now
+
+    run_step(scheduler, clock, 3.1)  # 100.5 ~ 103.0 共 6 个节拍已过
+    assert scheduler.skipped == 3
+    assert scheduler._next_due == pytest.approx(102.0)
+
+    # 之后的快速步进逐个补跑积压的节拍，不再丢弃
+    for _ in range(3):
+        run_step(scheduler, clock, 0.01)
+    assert scheduler.skipped == 3
+    assert scheduler._next_due == pytest.approx(103.5)
+
+
+def test_invalid_configuration_changes_nothing():
+    scheduler = TickScheduler(months_per_second=2.0)
+    with pytest.raises(ValueError):
+        scheduler.configure(months_per_second=5.0, catch_up="rewind")
+    with pytest.raises(ValueError):
+        scheduler.configure(months_per_second=0)
+    assert scheduler.months_per_second == 2.0
+    assert scheduler.catch_up == "skip"
+
+
+async def test_max_speed_and_reconfigure_wakes_waiter():
+    scheduler = TickScheduler(months_per_second=0.01)
+    scheduler._next_due = scheduler._clock() + 100
+
+    waiter = asyncio.create_task(scheduler.wait())
+    await asyncio.sleep(0.01)
+    assert not waiter.done()
+    scheduler.configure(max_speed=True)
+    await asyncio.wait_for(waiter, timeout=1)
+
+    scheduler.begin_step()
+    scheduler.end_step()
+    await asyncio.wait_for(scheduler.wait(), timeout=0.1)
+
+
+async def test_pause_polls_then_starts_without_catch_up(monkeypatch):
+    monkeypatch.setattr("src.server.tick_scheduler.IDLE_POLL_SECONDS", 0.01)
+    scheduler = TickScheduler(months_per_second=1.0)
+    scheduler.pause()
+    assert scheduler.status()["running"] is False
+
+    await asyncio.wait_for(scheduler.wait(), timeout=1)
+    scheduler.begin_step()
+    assert scheduler.last_lag < 0.01
+    assert scheduler.status()["running"] is True
+
+
+def test_speed_api_and_metrics(monkeypatch):
+    monkeypatch.setattr(main, "tick_scheduler", TickScheduler())
+    monkeypatch.setitem(main.game_instance, "sim", None)
+    client = TestClient(main.app)
+
+    assert client.get("/api/control/speed").json()["months_per_second"] == 1.0
+    data = client.post("/api/control/speed", json={"months_per_second": 4, "catch_up": "burst"}).json()
+    assert data["months_per_second"] == 4.0
+    assert data["catch_up"] == "burst"
+    assert client.post("/api/control/speed", json={"months_per_second": -1}).status_code == 400
+
+    text = client.get("/api/metrics").text
+    assert "cws_tick_lag_seconds 0.0" in text
+    assert "cws_tick_target_months_per_second 4.0" in text
+
+
+async def test_game_loop_runs_back_to_back_at_max_speed(monkeypatch):
+    sim = MagicMock()
+    sim.step = AsyncMock(return_value=[])
+    monkeypatch.setattr(main, "tick_scheduler", TickScheduler(max_speed=True))
+    monkeypatch.setattr(main, "publish_tick", lambda world, events: None)
+    monkeypatch.setitem(main.game_instance, "init_status", "ready")
+    monkeypatch.setitem(main.game_instance, "is_paused", False)
+    monkeypatch.setitem(main.game_instance, "sim", sim)
+    monkeypatch.setitem(main.game_instance, "world", MagicMock())
+
+    loop_task = asyncio.create_task(main.game_loop())
+    try:
+        await asyncio.sleep(0.3)
+    finally:
+        loop_task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await loop_task
+
+    assert sim.step.await_count >= 5
+    assert main.tick_scheduler.steps == sim.step.await_count
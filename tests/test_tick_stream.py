@@ -0,0 +1,286 @@
+"""
+Tests for the delta tick protocol and per-client send queues.
+
+Covers:
+- TickStream only emits changed avatar / phenomenon / domain fields, with sequence numbers
+- Snapshots reproduce the sent state for any seq, world changes reset clients
+- A slow client does not hold up others; its backlog is dropped (legacy) or coalesced into a snapshot (delta)
+- /ws?protocol=delta sends a snapshot on connect and on resync
+- Viewport / follow subscriptions only receive visible avatars
+"""
+
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.server import main
+from src.server.tick_stream import MAX_VIEWPORT_SIDE, PROTOCOL_DELTA, PROTOCOL_LEGACY, ClientChannel, Subscription, TickStream
+
+
+def avatar_fields(avatar):
+    return {"name": avatar.name, "x": avatar.pos_x, "y": avatar.pos_y}
+
+
+@pytest.fixture
+def stream():
+    domains = [{"id": "d1", "is_open": False}]
+    s = TickStream(avatar_fields, lambda world: [dict(d) for d in domains], lambda p: {"id": p.id} if p else None)
+    s.domains = domains
+    return s
+
+
+@pytest.fixture
+def world(base_world, dummy_avatar):
+    base_world.avatar_manager.register_avatar(dummy_avatar)
+    return base_world
+
+
+class TestTickStream:
+
+    def test_only_changed_fields_are_sent(self, stream, world, dummy_avatar):
+        aid = str(dummy_avatar.id)
+        first = stream.encode(world, [])
+        assert first.seq == 1
+        assert first.message["reset"] is True
+        assert first.message["avatars"] == [{"id": aid, "name": "TestDummy", "x": 0, "y": 0}]
+        assert first.message["domains"] == [{"id": "d1", "is_open": False}]
+
+        second = stream.encode(world, [{"id": "e1"}])
+        assert second.seq == 2
+        assert second.message["avatars"] == []
+        assert second.message["events"] == [{"id": "e1"}]
+        assert "phenomenon" not in second.message
+        assert "domains" not in second.message
+
+        dummy_avatar.pos_x = 3
+        stream.domains[0]["is_open"] = True
+        world.current_phenomenon = SimpleNamespace(id=7)
+        third = stream.encode(world, [])
+        assert third.message["avatars"] == [{"id": aid, "x": 3}]
+        assert third.message["domains"] == [{"id": "d1", "is_open": True}]
+        assert third.message["phenomenon"] == {"id": 7}
+        assert json.loads(third.text) == third.message
+
+    def test_dead_avatars_and_removed_domains(self, stream, world, dummy_avatar):
+        stream.encode(world, [])
+        world.avatar_manager.remove_avatar(dummy_avatar.id)
+        stream.domains.clear()
+
+        frame = stream.encode(world, [])
+        assert frame.message["avatars"] == [{"id": str(dummy_avatar.id), "is_dead": True, "action": "已故"}]
+        assert frame.message["domains_removed"] == ["d1"]
+
+    def test_snapshot_matches_sent_state(self, stream, world, dummy_avatar):
+        stream.encode(world, [])
+        dummy_avatar.pos_y = 4
+        stream.encode(world, [])
+
+        snapshot = json.loads(stream.snapshot_text())
+        assert snapshot["type"] == "snapshot"
+        assert snapshot["seq"] == 2
+        assert snapshot["avatars"] == [{"id": str(dummy_avatar.id), "name": "TestDummy", "x": 0, "y": 4}]
+        assert snapshot["active_domains"] == [{"id": "d1", "is_open": False}]
+        assert stream.snapshot_text() is stream.snapshot_text()
+
+    def test_new_world_resets_state(self, stream, world, base_map):
+        from src.classes.core.world import World
+
+        stream.encode(world, [])
+        other = World(map=base_map, month_stamp=world.month_stamp)
+        frame = stream.encode(other, [])
+        assert frame.message["reset"] is True
+        assert frame.message["avatars"] == []
+        assert "reset" not in stream.encode(other, []).message
+
+
+class SlowSocket:
+    """send_text 在 release 之前一直阻塞"""
+
+    def __init__(self):
+        self.sent = []
+        self.gate = asyncio.Event()
+
+    async def send_text(self, text):
+        await self.gate.wait()
+        self.sent.append(text)
+
+
+class FastSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def send_text(self, text):
+        self.sent.append(text)
+
+
+class TestClientChannel:
+
+    async def test_slow_legacy_client_drops_oldest_ticks(self, stream):
+        slow, fast = SlowSocket(), FastSocket()
+        slow_channel = ClientChannel(slow, stream, PROTOCOL_LEGACY, max_pending_ticks=2)
+        fast_channel = ClientChannel(fast, stream, PROTOCOL_LEGACY, max_pending_ticks=2)
+        slow_channel.start()
+        fast_channel.start()
+        try:
+            slow_channel.send_tick("t0")
+            fast_channel.send_tick("t0")
+            await asyncio.sleep(0)
+            for text in ("t1", "t2", "t3"):
+                slow_channel.send_tick(text)
+                fast_channel.send_tick(text)
+                await asyncio.sleep(0)
+            slow_channel.send_control("toast")
+            await asyncio.sleep(0.01)
+            assert fast.sent == ["t0", "t1", "t2", "t3"]
+
+            slow.gate.set()
+            await asyncio.sleep(0.01)
+            # t0 已在发送中，t1 因积压被丢弃，控制消息保留
+            assert slow.sent == ["t0", "t2", "t3", "toast"]
+            assert slow_channel.dropped_ticks == 1
+        finally:
+            slow_channel.close()
+            fast_channel.close()
+
+    async def test_slow_delta_client_gets_snapshot_instead_of_backlog(self, stream, world):
+        slow = SlowSocket()
+        channel = ClientChannel(slow, stream, PROTOCOL_DELTA, max_pending_ticks=2)
+        channel.start()
+        try:
+            await asyncio.sleep(0)  # 连接时的快照（seq 0）进入发送
+            for _ in range(4):
+                channel.send_tick(stream.encode(world, []).text)
+            slow.gate.set()
+            await asyncio.sleep(0.01)
+
+            messages = [json.loads(t) for t in slow.sent]
+            assert [m["type"] for m in messages] == ["snapshot", "snapshot"]
+            assert messages[-1]["seq"] == stream.seq == 4
+            assert channel.dropped_ticks == 4
+            assert channel.pending == 0
+        finally:
+            channel.close()
+
+
+class TestDeltaWebSocket:
+
+    def test_snapshot_on_connect_and_resync(self, world, monkeypatch):
+        stream = TickStream(main.serialize_avatar_tick_fields, main.serialize_active_domains, main.serialize_phenomenon)
+        monkeypatch.setattr(main, "tick_stream", stream)
+        monkeypatch.setitem(main.game_instance, "llm_check_failed", False)
+        monkeypatch.setitem(main.game_instance, "is_paused", main.game_instance.get("is_paused"))
+        stream.encode(world, [])
+
+        client = TestClient(main.app)
+        with client.websocket_connect("/ws?protocol=delta") as ws:
+            snapshot = ws.receive_json()
+            assert snapshot["type"] == "snapshot"
+            assert snapshot["seq"] == 1
+            assert snapshot["avatars"][0]["name"] == "TestDummy"
+
+            ws.send_text(json.dumps({"type": "resync"}))
+            assert ws.receive_json()["type"] == "snapshot"
+
+
+class TestViewportSubscription:
+
+    @pytest.fixture
+    def crowd(self, base_world):
+        from tests.test_spatial_index import _make_avatar
+
+        avatars = {name: _make_avatar(base_world, name, x, y) for name, x, y in [("a", 0, 0), ("b", 5, 5), ("c", 9, 9)]}
+        for av in avatars.values():
+            base_world.avatar_manager.register_avatar(av)
+        return base_world, avatars
+
+    def test_parse_subscription(self):
+        sub = Subscription.from_message({"viewport": {"x": 2, "y": 3, "width": 4, "height": 2}, "follow": [7]})
+        assert sub.viewport == (2, 3, 5, 4)
+        assert sub.follow == frozenset({"7"})
+        assert Subscription.from_message({"viewport": None}) is None
+        with pytest.raises(ValueError):
+            Subscription.from_message({"viewport": {"x": 0, "y": 0, "width": 0, "height": 3}})
+
+    def test_huge_viewport_is_capped_and_clamped_to_map(self, crowd):
+        world, av = crowd
+        sub = Subscription.from_message({"viewport": {"x": 0, "y": 0, "width": 10_000_000, "height": 10_000_000}})
+        assert sub.viewport == (0, 0, MAX_VIEWPORT_SIDE - 1, MAX_VIEWPORT_SIDE - 1)
+        assert sub.resolve(world) == {str(a.id) for a in av.values()}
+
+        far = Subscription(viewport=(-10_000_000, -10_000_000, 10_000_000, 10_000_000))
+        assert far.resolve(world) == {str(a.id) for a in av.values()}
+        assert Subscription(viewport=(50, 50, 60, 60)).resolve(world) == set()
+
+    async def test_only_visible_avatars_are_sent(self, stream, crowd):
+        world, av = crowd
+        ids = {name: str(a.id) for name, a in av.items()}
+        sock = FastSocket()
+        channel = ClientChannel(sock, stream, PROTOCOL_DELTA)
+        channel.subscription = Subscription(viewport=(0, 0, 4, 4), follow=frozenset({ids["c"]}))
+        channel.start()
+        try:
+            await asyncio.sleep(0.01)  # 连接时的快照（尚无已下发状态）
+            channel.send_frame(stream.encode(world, []), world)
+            await asyncio.sleep(0.01)
+            first = json.loads(sock.sent[-1])
+            assert {u["id"] for u in first["avatars"]} == {ids["a"], ids["c"]}
+            assert first["avatars_left"] == []
+
+            av["a"].pos_x, av["a"].pos_y = 6, 6
+            av["b"].pos_x, av["b"].pos_y = 2, 2
+            av["c"].pos_x = 8
+            channel.send_frame(stream.encode(world, []), world)
+            await asyncio.sleep(0.01)
+            second = json.loads(sock.sent[-1])
+            # b 进入视口：全部字段；c 被关注：只有变化的 x；a 离开视口
+            assert sorted(second["avatars"], key=lambda u: u["name"] if "name" in u else "") == [
+                {"id": ids["c"], "x": 8},
+                {"id": ids["b"], "name": "b", "x": 2, "y": 2},
+            ]
+            assert second["avatars_left"] == [ids["a"]]
+
+            world.avatar_manager.remove_avatar(av["b"].id)
+            channel.send_frame(stream.encode(world, []), world)
+            await asyncio.sleep(0.01)
+            third = json.loads(sock.sent[-1])
+            assert third["avatars"] == [{"id": ids["b"], "is_dead": True, "action": "已故"}]
+            assert third["avatars_left"] == []
+        finally:
+            channel.close()
+
+    async def test_subscribe_sends_filtered_snapshot(self, stream, crowd):
+        world, av = crowd
+        stream.encode(world, [])
+        sock = FastSocket()
+        channel = ClientChannel(sock, stream, PROTOCOL_DELTA)
+        channel.start()
+        try:
+            await asyncio.sleep(0.01)
+            assert len(json.loads(sock.sent[-1])["avatars"]) == 3
+
+            channel.subscribe(Subscription(viewport=(4, 4, 9, 9)))
+            await asyncio.sleep(0.01)
+            snapshot = json.loads(sock.sent[-1])
+            assert snapshot["type"] == "snapshot"
+            assert {u["name"] for u in snapshot["avatars"]} == {"b", "c"}
+            assert channel.visible == {str(av["b"].id), str(av["c"].id)}
+        finally:
+            channel.close()
+
+    def test_subscribe_over_websocket(self, world, monkeypatch, dummy_avatar):
+        stream = TickStream(main.serialize_avatar_tick_fields, main.serialize_active_domains, main.serialize_phenomenon)
+        monkeypatch.setattr(main, "tick_stream", stream)
+        monkeypatch.setitem(main.game_instance, "llm_check_failed", False)
+        monkeypatch.setitem(main.game_instance, "is_paused", main.game_instance.get("is_paused"))
+        stream.encode(world, [])
+
+        client = TestClient(main.app)
+        with client.websocket_connect("/ws?protocol=delta") as ws:
+            assert len(ws.receive_json()["avatars"]) == 1
+            ws.send_text(json.dumps({"type": "subscribe", "viewport": {"x": 5, "y": 5, "width": 3, "height": 3}}))
+            assert ws.receive_json()["avatars"] == []
+            ws.send_text(json.dumps({"type": "subscribe", "follow": [str(dummy_avatar.id)]}))
+            assert ws.receive_json()["avatars"][0]["id"] == str(dummy_avatar.id)
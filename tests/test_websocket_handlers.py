@@ -237,6 +237,27 @@ class TestWebSocketEndpoint:
             data = json.loads(response)
             assert data["type"] == "pong"
 
+    def test_control_replies_go_through_client_channel(self, client, reset_game_instance):
+        """pong and llm_config_required are queued on the connection's channel, its only writer."""
+        from src.server.tick_stream import ClientChannel
+
+        game_instance["llm_check_failed"] = True
+        game_instance["llm_error_message"] = "API key invalid"
+        queued = []
+        original = ClientChannel.send_control
+
+        def spy(channel, text):
+            queued.append(json.loads(text)["type"])
+            return original(channel, text)
+
+        with patch.object(ClientChannel, "send_control", spy):
+            with client.websocket_connect("/ws") as ws:
+                assert json.loads(ws.receive_text())["type"] == "llm_config_required"
+                ws.send_text("ping")
+                assert json.loads(ws.receive_text()) == {"type": "pong"}
+
+        assert queued == ["llm_config_required", "pong"]
+
     def test_websocket_multiple_pings(self, client, reset_game_instance):
         """Test WebSocket handles multiple ping messages."""
         with client.websocket_connect("/ws") as ws:
@@ -417,17 +438,16 @@ class TestMapAPI:
 
     def test_map_returns_data(self, client, reset_game_instance):
         """Test /api/map returns map data."""
-        mock_tile = MagicMock()
-        mock_tile.type.name = "PLAIN"
+        from src.classes.environment.map import Map
+        from src.classes.environment.tile import TileType
 
-        mock_map = MagicMock()
-        mock_map.width = 10
-        mock_map.height = 10
-        mock_map.get_tile.return_value = mock_tile
-        mock_map.regions = {}
+        game_map = Map(10, 10)
+        for x in range(10):
+            for y in range(10):
+                game_map.create_tile(x, y, TileType.PLAIN)
 
         mock_world = MagicMock()
-        mock_world.map = mock_map
+        mock_world.map = game_map
 
         game_instance["world"] = mock_world
 
@@ -0,0 +1,88 @@
+"""
+批量模拟吞吐基准：不经过服务端，按不同角色数构造世界并尽快推进若干个月（见 src/sim/headless.py）。
+
+输出每档的 月/秒、最慢月耗时、事件速率与耗时最多的阶段；--report 写出 JSON 报告，
+--baseline 与之前的报告比较，月/秒下降超过 --max-regression 时以非零状态退出。
+
+用法：
+    python tools/benchmark/bench_batch.py --avatars 100 1000 5000 --months 12 --report bench_batch.json
+    python tools/benchmark/bench_batch.py --avatars 1000 --ai rule   # 规则策略决策
+    python tools/benchmark/bench_batch.py --avatars 100 --ai llm --recording recordings/batch.jsonl   # 录制
+    python tools/benchmark/bench_batch.py --avatars 100 --ai recorded --recording recordings/batch.jsonl
+    python tools/benchmark/bench_batch.py --avatars 200 --months 36 --stub-latency 0.3 --pipelined   # 评估流水线决策
+"""
+import argparse
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+import common  # noqa: F401  # 把项目根目录加入 sys.path
+
+from src.sim.headless import AI_MODES, build_headless_world, make_ai_backend, run_batch
+
+
+def check_regressions(reports: list[dict], baseline_path: Path, max_regression: float) -> list[str]:
+    """按角色数与 baseline 对比 months_per_sec，返回超出容忍度的描述"""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = {r["avatars"]: r for r in json.load(f)["runs"]}
+    problems = []
+    for report in reports:
+        base = baseline.get(report["avatars"])
+        if base is None or base["months_per_sec"] <= 0:
+            continue
+        ratio = report["months_per_sec"] / base["months_per_sec"]
+        if ratio < 1 - max_regression:
+            problems.append(
+                f"{report['avatars']} avatars: {report['months_per_sec']:.2f} months/s "
+                f"vs baseline {base['months_per_sec']:.2f} ({(1 - ratio) * 100:.0f}% slower)"
+            )
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--avatars", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--months", type=int, default=12)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--ai", choices=AI_MODES, default="stub")
+    parser.add_argument("--recording", type=Path, help="recorded 模式的回放文件 / llm 模式的录制输出")
+    parser.add_argument("--stub-latency", type=float, default=0.0, help="stub 模式下每次决策模拟的 LLM 往返秒数")
+    parser.add_argument("--pipelined", action=argparse.BooleanOptionalAction, default=None, help="流水线决策（默认沿用配置）")
+    parser.add_argument("--top-phases", type=int, default=3)
+    parser.add_argument("--report", type=Path, help="写出 JSON 报告")
+    parser.add_argument("--baseline", type=Path, help="用于回归比较的旧报告")
+    parser.add_argument("--max-regression", type=float, default=0.2)
+    args = parser.parse_args()
+
+    reports = []
+    print(f"{'avatars':>8} | {'months/s':>9} | {'slowest s':>9} | {'living':>11} | {'events/m':>9} | top phases")
+    for count in args.avatars:
+        world = build_headless_world(count, seed=args.seed)
+        ai, responder = make_ai_backend(args.ai, args.recording, seed=args.seed, stub_latency=args.stub_latency)
+        report = asyncio.run(run_batch(world, args.months, ai, responder, label=args.ai, pipelined=args.pipelined)).to_dict()
+        reports.append(report)
+        top = ", ".join(f"{name} {sec:.2f}s" for name, sec in list(report["phase_seconds"].items())[:args.top_phases])
+        print(
+            f"{count:>8} | {report['months_per_sec']:>9.2f} | {report['slowest_month_s']:>9.2f} | "
+            f"{report['living_start']:>5}->{report['living_end']:<5} | {report['events_per_month']:>9.1f} | {top}"
+        )
+        if report["decision_pipeline"]:
+            stats = report["decision_pipeline"]
+            print(f"{'':>8}   pipeline: hit {stats['hit_ratio']:.0%}, waste {stats['waste_ratio']:.0%}, waited {stats['waited']}")
+
+    if args.report:
+        args.report.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump({"ai": args.ai, "months": args.months, "seed": args.seed, "runs": reports}, f, ensure_ascii=False, indent=2)
+
+    if args.baseline:
+        problems = check_regressions(reports, args.baseline, args.max_regression)
+        for problem in problems:
+            print(f"[regression] {problem}")
+        if problems:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
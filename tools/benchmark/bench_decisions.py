@@ -0,0 +1,65 @@
+"""
+决策请求基准：统计一个模拟月内 LLMAI 为全部角色决策所需的请求数与提示词 token 数（不联网）。
+
+LLM 调用被替换为本地桩：按真实模板渲染提示词、估算 token 数，并为提示词中的全部角色返回决策。
+token 为粗略估算：每个非 ASCII 字符计 1 个，每 4 个 ASCII 字符计 1 个。
+
+用法：
+    python tools/benchmark/bench_decisions.py --avatars 200 --batch-sizes 1 2 4 8
+"""
+import argparse
+import asyncio
+from unittest.mock import patch
+
+from common import build_world, timer
+
+from src.classes.ai import LLMAI
+from src.utils.config import CONFIG
+from src.utils.llm.prompt import build_prompt, load_template
+
+
+def estimate_tokens(text: str) -> int:
+    non_ascii = sum(1 for ch in text if ord(ch) > 127)
+    return non_ascii + (len(text) - non_ascii + 3) // 4
+
+
+def run(world, batch_size: int) -> dict:
+    stats = {"requests": 0, "tokens": 0}
+
+    async def fake_llm(task_name, template_path, infos):
+        prompt = build_prompt(load_template(template_path), infos)
+        stats["requests"] += 1
+        stats["tokens"] += estimate_tokens(prompt)
+        names = list(infos["avatar_infos"]) if "avatar_infos" in infos else [infos["avatar_name"]]
+        return {
+            name: {"action_name_params_pairs": [["Cultivate", {}]], "current_emotion": "emotion_calm"}
+            for name in names
+        }
+
+    avatars = list(world.avatar_manager.avatars.values())
+    with patch.object(CONFIG.ai, "decision_batch_size", batch_size), \
+         patch("src.classes.ai.call_llm_with_task_name", side_effect=fake_llm):
+        with timer(stats, "elapsed_s"):
+            results = asyncio.run(LLMAI()._decide(world, avatars))
+    stats["decided"] = len(results)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--avatars", type=int, default=200)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    world = build_world(args.avatars)
+    print(f"{'batch size':>10} | {'requests':>8} | {'tokens':>10} | {'tokens/avatar':>13} | {'decided':>7}")
+    for batch_size in args.batch_sizes:
+        res = run(world, batch_size)
+        print(
+            f"{batch_size:>10} | {res['requests']:>8} | {res['tokens']:>10} | "
+            f"{res['tokens'] / args.avatars:>13.0f} | {res['decided']:>7}"
+        )
+
+
+if __name__ == "__main__":
+    main()
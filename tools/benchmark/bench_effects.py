@@ -0,0 +1,53 @@
+"""
+Avatar.effects 基准：对比冷启动（每次都重新合并）与缓存命中的效果解析耗时。
+
+用法：
+    python tools/benchmark/bench_effects.py --avatars 300 --reads 55
+"""
+import argparse
+
+from common import build_world, timer
+
+
+def run(avatar_count: int, reads_per_avatar: int) -> dict:
+    world = build_world(avatar_count)
+    avatars = list(world.avatar_manager.avatars.values())
+    result: dict = {"avatars": len(avatars), "reads_per_avatar": reads_per_avatar}
+
+    # 冷：每次读取前都使缓存失效，等价于旧的逐次重建
+    with timer(result, "cold_s"):
+        for av in avatars:
+            for _ in range(reads_per_avatar):
+                av.invalidate_effects()
+                _ = av.effects
+
+    # 热：每月首读重建一次，其余命中缓存
+    for av in avatars:
+        av.invalidate_effects()
+    with timer(result, "cached_s"):
+        for av in avatars:
+            for _ in range(reads_per_avatar):
+                _ = av.effects
+
+    total_reads = len(avatars) * reads_per_avatar
+    result["cold_us_per_read"] = result["cold_s"] / total_reads * 1e6
+    result["cached_us_per_read"] = result["cached_s"] / total_reads * 1e6
+    result["speedup"] = result["cold_s"] / max(result["cached_s"], 1e-9)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--avatars", type=int, default=300)
+    parser.add_argument("--reads", type=int, default=55, help="每个角色每月读取 effects 的次数")
+    args = parser.parse_args()
+
+    res = run(args.avatars, args.reads)
+    print(f"avatars={res['avatars']} reads/avatar={res['reads_per_avatar']}")
+    print(f"  cold   : {res['cold_s']:.3f}s ({res['cold_us_per_read']:.1f} us/read)")
+    print(f"  cached : {res['cached_s']:.3f}s ({res['cached_us_per_read']:.1f} us/read)")
+    print(f"  speedup: x{res['speedup']:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+事件读取基准：模拟每月为 N 个决策角色构建 prompt 时的记忆查询，统计每页 SQL 语句数与耗时。
+
+每个角色依次读取 get_major_events_by_avatar、get_minor_events_by_avatar 和一页 get_events。
+每页语句数应为常数 1（不随页大小增长）。
+另外统计经 EventManager 角色记忆缓存读取大事/小事时（缓存已预热）每个角色的耗时。
+
+用法：
+    python tools/benchmark/bench_event_reads.py --events 100000 --avatars 200 --page-sizes 10 50 100
+"""
+import argparse
+import tempfile
+from pathlib import Path
+
+from common import make_events, timer
+
+from src.classes.event_storage import EventStorage
+from src.sim.managers.event_manager import EventManager
+
+
+def run(storage: EventStorage, avatar_ids: list[str], page_size: int) -> dict:
+    statements: list[str] = []
+    storage._conn.set_trace_callback(statements.append)
+    result: dict = {"pages": 0}
+    try:
+        with timer(result, "elapsed_s"):
+            for avatar_id in avatar_ids:
+                storage.get_major_events_by_avatar(avatar_id, limit=page_size)
+                storage.get_minor_events_by_avatar(avatar_id, limit=page_size)
+                storage.get_events(avatar_id=avatar_id, limit=page_size)
+                result["pages"] += 3
+    finally:
+        storage._conn.set_trace_callback(None)
+    result["statements"] = len(statements)
+    return result
+
+
+def run_cached(manager: EventManager, avatar_ids: list[str], page_size: int) -> float:
+    """返回经角色记忆缓存读取大事+小事的总耗时（秒）；第一遍用于预热。"""
+    result: dict = {}
+    for _ in range(2):
+        with timer(result, "elapsed_s"):
+            for avatar_id in avatar_ids:
+                manager.get_major_events_by_avatar(avatar_id, limit=page_size)
+                manager.get_minor_events_by_avatar(avatar_id, limit=page_size)
+    return result["elapsed_s"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--events", type=int, default=100_000)
+    parser.add_argument("--avatars", type=int, default=200, help="每月决策的角色数")
+    parser.add_argument("--page-sizes", type=int, nargs="+", default=[10, 50, 100])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        storage = EventStorage(Path(tmp) / "reads.db")
+        storage.add_events(make_events(args.events, per_month=200))
+        avatar_ids = [f"avatar_{i}" for i in range(args.avatars)]
+
+        manager = EventManager(storage)
+
+        print(f"{'page size':>9} | {'queries/page':>12} | {'ms/avatar':>10} | {'cached ms/avatar':>16}")
+        for page_size in args.page_sizes:
+            res = run(storage, avatar_ids, page_size)
+            cached = run_cached(manager, avatar_ids, page_size)
+            print(
+                f"{page_size:>9} | {res['statements'] / res['pages']:>12.2f} | "
+                f"{res['elapsed_s'] / len(avatar_ids) * 1e3:>10.2f} | "
+                f"{cached / len(avatar_ids) * 1e3:>16.3f}"
+            )
+        manager.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+事件写入吞吐基准：对比逐条 add_event（每条一次提交）与按月批量 add_events（每月一次提交）。
+
+用法：
+    python tools/benchmark/bench_event_writes.py --sizes 10000 100000 1000000 --per-month 200
+逐条写入在大规模下很慢，可用 --single-max 限制参与逐条测试的最大规模。
+"""
+import argparse
+import tempfile
+from pathlib import Path
+
+from common import make_events, timer
+
+from src.classes.event_storage import EventStorage
+
+
+def run(n: int, per_month: int, single: bool) -> dict:
+    events = make_events(n, per_month)
+    result: dict = {"events": n}
+    with tempfile.TemporaryDirectory() as tmp:
+        if single:
+            storage = EventStorage(Path(tmp) / "single.db")
+            with timer(result, "single_s"):
+                for e in events:
+                    storage.add_event(e)
+            storage.close()
+
+        storage = EventStorage(Path(tmp) / "batch.db")
+        with timer(result, "batch_s"):
+            for start in range(0, n, per_month):
+                storage.add_events(events[start:start + per_month])
+        assert storage.count() == n
+        storage.close()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--per-month", type=int, default=200, help="每个月步进产生的事件数（批大小）")
+    parser.add_argument("--single-max", type=int, default=100_000, help="超过此规模时跳过逐条写入")
+    args = parser.parse_args()
+
+    print(f"{'events':>10} | {'add_event ev/s':>15} | {'add_events ev/s':>15}")
+    for n in args.sizes:
+        res = run(n, args.per_month, single=n <= args.single_max)
+        single = f"{n / res['single_s']:>15,.0f}" if "single_s" in res else f"{'skipped':>15}"
+        print(f"{n:>10} | {single} | {n / res['batch_s']:>15,.0f}")
+
+
+if __name__ == "__main__":
+    main()
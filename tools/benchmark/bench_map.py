@@ -0,0 +1,57 @@
+"""
+随机地图基准：不同尺寸下生成布局、构造 Map 以及从布局缓存重建的耗时，以及构造出的 Map 占用的内存。
+
+用法：
+    python tools/benchmark/bench_map.py --sizes 160x100 400x250 800x500 --seed 20250103
+"""
+import argparse
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+from common import timer
+
+from src.classes.core.sect import sects_by_id
+from src.run.map_cache import load_or_generate_map
+from src.run.map_generator import build_map, generate_map_layout
+
+
+def run(width: int, height: int, seed: int, sect_count: int) -> dict:
+    sects = list(sects_by_id.values())[:sect_count]
+    result: dict = {}
+    with timer(result, "layout_s"):
+        layout = generate_map_layout(width, height, seed, sects)
+    with timer(result, "build_s"):
+        build_map(layout, sects)
+    tracemalloc.start()
+    game_map = build_map(layout, sects)
+    result["map_mb"] = tracemalloc.get_traced_memory()[0] / 1024 / 1024
+    tracemalloc.stop()
+    del game_map
+    with tempfile.TemporaryDirectory() as tmp:
+        load_or_generate_map(width, height, seed, sects, cache_dir=Path(tmp))
+        with timer(result, "cached_s"):
+            _, hit = load_or_generate_map(width, height, seed, sects, cache_dir=Path(tmp))
+    assert hit
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", nargs="+", default=["160x100", "400x250", "800x500"])
+    parser.add_argument("--seed", type=int, default=20250103)
+    parser.add_argument("--sects", type=int, default=5)
+    args = parser.parse_args()
+
+    rows = []
+    for size in args.sizes:
+        width, height = (int(v) for v in size.lower().split("x"))
+        rows.append((size, run(width, height, args.seed, args.sects)))
+
+    print(f"{'size':>9} | {'layout ms':>10} | {'build ms':>10} | {'cached ms':>10} | {'map MB':>8}")
+    for size, res in rows:
+        print(f"{size:>9} | {res['layout_s'] * 1000:>10.1f} | {res['build_s'] * 1000:>10.1f} | {res['cached_s'] * 1000:>10.1f} | {res['map_mb']:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
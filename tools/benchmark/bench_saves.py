@@ -0,0 +1,62 @@
+"""
+存档基准：比较 JSON 存档与二进制分块存档（.sav）的保存/读档耗时与文件大小。
+
+依次测量：JSON 保存、JSON 读档、二进制全量保存、二进制增量保存（改动 --changed 个角色）、二进制读档。
+
+用法：
+    python tools/benchmark/bench_saves.py --avatars 2000 --changed 50
+"""
+import argparse
+import tempfile
+from pathlib import Path
+
+from common import build_world
+
+from src.sim.load.load_game import load_game
+from src.sim.save.save_game import save_game
+from src.sim.simulator import Simulator
+
+
+def _save(world, path: Path) -> dict:
+    success, _ = save_game(world, Simulator(world), [], save_path=path)
+    assert success
+    return world._save_stats
+
+
+def _load(path: Path) -> dict:
+    world, _, _ = load_game(path)
+    world.event_manager.close()
+    return world._load_stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--avatars", type=int, default=2000)
+    parser.add_argument("--changed", type=int, default=50, help="增量保存前修改的角色数")
+    args = parser.parse_args()
+
+    world = build_world(args.avatars)
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        json_path, first_path, second_path = tmp / "game.json", tmp / "first.sav", tmp / "second.sav"
+
+        rows.append(("json save", _save(world, json_path)["total_ms"], json_path.stat().st_size, ""))
+        rows.append(("json load", _load(json_path)["total_ms"], json_path.stat().st_size, ""))
+
+        stats = _save(world, first_path)
+        rows.append(("binary save (full)", stats["total_ms"], first_path.stat().st_size, stats["avatars_written"]))
+
+        for avatar in list(world.avatar_manager.avatars.values())[:args.changed]:
+            avatar.magic_stone.value += 1
+        stats = _save(world, second_path)
+        rows.append(("binary save (delta)", stats["total_ms"], second_path.stat().st_size, stats["avatars_written"]))
+        rows.append(("binary load", _load(second_path)["total_ms"], second_path.stat().st_size, ""))
+
+    print(f"{'step':<20} | {'ms':>9} | {'size KB':>9} | {'avatars written':>15}")
+    for name, ms, size, written in rows:
+        print(f"{name:<20} | {ms:>9.1f} | {size / 1024:>9.1f} | {written!s:>15}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+空间索引基准：对比线性扫描与网格/区域索引的邻近查询耗时。
+
+用法：
+    python tools/benchmark/bench_spatial.py --sizes 100 1000 10000 --queries 200
+"""
+import argparse
+import random
+
+from common import build_world, timer
+
+from src.classes.observe import get_observable_avatars
+
+
+def _linear_same_region(avatar, avatars):
+    region = avatar.tile.region if avatar.tile else None
+    if region is None:
+        return []
+    return [o for o in avatars if o is not avatar and o.tile is not None and o.tile.region == region]
+
+
+def run(avatar_count: int, queries: int) -> dict:
+    world = build_world(avatar_count)
+    manager = world.avatar_manager
+    avatars = list(manager.avatars.values())
+    sample = random.Random(0).sample(avatars, min(queries, len(avatars)))
+    result: dict = {"avatars": len(avatars), "queries": len(sample)}
+
+    # 预热效果缓存，避免把感知半径的计算算进扫描耗时
+    for av in avatars:
+        _ = av.effects
+
+    with timer(result, "linear_observe_s"):
+        for av in sample:
+            get_observable_avatars(av, avatars)
+    with timer(result, "indexed_observe_s"):
+        for av in sample:
+            manager.get_observable_avatars(av)
+    with timer(result, "linear_region_s"):
+        for av in sample:
+            _linear_same_region(av, avatars)
+    with timer(result, "indexed_region_s"):
+        for av in sample:
+            manager.get_avatars_in_same_region(av)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'avatars':>8} | {'observe linear':>15} {'indexed':>10} | {'region linear':>15} {'indexed':>10}  (us/query)")
+    for n in args.sizes:
+        res = run(n, args.queries)
+        q = res["queries"]
+        print(
+            f"{res['avatars']:>8} | "
+            f"{res['linear_observe_s'] / q * 1e6:>15.1f} {res['indexed_observe_s'] / q * 1e6:>10.1f} | "
+            f"{res['linear_region_s'] / q * 1e6:>15.1f} {res['indexed_region_s'] / q * 1e6:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+tick 广播基准：每月随机移动一部分角色后，比较增量帧（全量订阅 / 视口订阅）的编码耗时与消息大小。
+
+用法：
+    python tools/benchmark/bench_ticks.py --avatars 100 1000 5000 --months 12 --viewport 40x25
+"""
+import argparse
+import random
+
+from common import build_world, timer
+
+from src.server.main import serialize_active_domains, serialize_avatar_tick_fields, serialize_phenomenon
+from src.server.tick_stream import Subscription, TickStream
+
+
+def run(avatar_count: int, months: int, viewport: tuple[int, int], move_ratio: float) -> dict:
+    world = build_world(avatar_count)
+    stream = TickStream(serialize_avatar_tick_fields, serialize_active_domains, serialize_phenomenon)
+    avatars = world.avatar_manager.get_living_avatars()
+    w, h = world.map.width, world.map.height
+    vw, vh = viewport
+    subscription = Subscription(viewport=((w - vw) // 2, (h - vh) // 2, (w + vw) // 2 - 1, (h + vh) // 2 - 1))
+    rng = random.Random(0)
+
+    stream.encode(world, [])
+    visible = set()
+    result = {"encode_s": 0.0, "filter_s": 0.0, "full_bytes": 0, "viewport_bytes": 0}
+    for _ in range(months):
+        for avatar in rng.sample(avatars, int(len(avatars) * move_ratio)):
+            avatar.pos_x = min(w - 1, max(0, avatar.pos_x + rng.choice((-1, 1))))
+            avatar.pos_y = min(h - 1, max(0, avatar.pos_y + rng.choice((-1, 1))))
+        part: dict = {}
+        with timer(part, "encode"):
+            frame = stream.encode(world, [])
+            text = frame.text
+        with timer(part, "filter"):
+            now = subscription.resolve(world)
+            viewport_text = stream.filter_frame(frame, visible, now)
+            visible = now
+        result["encode_s"] += part["encode"]
+        result["filter_s"] += part["filter"]
+        result["full_bytes"] += len(text.encode("utf-8"))
+        result["viewport_bytes"] += len(viewport_text.encode("utf-8"))
+    return {k: v / months for k, v in result.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--avatars", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--months", type=int, default=12)
+    parser.add_argument("--viewport", default="40x25")
+    parser.add_argument("--move-ratio", type=float, default=0.3)
+    args = parser.parse_args()
+    viewport = tuple(int(v) for v in args.viewport.lower().split("x"))
+
+    print(f"{'avatars':>8} | {'encode ms':>10} | {'full KB':>9} | {'filter ms':>10} | {'viewport KB':>12}")
+    for count in args.avatars:
+        res = run(count, args.months, viewport, args.move_ratio)
+        print(
+            f"{count:>8} | {res['encode_s'] * 1000:>10.2f} | {res['full_bytes'] / 1024:>9.1f} | "
+            f"{res['filter_s'] * 1000:>10.2f} | {res['viewport_bytes'] / 1024:>12.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
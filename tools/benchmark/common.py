@@ -0,0 +1,54 @@
+"""
+基准测试公共工具：构造带指定数量角色的离线世界（不依赖 LLM / 网络）。
+"""
+import random
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+# Add project root to python path to ensure imports work
+project_root = Path(__file__).resolve().parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.append(str(project_root))
+
+from src.classes.core.world import World
+from src.classes.event import Event
+from src.run.load_map import load_cultivation_world_map
+from src.sim.avatar_init import make_avatars
+from src.systems.time import Month, MonthStamp, Year, create_month_stamp
+
+
+def build_world(avatar_count: int, seed: int = 42) -> World:
+    """加载默认地图并随机生成 avatar_count 个角色（事件存于内存）。"""
+    random.seed(seed)
+    game_map = load_cultivation_world_map()
+    world = World(map=game_map, month_stamp=create_month_stamp(Year(100), Month.JANUARY))
+    avatars = make_avatars(world, count=avatar_count, current_month_stamp=world.month_stamp)
+    world.avatar_manager.avatars.update(avatars)
+    return world
+
+
+def make_events(n: int, per_month: int, avatar_pool: int = 500) -> list[Event]:
+    """生成 n 条事件：每月 per_month 条，每条关联 1~3 个来自 avatar_pool 的角色。"""
+    rng = random.Random(0)
+    ids = [f"avatar_{i}" for i in range(avatar_pool)]
+    return [
+        Event(
+            month_stamp=MonthStamp(1200 + i // per_month),
+            content=f"事件 {i}",
+            related_avatars=rng.sample(ids, rng.randint(1, 3)),
+            is_major=(i % 10 == 0),
+        )
+        for i in range(n)
+    ]
+
+
+@contextmanager
+def timer(result: dict, key: str):
+    """把 with 块耗时（秒）写入 result[key]。"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        result[key] = time.perf_counter() - start